@@ -144,9 +144,10 @@ def simple_add_hydrogens(session, structures, *, unknowns_info={}, in_isolation=
     _make_shared_data(session, structures, in_isolation)
     from chimerax.atomic import Atom
     invert_xforms = {}
-    for atom in atoms:
-        if atom not in type_info_for_atom:
-            continue
+    atoms = [atom for atom in atoms if atom in type_info_for_atom]
+    # find the atoms near each atom to protonate in one search
+    atoms_nearby = nearby_atoms(_addh_coords(atoms), 3.5)
+    for atom, nearby in zip(atoms, atoms_nearby):
         bonding_info = type_info_for_atom[atom]
         if Atom._addh_coord == Atom.coord:
             invert = None
@@ -158,7 +159,7 @@ def simple_add_hydrogens(session, structures, *, unknowns_info={}, in_isolation=
 
         add_hydrogens(atom, bonding_info, (naming_schemas[atom.residue],
             naming_schemas[atom.structure]), hydrogen_totals[atom],
-            idatm_type, invert, coordinations.get(atom, []))
+            idatm_type, invert, coordinations.get(atom, []), nearby=nearby)
     post_add(session, fake_N, fake_C, fake_5p, fake_3p)
     _delete_shared_data()
 
@@ -386,7 +387,7 @@ _tree_dist = 3.25
 h_rad = 1.0
 def _make_shared_data(session, protonation_models, in_isolation):
     from chimerax.geometry import distance_squared
-    from chimerax.atom_search import AtomSearchTree
+    from chimerax.atom_search import AtomSearchTree, CachedAtomSearchTree
     # since adaptive search tree is static, it will not include
     # hydrogens added after this; they will have to be found by
     # looking off their heavy atoms
@@ -426,7 +427,7 @@ def _make_shared_data(session, protonation_models, in_isolation):
                 metal_atoms.append(a)
     from chimerax.atomic import Atom
     use_scene_coords = Atom._addh_coord == Atom.scene_coord
-    search_tree = AtomSearchTree(search_atoms, sep_val=_tree_dist, scene_coords=use_scene_coords)
+    search_tree = CachedAtomSearchTree(search_atoms, sep_val=_tree_dist, scene_coords=use_scene_coords)
     _metals = AtomSearchTree(metal_atoms, sep_val=max(_metal_dist, 1.0), scene_coords=use_scene_coords)
     from weakref import WeakKeyDictionary
     _h_coloring = WeakKeyDictionary()
@@ -731,8 +732,21 @@ def _prep_add(session, structures, unknowns_info, template, need_all=False, **pr
     return atoms, type_info_for_atom, naming_schemas, idatm_type, \
             hydrogen_totals, his_Ns, coordinations, fake_N, fake_C, fake_5p, fake_3p
 
-def find_nearest(pos, atom, exclude, check_dist, avoid_metal_info=None):
-    nearby = search_tree.search(pos, check_dist)
+def _addh_coords(atoms):
+    from chimerax.atomic import Atom, Atoms
+    atoms = Atoms(atoms)
+    return atoms.scene_coords if Atom._addh_coord == Atom.scene_coord else atoms.coords
+
+def nearby_atoms(positions, check_dist):
+    '''For each position, return the atoms in the search tree within check_dist of it'''
+    offsets, indices = search_tree.search_many(positions, check_dist)
+    tree_atoms = search_tree.atoms
+    return [tree_atoms[indices[start:end]] for start, end in zip(offsets[:-1], offsets[1:])]
+
+def find_nearest(pos, atom, exclude, check_dist, avoid_metal_info=None, nearby=None):
+    # 'nearby' is the result of searching the tree with 'pos' and 'check_dist', if already known
+    if nearby is None:
+        nearby = search_tree.search(pos, check_dist)
     near_pos = n = near_atom = None
     exclude_pos = set([tuple(ex._addh_coord) for ex in exclude])
     exclude_pos.add(tuple(atom._addh_coord))
@@ -836,6 +850,7 @@ def find_rotamer_nearest(at_pos, idatm_type, atom, neighbor, check_dist):
 
 def roomiest(positions, attached, check_dist, atom_type_info):
     pos_info =[]
+    positions_nearby = nearby_atoms(positions, check_dist)
     for i in range(len(positions)):
         pos = positions[i]
         if isinstance(attached, list):
@@ -848,7 +863,8 @@ def roomiest(positions, attached, check_dist, atom_type_info):
             info = atom_type_info(atom)
         else:
             info = atom_type_info
-        near_pos, nearest, near_a = find_nearest(pos, atom, [], check_dist, avoid_metal_info=info)
+        near_pos, nearest, near_a = find_nearest(pos, atom, [], check_dist, avoid_metal_info=info,
+            nearby=positions_nearby[i])
         if nearest is None:
             nearest = check_dist
         pos_info.append((nearest, val))
@@ -40,7 +40,8 @@ def add_hydrogens(atom, *args, **kw):
     _alt_loc_add_hydrogens(atom, alt_loc_atom, *args, **kw)
 
 def _alt_loc_add_hydrogens(atom, alt_loc_atom, bonding_info, naming_schema, total_hydrogens,
-        idatm_type, invert, coordinations):
+        idatm_type, invert, coordinations, nearby=None):
+    # 'nearby' holds the atoms near the current position of 'atom', if already known
     from .cmd import find_nearest, roomiest, find_rotamer_nearest, add_altloc_hyds
     from .util import bond_with_H_length
     away = away2 = planar = None
@@ -75,8 +76,10 @@ def _alt_loc_add_hydrogens(atom, alt_loc_atom, bonding_info, naming_schema, tota
                 grand_bonded.remove(atom)
                 if len(grand_bonded) < 3:
                     planar = [a._addh_coord for a in grand_bonded]
+        if alt_loc_atom is not None:
+            nearby = None
         if geom == 4 and atom.num_bonds == 0:
-            away, d, natom = find_nearest(at_pos, atom, exclude, 3.5)
+            away, d, natom = find_nearest(at_pos, atom, exclude, 3.5, nearby=nearby)
             if away is not None:
                 away2, d2, natom2 = find_rotamer_nearest(at_pos, idatm_type[atom],
                     atom, natom, 3.5)
@@ -84,7 +87,7 @@ def _alt_loc_add_hydrogens(atom, alt_loc_atom, bonding_info, naming_schema, tota
             away, d, natom = find_rotamer_nearest(at_pos,
                     idatm_type[atom], atom, (list(atom.neighbors)+coordinations)[0], 3.5)
         else:
-            away, d, natom = find_nearest(at_pos, atom, exclude, 3.5)
+            away, d, natom = find_nearest(at_pos, atom, exclude, 3.5, nearby=nearby)
 
         bonded_pos = []
         for bonded in atom.neighbors:
@@ -38,3 +38,4 @@ cdef extern from "<atomstruct/search.h>" namespace "atomstruct":
         CppAtomSearchTree(vector[Atom*], bool, double) except +
         vector[Atom*] search(Atom*, double)
         vector[Atom*] search(Coord, double)
+        void search_many(vector[Coord], vector[double], vector[size_t]*, vector[Atom*]*, int)
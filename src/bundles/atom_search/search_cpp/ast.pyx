@@ -28,6 +28,7 @@
 
 cimport ast
 from libcpp.vector cimport vector
+from libcpp.unordered_map cimport unordered_map
 from libcpp cimport bool
 
 ctypedef ast.Atom* atom_ptr
@@ -55,6 +56,7 @@ cdef class CyAtomSearchTree:
        The specialization is that this is a 3D tree of Atoms.
     '''
     cdef ast.CppAtomSearchTree *cpp_ast
+    cdef unordered_map[atom_ptr, size_t] atom_index
 
     def __cinit__(self, atoms, *, bool scene_coords=True, double sep_val=5.0, **kw):
         cdef vector[atom_ptr] atom_ptrs = vector[atom_ptr]()
@@ -68,6 +70,9 @@ cdef class CyAtomSearchTree:
         else:
             for a in atoms:
                 atom_ptrs.push_back(<atom_ptr><ptr_type>a.cpp_pointer)
+        cdef size_t i
+        for i in range(atom_ptrs.size()):
+            self.atom_index[atom_ptrs[i]] = i
         self.cpp_ast = new ast.CppAtomSearchTree(atom_ptrs, scene_coords, sep_val)
 
     def search(self, target, double window):
@@ -93,6 +98,47 @@ cdef class CyAtomSearchTree:
             return [self.data_lookup[id(a)] for a in leaf_atoms]
         return leaf_atoms
 
+    def search_many(self, coords, windows, *, int nthread=1):
+        """Search tree for all leaves within windows of each of coords in one call.
+        Coords is an N by 3 array and windows is either a single distance or an array
+        of N distances.  Returns CSR-style arrays (offsets, indices): the atoms found
+        for coords[i] are at positions indices[offsets[i]:offsets[i+1]] of the atoms
+        the tree was made from.  Searches are split across nthread threads.
+        """
+        from numpy import array, float64, int64, empty, ndim
+        xyz = array(coords, float64, ndmin=2)
+        cdef vector[ast.Coord] targets = vector[ast.Coord]()
+        cdef vector[double] search_windows = vector[double]()
+        cdef Py_ssize_t n = len(xyz) if xyz.size > 0 else 0
+        cdef double[:,:] c = xyz.reshape((n,3))
+        cdef Py_ssize_t i
+        targets.reserve(n)
+        for i in range(n):
+            targets.push_back(ast.Coord(c[i,0], c[i,1], c[i,2]))
+        if ndim(windows) == 0:
+            search_windows.push_back(windows)
+        else:
+            w = array(windows, float64)
+            if len(w) != n:
+                raise ValueError("Number of windows (%d) does not match number of coords (%d)"
+                    % (len(w), n))
+            for i in range(n):
+                search_windows.push_back(w[i])
+
+        cdef vector[size_t] found_offsets
+        cdef vector[atom_ptr] found
+        self.cpp_ast.search_many(targets, search_windows, &found_offsets, &found, nthread)
+
+        offsets = empty((n+1,), int64)
+        indices = empty((found.size(),), int64)
+        cdef ptr_type[:] o = offsets
+        cdef ptr_type[:] ind = indices
+        for i in range(n+1):
+            o[i] = found_offsets[i]
+        for i in range(<Py_ssize_t>found.size()):
+            ind[i] = self.atom_index[found[i]]
+        return offsets, indices
+
     def __dealloc__(self):
         del self.cpp_ast
 
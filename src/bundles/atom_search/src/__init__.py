@@ -23,6 +23,7 @@
 # === UCSF ChimeraX Copyright ===
 
 from .ast import AtomSearchTree
+from .tree_cache import structure_search_tree, CachedAtomSearchTree
 
 from chimerax.core.toolshed import BundleAPI
 
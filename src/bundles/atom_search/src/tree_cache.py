@@ -0,0 +1,183 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# Search trees for all atoms of a structure, using untransformed coordinates,
+# kept between calls so that repeated zone, clash, contact and hydrogen bond
+# searches do not rebuild them.  A tree is discarded when the atomic "changes"
+# trigger reports changed coordinates, alternate locations or new atoms for its
+# structure, and rebuilt when the active coordinate set differs from the one
+# it was built with.  Deleted atoms are removed from trees by the C++ tree itself.
+# Changes made since the last "changes" trigger are looked at, without firing
+# the trigger, before a cached tree is returned.
+
+_cache = None
+def structure_search_tree(structure, *, sep_val=5.0):
+    '''
+    Return an :class:`AtomSearchTree` of all atoms of structure using untransformed
+    coordinates.  The tree is reused until the structure coordinates change.
+    Trees with different leaf separation values ('sep_val', see
+    :class:`AtomSearchTree`) are cached separately.
+    The tree's 'atoms' attribute holds the atoms it was made from, the atoms
+    that :meth:`AtomSearchTree.search_many` indices refer to.
+    '''
+    global _cache
+    if _cache is None:
+        _cache = _StructureTreeCache()
+    return _cache.tree(structure, sep_val)
+
+class _StructureTreeCache:
+    def __init__(self):
+        self._trees = {}	# structure -> {sep_val: (coordset id, tree)}
+        from chimerax.atomic import get_triggers
+        get_triggers().add_handler('changes', self._atomic_changes)
+
+    def tree(self, structure, sep_val = 5.0):
+        if structure in self._trees and _pending_tree_changes(structure):
+            del self._trees[structure]
+        cs_id = structure.active_coordset_id
+        s_trees = self._trees.setdefault(structure, {})
+        cs_tree = s_trees.get(sep_val)
+        if cs_tree is None or cs_tree[0] != cs_id:
+            from .ast import AtomSearchTree
+            atoms = structure.atoms
+            tree = AtomSearchTree(atoms, scene_coords = False, sep_val = sep_val)
+            tree.atoms = atoms
+            cs_tree = s_trees[sep_val] = (cs_id, tree)
+        return cs_tree[1]
+
+    def _atomic_changes(self, trigger_name, changes):
+        if not self._trees:
+            return
+        changed = set(s for s in self._trees.keys() if s.deleted)
+        atom_reasons = changes.atom_reasons()
+        if 'coord changed' in atom_reasons or 'alt_loc changed' in atom_reasons:
+            changed.update(changes.modified_atoms().unique_structures)
+        if 'coordset changed' in changes.coordset_reasons():
+            changed.update(cs.structure for cs in changes.modified_coordsets())
+        if changes.created_atoms(include_new_structures = False):
+            changed.update(changes.created_atoms(include_new_structures = False).unique_structures)
+        for s in changed:
+            self._trees.pop(s, None)
+
+def _pending_tree_changes(structure):
+    '''
+    Whether changes not yet reported by the "changes" trigger make the cached
+    trees of structure stale.  This reads the change tracker without clearing
+    it so no trigger handlers run during the calling command.
+    '''
+    ct = getattr(structure.session, 'change_tracker', None)
+    if ct is None or not ct.changed:
+        return False
+    global_changes, structure_changes = ct.changes
+    s_changes = structure_changes.get(structure)
+    if s_changes is None:
+        return False
+    ac = s_changes.get('Atom')
+    if ac is not None and (len(ac.created) > 0 or
+                           'coord changed' in ac.reasons or 'alt_loc changed' in ac.reasons):
+        return True
+    csc = s_changes.get('CoordSet')
+    return csc is not None and 'coordset changed' in csc.reasons
+
+class CachedAtomSearchTree:
+    '''
+    Search for atoms near a point using the cached search trees of the structures
+    the atoms belong to.  Has the same search interface as :class:`AtomSearchTree`
+    but avoids building a new tree each time.  If 'scene_coords' is True, then the
+    atoms' scene coordinates are searched rather than their coordinates.
+    'sep_val' is the leaf separation value of the cached trees.
+
+    If data is not None, then it should be a sequence/array of the same length
+    as 'atoms' in which case searches will return the corresponding data items
+    (otherwise searches return the appropriate atoms).
+    '''
+    def __init__(self, atoms, *, scene_coords=True, sep_val=5.0, data=None, **kw):
+        from chimerax.atomic import Atoms
+        if not isinstance(atoms, Atoms):
+            atoms = Atoms(atoms)
+        self.atoms = atoms
+        self.scene_coords = scene_coords
+        self._searches = []
+        from numpy import full, int64
+        for s, s_atoms in atoms.by_structure:
+            tree = structure_search_tree(s, sep_val = sep_val)
+            # Restrict found atoms to the requested subset of the structure atoms.
+            subset = None if len(s_atoms) == s.num_atoms else set(s_atoms.pointers.tolist())
+            if scene_coords and not s.scene_position.is_identity():
+                to_structure = s.scene_position.inverse()
+            else:
+                to_structure = None
+            # Map tree atom indices to indices in atoms, -1 for atoms not searched.
+            index_map = full((len(tree.atoms),), -1, int64)
+            index_map[tree.atoms.indices(s_atoms)] = atoms.indices(s_atoms)
+            self._searches.append((tree, subset, to_structure, index_map))
+        self.data_lookup = {}
+        if data:
+            for a, datum in zip(atoms, data):
+                self.data_lookup[a] = datum
+
+    def search(self, target, window):
+        '''Return atoms (or data) within distance 'window' of target.
+        Target must be an Atom or a sequence of 3 numbers.'''
+        from chimerax.atomic import Atom
+        if isinstance(target, Atom):
+            target = target.scene_coord if self.scene_coords else target.coord
+        found = []
+        for tree, subset, to_structure, index_map in self._searches:
+            xyz = target if to_structure is None else to_structure * target
+            atoms = tree.search(xyz, window)
+            if subset is not None:
+                atoms = [a for a in atoms if a.cpp_pointer in subset]
+            found.extend(atoms)
+        if self.data_lookup:
+            return [self.data_lookup[a] for a in found]
+        return found
+
+    def search_many(self, coords, windows, *, nthread=1):
+        '''Search for atoms near each of coords in one call.  Same as
+        :meth:`AtomSearchTree.search_many` with indices referring to this tree's atoms.'''
+        from numpy import array, float64, int64, arange, repeat, concatenate, argsort, \
+            bincount, cumsum, zeros, empty
+        xyz = array(coords, float64).reshape((-1,3))
+        n = len(xyz)
+        point_indices = []
+        found = []
+        for tree, subset, to_structure, index_map in self._searches:
+            s_xyz = xyz if to_structure is None else to_structure * xyz
+            offsets, indices = tree.search_many(s_xyz, windows, nthread = nthread)
+            indices = index_map[indices]
+            searched = (indices >= 0)
+            point_indices.append(repeat(arange(n), offsets[1:] - offsets[:-1])[searched])
+            found.append(indices[searched])
+        if not found:
+            return zeros((n+1,), int64), empty((0,), int64)
+        if len(found) == 1:
+            point_indices, found = point_indices[0], found[0]
+        else:
+            point_indices = concatenate(point_indices)
+            order = argsort(point_indices, kind = 'stable')
+            point_indices, found = point_indices[order], concatenate(found)[order]
+        offsets = zeros((n+1,), int64)
+        cumsum(bincount(point_indices, minlength = n), out = offsets[1:])
+        return offsets, found
@@ -0,0 +1,56 @@
+def _search_points(s, n=200):
+    from numpy import random
+    r = random.default_rng(12)
+    xyz = s.atoms.coords
+    # Points near random atoms plus a few far from all atoms.
+    points = xyz[r.integers(0, len(xyz), n)] + r.uniform(-3, 3, (n,3))
+    points[:5] += 1000
+    return points
+
+def _check_search_many(tree, atoms, points, windows, nthread):
+    from chimerax.atomic import Atoms
+    from numpy import ndim
+    offsets, indices = tree.search_many(points, windows, nthread=nthread)
+    assert len(offsets) == len(points) + 1 and offsets[0] == 0 and offsets[-1] == len(indices)
+    for i, xyz in enumerate(points):
+        w = windows if ndim(windows) == 0 else windows[i]
+        expected = tree.search(xyz, w)
+        found = indices[offsets[i]:offsets[i+1]]
+        assert len(found) == len(set(found))
+        assert set(found) == set(atoms.indices(Atoms(expected)))
+
+def test_search_many(test_production_session):
+    from chimerax.atom_search import AtomSearchTree
+    from chimerax.core.commands import run
+
+    session = test_production_session
+    s = run(session, "open 1www")[0]
+    atoms = s.atoms
+    tree = AtomSearchTree(atoms, scene_coords=False)
+    points = _search_points(s)
+    from numpy import random
+    windows = random.default_rng(13).uniform(0, 6, len(points))
+    for nthread in (1, 3, 16):
+        _check_search_many(tree, atoms, points, 4.0, nthread)
+        _check_search_many(tree, atoms, points, windows, nthread)
+
+    offsets, indices = tree.search_many(points[:0], 4.0)
+    assert len(offsets) == 1 and len(indices) == 0
+    import pytest
+    with pytest.raises(ValueError):
+        tree.search_many(points, windows[:-1])
+
+def test_cached_search_many(test_production_session):
+    from chimerax.atom_search import CachedAtomSearchTree
+    from chimerax.core.commands import run
+
+    session = test_production_session
+    s = run(session, "open 1www")[0]
+    points = _search_points(s)
+    # Search a subset of atoms of a moved structure in scene coordinates.
+    run(session, "turn y 30 models #1 ; move x 5 models #1")
+    atoms = s.atoms[::3]
+    tree = CachedAtomSearchTree(atoms)
+    scene_points = s.scene_position * points
+    for nthread in (1, 4):
+        _check_search_many(tree, atoms, scene_points, 3.5, nthread)
@@ -614,7 +614,7 @@ extern "C" EXPORT void atom_get_coord_crdset(void *atom, int cs_id, float64_t *x
             err_msg << "Structure has no coordset with ID " << cs_id;
             PyErr_SetString(PyExc_ValueError, err_msg.str().c_str());
         } else {
-            auto& crd = a->coord(cs);
+            auto crd = a->coord(cs);
             *xyz++ = crd[0];
             *xyz++ = crd[1];
             *xyz++ = crd[2];
@@ -3878,12 +3878,8 @@ extern "C" EXPORT PyObject* coordset_xyzs(void *coordset)
     PyObject* ret_val;
     try {
         double *v;
-        ret_val = python_double_array(cs->coords().size(), 3, &v);
-        for (auto xyz: cs->coords()) {
-            *v++ = xyz[0];
-            *v++ = xyz[1];
-            *v++ = xyz[2];
-        }
+        ret_val = python_double_array(cs->num_coords(), 3, &v);
+        cs->get_coords(v);
     } catch (...) {
         molc_error();
         return nullptr;
@@ -4206,6 +4202,18 @@ extern "C" EXPORT void set_structure_active_coordset_change_notify(void *structu
     error_wrap_array_set(s, n, &Structure::set_active_coord_set_change_notify, accn);
 }
 
+extern "C" EXPORT void structure_compact_coordsets(void *structures, size_t n, npy_bool *compact)
+{
+    Structure **s = static_cast<Structure **>(structures);
+    error_wrap_array_get(s, n, &Structure::compact_coord_sets, compact);
+}
+
+extern "C" EXPORT void set_structure_compact_coordsets(void *structures, size_t n, npy_bool *compact)
+{
+    Structure **s = static_cast<Structure **>(structures);
+    error_wrap_array_set(s, n, &Structure::set_compact_coord_sets, compact);
+}
+
 extern "C" EXPORT void structure_alt_loc_change_notify(void *structures, size_t n, npy_bool *alcn)
 {
     Structure **s = static_cast<Structure **>(structures);
@@ -4428,12 +4436,15 @@ extern "C" EXPORT void set_structure_active_coordset_id(void *mols, size_t n, in
     }
 }
 
-extern "C" EXPORT void structure_add_coordset(void *mol, int id, void *xyz, size_t n)
+extern "C" EXPORT void structure_add_coordset(void *mol, int id, void *xyz, bool float32, size_t n)
 {
     Structure *m = static_cast<Structure *>(mol);
     try {
         CoordSet *cs = m->new_coord_set(id);
-        cs->set_coords((double *)xyz, n);
+        if (float32)
+            cs->set_coords((float *)xyz, n);
+        else
+            cs->set_coords((double *)xyz, n);
     } catch (...) {
         molc_error();
     }
@@ -4449,17 +4460,19 @@ extern "C" EXPORT void structure_remove_coordsets(void *mol)
     }
 }
 
-extern "C" EXPORT void structure_add_coordsets(void *mol, bool replace, void *xyz, size_t n_sets, size_t n_coords)
+extern "C" EXPORT void structure_add_coordsets(void *mol, bool replace, void *xyz, bool float32,
+    size_t n_sets, size_t n_coords)
 {
     Structure *m = static_cast<Structure *>(mol);
-    double* xyzs = (double*)xyz;
     try {
         if (replace)
             m->clear_coord_sets();
         for (size_t i = 0; i < n_sets; ++i) {
             CoordSet *cs = m->new_coord_set();
-            cs->set_coords((double *)xyzs, n_coords);
-            xyzs += n_coords * 3;
+            if (float32)
+                cs->set_coords((float *)xyz + i * n_coords * 3, n_coords);
+            else
+                cs->set_coords((double *)xyz + i * n_coords * 3, n_coords);
         }
         if (replace)
             m->set_active_coord_set(m->coord_sets()[0]);
@@ -4502,7 +4515,7 @@ extern "C" EXPORT void structure_coordset_size(void *mols, size_t n, int32_t *co
     try {
       for (size_t i = 0; i != n; ++i) {
         CoordSet *cs = m[i]->active_coord_set();
-        *coordset_size++ = (cs ? cs->coords().size() : 0);
+        *coordset_size++ = (cs ? cs->num_coords() : 0);
       }
     } catch (...) {
         molc_error();
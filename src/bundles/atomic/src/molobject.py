@@ -1474,6 +1474,13 @@ class StructureData:
         ret = ctypes.c_char_p)().decode('utf-8')
     _ss_suppress_count = 0
 
+    coordset_provider = None
+    '''Object with a load_coordset(structure, coordset_id) method that is called before
+    a coordinate set is made active or returned by :meth:`coordset`.  Used to read
+    trajectory frames on demand.  It also has a load_all_coordsets(structure) method,
+    used before structures are combined, and a copy() method giving the provider for
+    a copy of the structure.'''
+
     # For attribute registration...
     _attr_reg_info = [
         ('display', (bool,)), ('name', (str,)), ('num_atoms', (int,)), ('num_bonds', (int,)),
@@ -1523,9 +1530,21 @@ class StructureData:
     active_coordset_change_notify = c_property('structure_active_coordset_change_notify', npy_bool,
     doc = '''Whether notifications are issued when the active coordset is changed.  Should only be
         set to true when temporarily changing the active coordset in a Python script. Boolean''')
+    compact_coordsets = c_property('structure_compact_coordsets', npy_bool,
+    doc = '''Whether coordinate sets other than the active one are stored in single precision,
+        halving their memory use.  They are converted to double precision when made active
+        or when their coordinates are otherwise needed.  Boolean''')
     active_coordset = c_property('structure_active_coordset', cptr, astype = convert.coordset,
         read_only = True, doc="Supported API. Currently active :class:`CoordSet`. Read only.")
-    active_coordset_id = c_property('structure_active_coordset_id', int32,
+    _active_coordset_id = c_property('structure_active_coordset_id', int32)
+    def _get_active_coordset_id(self):
+        return self._active_coordset_id
+    def _set_active_coordset_id(self, cs_id):
+        p = self.coordset_provider
+        if p is not None and cs_id != self._active_coordset_id:
+            p.load_coordset(self, cs_id)
+        self._active_coordset_id = cs_id
+    active_coordset_id = property(_get_active_coordset_id, _set_active_coordset_id,
         doc = "Supported API. Index of the active coordinate set.")
     alt_loc_change_notify = c_property('structure_alt_loc_change_notify', npy_bool, doc=
         '''Whether notifications are issued when altlocs are changed.  Should only be
@@ -1713,15 +1732,19 @@ class StructureData:
         f = c_function('structure_combine_sym_atoms', args = (ctypes.c_void_p,))(self._c_pointer)
 
     def add_coordset(self, id, xyz):
-        '''Supported API. Add a coordinate set with the given id.'''
-        if xyz.dtype != float64:
-            raise ValueError('add_coordset(): array must be float64, got %s' % xyz.dtype.name)
+        '''Supported API. Add a coordinate set with the given id.
+        The coordinates can be float32 or float64.'''
+        if xyz.dtype not in (float32, float64):
+            raise ValueError('add_coordset(): array must be float32 or float64, got %s'
+                % xyz.dtype.name)
         f = c_function('structure_add_coordset',
-                       args = (ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t))
-        f(self._c_pointer, id, pointer(xyz), len(xyz))
+                       args = (ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_bool,
+                               ctypes.c_size_t))
+        f(self._c_pointer, id, pointer(xyz), xyz.dtype == float32, len(xyz))
 
     def add_coordsets(self, xyzs, replace = True):
-        '''Add coordinate sets.  If 'replace' is True, clear out existing coordinate sets first'''
+        '''Add coordinate sets.  If 'replace' is True, clear out existing coordinate sets first.
+        The coordinates can be float32 or float64.'''
         if len(xyzs.shape) != 3:
             raise ValueError('add_coordsets(): array must be (frames)x(atoms)x3-dimensional')
         if not xyzs.flags.c_contiguous:
@@ -1742,11 +1765,13 @@ class StructureData:
         if xyzs.shape[2] != 3:
             raise ValueError('add_coordsets(): third dimension of coordinate array'
                 ' must be 3 (xyz)')
-        if xyzs.dtype != float64:
-            raise ValueError('add_coordsets(): array must be float64, got %s' % xyzs.dtype.name)
+        if xyzs.dtype not in (float32, float64):
+            raise ValueError('add_coordsets(): array must be float32 or float64, got %s'
+                % xyzs.dtype.name)
         f = c_function('structure_add_coordsets',
-                       args = (ctypes.c_void_p, ctypes.c_bool, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t))
-        f(self._c_pointer, replace, pointer(xyzs), *xyzs.shape[:2])
+                       args = (ctypes.c_void_p, ctypes.c_bool, ctypes.c_void_p, ctypes.c_bool,
+                               ctypes.c_size_t, ctypes.c_size_t))
+        f(self._c_pointer, replace, pointer(xyzs), xyzs.dtype == float32, *xyzs.shape[:2])
 
     def remove_coordsets(self):
         '''Remove all coordinate sets.'''
@@ -1755,6 +1780,9 @@ class StructureData:
 
     def coordset(self, cs_id):
         '''Supported API. Return the CoordSet for the given coordset ID'''
+        p = self.coordset_provider
+        if p is not None:
+            p.load_coordset(self, cs_id)
         f = c_function('structure_py_obj_coordset', args = (ctypes.c_void_p, ctypes.c_int),
             ret = ctypes.py_object)
         return f(self._c_pointer, cs_id)
@@ -1856,16 +1884,16 @@ class StructureData:
         '''
         if index is None:
             f = c_function('structure_new_coordset_default', args = (ctypes.c_void_p,))
-            f()
+            f(self._c_pointer)
         else:
             if size is None:
                 f = c_function('structure_new_coordset_index',
                     args = (ctypes.c_void_p, ctypes.c_int))
-                f(index)
+                f(self._c_pointer, index)
             else:
                 f = c_function('structure_new_coordset_index_size',
                     args = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int))
-                f(index, size)
+                f(self._c_pointer, index, size)
 
     def new_residue(self, residue_name, chain_id, pos, insert=None, *, precedes=None):
         ''' Supported API. Create a new :class:`.Residue`.
@@ -731,15 +731,15 @@ def close_surfaces(atoms_or_surfs):
         models = surfs[0].session.models
         models.close(surfs)
 
-def buried_area(a1, a2, probe_radius):
+def buried_area(a1, a2, probe_radius, method = 'standard'):
     from chimerax.surface import spheres_surface_area
     xyz1, r1 = atom_spheres(a1, probe_radius)
-    a1a = spheres_surface_area(xyz1, r1)
+    a1a = spheres_surface_area(xyz1, r1, method = method)
     xyz2, r2 = atom_spheres(a2, probe_radius)
-    a2a = spheres_surface_area(xyz2, r2)
+    a2a = spheres_surface_area(xyz2, r2, method = method)
     from numpy import concatenate
     xyz12, r12 = concatenate((xyz1,xyz2)), concatenate((r1,r2))
-    a12a = spheres_surface_area(xyz12, r12)
+    a12a = spheres_surface_area(xyz12, r12, method = method)
     ba = 0.5 * (a1a.sum() + a2a.sum() - a12a.sum())
     return ba, a1a, a2a, a12a
 
@@ -65,10 +65,15 @@ class Structure(Model, StructureData):
             '_use_spline_normals': False,
             'ribbon_xs_mgr': XSectionManager(),
             'filename': None,
+            'coordset_provider': None,
+            'compact_coordsets': False,
         }
 
         StructureData.__init__(self, c_pointer)
         for attr_name, val in self._session_attrs.items():
+            if attr_name == 'compact_coordsets' and c_pointer is not None:
+                # Kept by the C++ structure, e.g. from a copy.  Resetting it would expand all sets.
+                continue
             setattr(self, attr_name, val)
         self.ribbon_xs_mgr.set_structure(self)
         Model.__init__(self, name, session)
@@ -144,6 +149,19 @@ class Structure(Model, StructureData):
         dictionary describing how to change chain IDs of 's' when in conflict with this structure.
         'ref_xform' is the scene_position of the reference model.
         '''
+        # Coordinate sets read on demand must have coordinates before they are merged.
+        # All coordinate sets are merged if both structures have the same number of them,
+        # otherwise only the active ones are.  The combined coordinate sets no longer
+        # match a trajectory file, so they are all read before the provider is dropped.
+        merge_all = (self.num_coordsets == s.num_coordsets)
+        for m in (self, s):
+            p = m.coordset_provider
+            if p is not None:
+                if merge_all:
+                    p.load_all_coordsets(m)
+                else:
+                    p.load_coordset(m, m._active_coordset_id)
+        self.coordset_provider = None
         totals = self._get_instance_totals()
         StructureData._combine(self, s, chain_id_mapping, ref_xform)
         self._copy_custom_attrs(s, totals)
@@ -159,6 +177,8 @@ class Structure(Model, StructureData):
         m = self.__class__(self.session, name = name,
             c_pointer = StructureData._copy(self), auto_style = False, log_info = False)
         m.positions = self.positions
+        if self.coordset_provider is not None:
+            m.coordset_provider = self.coordset_provider.copy()
         m._copy_custom_attrs(self)
         return m
 
@@ -1011,9 +1031,19 @@ class Structure(Model, StructureData):
         return selected
 
     def atomspec_zone(self, session, coords, distance, target_type, operator, results):
-        from chimerax.geometry import find_close_points
         atoms = self.atoms
-        a, _ = find_close_points(atoms.scene_coords, coords, distance)
+        if len(coords) * 100 < len(atoms):
+            # Few zone centers compared to atoms.  Search the structure's cached
+            # search tree instead of computing all atom scene coordinates.
+            from chimerax.atom_search import structure_search_tree
+            tree = structure_search_tree(self)
+            tf = self.scene_position.inverse()
+            offsets, found = tree.search_many(tf.transform_points(coords), distance)
+            from numpy import unique
+            a = atoms.indices(tree.atoms[unique(found)])
+        else:
+            from chimerax.geometry import find_close_points
+            a, _ = find_close_points(atoms.scene_coords, coords, distance)
         def not_a():
             from numpy import ones, bool_
             mask = ones(len(atoms), dtype=bool_)
@@ -1077,6 +1107,7 @@ class AtomsDrawing(Drawing):
         spos = self.parent.get_scene_positions(displayed_only=True)
         b = sb if spos.is_identity() else copies_bounding_box(sb, spos)
         self._cached_position_bounds = b
+        self._cached_bounds = (b,)		# No children so these are the full bounds.
 
         return b
 
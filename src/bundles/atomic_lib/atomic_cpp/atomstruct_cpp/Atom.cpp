@@ -190,11 +190,11 @@ Atom::_coordset_set_coord(const Point &coord, CoordSet *cs, bool track_change)
         structure()->set_active_coord_set(cs);
     if (_coord_index == COORD_UNASSIGNED)
         _coord_index = _new_coord(coord);
-    else if (_coord_index >= cs->coords().size()) {
-        if (_coord_index > cs->coords().size()) {
+    else if (_coord_index >= cs->num_coords()) {
+        if (_coord_index > cs->num_coords()) {
             CoordSet *fill_cs = cs;
             while (fill_cs != nullptr) {
-                while (_coord_index > fill_cs->coords().size()) {
+                while (_coord_index > fill_cs->num_coords()) {
                     fill_cs->add_coord(Point());
                 }
                 fill_cs = structure()->find_coord_set(fill_cs->id()-1);
@@ -207,7 +207,7 @@ Atom::_coordset_set_coord(const Point &coord, CoordSet *cs, bool track_change)
         graphics_changes()->set_gc_ring();
     } else {
         //cs->_coords[_coord_index] = coord;
-        cs->_coords[_coord_index].set_xyz(coord[0], coord[1], coord[2]);
+        cs->set_coord(_coord_index, coord);
         if (track_change) {
             graphics_changes()->set_gc_shape();
             if (in_ribbon())
@@ -229,10 +229,10 @@ Atom::_new_coord(const Point &coord)
     for (auto csi = css.begin(); csi != css.end(); ++csi) {
         CoordSet *cs = *csi;
         if (index == COORD_UNASSIGNED) {
-            index = cs->coords().size();
+            index = cs->num_coords();
             cs->add_coord(coord);
         } else
-            while (index >= cs->coords().size())
+            while (index >= cs->num_coords())
                 cs->add_coord(coord);
     }
     return index;
@@ -244,10 +244,17 @@ Atom::coord() const
     CoordSet *cs = structure()->active_coord_set();
     if (cs == nullptr)
         throw std::logic_error("no active coordinate set");
-    return coord(cs);
+    if (_coord_index == COORD_UNASSIGNED)
+        throw std::logic_error("coordinate value hasn't been assigned");
+    if (_alt_loc != ' ') {
+        _Alt_loc_map::const_iterator i = _alt_loc_map.find(_alt_loc);
+        return (*i).second.coord;
+    }
+    // The active coordinate set is never compacted.
+    return cs->coords()[_coord_index];
 }
 
-const Coord&
+Coord
 Atom::coord(const CoordSet* cs) const
 {
     if (_coord_index == COORD_UNASSIGNED)
@@ -256,7 +263,7 @@ Atom::coord(const CoordSet* cs) const
         _Alt_loc_map::const_iterator i = _alt_loc_map.find(_alt_loc);
         return (*i).second.coord;
     }
-    return cs->coords()[_coord_index];
+    return cs->coord(_coord_index);
 }
 
 int
@@ -1453,7 +1460,7 @@ Atom::set_coord_index(unsigned int ci)
     auto cs = structure()->active_coord_set();
     if (cs == nullptr)
         throw std::logic_error("Cannot assign coordinate index with no coordinate sets");
-    if (cs->coords().size() <= ci)
+    if (cs->num_coords() <= ci)
         throw std::logic_error("Coordinate index larger than coordinate set");
     _coord_index = ci;
 }
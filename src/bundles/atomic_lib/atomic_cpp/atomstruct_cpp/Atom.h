@@ -168,7 +168,7 @@ public:
         return std::find(_neighbors.begin(), _neighbors.end(), other) != _neighbors.end();
     }
     const Coord&  coord() const;
-    const Coord&  coord(const CoordSet* cs) const;
+    Coord  coord(const CoordSet* cs) const;
     const Coord&  coord(char alt_loc) const { return _alt_loc_map.find(alt_loc)->second.coord; }
     unsigned int  coord_index() const { return _coord_index; }
     int  coordination(int value_if_unknown) const;
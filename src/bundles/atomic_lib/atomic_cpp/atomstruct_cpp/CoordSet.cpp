@@ -24,6 +24,8 @@
  * === UCSF ChimeraX Copyright ===
  */
 
+#include <algorithm>  // for std::copy
+#include <stdexcept>  // for std::logic_error
 #include <utility>  // for pair
 
 #define ATOMSTRUCT_EXPORT
@@ -60,19 +62,142 @@ CoordSet::~CoordSet()
 }
 
 void
-CoordSet::set_coords(Real *xyz, size_t n)
+CoordSet::_expand()
 {
-    size_t nc = _coords.size();
-    size_t c = 0;
-    for (size_t i = 0 ; i < nc ; ++i, c += 3)
-        _coords[i].set_xyz(xyz[c], xyz[c+1], xyz[c+2]);
-    for (size_t i = nc ; i < n ; ++i, c += 3)
-        add_coord(Coord(xyz[c], xyz[c+1], xyz[c+2]));
+    if (!_compact)
+        return;
+    _coords = expanded_coords();
+    std::vector<float>().swap(_compact_coords);
+    _compact = false;
+}
+
+void
+CoordSet::add_coords(const CoordSet* coords)
+{
+    if (_compact && coords->_compact)
+        _compact_coords.insert(_compact_coords.end(),
+            coords->_compact_coords.begin(), coords->_compact_coords.end());
+    else if (coords->_compact)
+        add_coords(coords->expanded_coords());
+    else
+        add_coords(coords->_coords);
+}
+
+void
+CoordSet::add_coords(const Coords& coords)
+{
+    if (!_compact) {
+        _coords.insert(_coords.end(), coords.begin(), coords.end());
+        return;
+    }
+    _compact_coords.reserve(_compact_coords.size() + 3 * coords.size());
+    for (auto& crd: coords)
+        _compact_coords.insert(_compact_coords.end(), {(float)crd[0], (float)crd[1], (float)crd[2]});
+}
 
+const CoordSet::Coords&
+CoordSet::coords() const
+{
+    if (_compact)
+        throw std::logic_error("Full precision coordinates requested from compacted coordinate set");
+    return _coords;
+}
+
+CoordSet::Coords
+CoordSet::expanded_coords() const
+{
+    if (!_compact)
+        return _coords;
+    Coords coords;
+    size_t n = _compact_coords.size() / 3;
+    coords.reserve(n);
+    for (size_t i = 0, c = 0; i < n; ++i, c += 3)
+        coords.emplace_back(_compact_coords[c], _compact_coords[c+1], _compact_coords[c+2]);
+    return coords;
+}
+
+void
+CoordSet::_coords_changed()
+{
     _structure->change_tracker()->add_modified(_structure, this, ChangeTracker::REASON_COORDSET);
     if (_structure->active_coord_set() == this)
         _structure->change_tracker()->add_modified(_structure, _structure,
             ChangeTracker::REASON_SCENE_COORD);
+    else if (_structure->compact_coord_sets())
+        compact();
+}
+
+void
+CoordSet::compact()
+{
+    if (_compact)
+        return;
+    _compact_coords.reserve(3 * _coords.size());
+    for (auto& crd: _coords)
+        _compact_coords.insert(_compact_coords.end(), {(float)crd[0], (float)crd[1], (float)crd[2]});
+    Coords().swap(_coords);
+    _compact = true;
+}
+
+void
+CoordSet::get_coords(Real *xyz) const
+{
+    // Copy coordinates without converting single precision storage.
+    if (_compact) {
+        std::copy(_compact_coords.begin(), _compact_coords.end(), xyz);
+        return;
+    }
+    for (auto& crd: _coords) {
+        *xyz++ = crd[0];
+        *xyz++ = crd[1];
+        *xyz++ = crd[2];
+    }
+}
+
+void
+CoordSet::set_coord(size_t i, const Point& coord)
+{
+    // Set one coordinate in place without changing the storage precision.
+    if (_compact) {
+        float* c = &_compact_coords[3*i];
+        c[0] = coord[0]; c[1] = coord[1]; c[2] = coord[2];
+    } else
+        _coords[i].set_xyz(coord[0], coord[1], coord[2]);
+}
+
+void
+CoordSet::set_coords(Real *xyz, size_t n)
+{
+    auto& coords = _full_coords();
+    size_t nc = coords.size();
+    size_t c = 0;
+    for (size_t i = 0 ; i < nc ; ++i, c += 3)
+        coords[i].set_xyz(xyz[c], xyz[c+1], xyz[c+2]);
+    for (size_t i = nc ; i < n ; ++i, c += 3)
+        coords.emplace_back(xyz[c], xyz[c+1], xyz[c+2]);
+    _coords_changed();
+}
+
+void
+CoordSet::set_coords(float *xyz, size_t n)
+{
+    if (_structure->compact_coord_sets() && _structure->active_coord_set() != this
+    && n >= num_coords()) {
+        // Store directly without a double precision copy.
+        _compact_coords.assign(xyz, xyz + 3 * n);
+        Coords().swap(_coords);
+        _compact = true;
+        _coords_changed();
+        return;
+    }
+    auto& coords = _full_coords();
+    size_t nc = coords.size();
+    size_t c = 0;
+    for (size_t i = 0 ; i < nc ; ++i, c += 3)
+        coords[i].set_xyz(xyz[c], xyz[c+1], xyz[c+2]);
+    for (size_t i = nc ; i < n ; ++i, c += 3)
+        coords.emplace_back(xyz[c], xyz[c+1], xyz[c+2]);
+    _coords_changed();
 }
 
 float
@@ -141,8 +266,12 @@ CoordSet::session_save(int** ints, float** floats) const
         int_ptr++; float_ptr++;
     }
 
-    int_ptr[0] = _coords.size();
+    int_ptr[0] = num_coords();
     int_ptr++;
+    if (_compact) {
+        float_ptr = std::copy(_compact_coords.begin(), _compact_coords.end(), float_ptr);
+        return;
+    }
     for (auto crd: _coords) {
         float_ptr[0] = crd[0];
         float_ptr[1] = crd[1];
@@ -154,9 +283,13 @@ CoordSet::session_save(int** ints, float** floats) const
 void
 CoordSet::xform(PositionMatrix mat)
 {
-    size_t nc = _coords.size();
+    bool compact = _compact;
+    auto& coords = _full_coords();
+    size_t nc = coords.size();
     for (size_t i = 0 ; i < nc ; ++i)
-        _coords[i].xform(mat);
+        coords[i].xform(mat);
+    if (compact)
+        this->compact();
 }
 
 }  // namespace atomstruct
@@ -46,35 +46,66 @@ public:
     typedef std::vector<Coord>  Coords;
 
 private:
+    // Coordinates may instead be held in single precision in _compact_coords
+    // to save memory.  Reads of a compacted set convert the coordinates they
+    // need without changing the storage; writes expand it to Coords and then
+    // compact it again if it is not the active set.
     Coords  _coords;
+    std::vector<float>  _compact_coords;
+    bool  _compact = false;
     int  _cs_id;
     std::unordered_map<const Atom *, float>  _bfactor_map;
     std::unordered_map<const Atom *, float>  _occupancy_map;
     Structure*  _structure;
     CoordSet(Structure* as, int cs_id);
     CoordSet(Structure* as, int cs_id, int size);
+    void  _expand();
+    Coords&  _full_coords() { _expand(); return _coords; }
+    void  _coords_changed();
 
 public:
     CoordSet& operator=(const CoordSet& source) {
         if (this != &source) {
-            _coords = source._coords;
+            fill(&source);
             _bfactor_map = source._bfactor_map; _occupancy_map = source._occupancy_map;
         }
         return *this;
     }
-    void  add_coord(const Point& coord) { _coords.push_back(coord); }
-    void  add_coords(const CoordSet* coords) {
-        _coords.insert(_coords.end(), coords->coords().begin(), coords->coords().end());
+    void  add_coord(const Point& coord) {
+        if (_compact)
+            _compact_coords.insert(_compact_coords.end(), {(float)coord[0], (float)coord[1], (float)coord[2]});
+        else
+            _coords.push_back(coord);
     }
-    const Coords &  coords() const { return _coords; }
+    void  add_coords(const CoordSet* coords);
+    void  add_coords(const Coords& coords);
+    void  compact();
+    bool  compacted() const { return _compact; }
+    Coord  coord(size_t i) const {
+        if (!_compact)
+            return _coords[i];
+        const float* c = &_compact_coords[3*i];
+        return Coord(c[0], c[1], c[2]);
+    }
+    // Full precision coordinates are only held by sets that are not compacted.
+    // Use coord(), get_coords() or expanded_coords() for sets that may be.
+    const Coords &  coords() const;
+    Coords  expanded_coords() const;
+    void  get_coords(Real* xyz) const;
+    size_t  num_coords() const { return _compact ? _compact_coords.size() / 3 : _coords.size(); }
+    void set_coord(size_t i, const Point& coord);
     void set_coords(Real* xyz, size_t n);
+    void set_coords(float* xyz, size_t n);
     virtual  ~CoordSet();
     float  get_bfactor(const Atom*) const;
     float  get_occupancy(const Atom*) const;
-    void  fill(const CoordSet* source) { _coords = source->_coords; }
+    void  fill(const CoordSet* source) {
+        _coords = source->_coords; _compact_coords = source->_compact_coords;
+        _compact = source->_compact;
+    }
     int  id() const { return _cs_id; }
     int  session_num_floats(int /*version*/=CURRENT_SESSION_VERSION) const {
-        return _bfactor_map.size() + _occupancy_map.size() + 3 * _coords.size();
+        return _bfactor_map.size() + _occupancy_map.size() + 3 * num_coords();
     }
     int  session_num_ints(int /*version*/=CURRENT_SESSION_VERSION) const {
         return _bfactor_map.size() + _occupancy_map.size() + 3;
@@ -547,6 +547,7 @@ void Structure::_copy(Structure* s, PositionMatrix coord_adjust,
     std::map<CoordSet*, CoordSet*> cs_map;
     unsigned int coord_base = 0;
     if (chain_id_map == nullptr) {
+        s->_compact_coord_sets = _compact_coord_sets;
         for (auto cs: coord_sets()) {
             auto new_cs = s->new_coord_set(cs->id());
             *new_cs = *cs;
@@ -556,7 +557,7 @@ void Structure::_copy(Structure* s, PositionMatrix coord_adjust,
         }
         s->set_active_coord_set(cs_map[active_coord_set()]);
     } else {
-        coord_base = s->active_coord_set()->coords().size();
+        coord_base = s->active_coord_set()->num_coords();
         if (s->coord_sets().size() != coord_sets().size()) {
             // copy just the current coord set onto the current one, and prune others from combination
             auto active = s->active_coord_set();
@@ -573,11 +574,11 @@ void Structure::_copy(Structure* s, PositionMatrix coord_adjust,
                 auto c_cs = coord_sets()[i];
                 if (coord_adjust != nullptr) {
                     // c_cs.xform() would overwrite coords rather than produce a new copy
-                    CoordSet::Coords tmp = c_cs->coords();
+                    CoordSet::Coords tmp = c_cs->expanded_coords();
                     size_t nc = tmp.size();
                     for (size_t i = 0 ; i < nc ; ++i)
                         tmp[i].xform(coord_adjust);
-                    s_cs->_coords.insert(s_cs->_coords.end(), tmp.begin(), tmp.end());
+                    s_cs->add_coords(tmp);
                 } else {
                     s_cs->add_coords(c_cs);
                 }
@@ -1552,6 +1553,9 @@ Structure::_coord_set_insert(Structure::CoordSets &coord_sets, CoordSet* cs, int
         } else if (index == (*csi)->id()) {
             auto pos = csi - coord_sets.begin();
             bool update_active = (*csi == active_coord_set());
+            // Forget the replaced active set so it is not compacted after deletion
+            if (update_active)
+                _active_coord_set = nullptr;
             delete *csi;
             coord_sets[pos] = cs;
             if (update_active)
@@ -1566,7 +1570,7 @@ CoordSet*
 Structure::new_coord_set(int index)
 {
     if (!_coord_sets.empty())
-        return new_coord_set(index, _coord_sets.back()->coords().size());
+        return new_coord_set(index, _coord_sets.back()->num_coords());
     CoordSet* cs = new CoordSet(this, index);
     _coord_set_insert(_coord_sets, cs, index);
     return cs;
@@ -2387,6 +2391,9 @@ Structure::set_active_coord_set(CoordSet *cs)
         new_active = cs;
     }
     if (_active_coord_set != new_active) {
+        if (_compact_coord_sets && _active_coord_set != nullptr)
+            _active_coord_set->compact();
+        new_active->_expand();
         _active_coord_set = new_active;
         pb_mgr().change_cs(new_active);
         if (active_coord_set_change_notify()) {
@@ -2399,6 +2406,19 @@ Structure::set_active_coord_set(CoordSet *cs)
     }
 }
 
+void
+Structure::set_compact_coord_sets(bool compact)
+{
+    // Keep inactive coordinate sets in single precision to save memory
+    _compact_coord_sets = compact;
+    for (auto cs: _coord_sets) {
+        if (compact && cs != _active_coord_set)
+            cs->compact();
+        else
+            cs->_expand();
+    }
+}
+
 void
 Structure::set_color(const Rgba& rgba)
 {
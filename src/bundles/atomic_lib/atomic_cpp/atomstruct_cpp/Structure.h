@@ -138,6 +138,7 @@ public:
                        RIBBON_TETHER_CYLINDER = 2 };
 protected:
     bool  _active_coord_set_change_notify = true;
+    bool  _compact_coord_sets = false;
     CoordSet *  _active_coord_set;
     mutable bool  _alt_loc_change_notify = true;
     mutable bool  _ss_change_notify = true;
@@ -240,6 +241,7 @@ public:
     virtual  ~Structure();
 
     bool  active_coord_set_change_notify() const { return _active_coord_set_change_notify; }
+    bool  compact_coord_sets() const { return _compact_coord_sets; }
     CoordSet*  active_coord_set() const { return _active_coord_set; };
     bool  alt_loc_change_notify() const { return _alt_loc_change_notify; }
     bool  ss_change_notify() const { return _ss_change_notify; }
@@ -336,6 +338,7 @@ public:
     void  session_save_setup() const;
     void  session_save_teardown() const;
     void  set_active_coord_set_change_notify(bool cn) { _active_coord_set_change_notify = cn; }
+    void  set_compact_coord_sets(bool compact);
     void  set_active_coord_set(CoordSet *cs);
     void  set_alt_loc_change_notify(bool cn) const { _alt_loc_change_notify = cn; }
     void  set_ss_change_notify(bool cn) const { _ss_change_notify = cn; }
@@ -25,6 +25,7 @@
  */
 
 #include <algorithm>  // std::sort, mix/max_element
+#include <thread>
 #include <utility>  // std::make_pair
 
 #define ATOMSTRUCT_EXPORT
@@ -94,6 +95,54 @@ AtomSearchTree::search(const Coord &target, double window)
     return ret_val;
 }
 
+void
+AtomSearchTree::search_many(const std::vector<Coord>& targets, const std::vector<double>& windows,
+    std::vector<std::size_t>* offsets, std::vector<Atom*>* found, int num_threads)
+{
+    // Search for all targets in one call.  Target i uses windows[i], or windows[0]
+    // if only one window is given.  The atoms found for target i are
+    // (*found)[(*offsets)[i]] up to (*found)[(*offsets)[i+1]].
+    //
+    // The targets are split into contiguous chunks searched by separate threads;
+    // the tree is only read while searching, so no locking is needed.
+    std::size_t n = targets.size();
+    if (num_threads < 1)
+        num_threads = 1;
+    if (static_cast<std::size_t>(num_threads) > n)
+        num_threads = n > 0 ? n : 1;
+    std::vector<std::vector<std::size_t>> chunk_counts(num_threads);
+    std::vector<std::vector<Atom*>> chunk_found(num_threads);
+    auto search_chunk = [&](int t) {
+        auto& counts = chunk_counts[t];
+        auto& chunk = chunk_found[t];
+        std::size_t end = n * (t+1) / num_threads;
+        for (std::size_t i = n * t / num_threads; i < end; ++i) {
+            auto atoms = search(targets[i], windows.size() == 1 ? windows[0] : windows[i]);
+            counts.push_back(atoms.size());
+            chunk.insert(chunk.end(), atoms.begin(), atoms.end());
+        }
+    };
+    if (num_threads == 1) {
+        search_chunk(0);
+    } else {
+        std::vector<std::thread> threads;
+        for (int t = 0; t < num_threads; ++t)
+            threads.push_back(std::thread(search_chunk, t));
+        for (auto& th: threads)
+            th.join();
+    }
+
+    offsets->clear();
+    offsets->reserve(n + 1);
+    offsets->push_back(0);
+    found->clear();
+    for (int t = 0; t < num_threads; ++t) {
+        for (auto count: chunk_counts[t])
+            offsets->push_back(offsets->back() + count);
+        found->insert(found->end(), chunk_found[t].begin(), chunk_found[t].end());
+    }
+}
+
 void
 AtomSearchTree::init_root()
 {
@@ -29,6 +29,7 @@
 
 #include "imex.h"
 
+#include <cstddef>
 #include <vector>
 
 #include "Python.h"
@@ -86,6 +87,8 @@ public:
     virtual void  destructors_done(const std::set<void*>& destroyed);
     std::vector<Atom*>  search(Atom*, double);
     std::vector<Atom*>  search(const Coord&, double);
+    void  search_many(const std::vector<Coord>& targets, const std::vector<double>& windows,
+        std::vector<std::size_t>* offsets, std::vector<Atom*>* found, int num_threads = 1);
     _Node  *root;
 };
 
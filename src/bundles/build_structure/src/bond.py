@@ -45,9 +45,9 @@ def create_bonds(atoms, *, reasonable=True, bond_length_tolerance=0.4):
     for struct, struct_atoms in atoms.by_structure:
         if reasonable:
             search_tree = AtomSearchTree(struct_atoms, scene_coords=False)
-            for a1 in struct_atoms:
-                hits = search_tree.search(a1, 4.0)
-                for a2 in hits:
+            offsets, indices = search_tree.search_many(struct_atoms.coords, 4.0)
+            for a1, start, end in zip(struct_atoms, offsets[:-1], offsets[1:]):
+                for a2 in struct_atoms[indices[start:end]]:
                     if a1 == a2 or a1 in a2.neighbors:
                         continue
                     if is_reasonable(a1, a2):
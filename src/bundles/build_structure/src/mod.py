@@ -88,8 +88,8 @@ def modify_atom(atom, element, num_bonds, *, geometry=None, name=None, connect_b
         if atom.structure.num_atoms < 100:
             test_atoms = list(atom.structure.atoms)
         else:
-            from chimerax.atom_search import AtomSearchTree
-            tree = AtomSearchTree(atom.structure.atoms, sep_val=2.5, scene_coords=False)
+            from chimerax.atom_search import structure_search_tree
+            tree = structure_search_tree(atom.structure, sep_val=2.5)
             test_atoms = tree.search(atom.coord, 5.0)
     else:
         test_atoms = []
@@ -120,92 +120,197 @@ def find_clashes(session, test_atoms,
         test_atoms = test_atoms.filter(test_atoms.structures.visibles == True)
         search_atoms = search_atoms.filter(search_atoms.structures.visibles == True)
 
+    if len(test_atoms) == 0 or len(search_atoms) == 0:
+        return {}
+
+    # Index all atoms of the structures involved so that atom properties,
+    # bonds and pairs can be handled as arrays.
+    from chimerax.atomic import concatenate, structure_atoms
+    structures = concatenate([test_atoms.unique_structures, search_atoms.unique_structures]).unique()
+    atoms = structure_atoms(structures)
+    t_index = atoms.indices(test_atoms)
+    s_index = atoms.indices(search_atoms)
+    xyz = atoms.scene_coords if use_scene_coords else atoms.coords
+    radii = atoms.radii
+    if distance_only:
+        cutoffs = distance_only
+    else:
+        cutoffs = radii[t_index] + (assumed_max_vdw - clash_threshold)
+
+    from chimerax.atom_search import CachedAtomSearchTree
+    tree = CachedAtomSearchTree(search_atoms, scene_coords=use_scene_coords)
+    i1, i2, d = _close_pairs(tree, xyz[t_index], cutoffs, xyz[s_index])
+    a1, a2 = t_index[i1], s_index[i2]
+
+    # Each atom pair once, with the lower index first.
+    from numpy import minimum, maximum, unique, int64
+    lo, hi = minimum(a1, a2), maximum(a1, a2)
+    keep = (lo != hi)
+    n = len(atoms)
+    pair_keys, first = unique(lo[keep].astype(int64)*n + hi[keep], return_index = True)
+    a1, a2, d = lo[keep][first], hi[keep][first], d[keep][first]
+
+    # Pair filters as masks.
+    keep = _bond_separation_mask(atoms, a1, a2, bond_separation)
+    if not intra_res:
+        rptr = atoms.residues.pointers
+        keep &= (rptr[a1] != rptr[a2])
+    sptr = atoms.structures.pointers
+    same_structure = (sptr[a1] == sptr[a2])
+    if not intra_mol:
+        fragment = _bonded_fragments(atoms)
+        keep &= (fragment[a1] != fragment[a2])
+    if not inter_model:
+        keep &= same_structure
+    if not intra_model:
+        keep &= ~same_structure
     if res_separation is not None:
-        chain_pos = {}
-        for s in test_atoms.unique_structures:
-            for c in s.chains:
-                for i, r in enumerate(c.residues):
-                    if r:
-                        chain_pos[r] = i
-    from chimerax.atom_search import AtomSearchTree
-    tree = AtomSearchTree(search_atoms, scene_coords=inter_model)
+        chain, pos = _chain_positions(atoms, test_atoms.unique_structures)
+        from numpy import absolute
+        keep &= ~((chain[a1] >= 0) & (chain[a1] == chain[a2])
+                  & (absolute(pos[a1] - pos[a2]) < res_separation))
+    if not inter_submodel:
+        keep &= ~_sibling_submodel_mask(structures, sptr, a1, a2)
+    a1, a2, d = a1[keep], a2[keep], d[keep]
+
+    if distance_only:
+        clash = distance_only - d
+        keep = (clash >= 0.0)
+    else:
+        clash = radii[a1] + radii[a2] - d
+        if hbond_allowance:
+            clash -= hbond_allowance * _donor_acceptor_mask(atoms, a1, a2)
+        keep = (clash >= clash_threshold)
+    a1, a2, clash = a1[keep], a2[keep], clash[keep]
+
     clashes = {}
-    from chimerax.geometry import distance
-    intra_mol_map = {}
-    for a in test_atoms:
-        if distance_only:
-            cutoff = distance_only
-        else:
-            cutoff = a.radius + assumed_max_vdw - clash_threshold
-        crd = a.scene_coord if use_scene_coords else a.coord
-        nearby = tree.search(crd, cutoff)
-        if not nearby:
-            continue
-        need_expansion = [a]
-        exclusions = set(need_expansion)
-        for i in range(bond_separation):
-            next_need = []
-            for expand in need_expansion:
-                for n in expand.neighbors:
-                    if n in exclusions:
-                        continue
-                    exclusions.add(n)
-                    next_need.append(n)
-            need_expansion = next_need
-        if not intra_mol and a not in intra_mol_map:
-            connected = set([a])
-            to_do = list(a.neighbors)
-            while to_do:
-                conn = to_do.pop()
-                connected.add(conn)
-                for nb in conn.neighbors:
-                    if nb not in connected:
-                        to_do.append(nb)
-            for ca in connected:
-                intra_mol_map[ca] = connected
-        for nb in nearby:
-            if nb in exclusions:
-                continue
-            if not intra_res and a.residue == nb.residue:
-                continue
-            if not intra_mol and nb in intra_mol_map[a]:
-                continue
-            if not inter_model and a.structure != nb.structure:
-                continue
-            if not intra_model and a.structure == nb.structure:
-                continue
-            if a in clashes and nb in clashes[a]:
-                continue
-            if res_separation is not None:
-                if a.residue.chain is not None and a.residue.chain == nb.residue.chain:
-                    if abs(chain_pos[a.residue] - chain_pos[nb.residue]) < res_separation:
-                        continue
-            if not inter_submodel \
-            and a.structure.id and nb.structure.id \
-            and a.structure.id[0] == nb.structure.id[0] \
-            and a.structure.id[:-1] == nb.structure.id[:-1] \
-            and a.structure.id[1:] != nb.structure.id[1:]:
-                continue
-            if use_scene_coords:
-                a_crd, nb_crd = a.scene_coord, nb.scene_coord
-            else:
-                a_crd, nb_crd = a.coord, nb.coord
-            if distance_only:
-                clash = distance_only - distance(a_crd, nb_crd)
-            else:
-                clash = a.radius + nb.radius - distance(a_crd, nb_crd)
-            if hbond_allowance and not distance_only:
-                if (_donor(a) and _acceptor(nb)) or (_donor(nb) and _acceptor(a)):
-                    clash -= hbond_allowance
-            if distance_only:
-                if clash < 0.0:
-                    continue
-            elif clash < clash_threshold:
-                continue
-            clashes.setdefault(a, {})[nb] = clash
-            clashes.setdefault(nb, {})[a] = clash
+    for at1, at2, c in zip(atoms[a1], atoms[a2], clash.tolist()):
+        clashes.setdefault(at1, {})[at2] = c
+        clashes.setdefault(at2, {})[at1] = c
     return clashes
 
+def _close_pairs(tree, xyz1, cutoffs, xyz2):
+    """Find pairs of points and tree atoms closer than a cutoff.  'cutoffs' is a
+       distance or an array with a distance for each point in xyz1.  'xyz2' are the
+       coordinates of the atoms the tree was made from, in the same coordinate system
+       as xyz1.  Returns index arrays i1 (into xyz1), i2 (into the tree atoms) and
+       the pair distances.
+    """
+    from numpy import arange, repeat, sqrt
+    offsets, i2 = tree.search_many(xyz1, cutoffs)
+    i1 = repeat(arange(len(xyz1)), offsets[1:] - offsets[:-1])
+    delta = xyz1[i1] - xyz2[i2]
+    return i1, i2, sqrt((delta*delta).sum(axis = 1))
+
+def _bond_graph(atoms):
+    """Return bonded neighbors of atoms in compressed sparse row form,
+       neighbors of atom i being indices[starts[i]:starts[i+1]]."""
+    from numpy import concatenate, argsort, bincount, cumsum, zeros, int64
+    b1, b2 = [], []
+    for s in atoms.unique_structures:
+        ba1, ba2 = s.bonds.atoms
+        b1.append(atoms.indices(ba1))
+        b2.append(atoms.indices(ba2))
+    b1, b2 = concatenate(b1).astype(int64), concatenate(b2).astype(int64)
+    ok = (b1 >= 0) & (b2 >= 0)
+    b1, b2 = b1[ok], b2[ok]
+    src, dst = concatenate((b1, b2)), concatenate((b2, b1))
+    order = argsort(src, kind = 'stable')
+    starts = zeros((len(atoms)+1,), int64)
+    starts[1:] = cumsum(bincount(src, minlength = len(atoms)))
+    return starts, dst[order]
+
+def _bond_separation_mask(atoms, a1, a2, bond_separation):
+    """Mask of atom pairs that are more than bond_separation bonds apart."""
+    from numpy import ones, unique, repeat, arange, cumsum, isin, concatenate, int64
+    if bond_separation <= 0 or len(a1) == 0:
+        return ones((len(a1),), bool)
+    starts, neighbors = _bond_graph(atoms)
+    n = len(atoms)
+    # Breadth first search from all first atoms at once, tracking (source, atom) pairs.
+    src = unique(a1).astype(int64)
+    node = src
+    reached = src*n + node
+    for step in range(bond_separation):
+        counts = starts[node+1] - starts[node]
+        total = counts.sum()
+        if total == 0:
+            break
+        run_start = repeat(cumsum(counts) - counts, counts)
+        nb = neighbors[repeat(starts[node], counts) + arange(total) - run_start]
+        src = repeat(src, counts)
+        keys = unique(src*n + nb)
+        keys = keys[~isin(keys, reached, assume_unique = True)]
+        reached = unique(concatenate((reached, keys)))
+        src, node = keys // n, keys % n
+    return ~isin(a1.astype(int64)*n + a2, reached)
+
+def _bonded_fragments(atoms):
+    """Label each atom with the smallest atom index in its covalently bonded fragment."""
+    from numpy import arange, minimum, int64
+    starts, neighbors = _bond_graph(atoms)
+    n = len(atoms)
+    src = arange(n, dtype = int64).repeat(starts[1:] - starts[:-1])
+    label = arange(n, dtype = int64)
+    while True:
+        new_label = label.copy()
+        minimum.at(new_label, src, label[neighbors])
+        new_label = new_label[new_label]	# pointer jumping
+        if (new_label == label).all():
+            return label
+        label = new_label
+
+def _chain_positions(atoms, structures):
+    """Return per-atom chain number (-1 if none) and residue position in that chain."""
+    from numpy import full, array, int64, argsort, searchsorted
+    rptr, cnum, rpos = [], [], []
+    chains = [c for s in structures for c in s.chains]
+    for ci, c in enumerate(chains):
+        for i, r in enumerate(c.residues):
+            if r:
+                rptr.append(r.cpp_pointer)
+                cnum.append(ci)
+                rpos.append(i)
+    chain = full((len(atoms),), -1, int64)
+    pos = full((len(atoms),), 0, int64)
+    if rptr:
+        rptr, cnum, rpos = array(rptr, int64), array(cnum, int64), array(rpos, int64)
+        order = argsort(rptr)
+        rptr, cnum, rpos = rptr[order], cnum[order], rpos[order]
+        aptr = atoms.residues.pointers.astype(int64)
+        i = searchsorted(rptr, aptr).clip(0, len(rptr)-1)
+        found = (rptr[i] == aptr)
+        chain[found] = cnum[i[found]]
+        pos[found] = rpos[i[found]]
+    return chain, pos
+
+def _sibling_submodel_mask(structures, sptr, a1, a2):
+    """Mask of atom pairs in different sibling submodels of the same parent model."""
+    from numpy import zeros, searchsorted
+    ns = len(structures)
+    sibling = zeros((ns, ns), bool)
+    for i, s1 in enumerate(structures):
+        for j, s2 in enumerate(structures):
+            id1, id2 = s1.id, s2.id
+            sibling[i,j] = (bool(id1) and bool(id2) and id1[0] == id2[0]
+                            and id1[:-1] == id2[:-1] and id1[1:] != id2[1:])
+    order = structures.pointers.argsort()
+    sorted_ptrs = structures.pointers[order]
+    s1 = order[searchsorted(sorted_ptrs, sptr[a1])]
+    s2 = order[searchsorted(sorted_ptrs, sptr[a2])]
+    return sibling[s1, s2]
+
+def _donor_acceptor_mask(atoms, a1, a2):
+    """Mask of atom pairs where one atom is a hydrogen bond donor and the other an acceptor."""
+    from numpy import unique, zeros, concatenate
+    involved = unique(concatenate((a1, a2)))
+    donor = zeros((len(atoms),), bool)
+    acceptor = zeros((len(atoms),), bool)
+    for i, a in zip(involved, atoms[involved]):
+        donor[i] = _donor(a)
+        acceptor[i] = _acceptor(a)
+    return (donor[a1] & acceptor[a2]) | (donor[a2] & acceptor[a1])
+
 from chimerax.atomic import Element
 hyd = Element.get_element(1)
 negative = set([Element.get_element(sym) for sym in ["N", "O", "S"]])
@@ -7,3 +7,97 @@ def test_clashes(test_production_session):
     assert (num_selected := len(selected_atoms(session)) == 43), "Finding clashes in  1www selected %d atoms instead of 43!" % num_selected
     run(session, "contacts #1 restrict both make false sel true")
     assert (num_selected := len(selected_atoms(session)) == 2581), "Finding contacts in 1www selected %d atoms instead of 2581!" % num_selected
+    # Repeat using the cached search tree, then after moving atoms so that the tree is rebuilt
+    from chimerax.atom_search import structure_search_tree
+    s = session.models[0]
+    tree = structure_search_tree(s)
+    run(session, "clashes #1 restrict both make false sel true")
+    assert (num_selected := len(selected_atoms(session)) == 43), "Repeated clashes in 1www selected %d atoms instead of 43!" % num_selected
+    assert structure_search_tree(s) is tree
+    run(session, "move x 5 atoms #1 ; move x -5 atoms #1")
+    run(session, "clashes #1 restrict both make false sel true")
+    assert (num_selected := len(selected_atoms(session)) == 43), "Clashes after moving 1www selected %d atoms instead of 43!" % num_selected
+    assert structure_search_tree(s) is not tree
+
+def test_cached_search_tree_changes(test_production_session):
+    from chimerax.atom_search import structure_search_tree
+    from chimerax.core.commands import run
+
+    session = test_production_session
+    s = run(session, "open 1www")[0]
+    tree = structure_search_tree(s)
+    assert structure_search_tree(s) is tree
+    assert structure_search_tree(s, sep_val=2.5) is not tree
+    # Coordinate changes not yet reported by the changes trigger still discard the tree
+    a = s.atoms[0]
+    xyz = a.coord + (50, 0, 0)
+    a.coord = xyz
+    tree2 = structure_search_tree(s)
+    assert tree2 is not tree
+    assert a in tree2.search(xyz, 0.1)
+
+def test_close_pairs(test_production_session):
+    from chimerax.atom_search import AtomSearchTree
+    from chimerax.clashes.clashes import _close_pairs
+    from chimerax.core.commands import run
+    from numpy import random, sqrt
+
+    session = test_production_session
+    s = run(session, "open 1www")[0]
+    atoms = s.atoms
+    xyz2 = atoms.coords
+    r = random.default_rng(7)
+    xyz1 = xyz2[r.integers(0, len(xyz2), 300)] + r.uniform(-2, 2, (300,3))
+    tree = AtomSearchTree(atoms, scene_coords=False)
+    d_all = sqrt(((xyz1[:,None,:] - xyz2[None,:,:])**2).sum(axis=2))
+    cutoffs = r.uniform(1, 5, len(xyz1))
+    for c in (3.5, cutoffs):
+        i1, i2, d = _close_pairs(tree, xyz1, c, xyz2)
+        expected = set(zip(*(d_all <= (c if isinstance(c, float) else c[:,None])).nonzero()))
+        assert set(zip(i1.tolist(), i2.tolist())) == expected
+        assert len(i1) == len(expected)
+        assert abs(d - d_all[i1, i2]).max() < 1e-6
+
+def test_bond_separation_mask(test_production_session):
+    from chimerax.clashes.clashes import _bond_separation_mask, _bonded_fragments
+    from chimerax.core.commands import run
+    from numpy import random, array
+
+    session = test_production_session
+    s = run(session, "open 1www")[0]
+    atoms = s.atoms
+    r = random.default_rng(5)
+    a1 = r.integers(0, len(atoms), 500)
+    # Pairs of bonded neighbors a few bonds apart plus random pairs.
+    near = []
+    for i in a1[:200]:
+        a = atoms[i]
+        for step in range(r.integers(0, 4)):
+            if a.neighbors:
+                a = a.neighbors[r.integers(0, len(a.neighbors))]
+        near.append(atoms.index(a))
+    a2 = array(near + r.integers(0, len(atoms), 300).tolist())
+
+    def bonds_apart(a, b, limit):
+        reached, frontier = {a}, [a]
+        for step in range(1, limit+1):
+            frontier = [n for f in frontier for n in f.neighbors if n not in reached]
+            reached.update(frontier)
+            if b in reached:
+                return step
+        return None
+    for bond_separation in (0, 1, 3, 4):
+        mask = _bond_separation_mask(atoms, a1, a2, bond_separation)
+        for i, j, m in zip(a1, a2, mask):
+            sep = 0 if i == j else bonds_apart(atoms[i], atoms[j], bond_separation)
+            far = (bond_separation <= 0 or sep is None)
+            assert m == far, "Atoms %s and %s separation %s" % (atoms[i], atoms[j], sep)
+
+    # Bonded atoms are in the same fragment, atoms with no path between them are not.
+    fragment = _bonded_fragments(atoms)
+    for i, j in zip(a1, a2):
+        if bonds_apart(atoms[i], atoms[j], 4) is not None:
+            assert fragment[i] == fragment[j]
+    waters = atoms.filter((atoms.residues.names == "HOH") & (atoms.element_names == "O"))
+    if len(waters) > 1:
+        assert fragment[atoms.index(waters[0])] != fragment[atoms.index(waters[1])]
@@ -0,0 +1,148 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+'''
+boxtree: Bounding box hierarchy
+===============================
+
+Find which of many boxes a line segment passes through, for example to
+pick triangles of large surfaces or instances of a drawing with many
+positions, without testing every box.
+'''
+
+class BoxTree:
+    '''
+    Hierarchy of axis-aligned bounding boxes.  Items are sorted along a
+    space filling (Morton) curve using their box centers and consecutive
+    groups of leaf_size items form the leaves.  Each higher level of the
+    tree bounds pairs of boxes from the level below.  Building the tree
+    and searching it use numpy operations on whole tree levels.
+    '''
+    def __init__(self, xyz_min, xyz_max, leaf_size = 32):
+        '''
+        Make the tree from N by 3 arrays of item box minimum and maximum
+        corners.  Items are identified by their index in these arrays.
+        '''
+        from numpy import arange, minimum, maximum, empty
+        n = len(xyz_min)
+        self.size = n
+        self.leaf_size = leaf_size
+        if n == 0:
+            self._order, self._levels = arange(0), []
+            return
+
+        order = _morton_order(0.5*(xyz_min + xyz_max))
+        self._order = order	# Item numbers sorted by leaf
+
+        starts = arange(0, n, leaf_size)
+        bmin = minimum.reduceat(xyz_min[order], starts, axis = 0)
+        bmax = maximum.reduceat(xyz_max[order], starts, axis = 0)
+        levels = [(bmin, bmax)]
+        while len(bmin) > 1:
+            m = len(bmin)
+            p = m//2
+            pmin, pmax = empty(((m+1)//2, 3), bmin.dtype), empty(((m+1)//2, 3), bmax.dtype)
+            minimum(bmin[0:2*p:2], bmin[1:2*p:2], out = pmin[:p])
+            maximum(bmax[0:2*p:2], bmax[1:2*p:2], out = pmax[:p])
+            if m % 2:
+                pmin[p], pmax[p] = bmin[m-1], bmax[m-1]
+            bmin, bmax = pmin, pmax
+            levels.append((bmin, bmax))
+        levels.reverse()
+        self._levels = levels	# Root level first.
+
+    def segment_leaves(self, xyz1, xyz2):
+        '''
+        Return the numbers of the leaves whose boxes the line segment from
+        xyz1 to xyz2 passes through and the fraction of the way along the
+        segment (0-1) where it enters each box, ordered by entry fraction.
+        '''
+        from numpy import array, concatenate, argsort, float64, int64, empty
+        if self.size == 0:
+            return array((), int64), empty((0,), float64)
+        p1, p2 = array(xyz1, float64), array(xyz2, float64)
+        nodes = array((0,), int64)
+        for li, (bmin, bmax) in enumerate(self._levels):
+            if li > 0:
+                c = 2*nodes
+                nodes = concatenate((c, c+1))
+                nodes = nodes[nodes < len(bmin)]
+            f, hit = _segment_box_entry(bmin[nodes], bmax[nodes], p1, p2)
+            nodes, f = nodes[hit], f[hit]
+            if len(nodes) == 0:
+                return nodes, empty((0,), float64)
+        o = argsort(f)
+        return nodes[o], f[o]
+
+    def leaf_items(self, leaves):
+        '''Return the item numbers in the specified leaves.'''
+        from numpy import arange, asarray
+        ls = self.leaf_size
+        i = (asarray(leaves)[:,None]*ls + arange(ls)).ravel()
+        return self._order[i[i < self.size]]
+
+    def segment_items(self, xyz1, xyz2):
+        '''
+        Return the numbers of items in leaves whose bounding boxes the line
+        segment from xyz1 to xyz2 passes through.  The caller needs to check
+        for intercepts with the returned items since a leaf box can include
+        items not near the segment.
+        '''
+        leaves, f = self.segment_leaves(xyz1, xyz2)
+        return self.leaf_items(leaves)
+
+def _morton_order(xyz, bits = 10):
+    '''Return indices that sort points along a Morton space filling curve.'''
+    from numpy import uint32, argsort
+    xmin = xyz.min(axis = 0)
+    size = xyz.max(axis = 0) - xmin
+    size[size == 0] = 1
+    scale = ((1 << bits) - 1) / size
+    q = ((xyz - xmin) * scale).astype(uint32)
+    code = _spread_bits(q[:,0]) | (_spread_bits(q[:,1]) << 1) | (_spread_bits(q[:,2]) << 2)
+    return argsort(code, kind = 'stable')
+
+def _spread_bits(x):
+    '''Insert 2 zero bits after each of the low 10 bits of uint32 values.'''
+    x = (x | (x << 16)) & 0x030000FF
+    x = (x | (x << 8)) & 0x0300F00F
+    x = (x | (x << 4)) & 0x030C30C3
+    x = (x | (x << 2)) & 0x09249249
+    return x
+
+def _segment_box_entry(bmin, bmax, xyz1, xyz2):
+    '''
+    Return the fraction along segment xyz1 to xyz2 where it enters each box
+    and a mask of which boxes the segment passes through.
+    '''
+    from numpy import minimum, maximum, errstate
+    d = xyz2 - xyz1
+    d[d == 0] = 1e-30	# Avoid 0/0 for segments parallel to box faces.
+    with errstate(over = 'ignore'):
+        t1 = (bmin - xyz1) / d
+        t2 = (bmax - xyz1) / d
+    tnear = minimum(t1, t2).max(axis = 1)
+    tfar = maximum(t1, t2).min(axis = 1)
+    hit = (tnear <= tfar) & (tfar >= 0) & (tnear <= 1)
+    return maximum(tnear, 0), hit
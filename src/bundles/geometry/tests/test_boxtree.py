@@ -0,0 +1,53 @@
+from chimerax.geometry import BoxTree
+
+def _segment_hits_boxes(bmin, bmax, xyz1, xyz2):
+    '''Brute force mask of boxes a line segment passes through using slab intervals.'''
+    from numpy import array, float64, ones, zeros, inf, minimum, maximum, abs
+    p1, d = array(xyz1, float64), array(xyz2, float64) - array(xyz1, float64)
+    n = len(bmin)
+    t0, t1 = zeros((n,)), ones((n,))
+    for a in range(3):
+        if abs(d[a]) < 1e-12:
+            inside = (bmin[:,a] <= p1[a]) & (p1[a] <= bmax[:,a])
+            t0[~inside], t1[~inside] = inf, -inf
+        else:
+            ta, tb = (bmin[:,a] - p1[a]) / d[a], (bmax[:,a] - p1[a]) / d[a]
+            t0, t1 = maximum(t0, minimum(ta, tb)), minimum(t1, maximum(ta, tb))
+    return t0 <= t1
+
+def _random_boxes(r, n, flat_axis = None):
+    center = r.uniform(-10, 10, (n,3))
+    half_size = r.uniform(0, 0.5, (n,3))
+    if flat_axis is not None:
+        half_size[:,flat_axis] = 0
+    return center - half_size, center + half_size
+
+def test_box_tree_segment_items():
+    from numpy import random
+    r = random.default_rng(5)
+    for trial in range(200):
+        bmin, bmax = _random_boxes(r, int(r.integers(1, 3000)),
+                                   flat_axis = (0 if trial % 5 == 0 else None))
+        tree = BoxTree(bmin, bmax, leaf_size = int(r.choice([1, 2, 7, 32])))
+        xyz1, xyz2 = r.uniform(-12, 12, 3), r.uniform(-12, 12, 3)
+        if trial % 7 == 0:
+            xyz2 = xyz1 + (0, 5, 0)	# Segment parallel to axes
+        items = tree.segment_items(xyz1, xyz2)
+        assert len(set(items)) == len(items)
+        hits = _segment_hits_boxes(bmin, bmax, xyz1, xyz2).nonzero()[0]
+        assert set(hits) <= set(items)
+
+def test_box_tree_segment_leaves_order():
+    from numpy import random, diff
+    r = random.default_rng(6)
+    bmin, bmax = _random_boxes(r, 5000)
+    tree = BoxTree(bmin, bmax)
+    for trial in range(20):
+        leaves, f = tree.segment_leaves(r.uniform(-12, 12, 3), r.uniform(-12, 12, 3))
+        assert len(leaves) == len(f)
+        assert (diff(f) >= 0).all() and ((f >= 0) & (f <= 1)).all()
+
+def test_box_tree_empty():
+    from numpy import zeros
+    tree = BoxTree(zeros((0,3)), zeros((0,3)))
+    assert len(tree.segment_items((0,0,0), (1,1,1))) == 0
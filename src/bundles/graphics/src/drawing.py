@@ -93,6 +93,9 @@ class Drawing:
 
         self._cached_geometry_bounds = None	# Triangles, positions not included. Local coords.
         self._cached_position_bounds = None	# Triangles including positions, children not included. Scene coords.
+        self._cached_bounds = None		# Tuple holding bounds including children. Scene coords.
+        self._cached_triangle_tree = None	# BoxTree of masked triangles for picking. Local coords.
+        self._cached_position_tree = None	# BoxTree of position bounds for picking. Parent coords.
 
         # Geometry and colors
         self._vertices = None		# N x 3 float32 numpy array
@@ -257,11 +260,21 @@ class Drawing:
             if sc:
                 self._cached_geometry_bounds = None
                 self._cached_position_bounds = None
+                self._cached_triangle_tree = None
+                self._cached_position_tree = None
             else:
                 sc = key in ('_displayed_positions', '_positions')
                 if sc:
                     self._cached_position_bounds = None
+                    if key == '_positions':
+                        self._cached_position_tree = None
+            if sc:
+                self._bounds_changed()
             self.redraw_needed(shape_changed=sc)
+        elif key == 'skip_bounds':
+            parent = getattr(self, 'parent', None)
+            if parent is not None:
+                parent._bounds_changed()
 
         super(Drawing, self).__setattr__(key, value)
 
@@ -317,7 +330,8 @@ class Drawing:
         d.parent = self
         if d.inherit_graphics_exemptions:
             d._inherit_graphics_exemptions()
-        d._displayed_scene_positions = None
+        d._scene_positions_changed()
+        self._bounds_changed()
         if self.display:
             self.redraw_needed(shape_changed=True)
 
@@ -340,6 +354,7 @@ class Drawing:
         d.parent = None
         if delete:
             d.delete()
+        self._bounds_changed()
         self.redraw_needed(shape_changed=True, highlight_changed=True)
 
     def remove_drawings(self, drawings, delete=True):
@@ -364,6 +379,7 @@ class Drawing:
         if delete:
             for d in drawings:
                 d.delete()
+        self._bounds_changed()
         self.redraw_needed(shape_changed=True, highlight_changed=True)
 
     def remove_all_drawings(self, delete=True):
@@ -540,6 +556,7 @@ class Drawing:
     def _scene_positions_changed(self):
         self._displayed_scene_positions = None
         self._cached_position_bounds = None
+        self._cached_bounds = None
         for c in self.child_drawings():
             c._scene_positions_changed()
 
@@ -973,12 +990,23 @@ class Drawing:
         The bounds of all displayed parts of a drawing and its children and all descendants, including
         instance positions, in scene coordinates.  Drawings with an attribute skip_bounds = True
         are not included.  The bounds are in the scene coordinate system.
+        The bounds are cached and the cache is cleared when the geometry, positions
+        or display of this drawing or a descendant changes.  The result is only
+        cached if the bounds of all included children were cached.
         '''
+        cached = self._cached_bounds
+        if cached is not None:
+            return cached[0]
 
         # Get child drawing bounds
         from chimerax.geometry.bounds import union_bounds, copies_bounding_box
-        dbounds = [d.bounds() for d in self.child_drawings()
-                   if d.display and not d.skip_bounds]
+        dbounds = []
+        cache = True
+        for d in self.child_drawings():
+            if d.display and not d.skip_bounds:
+                dbounds.append(d.bounds())
+                if d._cached_bounds is None:
+                    cache = False	# Subclass bounds() that is not cached.
         nc = len(dbounds)
         if nc == 0:
             cb = None
@@ -989,6 +1017,8 @@ class Drawing:
 
         # If this drawing has no geometry return child bounds.
         if self.empty_drawing():
+            if cache:
+                self._cached_bounds = (cb,)
             return cb
 
         # Get self bounds
@@ -1001,9 +1031,22 @@ class Drawing:
 
         # Combine child and self bounds
         b = pb if cb is None else union_bounds((pb, cb))
+        if cache:
+            self._cached_bounds = (b,)
 
         return b
 
+    def _bounds_changed(self):
+        '''
+        Clear the cached bounds of this drawing and of its parent drawings
+        since those include the bounds of this drawing.
+        '''
+        self._cached_bounds = None
+        d = self.parent
+        while d is not None and d._cached_bounds is not None:
+            d._cached_bounds = None
+            d = d.parent
+
     def geometry_bounds(self):
         '''
         Return the bounds of this drawing's geometry not including positions and
@@ -1092,25 +1135,48 @@ class Drawing:
         if self.empty_drawing():
             return None
         va = self.vertices
-        ta = self.masked_triangles
+        ta, tree = self._pick_triangles()
         if ta.shape[1] != 3:
             # TODO: Intercept only for triangles, not lines or points.
             return None
         p = None
-        from chimerax.geometry import closest_triangle_intercept
         if self.positions.is_identity():
-            fmin, tmin = closest_triangle_intercept(va, ta, mxyz1, mxyz2)
+            fmin, tmin = _closest_triangle_intercept(va, ta, tree, mxyz1, mxyz2)
             if fmin is not None:
                 p = PickedTriangle(fmin, tmin, 0, self)
         else:
             pos_nums = self.bounds_intercept_copies(self.geometry_bounds(), mxyz1, mxyz2)
             for i in pos_nums:
                 cxyz1, cxyz2 = self.positions[i].inverse() * (mxyz1, mxyz2)
-                fmin, tmin = closest_triangle_intercept(va, ta, cxyz1, cxyz2)
+                fmin, tmin = _closest_triangle_intercept(va, ta, tree, cxyz1, cxyz2)
                 if fmin is not None and (p is None or fmin < p.distance):
                     p = PickedTriangle(fmin, tmin, i, self)
         return p
 
+    _pick_tree_min_triangles = 65536
+    '''Use a bounding box tree for picking when a drawing has at least this many triangles.'''
+
+    def _pick_triangles(self):
+        '''
+        Return the masked triangles and a bounding box tree of them to quickly find
+        which triangles a pick line passes near.  Both are cached until the geometry
+        or triangle mask changes.  The tree is None for drawings with few triangles.
+        '''
+        ct = self._cached_triangle_tree
+        if ct is not None:
+            return ct
+        ta = self.masked_triangles
+        if ta.shape[1] != 3 or len(ta) < self._pick_tree_min_triangles:
+            return ta, None
+        from numpy import minimum, maximum
+        va = self.vertices
+        v0, v1, v2 = va[ta[:,0]], va[ta[:,1]], va[ta[:,2]]
+        tmin = minimum(minimum(v0, v1), v2)
+        tmax = maximum(maximum(v0, v1), v2)
+        from chimerax.geometry import BoxTree
+        ct = self._cached_triangle_tree = (ta, BoxTree(tmin, tmax))
+        return ct
+
     def bounds_intercept_copies(self, bounds, mxyz1, mxyz2):
         '''
         Return indices of positions where line segment intercepts displayed bounds.
@@ -1122,16 +1188,49 @@ class Drawing:
         if b is None:
             return []
         c, r = b.center(), b.radius()
-        pc = self.positions * c
         from chimerax.geometry import segment_intercepts_spheres
-        bi = segment_intercepts_spheres(pc, r, mxyz1, mxyz2)
-        dp = self._displayed_positions
-        if dp is not None:
-            from numpy import logical_and
-            logical_and(bi, dp, bi)
-        pos_nums = bi.nonzero()[0]
+        pt = self._position_tree(b)
+        if pt is None:
+            pc = self.positions * c
+            bi = segment_intercepts_spheres(pc, r, mxyz1, mxyz2)
+            dp = self._displayed_positions
+            if dp is not None:
+                from numpy import logical_and
+                logical_and(bi, dp, bi)
+            pos_nums = bi.nonzero()[0]
+        else:
+            tree, pc = pt
+            pnear = tree.segment_items(mxyz1, mxyz2)
+            pnear.sort()
+            dp = self._displayed_positions
+            if dp is not None:
+                pnear = pnear[dp[pnear]]
+            bi = segment_intercepts_spheres(pc[pnear], r, mxyz1, mxyz2)
+            pos_nums = pnear[bi]
         return pos_nums
 
+    _pick_tree_min_positions = 1024
+    '''Use a bounding box tree for picking when a drawing has at least this many positions.'''
+
+    def _position_tree(self, bounds):
+        '''
+        Bounding box tree of the bounding spheres of copies of the specified bounds
+        at each position to quickly find which copies a pick line passes near,
+        and the sphere centers.  Cached until the positions or geometry change.
+        Returns None for drawings with few positions.
+        '''
+        if len(self.positions) < self._pick_tree_min_positions:
+            return None
+        ct = self._cached_position_tree
+        if ct is not None and ct[0] is bounds:
+            return ct[1:]
+        pc = self.positions * bounds.center()
+        r = bounds.radius()
+        from chimerax.geometry import BoxTree
+        tree = BoxTree(pc - r, pc + r)
+        self._cached_position_tree = (bounds, tree, pc)
+        return tree, pc
+
     def planes_pick(self, planes, exclude=None):
         '''
         Find the displayed drawing instances bounded by the specified planes
@@ -1543,6 +1642,28 @@ class Drawing:
             print('%s</Transform>' % tab, file=stream)
         print('%s</Group>' % tab, file=stream)
 
+def _closest_triangle_intercept(va, ta, tree, xyz1, xyz2, leaf_batch = 16):
+    '''
+    Find the first triangle intercept along a line segment like
+    chimerax.geometry.closest_triangle_intercept() but only checking
+    triangles in leaves of the triangle bounding box tree that the
+    segment passes through.  Leaves are checked in the order the segment
+    enters them, stopping when a leaf starts beyond the closest intercept.
+    '''
+    from chimerax.geometry import closest_triangle_intercept
+    if tree is None:
+        return closest_triangle_intercept(va, ta, xyz1, xyz2)
+    leaves, entry = tree.segment_leaves(xyz1, xyz2)
+    fmin = tmin = None
+    for b in range(0, len(leaves), leaf_batch):
+        if fmin is not None and entry[b] > fmin:
+            break
+        t = tree.leaf_items(leaves[b:b+leaf_batch])
+        f, ti = closest_triangle_intercept(va, ta[t], xyz1, xyz2)
+        if f is not None and (fmin is None or f < fmin):
+            fmin, tmin = f, int(t[ti])
+    return fmin, tmin
+
 def opaque_count(rgba):
     if rgba is None:
         return 0
@@ -0,0 +1,196 @@
+from chimerax.graphics import Drawing
+
+def _height_field_geometry(n, height = 0.3):
+    '''Vertices and triangles of an n by n grid surface with wavy heights.'''
+    from numpy import indices, float32, int32, empty, sin, cos, arange
+    j, i = indices((n, n), float32)
+    va = empty((n*n, 3), float32)
+    va[:,0], va[:,1] = i.ravel(), j.ravel()
+    va[:,2] = height * sin(0.7 * va[:,0]) * cos(0.5 * va[:,1])
+    c = (arange(n-1)[None,:] + n*arange(n-1)[:,None]).ravel()	# Lower left corners of squares
+    ta = empty((2*len(c), 3), int32)
+    ta[0::2] = [(v, v+1, v+n+1) for v in c]
+    ta[1::2] = [(v, v+n+1, v+n) for v in c]
+    return va, ta
+
+def _picking_drawings(va, ta):
+    '''
+    Two drawings with the same geometry.  The second never uses bounding box trees
+    for picking so it gives brute force results to compare with.
+    '''
+    d = Drawing('surface')
+    d.set_geometry(va, None, ta)
+    b = Drawing('surface')
+    b.set_geometry(va, None, ta)
+    b._pick_tree_min_triangles = b._pick_tree_min_positions = 2**62
+    return d, b
+
+def _check_same_picks(d, b, segments):
+    npicks = 0
+    for xyz1, xyz2 in segments:
+        p, pb = d.first_intercept(xyz1, xyz2), b.first_intercept(xyz1, xyz2)
+        assert (p is None) == (pb is None)
+        if p is not None:
+            assert abs(p.distance - pb.distance) < 1e-6
+            assert p.description() == pb.description()
+            npicks += 1
+    return npicks
+
+def _random_segments(r, n, xy_max, z = 5):
+    from numpy import empty
+    xyz1, xyz2 = empty((n,3)), empty((n,3))
+    xyz1[:,:2], xyz2[:,:2] = r.uniform(-1, xy_max, (n,2)), r.uniform(-1, xy_max, (n,2))
+    xyz1[:,2], xyz2[:,2] = z, -z
+    return list(zip(xyz1, xyz2))
+
+def test_pick_triangle_tree():
+    from numpy import random
+    r = random.default_rng(7)
+    va, ta = _height_field_geometry(190)
+    assert len(ta) >= Drawing._pick_tree_min_triangles
+    d, b = _picking_drawings(va, ta)
+    segments = _random_segments(r, 100, 190)
+    assert _check_same_picks(d, b, segments) > 50
+    assert d._cached_triangle_tree is not None
+    assert b._cached_triangle_tree is None
+
+    # Changing vertices must discard the cached tree.
+    va2 = va.copy()
+    va2[:,2] += 0.5 * va2[:,0] / 190
+    d.set_geometry(va2, None, ta)
+    b.set_geometry(va2, None, ta)
+    assert d._cached_triangle_tree is None
+    _check_same_picks(d, b, segments)
+
+    # Changing the triangle mask must also discard the cached tree.
+    from numpy import arange
+    tmask = (arange(len(ta)) % 3 != 0)
+    d.triangle_mask = b.triangle_mask = tmask
+    assert d._cached_triangle_tree is None
+    _check_same_picks(d, b, segments)
+
+def test_pick_position_tree():
+    from numpy import random, zeros, float32, arange
+    from chimerax.geometry import Places
+    r = random.default_rng(8)
+    va, ta = _height_field_geometry(3, height = 0.2)
+    d, b = _picking_drawings(va, ta)
+    n = 40
+    shifts = zeros((n*n, 4), float32)
+    shifts[:,0], shifts[:,1], shifts[:,3] = 3 * (arange(n*n) % n), 3 * (arange(n*n) // n), 1
+    assert len(shifts) >= Drawing._pick_tree_min_positions
+    d.positions = b.positions = Places(shift_and_scale = shifts)
+    segments = _random_segments(r, 200, 3*n)
+    assert _check_same_picks(d, b, segments) > 50
+    assert d._cached_position_tree is not None
+
+    # Moving the copies must discard the cached tree.
+    shifts2 = shifts.copy()
+    shifts2[:,2] = r.uniform(-1, 1, len(shifts))
+    shifts2[:,:2] = shifts[::-1,:2]
+    d.positions = b.positions = Places(shift_and_scale = shifts2)
+    assert d._cached_position_tree is None
+    _check_same_picks(d, b, segments)
+
+    # Hidden copies are not picked.
+    dp = (arange(n*n) % 2 == 0)
+    d.display_positions = b.display_positions = dp
+    _check_same_picks(d, b, segments)
+
+    # Changing the geometry changes the copy bounds so the tree is rebuilt.
+    d.set_geometry(2*va, None, ta)
+    b.set_geometry(2*va, None, ta)
+    assert d._cached_position_tree is None
+    _check_same_picks(d, b, segments)
+
+def _scene_points(d, places, points):
+    if not d.display:
+        return
+    dp = d.display_positions
+    places = [p0 * p for p0 in places for p, shown in zip(d.positions, dp) if shown]
+    if not d.empty_drawing():
+        points.extend(p * d.vertices for p in places)
+    for c in d.child_drawings():
+        if not c.skip_bounds:
+            _scene_points(c, places, points)
+
+def _check_bounds(d):
+    '''Compare cached bounds with bounds computed from all displayed vertices.'''
+    from chimerax.geometry import identity
+    points = []
+    _scene_points(d, [identity()], points)
+    b = d.bounds()
+    if len(points) == 0:
+        assert b is None
+        return
+    from numpy import concatenate, allclose
+    xyz = concatenate(points)
+    assert b is not None
+    assert allclose(b.xyz_min, xyz.min(axis = 0), atol = 1e-5)
+    assert allclose(b.xyz_max, xyz.max(axis = 0), atol = 1e-5)
+    assert d._cached_bounds is not None
+
+def _triangle_drawing(name, offset):
+    from numpy import array, float32, int32
+    d = Drawing(name)
+    va = array(((0,0,0), (1,0,0), (0,2,0)), float32) + array(offset, float32)
+    d.set_geometry(va, None, array(((0,1,2),), int32))
+    return d
+
+def test_bounds_cache():
+    from chimerax.geometry import translation, Places
+    root = Drawing('root')
+    _check_bounds(root)
+
+    # Adding and removing children.
+    c1 = _triangle_drawing('c1', (0,0,0))
+    root.add_drawing(c1)
+    _check_bounds(root)
+    c2 = _triangle_drawing('c2', (10,-5,3))
+    root.add_drawing(c2)
+    _check_bounds(root)
+    g = _triangle_drawing('g', (-7,1,1))
+    c2.add_drawing(g)
+    _check_bounds(root)
+
+    # Changing child and grandchild vertices.
+    c1.set_geometry(3 * c1.vertices, None, c1.triangles)
+    _check_bounds(root)
+    g.set_geometry(g.vertices + (0,0,20), None, g.triangles)
+    _check_bounds(root)
+
+    # Changing child and parent positions.
+    c2.position = translation((0,4,-2))
+    _check_bounds(root)
+    root.position = translation((1,2,3))
+    _check_bounds(root)
+    g.positions = Places([translation((0,0,0)), translation((-20,0,0))])
+    _check_bounds(root)
+
+    # Toggling display of drawings and positions.
+    g.display = False
+    _check_bounds(root)
+    c2.display = False
+    _check_bounds(root)
+    g.display = c2.display = True
+    _check_bounds(root)
+    from numpy import array
+    g.display_positions = array((True, False))
+    _check_bounds(root)
+    g.display_positions = array((True, True))
+    _check_bounds(root)
+
+    # Drawings with skip_bounds are left out.
+    c2.skip_bounds = True
+    _check_bounds(root)
+    c2.skip_bounds = False
+    _check_bounds(root)
+
+    # Removing and reparenting children.
+    root.remove_drawing(c2, delete = False)
+    _check_bounds(root)
+    c1.add_drawing(c2)
+    _check_bounds(root)
+    c1.remove_drawing(c2)
+    root.remove_drawing(c1)
+    _check_bounds(root)
@@ -22,7 +22,8 @@
 # copies, of the software or any revisions or derivations thereof.
 # === UCSF ChimeraX Copyright ===
 
-from .hbond import find_hbonds, rec_dist_slop, rec_angle_slop, find_coordset_hbonds, flush_cache
+from .hbond import find_hbonds, rec_dist_slop, rec_angle_slop, find_coordset_hbonds, flush_cache, \
+    hbond_occupancy, hbond_lifetimes
 
 from chimerax.core.toolshed import BundleAPI
 
@@ -34,7 +34,8 @@ def cmd_hbonds(session, atoms, intra_model=True, inter_model=True, relax=True,
     reveal=False, naming_style=None, log=False, cache_DA=None,
     color=AtomicStructure.default_hbond_color, slop_color=BuiltinColors["dark orange"],
     show_dist=False, intra_res=True, intra_mol=True, dashes=None,
-    salt_only=False, name="hydrogen bonds", coordsets=True, select=False, update_group=False):
+    salt_only=False, name="hydrogen bonds", coordsets=True, select=False, update_group=False,
+    occupancy=False):
 
     """Wrapper to be called by command line.
 
@@ -84,6 +85,13 @@ def cmd_hbonds(session, atoms, intra_model=True, inter_model=True, relax=True,
     }
 
     doing_coordsets = coordsets and len(structures) == 1 and structures[0].num_coordsets > 1
+    if occupancy:
+        if not doing_coordsets:
+            session.logger.warning("H-bond occupancy is only reported for multiple coordsets"
+                " of a single structure; listing H-bonds instead")
+        elif not log and save_file is None:
+            session.logger.warning("H-bond occupancy is only reported with 'log true' or"
+                " 'saveFile'")
     if doing_coordsets:
         hb_func = find_coordset_hbonds
         struct_info = structures[0]
@@ -124,15 +132,16 @@ def cmd_hbonds(session, atoms, intra_model=True, inter_model=True, relax=True,
     else:
         output_info = (inter_model, intra_model, relax, dist_slop, angle_slop,
                                 structures, result, None)
+    output_func = _occupancy_output if occupancy and doing_coordsets else _file_output
     if log:
         import io
         buffer = io.StringIO()
         buffer.write("<pre>")
-        _file_output(buffer, output_info, naming_style)
+        output_func(buffer, output_info, naming_style)
         buffer.write("</pre>")
         session.logger.info(buffer.getvalue(), is_html=True)
     if save_file is not None:
-        _file_output(save_file, output_info, naming_style)
+        output_func(save_file, output_info, naming_style)
 
     if doing_coordsets:
         session.logger.status("%d hydrogen bonds found in %d coordsets" % (sum([len(hbs)
@@ -334,18 +343,7 @@ def _file_output(file_name, output_info, naming_style):
             dist_slop, angle_slop, structures, hbond_info, cs_ids = output_info
     from chimerax.io import open_output
     out_file = open_output(file_name, 'utf-8')
-    if inter_model:
-        out_file.write("Finding intermodel H-bonds\n")
-    if intra_model:
-        out_file.write("Finding intramodel H-bonds\n")
-    if relax_constraints:
-        out_file.write("Constraints relaxed by %g angstroms"
-            " and %d degrees\n" % (dist_slop, angle_slop))
-    else:
-        out_file.write("Using precise constraint criteria\n")
-    out_file.write("Models used:\n")
-    for s in structures:
-        out_file.write("\t%s %s\n" % (s.id_string, s.name))
+    _write_criteria(out_file, output_info)
     if cs_ids is None:
         hbond_lists = [hbond_info]
     else:
@@ -411,6 +409,47 @@ def _file_output(file_name, output_info, naming_style):
         # we opened it, so close it...
         out_file.close()
 
+def _write_criteria(out_file, output_info):
+    inter_model, intra_model, relax_constraints, \
+            dist_slop, angle_slop, structures, hbond_info, cs_ids = output_info
+    if inter_model:
+        out_file.write("Finding intermodel H-bonds\n")
+    if intra_model:
+        out_file.write("Finding intramodel H-bonds\n")
+    if relax_constraints:
+        out_file.write("Constraints relaxed by %g angstroms"
+            " and %d degrees\n" % (dist_slop, angle_slop))
+    else:
+        out_file.write("Using precise constraint criteria\n")
+    out_file.write("Models used:\n")
+    for s in structures:
+        out_file.write("\t%s %s\n" % (s.id_string, s.name))
+
+def _occupancy_output(file_name, output_info, naming_style):
+    hbond_lists, cs_ids = output_info[-2:]
+    from chimerax.io import open_output
+    out_file = open_output(file_name, 'utf-8')
+    _write_criteria(out_file, output_info)
+    from .hbond import hbond_occupancy, hbond_lifetimes
+    hbonds, present = hbond_occupancy(hbond_lists)
+    occupancy, formed, mean_lifetime, max_lifetime = hbond_lifetimes(present)
+    out_file.write("\n%d distinct H-bonds in %d coordsets" % (len(hbonds), len(cs_ids)))
+    out_file.write("\nH-bonds (donor, acceptor, occupancy %, times formed,"
+        " mean lifetime, max lifetime; lifetimes in coordsets):\n")
+    if hbonds:
+        style = None if naming_style == "residue" else naming_style
+        labels = [(don.string(style=style), acc.string(style=style)) for don, acc in hbonds]
+        dwidth = max([len(dl) for dl, al in labels])
+        awidth = max([len(al) for dl, al in labels])
+        # most persistent H-bonds first
+        for i in sorted(range(len(hbonds)), key=lambda i: (-occupancy[i], labels[i])):
+            out_file.write("%*s  %*s  %5.1f  %5d  %7.1f  %5d\n" % (0-dwidth, labels[i][0],
+                0-awidth, labels[i][1], 100 * occupancy[i], formed[i], mean_lifetime[i],
+                max_lifetime[i]))
+    if out_file != file_name:
+        # we opened it, so close it...
+        out_file.close()
+
 def donor_hyd(don, cs_id, acc_coord):
     from chimerax.geometry import distance
     dha = hyd = None
@@ -516,7 +555,8 @@ def register_command(command_name, logger):
                 ('retain_current', BoolArg), ('save_file', SaveFileNameArg), ('log', BoolArg),
                 ('naming_style', EnumOf(('simple', 'command', 'serial', 'residue'))), ('batch', BoolArg),
                 ('dashes', NonNegativeIntArg), ('salt_only', BoolArg), ('name', StringArg),
-                ('coordsets', BoolArg), ('select', BoolArg), ('update_group', BoolArg)],
+                ('coordsets', BoolArg), ('select', BoolArg), ('update_group', BoolArg),
+                ('occupancy', BoolArg)],
             synopsis = 'Find hydrogen bonds'
         )
         register('hbonds', desc, cmd_hbonds, logger=logger)
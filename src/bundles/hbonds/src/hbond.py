@@ -287,36 +287,171 @@ donor_params = [
 ]
 processed_donor_params = {}
 
+class _DonorAcceptorCache:
+    """Donors and acceptors found for each structure, kept between calls.  Typing for a
+       structure is discarded when the atomic "changes" trigger reports changed atom
+       types, elements or residue names or new atoms or bonds for it, or when its
+       atom or bond count shows that atoms or bonds were deleted.  Typing of all atoms
+       and typing restricted to particular donors/acceptors are kept separately.
+    """
+    def __init__(self):
+        from weakref import WeakKeyDictionary
+        self._typing = WeakKeyDictionary()	# structure -> (num atoms, num bonds, {key: typing})
+        from chimerax.atomic import get_triggers
+        get_triggers().add_handler('changes', self._atomic_changes)
+
+    def typing(self, structure, key, find_func):
+        """Return (atoms, data, truncated, problem) for the structure, computing it
+           with find_func() if not cached.  'key' identifies the kind of typing, the
+           slop values used and any restriction of the atoms typed."""
+        typings = self._structure_typings(structure)
+        if key not in typings:
+            typings[key] = find_func()
+        return typings[key]
+
+    def cached_typing(self, structure, key):
+        """Return the cached typing for key or None if there is none."""
+        return self._structure_typings(structure).get(key)
+
+    def _structure_typings(self, structure):
+        counts = (structure.num_atoms, structure.num_bonds)
+        try:
+            num_atoms, num_bonds, typings = self._typing[structure]
+        except KeyError:
+            typings = None
+        if typings is None or (num_atoms, num_bonds) != counts:
+            typings = {}
+            self._typing[structure] = counts + (typings,)
+        return typings
+
+    def discard_pending_changes(self, session):
+        """Changes are reported by the "changes" trigger once per frame.  Discard typing
+           of structures with changes since then that affect typing.  This reads the
+           change tracker without clearing it so no trigger handlers are run."""
+        if not self._typing:
+            return
+        ct = getattr(session, 'change_tracker', None)
+        if ct is None or not ct.changed:
+            return
+        global_changes, structure_changes = ct.changes
+        for s, s_changes in structure_changes.items():
+            if s not in self._typing:
+                continue
+            ac, bc, rc = [s_changes.get(c) for c in ('Atom', 'Bond', 'Residue')]
+            if (ac is not None and (len(ac.created) > 0 or 'idatm_type changed' in ac.reasons
+                    or 'element changed' in ac.reasons)) \
+            or (bc is not None and len(bc.created) > 0) \
+            or (rc is not None and 'name changed' in rc.reasons):
+                del self._typing[s]
+
+    def clear(self):
+        self._typing.clear()
+
+    def _atomic_changes(self, trigger_name, changes):
+        if not self._typing:
+            return
+        changed = set()
+        atom_reasons = changes.atom_reasons()
+        if 'idatm_type changed' in atom_reasons or 'element changed' in atom_reasons:
+            changed.update(changes.modified_atoms().unique_structures)
+        if 'name changed' in changes.residue_reasons():
+            changed.update(changes.modified_residues().unique_structures)
+        changed.update(changes.created_atoms(include_new_structures=False).unique_structures)
+        changed.update(changes.created_bonds(include_new_structures=False).unique_structures)
+        for s in changed:
+            self._typing.pop(s, None)
+
+_da_cache = None
+def _donor_acceptor_cache():
+    global _da_cache
+    if _da_cache is None:
+        _da_cache = _DonorAcceptorCache()
+    return _da_cache
+
 def flush_cache():
-    global _d_cache, _a_cache, _prev_limited
-    _prev_limited = _d_cache = _a_cache = None
-flush_cache()
+    """Discard the cached donor and acceptor typing of all structures"""
+    if _da_cache is not None:
+        _da_cache.clear()
 
 _problem = None
 _ring_funcs = [_ring5_asym_N, _ring6_asym_N, _ring5_O,
                 _ring5_sym_N, _ring6_sym_N, _ring5_NH, _ring6_aro_NH]
 
-def find_coordset_hbonds(session, structure, **kw):
+def find_coordset_hbonds(session, structure, *, status=True, **kw):
     """Like find_hbonds, but takes a single structure and cycles through its coordsets
        and finds the hydrogen bonds for each.  Returns a list of lists of hydrogen
        bonds, one list per coordset.
+
+       Donors and acceptors are typed once, for the first coordset, and reused for
+       the remaining coordsets.
     """
     hbonds = []
     cs_ids = structure.coordset_ids
+    keep_cache = kw.pop('cache_da', None)
     structure.active_coordset_change_notify = False
     cur_cs_id = structure.active_coordset_id
     try:
-        for cs_id in cs_ids:
+        for i, cs_id in enumerate(cs_ids):
+            if status:
+                session.logger.status("Finding hydrogen bonds in coordset %d of %d"
+                    % (i+1, len(cs_ids)), blank_after=0)
             structure.active_coordset_id = cs_id
-            kw['cache_da'] = cs_id != cs_ids[-1]
-            hbonds.append(find_hbonds(session, [structure], **kw))
+            hbonds.append(find_hbonds(session, [structure], cache_da=True, status=False, **kw))
     finally:
-        structure.active_coordset_od = cur_cs_id
+        structure.active_coordset_id = cur_cs_id
         structure.active_coordset_change_notify = True
+        if keep_cache is False:
+            flush_cache()
+        if status:
+            session.logger.status("")
     return hbonds
 
+def hbond_occupancy(hbond_lists):
+    """Given a list of hydrogen bond lists, one per coordset (as returned by
+       find_coordset_hbonds), return the distinct hydrogen bonds and a boolean
+       array with a row per coordset and a column per hydrogen bond that is True
+       where the hydrogen bond is present.
+    """
+    hbond_index = {}
+    rows = []
+    columns = []
+    for row, hbonds in enumerate(hbond_lists):
+        for hb in hbonds:
+            rows.append(row)
+            columns.append(hbond_index.setdefault(tuple(hb), len(hbond_index)))
+    from numpy import zeros, bool_
+    present = zeros((len(hbond_lists), len(hbond_index)), bool_)
+    present[rows, columns] = True
+    return list(hbond_index.keys()), present
+
+def hbond_lifetimes(present):
+    """Given a coordset by hydrogen bond presence array (as returned by
+       hbond_occupancy), return arrays with a value per hydrogen bond of:
+       the fraction of coordsets with the hydrogen bond present (occupancy),
+       the number of times it forms, and its mean and maximum lifetimes
+       in consecutive coordsets.
+    """
+    from numpy import zeros, int8, int64, float64, nonzero, bincount, maximum, errstate
+    nframes, nhb = present.shape
+    # Add an absent frame before and after so every run has a start and an end.
+    padded = zeros((nframes+2, nhb), int8)
+    padded[1:-1] = present
+    change = padded[1:].T - padded[:-1].T
+    start_hb, start_frame = nonzero(change == 1)
+    end_hb, end_frame = nonzero(change == -1)
+    lengths = end_frame - start_frame
+    formed = bincount(start_hb, minlength = nhb)
+    total = bincount(start_hb, weights = lengths, minlength = nhb)
+    max_lifetime = zeros((nhb,), int64)
+    maximum.at(max_lifetime, start_hb, lengths)
+    occupancy = total / nframes if nframes > 0 else zeros((nhb,), float64)
+    with errstate(invalid = 'ignore', divide = 'ignore'):
+        mean_lifetime = total / formed
+    mean_lifetime[formed == 0] = 0
+    return occupancy, formed, mean_lifetime, max_lifetime
+
 def find_hbonds(session, structures, *, inter_model=True, intra_model=True, donors=None, acceptors=None,
-        dist_slop=0.0, angle_slop=0.0, inter_submodel=False, cache_da=False, status=True):
+        dist_slop=0.0, angle_slop=0.0, inter_submodel=False, cache_da=None, status=True):
     """Hydrogen bond detection based on criteria in "Three-dimensional
         hydrogen-bond geometry and probability information from a
         crystal survey", J. Computer-Aided Molecular Design, 10 (1996),
@@ -329,8 +464,9 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
         Dist/angle slop are the amount that distances/angles are allowed to exceed
         the values given in the above reference and still be considered hydrogen bonds.
 
-        'cache_da' allows donors/acceptors in molecules to be cached if it is anticipated that
-        the same structures will be examined for H-bonds repeatedly (e.g. a dynamics trajectory).
+        Donors/acceptors found in each structure are cached and reused by later calls until
+        the atom types, atoms or bonds of the structure change.  If 'cache_da' is False,
+        donors/acceptors are found anew and the cache is neither used nor updated.
 
         If 'per_coordset' is True and 'structures' contains a single structure with multiple coordinate
         sets, then hydrogen bonds will be computed for each coordset.
@@ -358,28 +494,6 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             limited_acceptors = Atoms(acceptors)
         else:
             limited_acceptors = acceptors
-        global _d_cache, _a_cache, _prev_limited
-        if cache_da:
-            if limited_donors:
-                dIDs = [id(d) for d in limited_donors]
-                dIDs.sort()
-            else:
-                dIDs = None
-            if limited_acceptors:
-                aIDs = [id(a) for a in limited_acceptors]
-                aIDs.sort()
-            else:
-                aIDs = None
-            key = (dIDs, aIDs)
-            if _prev_limited and _prev_limited != key:
-                flush_cache()
-            _prev_limited = key
-            from weakref import WeakKeyDictionary
-            if _d_cache is None:
-                _d_cache = WeakKeyDictionary()
-                _a_cache = WeakKeyDictionary()
-        else:
-            flush_cache()
         global donor_params, acceptor_params
         global processed_donor_params, processed_acceptor_params
         global _compute_cache
@@ -388,6 +502,8 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
         _problem = None
         global _truncated
         _truncated = set()
+        if cache_da is not False and structures:
+            _donor_acceptor_cache().discard_pending_changes(session)
 
         bad_connectivities = 0
 
@@ -479,6 +595,7 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
         }
 
         from chimerax.atom_search import AtomSearchTree
+        hb_scene = (Atom._hb_coord == Atom.scene_coord)
         metal_coord = {}
         acc_trees = {}
         hbonds = []
@@ -486,24 +603,9 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
         for structure in structures:
             if status:
                 session.logger.status("Finding acceptors in model '%s'" % structure.name, blank_after=0)
-            if cache_da and structure in _a_cache and (dist_slop,
-                    angle_slop) in _a_cache[structure]:
-                acc_atoms = []
-                acc_data = []
-                for acc_atom, data in _a_cache[structure][(dist_slop, angle_slop)].items():
-                    if not acc_atom.deleted:
-                        acc_atoms.append(acc_atom)
-                        acc_data.append(data)
-            else:
-                acc_atoms, acc_data = _find_acceptors(structure, a_params,
-                        limited_acceptors, generic_acc_info)
-                if cache_da:
-                    cache = WeakKeyDictionary()
-                    for i in range(len(acc_atoms)):
-                        cache[acc_atoms[i]] = acc_data[i]
-                    if structure not in _a_cache:
-                        _a_cache[structure] = {}
-                    _a_cache[structure][(dist_slop, angle_slop)] = cache
+            acc_atoms, acc_data = _structure_typing(structure, ('acceptors', dist_slop, angle_slop),
+                lambda limited: _find_acceptors(structure, a_params, limited, generic_acc_info),
+                limited_acceptors, cache_da)
             #xyz = []
             has_sulfur[structure] = False
             for acc_atom in acc_atoms:
@@ -513,12 +615,14 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
                     has_sulfur[structure] = True
             if status:
                 session.logger.status("Building search tree of acceptor atoms", blank_after=0)
-            acc_tree = acc_trees[structure] = AtomSearchTree(acc_atoms, data=acc_data, sep_val=3.0,
-                scene_coords=(Atom._hb_coord == Atom.scene_coord))
+            acc_tree = AtomSearchTree(acc_atoms, sep_val=3.0, scene_coords=hb_scene)
+            acc_trees[structure] = (acc_tree, acc_data)
             metals = structure.atoms.filter(structure.atoms.elements.is_metal)
-            for metal in metals:
-                for acc_atom, geom_func, args in acc_tree.search(metal._hb_coord, 4.0):
-                    metal_coord.setdefault(acc_atom, []).append(metal)
+            offsets, indices = acc_tree.search_many(
+                metals.scene_coords if hb_scene else metals.coords, 4.0)
+            for metal, start, end in zip(metals, offsets[:-1], offsets[1:]):
+                for ai in indices[start:end]:
+                    metal_coord.setdefault(acc_atoms[ai], []).append(metal)
 
         if process_key not in processed_donor_params:
             # find max donor distances before they get squared..
@@ -559,46 +663,42 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             structure = structures[dmi]
             if status:
                 session.logger.status("Finding donors in model '%s'" % structure.name, blank_after=0)
-            if cache_da and structure in _d_cache and (dist_slop, angle_slop) in _d_cache[structure]:
-                don_atoms = []
-                don_data = []
-                for don_atom, data in _d_cache[structure][(dist_slop, angle_slop)].items():
-                    if not don_atom.deleted:
-                        don_atoms.append(don_atom)
-                        don_data.append(data)
-            else:
-                don_atoms, don_data = _find_donors(structure, d_params, limited_donors, generic_don_info)
-                if cache_da:
-                    cache = WeakKeyDictionary()
-                    for i in range(len(don_atoms)):
-                        cache[don_atoms[i]] = don_data[i]
-                    if structure not in _d_cache:
-                        _d_cache[structure] = {}
-                    _d_cache[structure][(dist_slop, angle_slop)] = cache
+            don_atoms, don_data = _structure_typing(structure, ('donors', dist_slop, angle_slop),
+                lambda limited: _find_donors(structure, d_params, limited, generic_don_info),
+                limited_donors, cache_da)
 
             if status:
                 session.logger.status("Matching donors in model '%s' to acceptors" % structure.name,
                     blank_after=0)
+            # search for the acceptors near all donors at once
+            don_collection = Atoms(don_atoms)
+            don_coords = don_collection.scene_coords if hb_scene else don_collection.coords
+            from numpy import array, float64
+            test_dists = array([dd[3] for dd in don_data], float64)
+            acc_searches = []
+            for acc_structure in structures:
+                if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
+                    continue
+                if not inter_submodel \
+                and acc_structure.id and structure.id \
+                and acc_structure.id[0] == structure.id[0] \
+                and acc_structure.id[:-1] == structure.id[:-1] \
+                and acc_structure.id[1:] != structure.id[1:]:
+                    continue
+                if has_sulfur[acc_structure]:
+                    from .common_geom import SULFUR_COMP
+                    tds = test_dists + SULFUR_COMP
+                else:
+                    tds = test_dists
+                acc_tree, acc_data = acc_trees[acc_structure]
+                offsets, indices = acc_tree.search_many(don_coords, tds)
+                acc_searches.append((acc_data, offsets, indices))
             for i in range(len(don_atoms)):
                 donor_atom = don_atoms[i]
                 geom_type, tau_sym, arg_list, test_dist = don_data[i]
                 donor_hyds = hyd_positions(donor_atom)
-                coord = donor_atom._hb_coord
-                for acc_structure in structures:
-                    if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
-                        continue
-                    if not inter_submodel \
-                    and acc_structure.id and structure.id \
-                    and acc_structure.id[0] == structure.id[0] \
-                    and acc_structure.id[:-1] == structure.id[:-1] \
-                    and acc_structure.id[1:] != structure.id[1:]:
-                        continue
-                    if has_sulfur[acc_structure]:
-                        from .common_geom import SULFUR_COMP
-                        td = test_dist + SULFUR_COMP
-                    else:
-                        td = test_dist
-                    accs = acc_trees[acc_structure].search(coord, td)
+                for acc_data, offsets, indices in acc_searches:
+                    accs = [acc_data[ai] for ai in indices[offsets[i]:offsets[i+1]]]
                     if verbose:
                         session.logger.info("Found %d possible acceptors for donor %s:"
                             % (len(accs), donor_atom))
@@ -759,6 +859,54 @@ def _process_arg_tuple(arg_tuple, dist_slop, angle_slop):
             new_args.append(arg)
     return new_args  # returns list
 
+def _structure_typing(structure, key, find_func, limited, cache_da):
+    """Return donors or acceptors (atoms and data lists) of the structure, as found by
+       find_func(limited) or taken from the donor/acceptor cache.  Only 'limited' atoms
+       are typed if given, unless typing of all atoms is already cached in which case
+       that typing is restricted to them.  Truncated atoms and typing conflicts are
+       noted in _truncated and _problem as if find_func() had been run.
+    """
+    def typing(limited = None):
+        global _problem, _truncated
+        problem, truncated = _problem, _truncated
+        _problem, _truncated = None, set()
+        try:
+            atoms, data = find_func(limited)
+            return atoms, data, _truncated, _problem
+        finally:
+            _problem, _truncated = problem, truncated
+
+    if limited:
+        limited = limited.filter(limited.structures.pointers == structure.cpp_pointer)
+        if len(limited) == 0:
+            return [], []
+    if cache_da is False:
+        atoms, data, truncated, problem = typing(set(limited) if limited else None)
+    elif not limited:
+        atoms, data, truncated, problem = _donor_acceptor_cache().typing(structure, key, typing)
+    else:
+        cache = _donor_acceptor_cache()
+        all_typing = cache.cached_typing(structure, key)
+        if all_typing is None:
+            # Type only the requested atoms instead of the whole structure.
+            limited_key = key + (limited.pointers.tobytes(),)
+            atoms, data, truncated, problem = cache.typing(structure, limited_key,
+                lambda: typing(set(limited)))
+        else:
+            atoms, data, truncated, problem = all_typing
+            from chimerax.atomic import Atoms
+            keep = Atoms(atoms).mask(limited)
+            atoms = [a for a, k in zip(atoms, keep) if k]
+            data = [d for d, k in zip(data, keep) if k]
+            truncated = [a for a in truncated if a in limited]
+            if problem and problem[1] not in limited:
+                problem = None
+    global _problem
+    if problem:
+        _problem = problem
+    _truncated.update(truncated)
+    return atoms, data
+
 def _find_acceptors(structure, a_params, limited_acceptors, generic_acc_info):
     global _problem
     global _truncated
@@ -5,3 +5,65 @@ def test_hbonds(test_production_session):
     run(session, "open 2gbp")
     hbonds = find_hbonds(session, session.models[:1], dist_slop=rec_dist_slop, angle_slop=rec_angle_slop)
     assert(len(hbonds) == 793), "Expected to find 793 hbonds in 2gbp; actually found %d" % len(hbonds)
+
+def test_hbond_lifetimes():
+    from chimerax.hbonds import hbond_occupancy, hbond_lifetimes
+    hb_lists = [[("d1", "a1")], [("d1", "a1"), ("d2", "a2")], [], [("d2", "a2")],
+        [("d1", "a1"), ("d2", "a2")]]
+    hbonds, present = hbond_occupancy(hb_lists)
+    assert hbonds == [("d1", "a1"), ("d2", "a2")]
+    occupancy, formed, mean_lifetime, max_lifetime = hbond_lifetimes(present)
+    assert list(occupancy) == [0.6, 0.6]
+    assert list(formed) == [2, 2]
+    assert list(mean_lifetime) == [1.5, 1.5]
+    assert list(max_lifetime) == [2, 2]
+
+def test_hbonds_typing_cache(test_production_session):
+    from chimerax.core.commands import run
+    from chimerax.hbonds import find_hbonds, flush_cache
+    session = test_production_session
+    run(session, "open 2gbp")
+    s = session.models[0]
+    flush_cache()
+    uncached = find_hbonds(session, [s], cache_da=False)
+    first = find_hbonds(session, [s])
+    again = find_hbonds(session, [s])
+    assert len(first) == len(again) == len(uncached)
+    # Deleting atoms must discard the cached typing for the structure.
+    run(session, "delete solvent")
+    after = find_hbonds(session, [s])
+    assert len(after) == len(find_hbonds(session, [s], cache_da=False))
+    assert not [a for hb in after for a in hb if a.deleted]
+
+def test_hbonds_restricted_typing_cache(test_production_session):
+    from chimerax.core.commands import run
+    from chimerax.hbonds import find_hbonds, flush_cache
+    session = test_production_session
+    run(session, "open 2gbp")
+    s = session.models[0]
+    donors = s.residues[:50].atoms
+    flush_cache()
+    uncached = find_hbonds(session, [s], donors=donors, cache_da=False)
+    # Restricted typing, then restriction of the typing of all atoms.
+    restricted = find_hbonds(session, [s], donors=donors)
+    find_hbonds(session, [s])
+    from_all = find_hbonds(session, [s], donors=donors)
+    hbset = lambda hbonds: set(tuple(hb) for hb in hbonds)
+    assert hbset(uncached) == hbset(restricted) == hbset(from_all)
+    # Changes made in the same command are seen without flushing the changes trigger.
+    s.atoms[0].idatm_type = 'Npl'
+    assert len(find_hbonds(session, [s])) == len(find_hbonds(session, [s], cache_da=False))
+
+def test_hbonds_occupancy_warning(test_production_session):
+    from chimerax.core.commands import run
+    session = test_production_session
+    run(session, "open 2gbp")
+    warnings = []
+    orig_warning = session.logger.warning
+    session.logger.warning = lambda msg, *args, **kw: warnings.append(msg)
+    try:
+        # A single coordset has no occupancy to report.
+        run(session, "hbonds #1 occupancy true log true")
+        assert [w for w in warnings if "occupancy" in w]
+    finally:
+        session.logger.warning = orig_warning
@@ -30,6 +30,11 @@
 //
 #include <math.h>		// use sqrt()
 
+#include <algorithm>		// use std::min()
+#include <new>			// use std::bad_alloc, std::nothrow
+#include <thread>		// use std::thread
+#include <vector>		// use std::vector
+
 #include "contourdata.h"	// use cube_edges, triangle_table
 
 namespace Contour_Calculation
@@ -65,6 +70,7 @@ public:
   void array(T *carray);  // Contiguous array.
   void reset() // Does not deallocate memory.
     { ae = anxt = afsize = 0; a = (alist ? alist[0] : a); }
+  void compact(); // Free unused memory.  Array cannot grow or be reset after this.
 private:
   BIndex bsize; // block size in elements.
   BIndex ae;    // elements in last block in use.
@@ -123,6 +129,27 @@ template <class T> void Block_Array<T>::next_block()
   this->afsize = (anxt - 1) * bsize;
 }
 
+// ----------------------------------------------------------------------------
+// Free blocks not in use and shrink the last block to the elements it holds.
+// Arrays for many small surface pieces otherwise each keep a mostly unused
+// block.  If memory for the smaller block cannot be allocated the last block
+// is kept.
+//
+template <class T> void Block_Array<T>::compact()
+{
+  for (BIndex k = anxt ; k < ale ; ++k)
+    delete [] alist[k];
+  this->ale = anxt;
+  T *b;
+  if (anxt > 0 && ae < bsize && (b = new (std::nothrow) T[ae]) != NULL)
+    {
+      for (BIndex j = 0 ; j < ae ; ++j)
+	b[j] = a[j];
+      delete [] alist[anxt-1];
+      alist[anxt-1] = this->a = b;
+    }
+}
+
 // ----------------------------------------------------------------------------
 //
 template <class T> void Block_Array<T>::array(T *carray)
@@ -246,17 +273,31 @@ private:
 
 // ----------------------------------------------------------------------------
 //
+// The surface is computed between grid planes k2_begin and k2_end along axis 2.
+// Vertices lying in those two planes are recorded so that surfaces of adjacent
+// slabs can share them.  If block_ranges is given it holds the minimum and
+// maximum value for each block of block_size^3 grid points, extended by one grid
+// point on each side, and blocks the threshold does not cross are skipped.
+//
 template <class Data_Type>
 class CSurface : public Contour_Surface
 {
 public:
   CSurface(const Data_Type *grid, const AIndex size[3], const GIndex stride[3],
-	   float threshold, bool cap_faces, BIndex block_size)
+	   float threshold, bool cap_faces, BIndex block_size,
+	   AIndex k2_begin = 0, AIndex k2_end = 0,
+	   const float *block_ranges = NULL, AIndex range_block_size = 0)
     : grid(grid), threshold(threshold), cap_faces(cap_faces),
+      k2_begin(k2_begin), k2_end(k2_end > k2_begin ? k2_end : size[2]-1),
+      block_ranges(block_ranges), range_block_size(range_block_size),
       vxyz(3*block_size), tvi(3*block_size)
     {
       for (int a = 0 ; a < 3 ; ++a)
-	{ this->size[a] = size[a]; this->stride[a] = stride[a]; }
+	{
+	  this->size[a] = size[a]; this->stride[a] = stride[a];
+	  this->range_blocks[a] = (range_block_size > 0 ?
+				   (size[a] + range_block_size - 1) / range_block_size : 0);
+	}
       compute_surface();
     }
   virtual ~CSurface() {}
@@ -266,6 +307,15 @@ public:
   virtual void geometry(float *vertex_xyz, VIndex *triangle_vertex_indices)
     { vxyz.array(vertex_xyz); tvi.array(triangle_vertex_indices); }
   virtual void normals(float *normals);
+  void compact() { vxyz.compact(); tvi.compact(); }  // Free unused array memory.
+
+  void vertex(VIndex v, float *xyz)
+    { BIndex v3 = 3*v;
+      xyz[0] = vxyz.element(v3); xyz[1] = vxyz.element(v3+1); xyz[2] = vxyz.element(v3+2); }
+  VIndex triangle_corner(TIndex c) { return tvi.element(c); }
+  void vertex_normal(VIndex v, float *normal);
+
+  std::vector<VIndex> begin_plane_vertices, end_plane_vertices;
 
 private:
   const Data_Type *grid;
@@ -273,12 +323,17 @@ private:
   GIndex stride[3];
   float threshold;
   bool cap_faces;
+  AIndex k2_begin, k2_end;
+  const float *block_ranges;
+  AIndex range_block_size, range_blocks[3];
   Block_Array<float> vxyz;
   Block_Array<VIndex> tvi;
 
   void compute_surface();
   void mark_plane_edge_cuts(Grid_Cell_List &gp0, Grid_Cell_List &gp1, AIndex k2);
-  void mark_interior_edge_cuts(AIndex k1, AIndex k2,
+  void mark_interior_row_edge_cuts(AIndex k1, AIndex k2,
+				   Grid_Cell_List &gp0, Grid_Cell_List &gp1);
+  void mark_interior_edge_cuts(AIndex k0_begin, AIndex k0_end, AIndex k1, AIndex k2,
 			       Grid_Cell_List &gp0, Grid_Cell_List &gp1);
   void mark_boundary_edge_cuts(AIndex k0, AIndex k1, AIndex k2,
 			       Grid_Cell_List &gp0, Grid_Cell_List &gp1);
@@ -308,6 +363,15 @@ private:
   VIndex create_vertex(float x, float y, float z)
     { vxyz.add_element(x); vxyz.add_element(y); vxyz.add_element(z);
       return vertex_count()-1; }
+  VIndex create_plane_vertex(float x, float y, AIndex k2)
+    {
+      VIndex v = create_vertex(x, y, k2);
+      if (k2 == k2_begin && k2_begin > 0)
+	begin_plane_vertices.push_back(v);
+      if (k2 == k2_end && k2_end+1 < size[2])
+	end_plane_vertices.push_back(v);
+      return v;
+    }
   void make_cap_triangles(int face, int bits, VIndex *cell_vertices)
     {
       int fbits = face_corner_bits[face][bits];
@@ -331,12 +395,12 @@ void CSurface<Data_Type>::compute_surface()
   // grid cells, triangulate grid cells between two z grid planes.
   //
   Grid_Cell_List gcp0(size[0]-1, size[1]-1), gcp1(size[0]-1, size[1]-1);
-  for (AIndex k2 = 0 ; k2 < size[2] ; ++k2)
+  for (AIndex k2 = k2_begin ; k2 <= k2_end ; ++k2)
     {
       Grid_Cell_List &gp0 = (k2%2 ? gcp1 : gcp0), &gp1 = (k2%2 ? gcp0 : gcp1);
       mark_plane_edge_cuts(gp0, gp1, k2);
 
-      if (k2 > 0)
+      if (k2 > k2_begin)
 	make_triangles(gp0, k2);	// Create triangles for cell plane.
 
       gp0.finished_plane();
@@ -362,7 +426,7 @@ void CSurface<Data_Type>::mark_plane_edge_cuts(Grid_Cell_List &gp0,
 	  if (k0_size > 0)
 	    mark_boundary_edge_cuts(0, k1, k2, gp0, gp1);
 
-	  mark_interior_edge_cuts(k1, k2, gp0, gp1);
+	  mark_interior_row_edge_cuts(k1, k2, gp0, gp1);
 	  
 	  if (k0_size > 1)
 	    mark_boundary_edge_cuts(k0_size-1, k1, k2, gp0, gp1);
@@ -371,20 +435,50 @@ void CSurface<Data_Type>::mark_plane_edge_cuts(Grid_Cell_List &gp0,
 }
 
 // ----------------------------------------------------------------------------
-// Compute edge cut vertices in 6 directions along axis 0 not including the
-// axis end points.  k1 and k2 axis values must not be on the boundary.
+// Compute edge cut vertices along axis 0 not including the axis end points,
+// skipping blocks of grid points where the threshold is not crossed.
+//
+template <class Data_Type>
+inline void CSurface<Data_Type>::mark_interior_row_edge_cuts(AIndex k1, AIndex k2,
+							     Grid_Cell_List &gp0,
+							     Grid_Cell_List &gp1)
+{
+  AIndex k0_max = (size[0] > 0 ? size[0]-1 : 0);
+  if (block_ranges == NULL)
+    {
+      mark_interior_edge_cuts(1, k0_max, k1, k2, gp0, gp1);
+      return;
+    }
+
+  AIndex bs = range_block_size;
+  const float *r = block_ranges + 2*(((GIndex)(k2/bs)*range_blocks[1] + k1/bs)*range_blocks[0]);
+  for (AIndex k0 = 1 ; k0 < k0_max ; )
+    {
+      AIndex b0 = k0/bs, k0_end = std::min((b0+1)*bs, k0_max);
+      // Values over the block and its neighbor grid points are all below
+      // or all above threshold, so no edges are cut.
+      if (!(r[2*b0+1] < threshold || r[2*b0] > threshold))
+	mark_interior_edge_cuts(k0, k0_end, k1, k2, gp0, gp1);
+      k0 = k0_end;
+    }
+}
+
+// ----------------------------------------------------------------------------
+// Compute edge cut vertices in 6 directions along axis 0 for k0_begin <= k0 < k0_end.
+// k0, k1 and k2 axis values must not be on the boundary.
 // This allows faster processing since boundary checking is not needed.
 //
 template <class Data_Type>
-inline void CSurface<Data_Type>::mark_interior_edge_cuts(AIndex k1, AIndex k2,
+inline void CSurface<Data_Type>::mark_interior_edge_cuts(AIndex k0_begin, AIndex k0_end,
+							 AIndex k1, AIndex k2,
 							 Grid_Cell_List &gp0,
 							 Grid_Cell_List &gp1)
 {
   GIndex step0 = stride[0], step1 = stride[1], step2 = stride[2];
-  AIndex k0_max = (size[0] > 0 ? size[0]-1 : 0);
+  bool below = (k2 > k2_begin), above = (k2 < k2_end);
 
-  const Data_Type *g = grid + step2*(GIndex)k2 + step1*(GIndex)k1 + step0;
-  for (AIndex k0 = 1 ; k0 < k0_max ; ++k0, g += step0)
+  const Data_Type *g = grid + step2*(GIndex)k2 + step1*(GIndex)k1 + step0*(GIndex)k0_begin;
+  for (AIndex k0 = k0_begin ; k0 < k0_end ; ++k0, g += step0)
     {
       float v0 = *g - threshold;
       if (!(v0 < 0))
@@ -400,9 +494,9 @@ inline void CSurface<Data_Type>::mark_interior_edge_cuts(AIndex k1, AIndex k2,
 	    add_vertex_axis_1(k0, k1-1, k2, k1-v0/(v0-v1), gp0, gp1);
 	  if ((v1 = (float)(g[step1]-threshold)) < 0)
 	    add_vertex_axis_1(k0, k1, k2, k1+v0/(v0-v1), gp0, gp1);
-	  if ((v1 = (float)(*(g-step2)-threshold)) < 0)
+	  if (below && (v1 = (float)(*(g-step2)-threshold)) < 0)
 	    add_vertex_axis_2(k0, k1, k2-v0/(v0-v1), gp0);
-	  if ((v1 = (float)(g[step2]-threshold)) < 0)
+	  if (above && (v1 = (float)(g[step2]-threshold)) < 0)
 	    add_vertex_axis_2(k0, k1, k2+v0/(v0-v1), gp1);
 	}
     }
@@ -465,22 +559,22 @@ inline void CSurface<Data_Type>::mark_boundary_edge_cuts(AIndex k0, AIndex k1, A
   else if (cap_faces)
     bv = add_cap_vertex_r1(bv, k0, k1, k2, gp0, gp1);
 
-  // Axis 2 left
-  if (k2 > 0)
+  // Axis 2 left.  Edges outside planes k2_begin to k2_end are left to adjacent slabs.
+  if (k2 > k2_begin)
     {
       if ((v1 = (float)(*(g-step2)-threshold)) < 0)
 	add_vertex_axis_2(k0, k1, k2-v0/(v0-v1), gp0);
     }
-  else if (cap_faces)
+  else if (k2 == 0 && cap_faces)
     bv = add_cap_vertex_l2(bv, k0, k1, k2, gp1);
 
   // Axis 2 right
-  if (k2+1 < k2_size)
+  if (k2 < k2_end)
     {
       if ((v1 = (float)(g[step2]-threshold)) < 0)
 	add_vertex_axis_2(k0, k1, k2+v0/(v0-v1), gp1);
     }
-  else if (cap_faces)
+  else if (k2+1 == k2_size && cap_faces)
     bv = add_cap_vertex_r2(bv, k0, k1, k2, gp0);
 }
 
@@ -491,7 +585,7 @@ template <class Data_Type>
 void CSurface<Data_Type>::add_vertex_axis_0(AIndex k0, AIndex k1, AIndex k2, float x0,
 					    Grid_Cell_List &gp0, Grid_Cell_List &gp1)
 {
-  VIndex v = create_vertex(x0,k1,k2);
+  VIndex v = create_plane_vertex(x0,k1,k2);
   gp0.set_edge_vertex(k0, k1-1, EDGE_A11, v);
   gp0.set_edge_vertex(k0, k1, EDGE_A01, v);
   gp1.set_edge_vertex(k0, k1-1, EDGE_A10, v);
@@ -505,7 +599,7 @@ template <class Data_Type>
 void CSurface<Data_Type>::add_vertex_axis_1(AIndex k0, AIndex k1, AIndex k2, float x1,
 					    Grid_Cell_List &gp0, Grid_Cell_List &gp1)
 {
-  VIndex v = create_vertex(k0,x1,k2);
+  VIndex v = create_plane_vertex(k0,x1,k2);
   gp0.set_edge_vertex(k0-1, k1, EDGE_1A1, v);
   gp0.set_edge_vertex(k0, k1, EDGE_0A1, v);
   gp1.set_edge_vertex(k0-1, k1, EDGE_1A0, v);
@@ -535,7 +629,7 @@ VIndex CSurface<Data_Type>::add_cap_vertex_l0(VIndex bv,
 					     Grid_Cell_List &gp1)
 {
   if (bv == no_vertex)
-    bv = create_vertex(k0,k1,k2);
+    bv = create_plane_vertex(k0,k1,k2);
   gp0.set_corner_vertex(k0, k1-1, CORNER_011, bv);
   gp0.set_corner_vertex(k0, k1, CORNER_001, bv);
   gp1.set_corner_vertex(k0, k1-1, CORNER_010, bv);
@@ -551,7 +645,7 @@ VIndex CSurface<Data_Type>::add_cap_vertex_r0(VIndex bv,
 					     Grid_Cell_List &gp1)
 {
   if (bv == no_vertex)
-    bv = create_vertex(k0,k1,k2);
+    bv = create_plane_vertex(k0,k1,k2);
   gp0.set_corner_vertex(k0-1, k1-1, CORNER_111, bv);
   gp0.set_corner_vertex(k0-1, k1, CORNER_101, bv);
   gp1.set_corner_vertex(k0-1, k1-1, CORNER_110, bv);
@@ -568,7 +662,7 @@ VIndex CSurface<Data_Type>::add_cap_vertex_l1(VIndex bv,
 					     Grid_Cell_List &gp1)
 {
   if (bv == no_vertex)
-    bv = create_vertex(k0,k1,k2);
+    bv = create_plane_vertex(k0,k1,k2);
   gp0.set_corner_vertex(k0-1, k1, CORNER_101, bv);
   gp0.set_corner_vertex(k0, k1, CORNER_001, bv);
   gp1.set_corner_vertex(k0-1, k1, CORNER_100, bv);
@@ -585,7 +679,7 @@ VIndex CSurface<Data_Type>::add_cap_vertex_r1(VIndex bv,
 					     Grid_Cell_List &gp1)
 {
   if (bv == no_vertex)
-    bv = create_vertex(k0,k1,k2);
+    bv = create_plane_vertex(k0,k1,k2);
   gp0.set_corner_vertex(k0-1, k1-1, CORNER_111, bv);
   gp0.set_corner_vertex(k0, k1-1, CORNER_011, bv);
   gp1.set_corner_vertex(k0-1, k1-1, CORNER_110, bv);
@@ -601,7 +695,7 @@ VIndex CSurface<Data_Type>::add_cap_vertex_l2(VIndex bv,
 					     Grid_Cell_List &gp1)
 {
   if (bv == no_vertex)
-    bv = create_vertex(k0,k1,k2);
+    bv = create_plane_vertex(k0,k1,k2);
   gp1.set_corner_vertex(k0-1, k1-1, CORNER_110, bv);
   gp1.set_corner_vertex(k0-1, k1, CORNER_100, bv);
   gp1.set_corner_vertex(k0, k1-1, CORNER_010, bv);
@@ -617,7 +711,7 @@ VIndex CSurface<Data_Type>::add_cap_vertex_r2(VIndex bv,
 					     Grid_Cell_List &gp0)
 {
   if (bv == no_vertex)
-    bv = create_vertex(k0,k1,k2);
+    bv = create_plane_vertex(k0,k1,k2);
   gp0.set_corner_vertex(k0-1, k1-1, CORNER_111, bv);
   gp0.set_corner_vertex(k0-1, k1, CORNER_101, bv);
   gp0.set_corner_vertex(k0, k1-1, CORNER_011, bv);
@@ -680,51 +774,352 @@ void CSurface<Data_Type>::make_triangles(Grid_Cell_List &gp0, AIndex k2)
 template <class Data_Type>
 void CSurface<Data_Type>::normals(float *normals)
 {
-  int64_t n3 = 3*vertex_count();
-  for (int64_t v = 0 ; v < n3 ; v += 3)
-    {  
-      float x[3] = {vxyz.element(v), vxyz.element(v+1), vxyz.element(v+2)};
-      float g[3];
+  VIndex n = vertex_count();
+  for (VIndex v = 0 ; v < n ; ++v)
+    vertex_normal(v, normals + 3*(int64_t)v);
+}
+
+// ----------------------------------------------------------------------------
+//
+template <class Data_Type>
+void CSurface<Data_Type>::vertex_normal(VIndex v, float *normal)
+{
+  float x[3];
+  vertex(v, x);
+  float g[3];
+  for (int a = 0 ; a < 3 ; ++a)
+    g[a] = (x[a] == 0 ? 1 : (x[a] == size[a]-1 ? -1 : 0));
+  if (g[0] == 0 && g[1] == 0 && g[2] == 0)
+    {
+      AIndex i[3] = {(AIndex)x[0], (AIndex)x[1], (AIndex)x[2]};
+      const Data_Type *ga = grid + stride[0]*(GIndex)i[0]+stride[1]*(GIndex)i[1]+stride[2]*(GIndex)i[2];
+      const Data_Type *gb = ga;
+      AIndex off[3] = {0,0,0};
+      float fb = 0;
+      for (int a = 0 ; a < 3 ; ++a)
+	if ((fb = x[a]-i[a]) > 0) { off[a] = 1; gb = ga + stride[a]; break; }
+      float fa = 1-fb;
       for (int a = 0 ; a < 3 ; ++a)
-	g[a] = (x[a] == 0 ? 1 : (x[a] == size[a]-1 ? -1 : 0));
-      if (g[0] == 0 && g[1] == 0 && g[2] == 0)
 	{
-	  AIndex i[3] = {(AIndex)x[0], (AIndex)x[1], (AIndex)x[2]};
-	  const Data_Type *ga = grid + stride[0]*(GIndex)i[0]+stride[1]*(GIndex)i[1]+stride[2]*(GIndex)i[2];
-	  const Data_Type *gb = ga;
-	  AIndex off[3] = {0,0,0};
-	  float fb = 0;
-	  for (int a = 0 ; a < 3 ; ++a)
-	    if ((fb = x[a]-i[a]) > 0) { off[a] = 1; gb = ga + stride[a]; break; }
-	  float fa = 1-fb;
+	  GIndex s = stride[a];
+	  AIndex ia = i[a], ib = ia + off[a];
+	  g[a] = (fa*(ia == 0 ?
+		      2*((float)ga[s]-ga[0]) : (float)ga[s]-*(ga-s))
+		  + fb*(ib == 0 ? 2*((float)gb[s]-gb[0]) :
+			ib == size[a]-1 ? 2*((float)gb[0]-*(gb-s))
+			: (float)gb[s]-*(gb-s)));
+	}
+      float norm = sqrt(g[0]*g[0] + g[1]*g[1] + g[2]*g[2]);
+      if (norm > 0)
+	{ g[0] /= norm; g[1] /= norm; g[2] /= norm;}
+    }
+  normal[0] = -g[0]; normal[1] = -g[1]; normal[2] = -g[2];
+}
+
+// ----------------------------------------------------------------------------
+// Surface pieces computed for slabs of grid planes along axis 2 combined into
+// one surface.  Vertices in the grid plane shared by adjacent slabs are made
+// by both slabs in the same order, so the duplicates of the upper slab are
+// replaced by the vertices of the lower slab.
+//
+template <class Data_Type>
+class Slab_Surface : public Contour_Surface
+{
+public:
+  Slab_Surface(std::vector<CSurface<Data_Type> *> &slabs) : slabs(slabs)
+    {
+      VIndex nv = 0;
+      ntri = 0;
+      vertex_map.resize(slabs.size());
+      for (size_t s = 0 ; s < slabs.size() ; ++s)
+	{
+	  CSurface<Data_Type> *cs = slabs[s];
+	  VIndex snv = cs->vertex_count();
+	  std::vector<VIndex> &vmap = vertex_map[s];
+	  vmap.resize(snv);
+	  std::vector<VIndex> &shared = cs->begin_plane_vertices;
+	  size_t i = 0;
+	  for (VIndex v = 0 ; v < snv ; ++v)
+	    if (s > 0 && i < shared.size() && shared[i] == v)
+	      vmap[v] = vertex_map[s-1][slabs[s-1]->end_plane_vertices[i++]];
+	    else
+	      vmap[v] = nv++;
+	  ntri += cs->triangle_count();
+	}
+      nvert = nv;
+    }
+  virtual ~Slab_Surface()
+    {
+      for (size_t s = 0 ; s < slabs.size() ; ++s)
+	delete slabs[s];
+    }
+
+  virtual VIndex vertex_count() { return nvert; }
+  virtual TIndex triangle_count() { return ntri; }
+  virtual void geometry(float *vertex_xyz, VIndex *triangle_vertex_indices)
+    {
+      int64_t t3 = 0;
+      for (size_t s = 0 ; s < slabs.size() ; ++s)
+	{
+	  CSurface<Data_Type> *cs = slabs[s];
+	  std::vector<VIndex> &vmap = vertex_map[s];
+	  VIndex snv = cs->vertex_count();
+	  for (VIndex v = 0 ; v < snv ; ++v)
+	    cs->vertex(v, vertex_xyz + 3*(int64_t)vmap[v]);
+	  int64_t sn3 = 3*(int64_t)cs->triangle_count();
+	  for (int64_t c = 0 ; c < sn3 ; ++c)
+	    triangle_vertex_indices[t3++] = vmap[cs->triangle_corner(c)];
+	}
+    }
+  virtual void normals(float *normals)
+    {
+      for (size_t s = 0 ; s < slabs.size() ; ++s)
+	{
+	  CSurface<Data_Type> *cs = slabs[s];
+	  std::vector<VIndex> &vmap = vertex_map[s];
+	  VIndex snv = cs->vertex_count();
+	  for (VIndex v = 0 ; v < snv ; ++v)
+	    cs->vertex_normal(v, normals + 3*(int64_t)vmap[v]);
+	}
+    }
+
+private:
+  std::vector<CSurface<Data_Type> *> slabs;
+  std::vector<std::vector<VIndex> > vertex_map;	// Slab vertex to surface vertex.
+  VIndex nvert;
+  TIndex ntri;
+};
+
+// ----------------------------------------------------------------------------
+//
+template <class Data_Type>
+void compute_slab_surface(const Data_Type *grid, const AIndex size[3],
+			  const GIndex stride[3], float threshold, bool cap_faces,
+			  BIndex block_size, AIndex k2_begin, AIndex k2_end,
+			  const float *block_ranges, AIndex range_block_size,
+			  CSurface<Data_Type> **cs)
+{
+  try
+    {
+      *cs = new CSurface<Data_Type>(grid, size, stride, threshold, cap_faces, block_size,
+				    k2_begin, k2_end, block_ranges, range_block_size);
+    }
+  catch (std::bad_alloc&)
+    {
+      *cs = NULL;
+    }
+}
+
+// ----------------------------------------------------------------------------
+// The grid is split into slabs along axis 2 computed in num_threads threads.
+//
+template <class Data_Type>
+Contour_Surface *surface(const Data_Type *grid, const AIndex size[3],
+			 const GIndex stride[3], float threshold, bool cap_faces,
+			 int num_threads, const float *block_ranges,
+			 AIndex range_block_size)
+{
+  if (block_ranges == NULL || range_block_size <= 0)
+    { block_ranges = NULL; range_block_size = 0; }
+  AIndex cell_planes = (size[2] > 1 ? size[2]-1 : 1);
+  AIndex nslab = (num_threads > 1 ? std::min((AIndex)num_threads, cell_planes) : 1);
+  if (nslab <= 1)
+    return new CSurface<Data_Type>(grid, size, stride, threshold, cap_faces,
+				   CONTOUR_ARRAY_BLOCK_SIZE, 0, 0,
+				   block_ranges, range_block_size);
+
+  BIndex block_size = std::max(CONTOUR_ARRAY_BLOCK_SIZE / (BIndex)nslab, (BIndex)65536);
+  std::vector<CSurface<Data_Type> *> slabs(nslab, NULL);
+  std::vector<std::thread> threads;
+  for (AIndex s = 0 ; s < nslab ; ++s)
+    {
+      AIndex k2_begin = (s * cell_planes) / nslab, k2_end = ((s+1) * cell_planes) / nslab;
+      threads.push_back(std::thread(compute_slab_surface<Data_Type>, grid, size, stride,
+				    threshold, cap_faces, block_size, k2_begin, k2_end,
+				    block_ranges, range_block_size, &slabs[s]));
+    }
+  for (auto &th: threads)
+    th.join();
+
+  for (AIndex s = 0 ; s < nslab ; ++s)
+    if (slabs[s] == NULL)
+      {
+	for (AIndex s2 = 0 ; s2 < nslab ; ++s2)
+	  delete slabs[s2];
+	throw std::bad_alloc();
+      }
+  return new Slab_Surface<Data_Type>(slabs);
+}
+
+// ----------------------------------------------------------------------------
+// Contour pieces piece_begin <= p < piece_end at all thresholds.  Piece p
+// spans grid planes k2[p] to k2[p+1] and its surface for threshold t is put
+// in pieces[p*num_thresholds + t].  Each surface is compacted since all pieces
+// are kept until they are joined.  If memory runs out the remaining surfaces
+// are left NULL.
+//
+template <class Data_Type>
+void compute_piece_surfaces(const Data_Type *grid, const AIndex size[3],
+			    const GIndex stride[3], const float *thresholds,
+			    int num_thresholds, bool cap_faces, BIndex block_size,
+			    const AIndex *k2, AIndex piece_begin, AIndex piece_end,
+			    const float *block_ranges, AIndex range_block_size,
+			    CSurface<Data_Type> **pieces)
+{
+  try
+    {
+      for (AIndex p = piece_begin ; p < piece_end ; ++p)
+	for (int t = 0 ; t < num_thresholds ; ++t)
+	  {
+	    CSurface<Data_Type> *cs =
+	      new CSurface<Data_Type>(grid, size, stride, thresholds[t], cap_faces, block_size,
+				      k2[p], k2[p+1], block_ranges, range_block_size);
+	    cs->compact();
+	    pieces[p*num_thresholds + t] = cs;
+	  }
+    }
+  catch (std::bad_alloc&)
+    {
+    }
+}
+
+// ----------------------------------------------------------------------------
+// Pieces of about this many bytes of grid data are contoured at all thresholds
+// before moving to the next piece so the grid values stay in cache.
+//
+#define CONTOUR_PIECE_BYTES 16777216
+
+// ----------------------------------------------------------------------------
+//
+template <class Data_Type>
+void surfaces(const Data_Type *grid, const AIndex size[3], const GIndex stride[3],
+	      const float *thresholds, int num_thresholds, bool cap_faces,
+	      Contour_Surface **surfs, int num_threads,
+	      const float *block_ranges, AIndex range_block_size)
+{
+  if (num_thresholds <= 0)
+    return;
+  if (block_ranges == NULL || range_block_size <= 0)
+    { block_ranges = NULL; range_block_size = 0; }
+
+  // Split grid into pieces of whole cell planes along axis 2.
+  AIndex npieces = 1;
+  std::vector<AIndex> k2(2, 0);
+  if (size[2] > 2)
+    {
+      AIndex cell_planes = size[2]-1;
+      GIndex plane_bytes = (GIndex)size[0] * size[1] * sizeof(Data_Type);
+      AIndex piece_planes = (AIndex)std::max((GIndex)1, (GIndex)CONTOUR_PIECE_BYTES / std::max(plane_bytes, (GIndex)1));
+      npieces = std::max((cell_planes + piece_planes - 1) / piece_planes, (AIndex)std::max(num_threads, 1));
+      npieces = std::min(npieces, cell_planes);
+      k2.resize(npieces+1);
+      for (AIndex p = 0 ; p <= npieces ; ++p)
+	k2[p] = (p * cell_planes) / npieces;
+    }
+
+  BIndex block_size = std::max(CONTOUR_ARRAY_BLOCK_SIZE / (BIndex)npieces, (BIndex)16384);
+  std::vector<CSurface<Data_Type> *> pieces(npieces*num_thresholds, NULL);
+  AIndex nthreads = std::min((AIndex)std::max(num_threads, 1), npieces);
+  if (nthreads == 1)
+    compute_piece_surfaces(grid, size, stride, thresholds, num_thresholds, cap_faces,
+			   block_size, k2.data(), 0, npieces, block_ranges, range_block_size,
+			   pieces.data());
+  else
+    {
+      std::vector<std::thread> threads;
+      for (AIndex t = 0 ; t < nthreads ; ++t)
+	threads.push_back(std::thread(compute_piece_surfaces<Data_Type>, grid, size, stride,
+				      thresholds, num_thresholds, cap_faces, block_size, k2.data(),
+				      (t * npieces) / nthreads, ((t+1) * npieces) / nthreads,
+				      block_ranges, range_block_size, pieces.data()));
+      for (auto &th: threads)
+	th.join();
+    }
+
+  for (size_t i = 0 ; i < pieces.size() ; ++i)
+    if (pieces[i] == NULL)
+      {
+	for (size_t i2 = 0 ; i2 < pieces.size() ; ++i2)
+	  delete pieces[i2];
+	throw std::bad_alloc();
+      }
+
+  // Join the pieces for each threshold.
+  for (int t = 0 ; t < num_thresholds ; ++t)
+    if (npieces == 1)
+      surfs[t] = pieces[t];
+    else
+      {
+	std::vector<CSurface<Data_Type> *> slabs(npieces);
+	for (AIndex p = 0 ; p < npieces ; ++p)
+	  slabs[p] = pieces[p*num_thresholds + t];
+	surfs[t] = new Slab_Surface<Data_Type>(slabs);
+      }
+}
+
+// ----------------------------------------------------------------------------
+// Find the minimum and maximum value in each block of block_size^3 grid points
+// extended by one grid point on each side, for skipping blocks in surface().
+// NaN values give the block infinite range so it is never skipped.  Ranges are
+// in k2, k1, k0 block order, minimum then maximum.
+//
+template <class Data_Type>
+void block_value_ranges(const Data_Type *grid, const AIndex size[3], const GIndex stride[3],
+			AIndex block_size, AIndex k2_begin, AIndex k2_end, float *ranges)
+{
+  AIndex nb[3];
+  for (int a = 0 ; a < 3 ; ++a)
+    nb[a] = (size[a] + block_size - 1) / block_size;
+  for (AIndex b2 = k2_begin ; b2 < k2_end ; ++b2)
+    for (AIndex b1 = 0 ; b1 < nb[1] ; ++b1)
+      for (AIndex b0 = 0 ; b0 < nb[0] ; ++b0)
+	{
+	  AIndex b[3] = {b0, b1, b2}, kmin[3], kmax[3];
 	  for (int a = 0 ; a < 3 ; ++a)
 	    {
-	      GIndex s = stride[a];
-	      AIndex ia = i[a], ib = ia + off[a];
-	      g[a] = (fa*(ia == 0 ?
-			  2*((float)ga[s]-ga[0]) : (float)ga[s]-*(ga-s))
-		      + fb*(ib == 0 ? 2*((float)gb[s]-gb[0]) :
-			    ib == size[a]-1 ? 2*((float)gb[0]-*(gb-s))
-			    : (float)gb[s]-*(gb-s)));
+	      kmin[a] = (b[a] > 0 ? b[a]*block_size - 1 : 0);
+	      kmax[a] = std::min((b[a]+1)*block_size + 1, size[a]);
 	    }
-	  float norm = sqrt(g[0]*g[0] + g[1]*g[1] + g[2]*g[2]);
-	  if (norm > 0)
-	    { g[0] /= norm; g[1] /= norm; g[2] /= norm;}
+	  float vmin = INFINITY, vmax = -INFINITY;
+	  for (AIndex k2 = kmin[2] ; k2 < kmax[2] ; ++k2)
+	    for (AIndex k1 = kmin[1] ; k1 < kmax[1] ; ++k1)
+	      {
+		const Data_Type *g = grid + stride[2]*(GIndex)k2 + stride[1]*(GIndex)k1;
+		for (AIndex k0 = kmin[0] ; k0 < kmax[0] ; ++k0)
+		  {
+		    float v = (float)g[stride[0]*(GIndex)k0];
+		    if (v < vmin) vmin = v;
+		    if (v > vmax) vmax = v;
+		    if (v != v) { vmin = -INFINITY; vmax = INFINITY; }
+		  }
+	      }
+	  float *r = ranges + 2*(((GIndex)b2*nb[1] + b1)*nb[0] + b0);
+	  r[0] = vmin; r[1] = vmax;
 	}
-      normals[v] = -g[0]; normals[v+1] = -g[1]; normals[v+2] = -g[2];
-    }
 }
 
 // ----------------------------------------------------------------------------
 //
 template <class Data_Type>
-Contour_Surface *surface(const Data_Type *grid, const AIndex size[3],
-			 const GIndex stride[3], float threshold, bool cap_faces)
+void block_value_ranges(const Data_Type *grid, const AIndex size[3], const GIndex stride[3],
+			AIndex block_size, float *ranges, int num_threads)
 {
-  CSurface<Data_Type> *cs = new CSurface<Data_Type>(grid, size, stride,
-						    threshold, cap_faces,
-						    CONTOUR_ARRAY_BLOCK_SIZE);
-  return cs;
+  AIndex nb2 = (size[2] + block_size - 1) / block_size;
+  AIndex nt = (num_threads > 1 ? std::min((AIndex)num_threads, nb2) : 1);
+  if (nt <= 1)
+    {
+      block_value_ranges(grid, size, stride, block_size, 0, nb2, ranges);
+      return;
+    }
+  std::vector<std::thread> threads;
+  for (AIndex t = 0 ; t < nt ; ++t)
+    threads.push_back(std::thread(static_cast<void (*)(const Data_Type *, const AIndex *,
+							const GIndex *, AIndex, AIndex, AIndex, float *)>
+				  (block_value_ranges<Data_Type>),
+				  grid, size, stride, block_size,
+				  (t*nb2)/nt, ((t+1)*nb2)/nt, ranges));
+  for (auto &th: threads)
+    th.join();
 }
 
 } // end of namespace Contour_Calculation
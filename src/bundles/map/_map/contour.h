@@ -57,10 +57,39 @@ class Contour_Surface
   virtual void normals(float *normals) = 0;
 };
 
+//
+// The grid is split into slabs computed in num_threads threads.  Optional
+// block_ranges from block_value_ranges() let blocks of the grid that the
+// threshold does not cross be skipped.
+//
 template <class Data_Type>
 Contour_Surface *surface(const Data_Type *grid,
 			 const AIndex size[3], const GIndex stride[3],
-			 float threshold, bool cap_faces);
+			 float threshold, bool cap_faces, int num_threads = 1,
+			 const float *block_ranges = NULL, AIndex range_block_size = 0);
+
+//
+// Surfaces for several thresholds computed in one pass over the grid.  The
+// grid is split into pieces of a few planes along axis 2 and each piece is
+// contoured at every threshold before moving to the next piece, so grid
+// values are read from memory once.  Pieces are divided among num_threads
+// threads.  One surface per threshold is returned in surfs.
+//
+template <class Data_Type>
+void surfaces(const Data_Type *grid, const AIndex size[3], const GIndex stride[3],
+	      const float *thresholds, int num_thresholds, bool cap_faces,
+	      Contour_Surface **surfs, int num_threads = 1,
+	      const float *block_ranges = NULL, AIndex range_block_size = 0);
+
+//
+// Minimum and maximum grid value for each block of block_size^3 grid points
+// extended by one grid point on each side.  The ranges array has size
+// 2 * nb2 * nb1 * nb0 where nbk = ceil(size[k]/block_size).
+//
+template <class Data_Type>
+void block_value_ranges(const Data_Type *grid,
+			const AIndex size[3], const GIndex stride[3],
+			AIndex block_size, float *ranges, int num_threads = 1);
 }
 
 #include "contour.cpp"	// template implementation
@@ -31,6 +31,8 @@
 
 // #include <iostream>			// use std:cerr for debugging
 
+#include <vector>			// use std::vector
+
 #include "contour.h"			// use surface()
 #include <arrays/pythonarray.h>		// use array_from_python()
 #include <arrays/rcarray.h>		// use call_template_function()
@@ -41,7 +43,9 @@ using namespace Contour_Calculation;
 //
 template <class T>
 void contour_surface(const Reference_Counted_Array::Array<T> &data,
-		     float threshold, bool cap_faces, Contour_Surface **cs)
+		     float threshold, bool cap_faces, int num_threads,
+		     const float *block_ranges, int block_size,
+		     Contour_Surface **cs)
 {
   // contouring calculation requires contiguous array
   // put sizes in x, y, z order
@@ -49,31 +53,79 @@ void contour_surface(const Reference_Counted_Array::Array<T> &data,
 		    static_cast<AIndex>(data.size(1)),
 		    static_cast<AIndex>(data.size(0))};
   GIndex stride[3] = {data.stride(2), data.stride(1), data.stride(0)};
-  *cs = surface(data.values(), size, stride, threshold, cap_faces);
+  *cs = surface(data.values(), size, stride, threshold, cap_faces,
+		num_threads, block_ranges, block_size);
+}
+
+// ----------------------------------------------------------------------------
+// Check that block ranges array has shape (nb2, nb1, nb0, 2) for data
+// with blocks of size block_size.
+//
+static bool check_block_ranges(const Numeric_Array &data, const FArray &ranges, int block_size)
+{
+  if (block_size <= 0)
+    {
+      PyErr_SetString(PyExc_ValueError, "Block size must be positive");
+      return false;
+    }
+  for (int a = 0 ; a < 3 ; ++a)
+    if (ranges.size(a) != (data.size(a) + block_size - 1) / block_size)
+      {
+	PyErr_Format(PyExc_ValueError,
+		     "Block ranges array axis %d size %lld does not match data size %lld with block size %d",
+		     a, (long long)ranges.size(a), (long long)data.size(a), block_size);
+	return false;
+      }
+  if (ranges.size(3) != 2)
+    {
+      PyErr_SetString(PyExc_ValueError, "Block ranges array last dimension must be size 2");
+      return false;
+    }
+  if (!ranges.is_contiguous())
+    {
+      PyErr_SetString(PyExc_ValueError, "Block ranges array must be contiguous");
+      return false;
+    }
+  return true;
 }
 
 // ----------------------------------------------------------------------------
 //
 static PyObject *surface_py2(PyObject *, PyObject *args, PyObject *keywds)
 {
-  PyObject *py_data;
+  PyObject *py_data, *py_ranges = NULL;
   float threshold;
-  int cap_faces = 1, return_normals = 0;
-  const char *kwlist[] = {"data", "threshold", "cap_faces", "calculate_normals", NULL};
-  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("Of|pp"),
+  int cap_faces = 1, return_normals = 0, num_threads = 1, block_size = 8;
+  const char *kwlist[] = {"data", "threshold", "cap_faces", "calculate_normals",
+			  "num_threads", "block_ranges", "block_size", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("Of|ppiOi"),
 				   (char **)kwlist,
 				   &py_data, &threshold, &cap_faces,
-				   &return_normals))
+				   &return_normals, &num_threads, &py_ranges, &block_size))
     return NULL;
   
   Numeric_Array data;
   if (!array_from_python(py_data, 3, &data))
     return NULL;
 
+  FArray ranges;
+  const float *block_ranges = NULL;
+  if (py_ranges && py_ranges != Py_None)
+    {
+      Numeric_Array r;
+      if (!array_from_python(py_ranges, 4, Numeric_Array::Float, &r, false))
+	return NULL;
+      ranges = FArray(r);
+      if (!check_block_ranges(data, ranges, block_size))
+	return NULL;
+      block_ranges = ranges.values();
+    }
+
   Contour_Surface *cs;
   Py_BEGIN_ALLOW_THREADS
   call_template_function(contour_surface, data.value_type(),
-  			 (data, threshold, cap_faces, &cs));
+  			 (data, threshold, cap_faces, num_threads,
+			  block_ranges, block_size, &cs));
   Py_END_ALLOW_THREADS
 
   float *vxyz, *nxyz;
@@ -111,6 +163,167 @@ extern "C" PyObject *surface_py(PyObject *s, PyObject *args, PyObject *keywds)
     }
 }
 
+// ----------------------------------------------------------------------------
+//
+template <class T>
+void contour_surfaces(const Reference_Counted_Array::Array<T> &data,
+		      const std::vector<float> &thresholds, bool cap_faces,
+		      int num_threads, const float *block_ranges, int block_size,
+		      Contour_Surface **cs)
+{
+  AIndex size[3] = {static_cast<AIndex>(data.size(2)),
+		    static_cast<AIndex>(data.size(1)),
+		    static_cast<AIndex>(data.size(0))};
+  GIndex stride[3] = {data.stride(2), data.stride(1), data.stride(0)};
+  surfaces(data.values(), size, stride, thresholds.data(), (int)thresholds.size(),
+	   cap_faces, cs, num_threads, block_ranges, block_size);
+}
+
+// ----------------------------------------------------------------------------
+//
+static PyObject *surfaces_py2(PyObject *, PyObject *args, PyObject *keywds)
+{
+  PyObject *py_data, *py_ranges = NULL;
+  FArray thresh;
+  int cap_faces = 1, return_normals = 0, num_threads = 1, block_size = 8;
+  const char *kwlist[] = {"data", "thresholds", "cap_faces", "calculate_normals",
+			  "num_threads", "block_ranges", "block_size", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("OO&|ppiOi"),
+				   (char **)kwlist,
+				   &py_data, parse_float_n_array, &thresh, &cap_faces,
+				   &return_normals, &num_threads, &py_ranges, &block_size))
+    return NULL;
+
+  Numeric_Array data;
+  if (!array_from_python(py_data, 3, &data))
+    return NULL;
+
+  FArray ranges;
+  const float *block_ranges = NULL;
+  if (py_ranges && py_ranges != Py_None)
+    {
+      Numeric_Array r;
+      if (!array_from_python(py_ranges, 4, Numeric_Array::Float, &r, false))
+	return NULL;
+      ranges = FArray(r);
+      if (!check_block_ranges(data, ranges, block_size))
+	return NULL;
+      block_ranges = ranges.values();
+    }
+
+  int64_t n = thresh.size(0), ts = thresh.stride(0);
+  std::vector<float> thresholds(n);
+  const float *tv = thresh.values();
+  for (int64_t t = 0 ; t < n ; ++t)
+    thresholds[t] = tv[t*ts];
+
+  std::vector<Contour_Surface *> cs(n, NULL);
+  Py_BEGIN_ALLOW_THREADS
+  call_template_function(contour_surfaces, data.value_type(),
+  			 (data, thresholds, cap_faces, num_threads,
+			  block_ranges, block_size, cs.data()));
+  Py_END_ALLOW_THREADS
+
+  PyObject *geom_list = PyList_New(n);
+  for (int64_t t = 0 ; t < n ; ++t)
+    {
+      Contour_Surface *s = cs[t];
+      float *vxyz, *nxyz;
+      VIndex *tvi;
+      PyObject *vertex_xyz = python_float_array(s->vertex_count(), 3, &vxyz);
+      PyObject *normals = (return_normals ? python_float_array(s->vertex_count(), 3, &nxyz) : NULL);
+      PyObject *tv_indices = python_int_array(s->triangle_count(), 3, &tvi);
+
+      Py_BEGIN_ALLOW_THREADS
+      s->geometry(vxyz, reinterpret_cast<VIndex *>(tvi));
+      if (return_normals)
+	s->normals(nxyz);
+      delete s;
+      Py_END_ALLOW_THREADS
+
+      PyObject *geom = (return_normals ?
+			python_tuple(vertex_xyz, tv_indices, normals) :
+			python_tuple(vertex_xyz, tv_indices));
+      PyList_SET_ITEM(geom_list, t, geom);
+    }
+  return geom_list;
+}
+
+// ----------------------------------------------------------------------------
+//
+extern "C" PyObject *surfaces_py(PyObject *s, PyObject *args, PyObject *keywds)
+{
+  try
+    {
+      return surfaces_py2(s, args, keywds);
+    }
+  catch (std::bad_alloc&)
+    {
+      PyErr_SetString(PyExc_MemoryError, "Out of memory");
+      return NULL;
+    }
+}
+
+// ----------------------------------------------------------------------------
+//
+template <class T>
+void data_block_ranges(const Reference_Counted_Array::Array<T> &data,
+		       int block_size, float *ranges, int num_threads)
+{
+  AIndex size[3] = {static_cast<AIndex>(data.size(2)),
+		    static_cast<AIndex>(data.size(1)),
+		    static_cast<AIndex>(data.size(0))};
+  GIndex stride[3] = {data.stride(2), data.stride(1), data.stride(0)};
+  block_value_ranges(data.values(), size, stride, block_size, ranges, num_threads);
+}
+
+// ----------------------------------------------------------------------------
+//
+static PyObject *block_value_ranges_py2(PyObject *, PyObject *args, PyObject *keywds)
+{
+  PyObject *py_data, *py_ranges;
+  int block_size, num_threads = 1;
+  const char *kwlist[] = {"data", "block_size", "ranges", "num_threads", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("OiO|i"),
+				   (char **)kwlist,
+				   &py_data, &block_size, &py_ranges, &num_threads))
+    return NULL;
+
+  Numeric_Array data;
+  if (!array_from_python(py_data, 3, &data))
+    return NULL;
+
+  Numeric_Array r;
+  if (!array_from_python(py_ranges, 4, Numeric_Array::Float, &r, false))
+    return NULL;
+  FArray ranges(r);
+  if (!check_block_ranges(data, ranges, block_size))
+    return NULL;
+
+  float *rv = ranges.values();
+  Py_BEGIN_ALLOW_THREADS
+  call_template_function(data_block_ranges, data.value_type(),
+  			 (data, block_size, rv, num_threads));
+  Py_END_ALLOW_THREADS
+
+  return python_none();
+}
+
+// ----------------------------------------------------------------------------
+//
+extern "C" PyObject *block_value_ranges_py(PyObject *s, PyObject *args, PyObject *keywds)
+{
+  try
+    {
+      return block_value_ranges_py2(s, args, keywds);
+    }
+  catch (std::bad_alloc&)
+    {
+      PyErr_SetString(PyExc_MemoryError, "Out of memory");
+      return NULL;
+    }
+}
+
 // ----------------------------------------------------------------------------
 // Swap vertex 1 and 2 of each triangle.
 //
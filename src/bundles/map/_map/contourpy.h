@@ -30,6 +30,8 @@
 extern "C" {
 
 PyObject *surface_py(PyObject *s, PyObject *args, PyObject *keywds);
+PyObject *surfaces_py(PyObject *s, PyObject *args, PyObject *keywds);
+PyObject *block_value_ranges_py(PyObject *s, PyObject *args, PyObject *keywds);
 PyObject *reverse_triangle_vertex_order(PyObject *, PyObject *args);
 
 }
@@ -30,6 +30,7 @@
 //
 #include <Python.h>			// use PyObject
 #include <math.h>			// use ceil(), floor(), exp()
+#include <vector>			// use std::vector
 
 #include <arrays/pythonarray.h>		// use array_from_python()
 #include <arrays/rcarray.h>		// use FArray
@@ -59,6 +60,7 @@ static void sum_of_gaussians(const FArray &centers, const FArray &coef,
   int64_t cfs0 = coef.stride(0), ss0 = sdev.stride(0), ss1 = sdev.stride(1);
   float *ma = matrix.values();
   int64_t ms0 = matrix.stride(0), ms1 = matrix.stride(1), ms2 = matrix.stride(2);
+  std::vector<float> g[3];
   for (int64_t c = 0 ; c < n ; ++c)
     {
       float sd[3] = {sa[c*ss0], sa[c*ss0 + ss1], sa[c*ss0 + 2*ss1]};
@@ -73,21 +75,32 @@ static void sum_of_gaussians(const FArray &centers, const FArray &coef,
 	  ijk_min[p] = clamp((int)ceil(x-maxrange*sd[p]), msize[2-p]);
 	  ijk_max[p] = clamp((int)floor(x+maxrange*sd[p]), msize[2-p]);
 	}
+      // Skip centers whose cutoff box misses the matrix.
+      if (ijk_max[0] < ijk_min[0] || ijk_max[1] < ijk_min[1] || ijk_max[2] < ijk_min[2])
+	continue;
+      // The Gaussian is a product of 1-dimensional Gaussians along each axis
+      // so only compute exponentials along the 3 edges of the cutoff box.
+      for (int p = 0 ; p < 3 ; ++p)
+	{
+	  g[p].resize(ijk_max[p] - ijk_min[p] + 1);
+	  for (int i = ijk_min[p] ; i <= ijk_max[p] ; ++i)
+	    {
+	      float d = (i-cijk[p])/sd[p];
+	      g[p][i-ijk_min[p]] = exp(-0.5*d*d);
+	    }
+	}
       float cf = cfa[c*cfs0];
+      const float *gi = g[0].data(), *gj = g[1].data(), *gk = g[2].data();
+      int i0 = ijk_min[0], j0 = ijk_min[1], k0 = ijk_min[2];
       for (int k = ijk_min[2] ; k <= ijk_max[2] ; ++k)
 	{
-	  float dk = (k-cijk[2])/sd[2];
-	  float k2 = dk*dk;
+	  float ck = cf*gk[k-k0];
 	  for (int j = ijk_min[1] ; j <= ijk_max[1] ; ++j)
 	    {
-	      float dj = (j-cijk[1])/sd[1];
-	      float jk2 = dj*dj + k2;
+	      float cjk = ck*gj[j-j0];
+	      float *mjk = ma + k*ms0 + j*ms1;
 	      for (int i = ijk_min[0] ; i <= ijk_max[0] ; ++i)
-		{
-		  float di = (i-cijk[0])/sd[0];
-		  float ijk2 = di*di + jk2;
-		  ma[k*ms0+j*ms1+i*ms2] += cf*exp(-0.5*ijk2);
-		}
+		mjk[i*ms2] += cjk*gi[i-i0];
 	    }
 	}
     }
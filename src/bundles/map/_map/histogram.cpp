@@ -29,6 +29,7 @@
 //
 #include <Python.h>			// use PyObject
 #include <cfloat>			// use DBL_MAX, DBL_MIN
+#include <algorithm>			// use std::min()
 
 #include <arrays/pythonarray.h>		// use array_from_python()
 #include <arrays/rcarray.h>		// use Numeric_Array, Array<T>
@@ -342,24 +343,86 @@ static void high_count(const Reference_Counted_Array::Array<T> &d,
   *n = c;
 }
 
+// ----------------------------------------------------------------------------
+// Count using minimum and maximum values of blocks of block_size^3 elements
+// (from block_value_ranges()).  Blocks entirely above or below the level
+// are counted without looking at the data.
+//
+template<class T>
+static void block_high_count(const Reference_Counted_Array::Array<T> &d,
+			     float level, const float *ranges, int64_t block_size,
+			     int64_t *n)
+{
+  T *data = d.values();
+  int64_t s0 = d.stride(0), s1 = d.stride(1), s2 = d.stride(2);
+  int64_t m0 = d.size(0), m1 = d.size(1), m2 = d.size(2);
+  int64_t bs = block_size, c = 0;
+  const float *r = ranges;
+  for (int64_t b0 = 0 ; b0 < m0 ; b0 += bs)
+    for (int64_t b1 = 0 ; b1 < m1 ; b1 += bs)
+      for (int64_t b2 = 0 ; b2 < m2 ; b2 += bs, r += 2)
+	{
+	  int64_t e0 = std::min(b0+bs, m0), e1 = std::min(b1+bs, m1), e2 = std::min(b2+bs, m2);
+	  if (r[1] < level)
+	    continue;
+	  if (r[0] > level)
+	    {
+	      c += (e0-b0)*(e1-b1)*(e2-b2);
+	      continue;
+	    }
+	  for (int64_t i0 = b0 ; i0 < e0 ; ++i0)
+	    for (int64_t i1 = b1 ; i1 < e1 ; ++i1)
+	      {
+		T *drow = data + i0*s0 + i1*s1;
+		for (int64_t i2 = b2 ; i2 < e2 ; ++i2)
+		  if (drow[i2*s2] >= level)
+		    c += 1;
+	      }
+	}
+  *n = c;
+}
+
 // ----------------------------------------------------------------------------
 // Return count of elements where data is greater than or equal to a
-// specified level.
+// specified level.  Optional block value ranges from block_value_ranges()
+// avoid scanning blocks entirely above or below the level.
 //
 extern "C" PyObject *
 high_count_py(PyObject *, PyObject *args, PyObject *keywds)
 {
   Numeric_Array d;
   float level;
-  const char *kwlist[] = {"array", "level", NULL};
-  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("O&f"),
+  PyObject *py_ranges = NULL;
+  int block_size = 8;
+  const char *kwlist[] = {"array", "level", "block_ranges", "block_size", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("O&f|Oi"),
 				   (char **)kwlist,
 				   parse_3d_array, &d,
-				   &level))
+				   &level, &py_ranges, &block_size))
     return NULL;
 
   int64_t n = 0;
-  call_template_function(high_count, d.value_type(), (d, level, &n));
+  if (py_ranges && py_ranges != Py_None)
+    {
+      Numeric_Array r;
+      if (!array_from_python(py_ranges, 4, Numeric_Array::Float, &r, false))
+	return NULL;
+      bool size_ok = (block_size > 0 && r.size(3) == 2 && r.is_contiguous());
+      for (int a = 0 ; a < 3 && size_ok ; ++a)
+	size_ok = (r.size(a) == (d.size(a) + block_size - 1) / block_size);
+      if (!size_ok)
+	{
+	  PyErr_SetString(PyExc_ValueError, "Block ranges array size does not match data array size");
+	  return NULL;
+	}
+      FArray ranges(r);
+      const float *rv = ranges.values();
+      Py_BEGIN_ALLOW_THREADS
+      call_template_function(block_high_count, d.value_type(), (d, level, rv, block_size, &n));
+      Py_END_ALLOW_THREADS
+    }
+  else
+    call_template_function(high_count, d.value_type(), (d, level, &n));
   return PyLong_FromLong(n);
 }
 
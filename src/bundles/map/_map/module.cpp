@@ -40,6 +40,7 @@
 #include "localcorr.h"			// use local_correlation
 #include "moments.h"			// use moments_py, affine_scale_py
 #include "occupancy.h"			// use fill_occupancy_map
+#include "rankfilter.h"			// use rank_filter
 #include "squaremesh.h"			// use principle_plane_edges
 #include "transfer.h"			// use data_to_rgba,...
 
@@ -77,6 +78,10 @@ static struct PyMethodDef map_cpp_methods[] =
   /* contourpy.h */
   {const_cast<char*>("contour_surface"), (PyCFunction)surface_py,
    METH_VARARGS|METH_KEYWORDS, NULL},
+  {const_cast<char*>("contour_surfaces"), (PyCFunction)surfaces_py,
+   METH_VARARGS|METH_KEYWORDS, NULL},
+  {const_cast<char*>("block_value_ranges"), (PyCFunction)block_value_ranges_py,
+   METH_VARARGS|METH_KEYWORDS, NULL},
   {const_cast<char*>("reverse_triangle_vertex_order"),
    reverse_triangle_vertex_order, METH_VARARGS, NULL},
 
@@ -132,6 +137,10 @@ static struct PyMethodDef map_cpp_methods[] =
   {const_cast<char*>("fill_occupancy_map"), (PyCFunction)fill_occupancy_map,
    METH_VARARGS|METH_KEYWORDS, NULL},
 
+  /* rankfilter.h */
+  {const_cast<char*>("rank_filter"), (PyCFunction)rank_filter,
+   METH_VARARGS|METH_KEYWORDS, NULL},
+
   /* squaremesh.h */
   {const_cast<char*>("principle_plane_edges"), (PyCFunction)principle_plane_edges,
    METH_VARARGS|METH_KEYWORDS, NULL},
@@ -0,0 +1,213 @@
+/*
+ * === UCSF ChimeraX Copyright ===
+ * Copyright 2022 Regents of the University of California. All rights reserved.
+ * The ChimeraX application is provided pursuant to the ChimeraX license
+ * agreement, which covers academic and commercial uses. For more details, see
+ * <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+ *
+ * This particular file is part of the ChimeraX library. You can also
+ * redistribute and/or modify it under the terms of the GNU Lesser General
+ * Public License version 2.1 as published by the Free Software Foundation.
+ * For more details, see
+ * <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+ *
+ * THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+ * EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+ * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+ * LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+ * VERSION 2.1
+ *
+ * This notice must be embedded in or attached to all copies, including partial
+ * copies, of the software or any revisions or derivations thereof.
+ * === UCSF ChimeraX Copyright ===
+ */
+
+// ----------------------------------------------------------------------------
+// Median and other rank filters of 3d arrays.
+//
+#include <Python.h>			// use PyObject
+
+#include <algorithm>			// use std::sort, std::min
+#include <functional>			// use std::cref
+#include <thread>			// use std::thread
+#include <vector>			// use std::vector
+
+#include <arrays/pythonarray.h>		// use array_from_python()
+#include <arrays/rcarray.h>		// use Numeric_Array, Array<T>
+
+#include "rankfilter.h"
+
+namespace Map_Cpp
+{
+// ----------------------------------------------------------------------------
+// Order with NaN values greater than all other values.
+//
+template<class T>
+inline bool value_less(T a, T b)
+{
+  return a < b || (b != b && a == a);
+}
+
+// ----------------------------------------------------------------------------
+// Filter planes k0 <= k < k1 of the output.  For each row the bin columns
+// (values with the same i) are gathered and sorted once.  The sorted values
+// of a bin are then updated as the bin slides along the row by removing the
+// oldest column and merging in the newest column.  The merge passes over all
+// bin values, so each output value takes time proportional to the bin volume
+// (bin_size[0]*bin_size[1]*bin_size[2]), avoiding the extra log factor of
+// sorting the bin values for every output value.  NaN values sort as larger
+// than all other values.
+//
+template<class T>
+static void rank_filter_planes(const Reference_Counted_Array::Array<T> &m,
+			       const int *bin_size, int64_t rank,
+			       const Reference_Counted_Array::Array<T> &mr,
+			       int64_t k0, int64_t k1)
+{
+  int64_t bi = bin_size[0], bj = bin_size[1], bk = bin_size[2];
+  int64_t hi = bi/2, hj = bj/2, hk = bk/2;
+  int64_t si = m.size(2), sj = m.size(1);
+  int64_t st0 = m.stride(0), st1 = m.stride(1), st2 = m.stride(2);
+  int64_t rs0 = mr.stride(0), rs1 = mr.stride(1), rs2 = mr.stride(2);
+  const T *v = m.values();
+  T *vr = mr.values();
+
+  int64_t cn = bj*bk, n = bi*cn;
+  std::vector<T> cols(si*cn), bin(n), merged(n);
+  for (int64_t k = k0 ; k < k1 ; ++k)
+    for (int64_t j = hj ; j < sj-hj ; ++j)
+      {
+	T *c = cols.data();
+	for (int64_t i = 0 ; i < si ; ++i, c += cn)
+	  {
+	    T *ci = c;
+	    for (int64_t ko = -hk ; ko <= hk ; ++ko)
+	      {
+		const T *vk = v + (k+ko)*st0 + i*st2;
+		for (int64_t jo = -hj ; jo <= hj ; ++jo)
+		  *ci++ = vk[(j+jo)*st1];
+	      }
+	    std::sort(c, c+cn, value_less<T>);
+	  }
+
+	std::copy(cols.data(), cols.data()+n, bin.begin());
+	std::sort(bin.begin(), bin.end(), value_less<T>);
+
+	T *r = vr + k*rs0 + j*rs1;
+	for (int64_t i = hi ; i < si-hi ; ++i)
+	  {
+	    r[i*rs2] = bin[rank];
+	    if (i+hi+1 >= si)
+	      break;
+	    // Remove column i-hi and add column i+hi+1.
+	    const T *o = cols.data() + (i-hi)*cn, *oe = o + cn;
+	    const T *a = cols.data() + (i+hi+1)*cn, *ae = a + cn;
+	    T *b = merged.data();
+	    for (int64_t w = 0 ; w < n ; ++w)
+	      {
+		T bw = bin[w];
+		if (o < oe && !value_less(*o, bw) && !value_less(bw, *o))
+		  { ++o; continue; }
+		while (a < ae && value_less(*a, bw))
+		  *b++ = *a++;
+		*b++ = bw;
+	      }
+	    while (a < ae)
+	      *b++ = *a++;
+	    bin.swap(merged);
+	  }
+      }
+}
+
+// ----------------------------------------------------------------------------
+//
+template<class T>
+static void rank_filter_array(const Reference_Counted_Array::Array<T> &m,
+			      const int *bin_size, float rank,
+			      const Reference_Counted_Array::Array<T> &mr,
+			      int num_threads)
+{
+  int64_t hk = bin_size[2]/2;
+  int64_t k0 = hk, k1 = m.size(0)-hk;
+  if (k1 <= k0 || m.size(1) < bin_size[1] || m.size(2) < bin_size[0])
+    return;
+  int64_t n = static_cast<int64_t>(bin_size[0])*bin_size[1]*bin_size[2];
+  int64_t r = static_cast<int64_t>(rank * (n-1) + 0.5);
+  r = std::min(std::max(r, static_cast<int64_t>(0)), n-1);
+
+  int64_t nt = std::min(static_cast<int64_t>(std::max(num_threads, 1)), k1-k0);
+  if (nt == 1)
+    {
+      rank_filter_planes(m, bin_size, r, mr, k0, k1);
+      return;
+    }
+  std::vector<std::thread> threads;
+  for (int64_t t = 0 ; t < nt ; ++t)
+    threads.push_back(std::thread(rank_filter_planes<T>, std::cref(m), bin_size, r,
+				  std::cref(mr), k0 + (t*(k1-k0))/nt, k0 + ((t+1)*(k1-k0))/nt));
+  for (auto &th: threads)
+    th.join();
+}
+
+// ----------------------------------------------------------------------------
+// Set output values to the value at the given rank (0 = minimum, 1 = maximum)
+// of the input values in a bin centered at each grid point, NaN values ranking
+// above all others.  Output values where the bin extends outside the input
+// array are not set.
+//
+extern "C" PyObject *
+rank_filter(PyObject *, PyObject *args, PyObject *keywds)
+{
+  Numeric_Array m, mr;
+  PyObject *bin_size_py;
+  float rank;
+  int num_threads = 1;
+  const char *kwlist[] = {"array", "bin_size", "rank", "output", "num_threads", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("O&OfO&|i"),
+				   (char **)kwlist,
+				   parse_3d_array, &m,
+				   &bin_size_py,
+				   &rank,
+				   parse_writable_3d_array, &mr,
+				   &num_threads))
+    return NULL;
+
+  int bin_size[3];
+  if (!python_array_to_c(bin_size_py, bin_size, 3))
+    {
+      PyErr_SetString(PyExc_TypeError, "bin_size must be 3 integers");
+      return NULL;
+    }
+  for (int a = 0 ; a < 3 ; ++a)
+    if (bin_size[a] <= 0 || bin_size[a] % 2 == 0)
+      {
+	PyErr_Format(PyExc_ValueError, "bin size must be positive odd integers, got %d %d %d",
+		     bin_size[0], bin_size[1], bin_size[2]);
+	return NULL;
+      }
+  if (rank < 0 || rank > 1)
+    {
+      PyErr_Format(PyExc_ValueError, "rank must be between 0 and 1, got %.4g", rank);
+      return NULL;
+    }
+  if (m.value_type() != mr.value_type())
+    {
+      PyErr_SetString(PyExc_TypeError, "input and output arrays must have same value type");
+      return NULL;
+    }
+  if (m.size(0) != mr.size(0) || m.size(1) != mr.size(1) || m.size(2) != mr.size(2))
+    {
+      PyErr_Format(PyExc_TypeError, "input and output arrays must have same size, %d %d %d and %d %d %d",
+		   m.size(0), m.size(1), m.size(2), mr.size(0), mr.size(1), mr.size(2));
+      return NULL;
+    }
+
+  Py_BEGIN_ALLOW_THREADS
+  call_template_function(rank_filter_array, m.value_type(),
+			 (m, bin_size, rank, mr, num_threads));
+  Py_END_ALLOW_THREADS
+
+  return python_none();
+}
+
+}	// end of namespace Map_Cpp
@@ -0,0 +1,48 @@
+/*
+ * === UCSF ChimeraX Copyright ===
+ * Copyright 2022 Regents of the University of California. All rights reserved.
+ * The ChimeraX application is provided pursuant to the ChimeraX license
+ * agreement, which covers academic and commercial uses. For more details, see
+ * <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+ *
+ * This particular file is part of the ChimeraX library. You can also
+ * redistribute and/or modify it under the terms of the GNU Lesser General
+ * Public License version 2.1 as published by the Free Software Foundation.
+ * For more details, see
+ * <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+ *
+ * THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+ * EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+ * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+ * LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+ * VERSION 2.1
+ *
+ * This notice must be embedded in or attached to all copies, including partial
+ * copies, of the software or any revisions or derivations thereof.
+ * === UCSF ChimeraX Copyright ===
+ */
+
+// ----------------------------------------------------------------------------
+// Median and other rank filters of 3d arrays.
+//
+#ifndef RANKFILTER_HEADER_INCLUDED
+#define RANKFILTER_HEADER_INCLUDED
+
+#include <Python.h>			// use PyObject
+
+namespace Map_Cpp
+{
+//
+// Set each output value to the value of the given rank among the input values
+// in a box of size bin_size (i,j,k) centered at that grid point.  Rank is a
+// fraction from 0 (minimum) to 1 (maximum), 0.5 giving the median.  Bin sizes
+// must be odd.  Output values within half a bin size of the array edges are not
+// set.  Input and output arrays must have the same size and value type.
+//
+// rank_filter(array, bin_size, rank, output, num_threads = 1)
+//
+extern "C" PyObject *rank_filter(PyObject *, PyObject *args, PyObject *keywds);
+
+}	// end of namespace Map_Cpp
+
+#endif
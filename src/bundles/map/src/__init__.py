@@ -42,7 +42,7 @@ from .volume import VolumeSurface, VolumeImage
 # Make sure _map can runtime link shared library libarrays.
 import chimerax.arrays
 
-from ._map import contour_surface, sphere_surface_distance
+from ._map import contour_surface, contour_surfaces, sphere_surface_distance
 from ._map import interpolate_colormap, set_outside_volume_colors
 from ._map import extend_crystal_map
 from ._map import moments, affine_scale
@@ -188,6 +188,7 @@ class _MapBundle(BundleAPI):
                         return {
                             'array_name': StringArg,
                             'channel': IntArg,
+                            'memory_map': BoolArg,
                             'verbose': BoolArg,
                             'vseries': BoolArg,
                             'difference': BoolArg,
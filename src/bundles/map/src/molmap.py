@@ -48,6 +48,8 @@ def molmap(session,
            show_dialog = True,
            open_model = True,   # if calling directly from Python, may not want model opened
                                 # implies show_dialog=False
+           nthread = 1,         # number of threads computing z slabs of the map
+           save_file = None,    # write map to file plane by plane without opening a model
           ):
     '''
     Create a density map by placing Gaussians centered on atoms.
@@ -84,6 +86,13 @@ def molmap(session,
     replace : bool
       Default true
     show_dialog : bool, not supported
+    nthread : int
+      Number of threads used to compute the map.  The grid is split into
+      slabs along the z axis that are computed in parallel.  Default 1.
+    save_file : string or None
+      Write the map to this file computing it in slabs of planes
+      instead of opening a model.  This allows making maps too large
+      to fit in memory.  Returns None.
     '''
 
     molecules = atoms.unique_structures
@@ -116,12 +125,18 @@ def molmap(session,
         from chimerax.core.commands.parse import parse_model_id
         model_id = parse_model_id(model_id)
 
+    if save_file is not None:
+        save_molecule_map(atoms, resolution, step, cube, pad, on_grid,
+                          cutoff_range, sigma_factor, balls, transforms,
+                          name, save_file, session, nthread = nthread)
+        return None
+
     if not open_model:
         show_dialog = False
     v = make_molecule_map(atoms, resolution, step, cube, pad, on_grid,
                           cutoff_range, sigma_factor, balls, transforms,
                           display_threshold, model_id, replace, show_dialog, name, session,
-                          open_model=open_model)
+                          open_model=open_model, nthread=nthread)
 
     return v
 
@@ -132,11 +147,13 @@ molecule_map = molmap
 def make_molecule_map(atoms, resolution, step, cube, pad, on_grid, cutoff_range,
                       sigma_factor, balls, transforms,
                       display_threshold, model_id,
-                      replace, show_dialog, name, session, open_model = True):
+                      replace, show_dialog, name, session, open_model = True,
+                      nthread = 1, grid = None):
 
-    grid = molecule_grid_data(atoms, resolution, step, cube, pad, on_grid,
-                              cutoff_range, sigma_factor, balls,
-                              transforms, name)
+    if grid is None:
+        grid = molecule_grid_data(atoms, resolution, step, cube, pad, on_grid,
+                                  cutoff_range, sigma_factor, balls,
+                                  transforms, name, nthread = nthread)
     if step is None:
         step = grid.step[0]
 
@@ -166,7 +183,34 @@ def make_molecule_map(atoms, resolution, step, cube, pad, on_grid, cutoff_range,
 #
 def molecule_grid_data(atoms, resolution, step, cube, pad, on_grid,
                        cutoff_range, sigma_factor, balls = False,
-                       transforms = None, name = 'molmap'):
+                       transforms = None, name = 'molmap', nthread = 1):
+
+    xyz, transforms = molecule_coordinates(atoms, on_grid, transforms)
+
+    if on_grid:
+        from numpy import float32
+        grid = on_grid.region_grid(on_grid.region, float32)
+    else:
+        grid = bounding_grid(xyz, step, pad, transforms = transforms, cube = cube)
+    grid.name = name
+
+    sdev = resolution * sigma_factor
+    if balls:
+        radii = atoms.radii
+        add_balls(grid, xyz, radii, sdev, cutoff_range, transforms,
+                  nthread = nthread)
+    else:
+        weights = atoms.element_numbers
+        add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms,
+                      nthread = nthread)
+
+    return grid
+
+# -----------------------------------------------------------------------------
+# Return atom coordinates in the frame of the map and symmetry transforms
+# adjusted to that coordinate system.
+#
+def molecule_coordinates(atoms, on_grid = None, transforms = None):
 
     if len(atoms.unique_structures) == 1 and not on_grid:
         xyz = atoms.coords
@@ -183,26 +227,182 @@ def molecule_grid_data(atoms, resolution, step, cube, pad, on_grid,
         # Adjust transforms to correct coordinate system
         transforms = transforms.transform_coordinates(tf)
 
+    return xyz, transforms
+
+# -----------------------------------------------------------------------------
+# Write a molecule map to a file without holding the full map in memory.
+# The map values are computed in slabs of many planes as the file writer
+# requests them one plane at a time.
+#
+def save_molecule_map(atoms, resolution, step, cube, pad, on_grid,
+                      cutoff_range, sigma_factor, balls, transforms,
+                      name, path, session, nthread = 1):
+
+    xyz, transforms = molecule_coordinates(atoms, on_grid, transforms)
+
     if on_grid:
-        from numpy import float32
-        grid = on_grid.region_grid(on_grid.region, float32)
+        region = on_grid.region
+        size = on_grid.matrix_size(region = region, clamp = False)
+        origin, gstep = on_grid.region_origin_and_step(region)
+        d = on_grid.data
+        cell_angles, rotation = d.cell_angles, d.rotation
     else:
-        grid = bounding_grid(xyz, step, pad, transforms = transforms, cube = cube)
-    grid.name = name
+        size, origin, gstep = bounding_grid_geometry(xyz, step, pad, transforms, cube)
+        cell_angles = rotation = None
 
     sdev = resolution * sigma_factor
-    if balls:
-        radii = atoms.radii
-        add_balls(grid, xyz, radii, sdev, cutoff_range, transforms)
-    else:
-        weights = atoms.element_numbers
-        add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms)
+    values = atoms.radii if balls else atoms.element_numbers
+    grid = MolmapGrid(size, origin, gstep, xyz, values, sdev, cutoff_range,
+                      transforms = transforms, balls = balls, name = name,
+                      cell_angles = cell_angles, rotation = rotation,
+                      nthread = nthread)
 
-    return grid
+    from chimerax.map_data import save_grid_data
+    save_grid_data([grid], path, session)
+    session.logger.info('Wrote %s, grid size %d,%d,%d to %s'
+                        % (name, size[0], size[1], size[2], path))
+
+# -----------------------------------------------------------------------------
+# Grid data that computes a molecule map only for the requested region.
+#
+from chimerax.map_data import GridData
+class MolmapGrid(GridData):
+
+    def __init__(self, size, origin, step, xyz, values, sdev, cutoff_range,
+                 transforms = None, balls = False, name = 'molmap',
+                 cell_angles = None, rotation = None, nthread = 1):
+
+        from numpy import float32
+        settings = {}
+        if cell_angles is not None:
+            settings['cell_angles'] = cell_angles
+        if rotation is not None:
+            settings['rotation'] = rotation
+        GridData.__init__(self, size, float32, origin, step, name = name,
+                          **settings)
+
+        self._xyz = xyz
+        self._values = values.astype(float32)
+        self._transforms = transforms
+        self._sdev = sdev
+        self._cutoff_range = cutoff_range
+        self._balls = balls
+        self._nthread = nthread
+        self._k_ranges = None	# Grid k index range of points for each symmetry copy.
+        self._slab = None	# (k0, k1, matrix) of last computed full planes.
+
+    # -------------------------------------------------------------------------
+    # File writers request one plane at a time.  Compute a slab of many full
+    # planes so threads have work and the points are not searched again
+    # for every plane, then return the requested part of the slab.
+    #
+    def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
+
+        if tuple(ijk_step) != (1,1,1):
+            return self._compute_region(ijk_origin, ijk_size, ijk_step)
+
+        (i0,j0,k0), (isz,jsz,ksz) = ijk_origin, ijk_size
+        slab = self._slab
+        if slab is None or k0 < slab[0] or k0+ksz > slab[1]:
+            gi, gj, gk = self.size
+            kend = min(gk, k0 + max(ksz, self._slab_planes()))
+            m = self._compute_region((0,0,k0), (gi,gj,kend-k0), (1,1,1))
+            if kend - k0 == ksz and (isz,jsz) == (gi,gj):
+                return m	# Whole slab requested, don't keep a second copy.
+            self._slab = slab = (k0, kend, m)
+
+        sk0, sk1, m = slab
+        return m[k0-sk0:k0-sk0+ksz, j0:j0+jsz, i0:i0+isz].copy()
+
+    # -------------------------------------------------------------------------
+    #
+    def _slab_planes(self, slab_bytes = 2**26):
+        gi, gj, gk = self.size
+        return max(4*self._nthread, slab_bytes // (4*gi*gj), 1)
+
+    # -------------------------------------------------------------------------
+    # Grid k index range of the points for each symmetry copy, so a region
+    # only transforms the copies that can contribute to it.
+    #
+    def _copy_k_ranges(self):
+
+        if self._k_ranges is None:
+            self._k_ranges = [(ijk[:,2].min(), ijk[:,2].max()) if len(ijk) > 0 else (0,-1)
+                              for ijk in _symmetry_copies(self._xyz, self.xyz_to_ijk_transform,
+                                                          self._transforms)]
+        return self._k_ranges
+
+    # -------------------------------------------------------------------------
+    # Sum the contributions of one symmetry copy at a time into the region
+    # so only one copy of the transformed points is held in memory.
+    #
+    def _compute_region(self, ijk_origin, ijk_size, ijk_step):
+
+        if self._balls and len(set(ijk_step)) > 1:
+            # Balls use one radius and falloff scale for all axes so
+            # compute unequal subsampling from the full resolution region.
+            m = self._compute_region(ijk_origin, ijk_size, (1,1,1))
+            si, sj, sk = ijk_step
+            return m[::sk,::sj,::si].copy()
+
+        from numpy import zeros, float32, array
+        msize = [1 + (s-1)//st for s, st in zip(ijk_size, ijk_step)]
+        matrix = zeros(msize[::-1], float32)
+
+        values = self._values
+        sdev, cutoff = self._sdev, self._cutoff_range
+        if self._balls:
+            # Ball radii and falloff are scaled by the i axis step.
+            rmax = max(values.max() - sdev, 0) if len(values) > 0 else 0
+            gkpad = rmax / self.step[0] + cutoff*sdev
+            s = self.step[0] * ijk_step[0]
+            r = (values - sdev) / s
+            sd = sdev / ijk_step[0]
+            pad = [max(r.max(), 0) + cutoff*sd] * 3 if len(r) > 0 else [0]*3
+        else:
+            gkpad = cutoff * sdev / self.step[2]
+            sdevs = [sdev / (s*st) for s, st in zip(self.step, ijk_step)]
+            pad = [cutoff*sd for sd in sdevs]
+        k0, k1 = ijk_origin[2] - gkpad, ijk_origin[2] + ijk_size[2] - 1 + gkpad
+
+        origin, step = array(ijk_origin, float32), array(ijk_step, float32)
+        copies = _symmetry_copies(self._xyz, self.xyz_to_ijk_transform, self._transforms)
+        for (ck0, ck1), ijk in zip(self._copy_k_ranges(), copies):
+            if ck1 < k0 or ck0 > k1:
+                continue
+            # Grid index positions relative to the region in units of ijk_step.
+            ijk -= origin
+            ijk /= step
+            close = _points_near_box(ijk, pad, msize)
+            if self._balls:
+                _sum_balls(ijk[close], r[close], sd, cutoff, matrix, self._nthread)
+            else:
+                _sum_gaussians(ijk[close], values[close], sdevs, cutoff,
+                               matrix, self._nthread)
+
+        if not self._balls:
+            from math import pow, pi
+            matrix *= pow(2*pi,-1.5)*pow(sdev,-3)
+
+        return matrix
 
 # -----------------------------------------------------------------------------
 #
 def bounding_grid(xyz, step, pad, transforms = None, cube = False):
+
+    shape, origin, step = bounding_grid_geometry(xyz, step, pad, transforms, cube)
+    from numpy import zeros, float32
+    matrix = zeros(shape[::-1], float32)
+    from chimerax.map_data import ArrayGridData
+    grid = ArrayGridData(matrix, origin, step)
+    return grid
+
+# -----------------------------------------------------------------------------
+# Return grid size (i,j,k order), origin and step of a grid enclosing the
+# atoms with padding.
+#
+def bounding_grid_geometry(xyz, step, pad, transforms = None, cube = False):
+
     from chimerax.geometry import bounds
     b = bounds.point_bounds(xyz, transforms)
 
@@ -224,32 +424,20 @@ def bounding_grid(xyz, step, pad, transforms = None, cube = False):
 
     origin = b.center() - [0.5*(s-1)*step for s in shape[::-1]]
 
-    from numpy import zeros, float32
-    matrix = zeros(shape, float32)
-    from chimerax.map_data import ArrayGridData
-    grid = ArrayGridData(matrix, origin, (step,step,step))
-    return grid
+    return tuple(shape[::-1]), tuple(origin), (step,step,step)
 
 # -----------------------------------------------------------------------------
+# The grid is split into z slabs computed in nthread threads.
 #
 def add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms = None,
-                  normalize = True):
-
-    from numpy import zeros, float32, empty
-    sdevs = zeros((len(xyz),3), float32)
-    for a in (0,1,2):
-        sdevs[:,a] = sdev / grid.step[a]
+                  normalize = True, nthread = 1):
 
-    if transforms is None:
-        from chimerax.geometry import Places
-        transforms = Places()
-    from ._map import sum_of_gaussians
-    ijk = empty(xyz.shape, float32)
+    sdevs = [sdev / s for s in grid.step]
+    from numpy import float32
+    w = weights.astype(float32)
     matrix = grid.matrix()
-    for tf in transforms:
-        ijk[:] = xyz
-        (grid.xyz_to_ijk_transform * tf).transform_points(ijk, in_place = True)
-        sum_of_gaussians(ijk, weights, sdevs, cutoff_range, matrix)
+    for ijk in _symmetry_copies(xyz, grid.xyz_to_ijk_transform, transforms):
+        _sum_gaussians(ijk, w, sdevs, cutoff_range, matrix, nthread)
 
     if normalize:
         from math import pow, pi
@@ -258,27 +446,103 @@ def add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms = None,
 
 # -----------------------------------------------------------------------------
 #
-def add_balls(grid, xyz, radii, sdev, cutoff_range, transforms = None):
+def add_balls(grid, xyz, radii, sdev, cutoff_range, transforms = None,
+              nthread = 1):
+
+    from numpy import float32
+    r = ((radii - sdev) / grid.step[0]).astype(float32)
+    matrix = grid.matrix()
+    for ijk in _symmetry_copies(xyz, grid.xyz_to_ijk_transform, transforms):
+        _sum_balls(ijk, r, sdev, cutoff_range, matrix, nthread)
+
+# -----------------------------------------------------------------------------
+# Yield grid index positions of the points for each symmetry copy in turn.
+# The same buffer is reused for each copy so use it before getting the next.
+#
+def _symmetry_copies(xyz, xyz_to_ijk_transform, transforms = None):
 
     if transforms is None or len(transforms) == 0:
         from chimerax.geometry import Places
         transforms = Places()
     from numpy import empty, float32
     ijk = empty(xyz.shape, float32)
-    r = (radii - sdev) / grid.step[0]
-    matrix = grid.matrix()
-    from ._map import sum_of_balls
     for tf in transforms:
         ijk[:] = xyz
-        (grid.xyz_to_ijk_transform * tf).transform_points(ijk, in_place = True)
-        sum_of_balls(ijk, r, sdev, cutoff_range, matrix)
+        (xyz_to_ijk_transform * tf).transform_points(ijk, in_place = True)
+        yield ijk
+
+# -----------------------------------------------------------------------------
+# Mask for grid index points within pad (per axis) of a box of given size.
+#
+def _points_near_box(ijk, pad, size):
+
+    from numpy import logical_and
+    close = None
+    for a in (0,1,2):
+        inside = logical_and(ijk[:,a] >= -pad[a], ijk[:,a] <= size[a]-1+pad[a])
+        close = inside if close is None else logical_and(close, inside)
+    return close
+
+# -----------------------------------------------------------------------------
+#
+def _sum_gaussians(ijk, weights, sdevs, cutoff_range, matrix, nthread = 1):
+
+    from numpy import empty, float32
+    sd = empty((len(ijk),3), float32)
+    sd[:] = sdevs
+    from ._map import sum_of_gaussians
+    def sum_slab(ijk, weights, m, sd = sd):
+        sum_of_gaussians(ijk, weights, sd[:len(ijk)], cutoff_range, m)
+    kpad = cutoff_range * sdevs[2]
+    _sum_in_slabs(ijk, weights, kpad, sum_slab, matrix, nthread)
+
+# -----------------------------------------------------------------------------
+#
+def _sum_balls(ijk, r, sdev, cutoff_range, matrix, nthread = 1):
+
+    from ._map import sum_of_balls
+    def sum_slab(ijk, r, m):
+        sum_of_balls(ijk, r, sdev, cutoff_range, m)
+    kpad = (max(r.max(), 0) if len(r) > 0 else 0) + cutoff_range * sdev
+    _sum_in_slabs(ijk, r, kpad, sum_slab, matrix, nthread)
+
+# -----------------------------------------------------------------------------
+# Split the matrix into slabs along the z axis and sum the contributions of
+# points within kpad grid planes of each slab in separate threads.
+#
+def _sum_in_slabs(ijk, values, kpad, sum_func, matrix, nthread = 1):
+
+    ksize = matrix.shape[0]
+    nslab = min(ksize, 4*nthread) if nthread > 1 else 1
+    if nslab <= 1 or len(ijk) == 0:
+        sum_func(ijk, values, matrix)
+        return
+
+    from numpy import argsort, searchsorted, linspace
+    k = ijk[:,2]
+    if (k[1:] < k[:-1]).any():
+        order = argsort(k)
+        ijk, values = ijk[order], values[order]
+        k = ijk[:,2]
+    kb = linspace(0, ksize, nslab+1).astype(int)
+    args = []
+    for k0, k1 in zip(kb[:-1], kb[1:]):
+        p0 = searchsorted(k, k0 - kpad, side = 'left')
+        p1 = searchsorted(k, k1 - 1 + kpad, side = 'right')
+        if p1 > p0 and k1 > k0:
+            sijk = ijk[p0:p1].copy()
+            sijk[:,2] -= k0
+            args.append((sijk, values[p0:p1], matrix[k0:k1]))
+
+    from chimerax.core.threadq import apply_to_list
+    apply_to_list(sum_func, args, nthread)
 
 # -----------------------------------------------------------------------------
 #
 def register_molmap_command(logger):
 
     from chimerax.core.commands import CmdDesc, register, BoolArg, FloatArg, PositiveFloatArg, IntArg, Or
-    from chimerax.core.commands import CenterArg, AxisArg, CoordSysArg
+    from chimerax.core.commands import CenterArg, AxisArg, CoordSysArg, SaveFileNameArg
     from chimerax.atomic import SymmetryArg, AtomsArg
     from . import MapArg
     molmap_desc = CmdDesc(
@@ -302,6 +566,8 @@ def register_molmap_command(logger):
 #            ('modelId', model_id_arg),
             ('replace', BoolArg),
             ('show_dialog', BoolArg),
+            ('nthread', IntArg),
+            ('save_file', SaveFileNameArg),
         ],
         synopsis = 'Compute a map by placing Gaussians at atom positions'
     )
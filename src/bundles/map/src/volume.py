@@ -74,6 +74,8 @@ class Volume(Model):
 
     self.matrix_stats = None
     self._matrix_id = 1          # Incremented when shape or values change.
+    self._block_ranges = None    # Matrix block value ranges for contouring
+    self._min_block_ranges_voxels = 2**24	# Only compute block ranges for big matrices
 
     rlist = Region_List()
     ijk_min, ijk_max = self.region[:2]
@@ -560,6 +562,7 @@ class Volume(Model):
   def matrix_changed(self):
 
     self.matrix_stats = None
+    self._block_ranges = None
     self._matrix_id += 1
     self._drawings_need_update()
 
@@ -826,6 +829,7 @@ class Volume(Model):
 
     ro = self.rendering_options
     try:
+      self._update_surfaces_together(ro)
       for s in self.surfaces:
         s.update_surface(ro)
     except CancelOperation:
@@ -834,6 +838,77 @@ class Volume(Model):
     self.show_outline_box(ro.show_outline_box, ro.outline_box_rgb,
                           ro.outline_box_linewidth)
 
+  # ---------------------------------------------------------------------------
+  # Compute new geometry in one pass over the matrix for all surfaces
+  # whose geometry is out of date, if there are more than one.
+  #
+  def _update_surfaces_together(self, rendering_options):
+
+    ro = rendering_options
+    surfs = [s for s in self.surfaces
+             if not s._use_thread and s._contour_settings != s._current_contour_settings(ro)]
+    if len(surfs) < 2:
+      return
+
+    matrix = self.matrix()
+    levels = [s.level for s in surfs]
+    lstring = ', '.join('%.3g' % level for level in levels)
+    show_status = (matrix.size >= surfs[0]._min_status_message_voxels)
+    if show_status:
+      self.message('Computing %s surfaces, levels %s' % (self.data.name, lstring))
+
+    try:
+      geom = self.contour_matrix(matrix, levels, ro.cap_faces)
+    except MemoryError:
+      return	# Try computing surfaces one at a time.
+
+    for s, (varray, tarray, narray), level in zip(surfs, geom, levels):
+      s._surf_calc_thread = None	# Don't use an earlier threaded calculation.
+      s._contour_settings = s._current_contour_settings(ro)
+      va, na, ta, hidden_edges = s._adjust_surface_geometry(varray, narray, tarray, ro, level)
+      s._set_surface(va, na, ta, hidden_edges)
+      s._set_appearance(ro)
+
+    if show_status:
+      ntri = sum(len(s.triangles) for s in surfs)
+      self.message('Calculated %s surfaces, levels %s, with %d triangles'
+                   % (self.data.name, lstring, ntri), blank_after = 3.0)
+
+  # ---------------------------------------------------------------------------
+  # Compute contour surfaces for one or more levels in grid index coordinates.
+  # Several levels are contoured in one pass over the matrix.  Returns a list
+  # of vertex, triangle and normal arrays for each level.
+  #
+  def contour_matrix(self, matrix, levels, cap_faces = True):
+
+    # _map contour code does not handle single data planes.
+    # Handle these by stacking two planes on top of each other.
+    plane_axis = [a for a in (0,1,2) if matrix.shape[a] == 1]
+    if plane_axis:
+      for a in plane_axis:
+        matrix = matrix.repeat(2, axis = a)
+
+    block_size = 8
+    br = None if plane_axis else self.contour_block_ranges(matrix, block_size)
+    ranges = None if br is None else br.ranges
+    kw = {'cap_faces': cap_faces, 'calculate_normals': True,
+          'num_threads': contour_threads(), 'block_ranges': ranges,
+          'block_size': block_size}
+    if len(levels) == 1:
+      from ._map import contour_surface
+      geom = [contour_surface(matrix, levels[0], **kw)]
+    else:
+      from ._map import contour_surfaces
+      from numpy import array, float32
+      geom = contour_surfaces(matrix, array(levels, float32), **kw)
+
+    if plane_axis:
+      for varray, tarray, narray in geom:
+        for a in plane_axis:
+          varray[:,2-a] = 0
+
+    return geom
+
   # ---------------------------------------------------------------------------
   #
   def _remove_contour_surface(self, surf):
@@ -863,7 +938,8 @@ class Volume(Model):
     matrix = self.matrix()
     from chimerax.map_data import surface_level_enclosing_volume
     try:
-      level = surface_level_enclosing_volume(matrix, gvolume, tolerance, max_bisections)
+      level = surface_level_enclosing_volume(matrix, gvolume, tolerance, max_bisections,
+                                             block_ranges = self.block_ranges(matrix))
     except MemoryError as e:
       self.session.warning(str(e))
       level = None
@@ -1749,6 +1825,34 @@ class Volume(Model):
 
     return ms
 
+  # ---------------------------------------------------------------------------
+  # Minimum and maximum values for blocks of the matrix and coarser blocks,
+  # a chimerax.map_data.MatrixBlockRanges.  Used by contouring to skip blocks
+  # a contour level does not cross and to quickly count voxels above a level
+  # when searching for a level enclosing a volume.  Computed once for a matrix
+  # and reused for other levels until the matrix changes.
+  #
+  def block_ranges(self, matrix, block_size = 8):
+
+    br = self._block_ranges
+    if br and br.matrix is matrix and br.block_size == block_size:
+      return br
+
+    from chimerax.map_data import MatrixBlockRanges
+    br = MatrixBlockRanges(matrix, block_size, num_threads = contour_threads())
+    self._block_ranges = br
+    return br
+
+  # ---------------------------------------------------------------------------
+  # Block value ranges used to speed up contouring, or None for small matrices
+  # where computing the ranges is not worthwhile.
+  #
+  def contour_block_ranges(self, matrix, block_size = 8):
+
+    if matrix.size < self._min_block_ranges_voxels:
+      return None
+    return self.block_ranges(matrix, block_size)
+
   # ---------------------------------------------------------------------------
   #
   def displayed_matrices(self, read_matrix = True):
@@ -2204,21 +2308,8 @@ class VolumeSurface(Surface):
   #
   def _calculate_contour_surface(self, matrix, level, rendering_options):
 
-    # _map contour code does not handle single data planes.
-    # Handle these by stacking two planes on top of each other.
-    plane_axis = [a for a in (0,1,2) if matrix.shape[a] == 1]
-    if plane_axis:
-      for a in plane_axis:
-        matrix = matrix.repeat(2, axis = a)
-
-    from ._map import contour_surface
-    varray, tarray, narray = contour_surface(matrix, level,
-                                             cap_faces = rendering_options.cap_faces,
-                                             calculate_normals = True)
-
-    if plane_axis:
-      for a in plane_axis:
-        varray[:,2-a] = 0
+    geom = self.volume.contour_matrix(matrix, [level], rendering_options.cap_faces)
+    varray, tarray, narray = geom[0]
 
     va, na, ta, hidden_edges = self._adjust_surface_geometry(varray, narray, tarray,
                                                              rendering_options, level)
@@ -2311,6 +2402,15 @@ class VolumeSurface(Surface):
   # ---------------------------------------------------------------------------
   #
   def _geometry_changed(self, rendering_options):
+    contour_settings = self._current_contour_settings(rendering_options)
+    changed = (self._contour_settings != contour_settings)
+    if changed:
+      self._contour_settings = contour_settings
+    return changed
+
+  # ---------------------------------------------------------------------------
+  #
+  def _current_contour_settings(self, rendering_options):
     v = self.volume
     ro = rendering_options
     contour_settings = {'level': self.level,
@@ -2325,10 +2425,7 @@ class VolumeSurface(Surface):
                         'cap_faces': ro.cap_faces,
                         'flip_normals': ro.flip_normals,
                         }
-    changed = (self._contour_settings != contour_settings)
-    if changed:
-      self._contour_settings = contour_settings
-    return changed
+    return contour_settings
 
   # State save/restore in ChimeraX
   def take_snapshot(self, session, flags):
@@ -3492,6 +3589,15 @@ def show_when_opened(v, show_on_open, max_voxels):
 
   return (voxels <= voxel_limit)
 
+# -----------------------------------------------------------------------------
+# Number of threads used to compute contour surfaces.
+#
+def contour_threads():
+
+  import os
+  n = os.cpu_count()
+  return 1 if n is None else n
+
 # -----------------------------------------------------------------------------
 # Decide whether a data region is large enough that only a single z plane
 # should be shown.
@@ -919,10 +919,12 @@ def volume_default_values(session,
 # -----------------------------------------------------------------------------
 #
 def default_settings_text(session):
-    from .volume import default_settings
+    from .volume import default_settings, data_cache
+    from chimerax.map_data.memoryuse import data_cache_summary
     ds = default_settings(session)
     lines = ['Default volume settings',
              'data cache size = %.3g Mbytes' % ds['data_cache_size'],
+             'data cache use: %s' % data_cache_summary(data_cache(session)),
              'show on open = %s' % ds['show_on_open'],
              'show plane = %s' % ds['show_plane'],
              'voxel limit for open = %.3g Mvoxels' % ds['voxel_limit_for_open'],
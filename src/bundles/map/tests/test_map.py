@@ -0,0 +1,139 @@
+def test_molmap_threads(test_production_session):
+    session = test_production_session
+    from chimerax.core.commands import run
+    run(session, "open 1a0m")
+    v1 = run(session, "molmap /A 5")
+    v2 = run(session, "molmap /A 5 nthread 2 replace false")
+    assert abs(v1.full_matrix() - v2.full_matrix()).max() < 1e-5 * v1.full_matrix().max()
+
+def test_molmap_save_file(test_production_session, tmp_path):
+    session = test_production_session
+    from chimerax.core.commands import run
+    run(session, "open 1a0m")
+    path = str(tmp_path / "molmap.mrc")
+    v = run(session, "molmap /A 3 gridSpacing 0.5")
+    run(session, "molmap /A 3 gridSpacing 0.5 nthread 3 saveFile %s" % path)
+    vs = run(session, "open %s" % path)[0]
+    m, ms = v.full_matrix(), vs.full_matrix()
+    assert m.shape == ms.shape
+    assert abs(m - ms).max() < 1e-5 * m.max()
+
+def test_molmap_grid_regions(test_production_session):
+    session = test_production_session
+    from chimerax.core.commands import run
+    s = run(session, "open 1a0m")[0]
+    atoms = s.atoms
+    from chimerax.map.molmap import molecule_grid_data, molecule_coordinates, MolmapGrid
+    grid = molecule_grid_data(atoms, 4, 1, False, 5, None, 5, 0.225)
+    xyz, tf = molecule_coordinates(atoms)
+    mg = MolmapGrid(grid.size, grid.origin, grid.step, xyz, atoms.element_numbers,
+                    4*0.225, 5, nthread = 2)
+    full = grid.full_matrix()
+    tol = 1e-5 * full.max()
+    isz, jsz, ksz = grid.size
+    # Single planes as requested by file writers, then planes out of order.
+    for k in list(range(ksz)) + [ksz-1, 0, ksz//2]:
+        plane = mg.read_matrix((0,0,k), (isz,jsz,1), (1,1,1), None)
+        assert abs(plane - full[k:k+1]).max() < tol
+    # Subregion and subsampled regions.
+    sub = mg.read_matrix((3,5,7), (10,11,12), (1,1,1), None)
+    assert abs(sub - full[7:19,5:16,3:13]).max() < tol
+    sub = mg.read_matrix((1,0,2), (isz-1,jsz,ksz-2), (2,3,2), None)
+    assert abs(sub - full[2::2,0::3,1::2]).max() < tol
+
+def test_molmap_symmetry_copies():
+    from chimerax.map.molmap import bounding_grid, bounding_grid_geometry, add_gaussians, add_balls, MolmapGrid
+    from chimerax.geometry import Places, rotation
+    from numpy import random, float32
+    r = random.default_rng(2)
+    xyz = r.uniform(0, 20, (500,3))
+    weights = r.integers(1, 9, len(xyz))
+    radii = r.uniform(1.2, 2, len(xyz)).astype(float32)
+    tfs = Places([rotation((0,0,1), a, center = (30,30,10)) for a in range(0, 360, 72)])
+    for balls in (False, True):
+        def add(grid, transforms, nthread):
+            if balls:
+                add_balls(grid, xyz, radii, 0.9, 5, transforms, nthread = nthread)
+            else:
+                add_gaussians(grid, xyz, weights, 0.9, 5, transforms, nthread = nthread)
+            return grid.full_matrix()
+        # Sum of maps for each symmetry copy.
+        ref = sum(add(bounding_grid(xyz, 1.0, 5, transforms = tfs), Places([tf]), 1) for tf in tfs)
+        tol = 1e-5 * ref.max()
+        for nthread in (1, 3):
+            m = add(bounding_grid(xyz, 1.0, 5, transforms = tfs), tfs, nthread)
+            assert abs(m - ref).max() < tol
+        size, origin, step = bounding_grid_geometry(xyz, 1.0, 5, tfs)
+        values = radii if balls else weights
+        mg = MolmapGrid(size, origin, step, xyz, values, 0.9, 5, transforms = tfs,
+                        balls = balls, nthread = 2)
+        isz, jsz, ksz = size
+        for k in range(ksz):
+            plane = mg.read_matrix((0,0,k), (isz,jsz,1), (1,1,1), None)
+            assert abs(plane - ref[k:k+1]).max() < tol
+        sub = mg.read_matrix((1,0,2), (isz-1,jsz,ksz-2), (2,3,2), None)
+        assert abs(sub - ref[2::2,0::3,1::2]).max() < tol
+
+def _contour_test_grids():
+    from numpy import random, float32, float64, int16, uint8
+    r = random.default_rng(1)
+    grids = [(100 * r.random(shape)).astype(dtype)
+             for shape, dtype in [((37,29,45), float32), ((50,17,33), float64),
+                                  ((21,40,19), int16), ((9,11,13), uint8)]]
+    grids.append(r.random((60,30,40)).astype(float32)[::2,:,1::3])	# Strided
+    return grids
+
+def _triangle_coordinates(varray, tarray):
+    '''Sorted triangles given by sorted vertex coordinates, independent of vertex numbering.'''
+    from numpy import unique, sort, lexsort
+    # Number vertices by position so triangles can be compared as vertex number triples.
+    uv, vnum = unique(varray, axis = 0, return_inverse = True)
+    tv = sort(vnum.ravel()[tarray], axis = 1)
+    tv = tv[lexsort(tv.T[::-1])]
+    return uv[tv]
+
+def _sorted_normals(varray, narray):
+    '''Normals ordered by vertex position, with ties broken by normal for cap vertices.'''
+    from numpy import lexsort, concatenate
+    return narray[lexsort(concatenate((varray, narray), axis = 1).T[::-1])]
+
+def test_contour_threads_and_block_ranges():
+    from chimerax.map._map import contour_surface, block_value_ranges
+    from numpy import empty, float32, allclose
+    block_size = 8
+    for g in _contour_test_grids():
+        level = float(0.5 * (g.min() + g.max()))
+        ranges = empty([(s + block_size - 1) // block_size for s in g.shape] + [2], float32)
+        block_value_ranges(g, block_size, ranges, num_threads = 2)
+        for cap_faces in (True, False):
+            v1, t1, n1 = contour_surface(g, level, cap_faces = cap_faces, calculate_normals = True)
+            tri1, sn1 = _triangle_coordinates(v1, t1), _sorted_normals(v1, n1)
+            for nt in (2, 3, 8):
+                for br in (None, ranges):
+                    v, t, n = contour_surface(g, level, cap_faces = cap_faces, calculate_normals = True,
+                                              num_threads = nt, block_ranges = br, block_size = block_size)
+                    assert len(v) == len(v1) and len(t) == len(t1)
+                    assert allclose(_triangle_coordinates(v, t), tri1)
+                    assert allclose(_sorted_normals(v, n), sn1, atol = 1e-5)
+
+def test_contour_surfaces_match_single_levels():
+    from chimerax.map._map import contour_surface, contour_surfaces, block_value_ranges
+    from numpy import empty, float32, allclose
+    block_size = 8
+    for g in _contour_test_grids():
+        vmin, vmax = float(g.min()), float(g.max())
+        levels = [vmin + f * (vmax - vmin) for f in (0.3, 0.5, 0.8)] + [vmax + 1]
+        ranges = empty([(s + block_size - 1) // block_size for s in g.shape] + [2], float32)
+        block_value_ranges(g, block_size, ranges)
+        for cap_faces in (True, False):
+            single = [contour_surface(g, level, cap_faces = cap_faces, calculate_normals = True)
+                      for level in levels]
+            for nt in (1, 4):
+                for br in (None, ranges):
+                    surfs = contour_surfaces(g, levels, cap_faces = cap_faces, calculate_normals = True,
+                                             num_threads = nt, block_ranges = br, block_size = block_size)
+                    assert len(surfs) == len(levels)
+                    for (v, t, n), (v1, t1, n1) in zip(surfs, single):
+                        assert len(v) == len(v1) and len(t) == len(t1)
+                        assert allclose(_triangle_coordinates(v, t), _triangle_coordinates(v1, t1))
+                        assert allclose(_sorted_normals(v, n), _sorted_normals(v1, n1), atol = 1e-5)
@@ -236,6 +236,112 @@ class MatrixValueStatistics:
       self.cmass = bin_mass.cumsum()
     return self.cmass
 
+# -----------------------------------------------------------------------------
+# Minimum and maximum matrix values for blocks of block_size^3 values, each
+# block extended by one value on each side, and for successively coarser blocks
+# combining 2x2x2 blocks up to a single block covering the whole matrix.  Used to
+# skip blocks that a contour level does not cross and to count values above a
+# level without scanning the whole matrix.
+#
+class MatrixBlockRanges:
+
+  def __init__(self, matrix, block_size = 8, num_threads = 1):
+
+    from weakref import ref
+    self._matrix = ref(matrix)
+    self.block_size = block_size
+
+    from numpy import empty, float32
+    shape = tuple((s + block_size - 1) // block_size for s in matrix.shape) + (2,)
+    self.ranges = r = empty(shape, float32)	# Finest blocks, minimum and maximum
+    from chimerax.map import _map
+    _map.block_value_ranges(matrix, block_size, r, num_threads = num_threads)
+
+    self.levels = [r]	# Finest to coarsest
+    while max(r.shape[:3]) > 1:
+      r = _coarser_block_ranges(r)
+      self.levels.append(r)
+
+  # ---------------------------------------------------------------------------
+  # Matrix is not kept alive by the block ranges, None if it has been freed.
+  #
+  @property
+  def matrix(self):
+    return self._matrix()
+
+  # ---------------------------------------------------------------------------
+  #
+  def value_range(self):
+
+    vmin, vmax = self.levels[-1][0,0,0]
+    from math import isinf
+    if isinf(vmin) or isinf(vmax):
+      # Matrix contains NaN values.
+      from chimerax.map import _map
+      vmin, vmax = _map.minimum_and_maximum(self.matrix)
+    return float(vmin), float(vmax)
+
+  # ---------------------------------------------------------------------------
+  # Return indices (k,j,i) of finest blocks with minimum <= level <= maximum
+  # as an N by 3 array.  Only children of straddling coarser blocks are tested.
+  #
+  def straddling_blocks(self, level):
+
+    from numpy import zeros, array, int64
+    blocks = zeros((1,3), int64)
+    children = array([(k,j,i) for k in (0,1) for j in (0,1) for i in (0,1)], int64)
+    nlevels = len(self.levels)
+    for li in range(nlevels-1, -1, -1):
+      r = self.levels[li]
+      if li < nlevels-1:
+        blocks = (2*blocks[:,None,:] + children).reshape((-1,3))
+        blocks = blocks[(blocks < r.shape[:3]).all(axis = 1)]
+      rb = r[blocks[:,0], blocks[:,1], blocks[:,2]]
+      blocks = blocks[(rb[:,0] <= level) & (rb[:,1] >= level)]
+    return blocks
+
+  # ---------------------------------------------------------------------------
+  # Number of matrix values greater than or equal to level.  Blocks entirely
+  # above or below the level are counted without reading the matrix.
+  #
+  def voxels_above(self, level):
+
+    from chimerax.map import _map
+    return _map.high_count(self.matrix, level, block_ranges = self.ranges,
+                           block_size = self.block_size)
+
+  # ---------------------------------------------------------------------------
+  # Find a level between low and high with about count matrix values above it.
+  #
+  def level_with_count_above(self, count, low, high, iterations = 30):
+
+    for i in range(iterations):
+      level = 0.5*(low + high)
+      n = self.voxels_above(level)
+      if n == count:
+        break
+      if n > count:
+        low = level
+      else:
+        high = level
+    return level
+
+# -----------------------------------------------------------------------------
+#
+def _coarser_block_ranges(r):
+
+  from numpy import pad, empty
+  n = r.shape[:3]
+  if n[0] % 2 or n[1] % 2 or n[2] % 2:
+    # Repeating edge blocks does not change minimum or maximum.
+    r = pad(r, [(0, s % 2) for s in n] + [(0,0)], mode = 'edge')
+  k, j, i = [(s+1)//2 for s in n]
+  r8 = r.reshape((k,2,j,2,i,2,2))
+  c = empty((k,j,i,2), r.dtype)
+  c[...,0] = r8[...,0].min(axis = (1,3,5))
+  c[...,1] = r8[...,1].max(axis = (1,3,5))
+  return c
+
 # -----------------------------------------------------------------------------
 #
 def grid_indices(size, data_type):
@@ -374,21 +480,37 @@ def invert_matrix(m):
 # marching cubes triangulation makes discrete changes (visually it pops) when
 # the level passes through a grid point data value.
 #
-# This could be made much faster by starting at the level that encloses the
-# correct fraction of grid points (use MatrixValueStatistics binning),
-# then increase or decrease 1% to try to find a small bounding interval.
-# This would require fewer subdivisions and avoid making very large surfaces
-# at too low a contour level.
+# The enclosed volume in grid units is close to the number of grid points at or
+# above the level.  So the search starts at the level with that many points above
+# it, found quickly using block value ranges, and each following level is chosen
+# from a point count scaled by the enclosed volume error.  This takes far fewer
+# contour calculations than bisecting the full data range.  If a scaled count
+# gives a level outside the interval known to contain the answer, or the
+# interval did not shrink by half over the last two levels, the interval is
+# bisected instead.
 #
 def surface_level_enclosing_volume(matrix, volume, tolerance = 1e-3,
-                                   max_bisections = 30, session = None):
+                                   max_bisections = 30, session = None,
+                                   block_ranges = None):
   from chimerax.map import _map
-  l0, l1 = _map.minimum_and_maximum(matrix)
+  if block_ranges is None or block_ranges.matrix is not matrix:
+    block_ranges = MatrixBlockRanges(matrix)
+  l0, l1 = block_ranges.value_range()
+  count = volume
+  widths = [l1 - l0]
   for s in range(max_bisections):
-    level = 0.5*(l0 + l1)
+    level = None
+    if count is not None:
+      level = block_ranges.level_with_count_above(count, l0, l1)
+      if not (l0 < level < l1):
+        level = None
+    if level is None:
+      level = 0.5*(l0 + l1)
     try:
       varray, tarray = _map.contour_surface(matrix, level, cap_faces = True,
-                                            calculate_normals = False)
+                                            calculate_normals = False,
+                                            block_ranges = block_ranges.ranges,
+                                            block_size = block_ranges.block_size)
     except MemoryError:
       raise MemoryError('Ran out of memory contouring at level %.3g.\n' % level)
 
@@ -400,4 +522,9 @@ def surface_level_enclosing_volume(matrix, volume, tolerance = 1e-3,
       l0 = level
     else:
       l1 = level
+    widths.append(l1 - l0)
+    if evol <= 0 or (len(widths) > 2 and widths[-1] > 0.5*widths[-3]):
+      count = None
+    else:
+      count = block_ranges.voxels_above(level) * volume / evol
   return level
@@ -14,7 +14,7 @@ from ..mrc.writemrc import write_ccp4_grid_data as save
 # -----------------------------------------------------------------------------
 # CCP4 density map file reader.
 #
-def open(path):
+def open(path, memory_map = False):
 
   from .ccp4_grid import CCP4Grid
-  return [CCP4Grid(path)]
+  return [CCP4Grid(path, memory_map = memory_map)]
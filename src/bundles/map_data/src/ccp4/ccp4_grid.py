@@ -17,5 +17,5 @@ from ..mrc.mrc_grid import MRCGrid
 # -----------------------------------------------------------------------------
 #
 class CCP4Grid(MRCGrid):
-  def __init__(self, path):
-    MRCGrid.__init__(self, path, file_type = 'ccp4')
+  def __init__(self, path, memory_map = False):
+    MRCGrid.__init__(self, path, file_type = 'ccp4', memory_map = memory_map)
@@ -24,37 +24,52 @@
 
 # -----------------------------------------------------------------------------
 # Maintain a cache of data objects using a limited amount of memory.
-# The least recently accessed data is released first.
+# The least recently accessed data is released first.  Data that is still
+# referenced outside the cache is not released.  Groups of data (e.g. all
+# matrices for one map, or all maps of a time series) can be given their
+# own memory limits.
 #
 
 # -----------------------------------------------------------------------------
 #
 class Data_Cache:
 
-  def __init__(self, size):
+  def __init__(self, size, policy = None):
 
     self.size = size
     self.used = 0
-    self.time = 1
     self.data = {}
     self.groups = {}
+    self.group_used = {}
+    self.group_limits = {}
+    self.policy = LRU_Policy() if policy is None else policy
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.evicted_bytes = 0
 
   # ---------------------------------------------------------------------------
   #
   def cache_data(self, key, value, size, description, groups = []):
 
     self.remove_key(key)
-    d = Cached_Data(key, value, size, description,
-                    self.time_stamp(), groups)
+    d = Cached_Data(key, value, size, description, groups)
     self.data[key] = d
+    self.policy.added(d)
 
+    gtable = self.groups
+    gused = self.group_used
+    from collections import OrderedDict
     for g in groups:
-      gtable = self.groups
       if not g in gtable:
-        gtable[g] = []
-      gtable[g].append(d)
+        gtable[g] = OrderedDict()
+        gused[g] = 0
+      gtable[g][d] = True
+      gused[g] += size
 
     self.used = self.used + size
+    for g in groups:
+      self.reduce_group_use(g)
     self.reduce_use()
 
   # ---------------------------------------------------------------------------
@@ -64,10 +79,15 @@ class Data_Cache:
     data = self.data
     if key in data:
       d = data[key]
-      d.last_access = self.time_stamp()
+      self.policy.accessed(d)
+      gtable = self.groups
+      for g in d.groups:
+        gtable[g].move_to_end(d)
       v = d.value
+      self.hits += 1
     else:
       v = None
+      self.misses += 1
     self.reduce_use()
     return v
 
@@ -98,6 +118,34 @@ class Data_Cache:
     self.size = size
     self.reduce_use()
 
+  # ---------------------------------------------------------------------------
+  # Limit memory used by a group of data.  A size of None removes the limit.
+  #
+  def set_group_limit(self, group, size):
+
+    if size is None:
+      self.group_limits.pop(group, None)
+    else:
+      self.group_limits[group] = size
+      self.reduce_group_use(group)
+
+  # ---------------------------------------------------------------------------
+  #
+  def group_limit(self, group):
+
+    return self.group_limits.get(group)
+
+  # ---------------------------------------------------------------------------
+  # Forget a group, for instance when a map series is closed.  The group's
+  # data stays cached as part of its other groups.
+  #
+  def remove_group(self, group):
+
+    self.group_limits.pop(group, None)
+    self.group_used.pop(group, None)
+    for d in self.groups.pop(group, ()):
+      d.groups = [g for g in d.groups if g is not group]
+
   # ---------------------------------------------------------------------------
   #
   def reduce_use(self):
@@ -105,47 +153,123 @@ class Data_Cache:
     if self.used <= self.size:
       return
 
-    data = self.data
-    dlist = list(data.values())
-    dlist.sort(key = lambda d: d.last_access)
+    self._release(self.policy.release_order(), self.used - self.size)
+
+  # ---------------------------------------------------------------------------
+  # Group data is released least recently used first.
+  #
+  def reduce_group_use(self, group):
+
+    limit = self.group_limits.get(group)
+    used = self.group_used.get(group, 0)
+    if limit is None or used <= limit:
+      return
+
+    self._release(self.groups[group].keys(), used - limit)
+
+  # ---------------------------------------------------------------------------
+  # Release data not referenced outside the cache, in the given order, until
+  # the released size reaches excess.  Only data up to the last one released
+  # is examined.
+  #
+  def _release(self, dlist, excess):
+
     import sys
+    release = []
+    freed = 0
     for d in dlist:
       if sys.getrefcount(d.value) == 2:
-        self.remove_data(d)
-        if self.used <= self.size:
+        release.append(d)
+        freed += d.size
+        if freed >= excess:
           break
 
+    for d in release:
+      self.evictions += 1
+      self.evicted_bytes += d.size
+      self.remove_data(d)
+
   # ---------------------------------------------------------------------------
   #
   def remove_data(self, d):
 
     del self.data[d.key]
+    self.policy.removed(d)
     self.used = self.used - d.size
     d.value = None
 
     for g in d.groups:
       dlist = self.groups[g]
-      dlist.remove(d)
+      del dlist[d]
+      self.group_used[g] -= d.size
       if len(dlist) == 0:
         del self.groups[g]
+        del self.group_used[g]
+
+  # ---------------------------------------------------------------------------
+  # Return dictionary of cache use and hit, miss and eviction counts.
+  #
+  def statistics(self):
+
+    lookups = self.hits + self.misses
+    stats = {'size': self.size,
+             'used': self.used,
+             'objects': len(self.data),
+             'hits': self.hits,
+             'misses': self.misses,
+             'hit rate': (float(self.hits) / lookups if lookups > 0 else None),
+             'evictions': self.evictions,
+             'evicted bytes': self.evicted_bytes,
+             }
+    return stats
+
+  # ---------------------------------------------------------------------------
+  #
+  def group_statistics(self, group):
+
+    return {'used': self.group_used.get(group, 0),
+            'objects': len(self.groups.get(group, ())),
+            'limit': self.group_limits.get(group)}
 
   # ---------------------------------------------------------------------------
   #
-  def time_stamp(self):
+  def reset_statistics(self):
 
-    t = self.time
-    self.time = t + 1
-    return t
+    self.hits = self.misses = self.evictions = self.evicted_bytes = 0
 
 # -----------------------------------------------------------------------------
 #
 class Cached_Data:
 
-  def __init__(self, key, value, size, description, time_stamp, groups):
+  def __init__(self, key, value, size, description, groups):
 
     self.key = key
     self.value = value
     self.size = size
     self.description = description
-    self.last_access = time_stamp
     self.groups = groups
+
+# -----------------------------------------------------------------------------
+# Eviction policy used by Data_Cache.  A policy is told when data is added,
+# accessed and removed, and gives the order in which data should be released.
+# This policy releases the least recently used data first, with constant
+# time updates.
+#
+class LRU_Policy:
+
+  def __init__(self):
+
+    from collections import OrderedDict
+    self._order = OrderedDict()
+
+  def added(self, d):
+    self._order[d] = True
+
+  def accessed(self, d):
+    self._order.move_to_end(d)
+
+  def removed(self, d):
+    del self._order[d]
+
+  def release_order(self):
+    return self._order.keys()
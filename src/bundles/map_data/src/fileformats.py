@@ -82,6 +82,7 @@ file_formats = [
   MapFileFormat('MacMolPlt grid', 'macmolplt', ['macmolplt'], ['mmp']),
   MapFileFormat('MRC density map', 'mrc', ['mrc'], ['mrc'], writable = True,
                 writer_options = ('value_type',)),
+  MapFileFormat('OME-Zarr image', 'omezarr', ['omezarr'], ['zarr'], allow_directory = True),
   MapFileFormat('NetCDF generic array', 'netcdf', ['netcdfmap'], ['nc']),
   MapFileFormat('Priism microscope image', 'priism', ['priism'], ['xyzw', 'xyzt']),
   MapFileFormat('PROFEC free energy grid', 'profec', ['profec'], ['profec']),
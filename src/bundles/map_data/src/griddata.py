@@ -143,6 +143,7 @@ class GridData:
     self.channel = channel		# Integer, channel number for multi-channel data
 
     self.data_cache = None
+    self.cache_group = None		# Additional data cache group, e.g. for a map series.
 
     self.writable = False
     self.change_callbacks = []
@@ -472,8 +473,14 @@ class GridData:
 
     key = (self, tuple(origin), tuple(size), tuple(step))
     elements = m.size
-    bytes = elements * m.itemsize
+    from numpy import memmap
+    if isinstance(m, memmap):
+      bytes = 0		# Memory mapped file pages are managed by the operating system.
+    else:
+      bytes = elements * m.itemsize
     groups = [self]
+    if self.cache_group is not None:
+      groups.append(self.cache_group)
     descrip = self.data_description(origin, size, step)
     dcache.cache_data(key, m, bytes, descrip, groups)
 
@@ -83,8 +83,8 @@ class Memory_Use_Dialog:
       dlist = []
       limit = 0
     else:
-      dlist = dcache.data.values()
-      dlist.sort(lambda d1, d2: -cmp(d1.size, d2.size))
+      dlist = list(dcache.data.values())
+      dlist.sort(key = lambda d: d.size, reverse = True)
       import sys
       for d in dlist:
         refs = sys.getrefcount(d.value) - 2
@@ -92,9 +92,7 @@ class Memory_Use_Dialog:
         listbox.insert('end', line)
       limit = dcache.size
 
-    used = reduce(lambda t, d: t + d.size, dlist, 0)
-    heading = ('%d objects using %.0f of %.0f Mb' %
-               (len(dlist), used/mb, limit/mb))
+    heading = data_cache_summary(dcache) if dcache else ''
     heading = heading + '\nSize (Mb)  In use   Description'
     self.object_list_heading['text'] = heading
 
@@ -105,6 +103,21 @@ class Memory_Use_Dialog:
     from . import data_cache
     return data_cache
 
+# -----------------------------------------------------------------------------
+# One line description of data cache memory use and hit rate.
+#
+def data_cache_summary(dcache):
+
+  s = dcache.statistics()
+  mb = float(2**20)
+  hr = s['hit rate']
+  hits = ('no lookups' if hr is None else
+          '%.0f%% hits (%d of %d lookups)' % (100*hr, s['hits'], s['hits'] + s['misses']))
+  summary = ('%d objects using %.0f of %.0f Mbytes, %s, %d released (%.0f Mbytes)'
+             % (s['objects'], s['used']/mb, s['size']/mb, hits,
+                s['evictions'], s['evicted bytes']/mb))
+  return summary
+
 # -----------------------------------------------------------------------------
 #
 def show_memory_use_dialog():
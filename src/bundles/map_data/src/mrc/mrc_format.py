@@ -275,19 +275,28 @@ class MRC_Data:
   # ---------------------------------------------------------------------------
   # Reads a submatrix from a the file.
   # Returns 3d numpy matrix with zyx index order.
+  # If memory_map is true the matrix is a view of a memory mapped file
+  # and values are read from disk only when accessed.
   #
-  def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
+  def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress,
+                  memory_map = False):
 
     # ijk correspond to xyz.  crs refers to fast,medium,slow matrix file axes.
     crs_origin = [ijk_origin[a] for a in self.crs_to_ijk]
     crs_size = [ijk_size[a] for a in self.crs_to_ijk]
     crs_step = [ijk_step[a] for a in self.crs_to_ijk]
 
-    from ..readarray import read_array
-    matrix = read_array(self.path, self.data_offset,
-                        crs_origin, crs_size, crs_step,
-                        self.matrix_size, self.element_type, self.swap_bytes,
-                        progress)
+    if memory_map and not self.swap_bytes:
+      from ..readarray import memory_map_array
+      matrix = memory_map_array(self.path, self.data_offset,
+                                crs_origin, crs_size, crs_step,
+                                self.matrix_size, self.element_type)
+    else:
+      from ..readarray import read_array
+      matrix = read_array(self.path, self.data_offset,
+                          crs_origin, crs_size, crs_step,
+                          self.matrix_size, self.element_type, self.swap_bytes,
+                          progress)
     if not matrix is None:
       matrix = self.permute_matrix_to_xyz_axis_order(matrix)
     
@@ -18,11 +18,16 @@ from .. import GridData
 #
 class MRCGrid(GridData):
 
-  def __init__(self, path, file_type = 'mrc'):
+  def __init__(self, path, file_type = 'mrc', memory_map = False):
 
     from . import mrc_format
     d = mrc_format.MRC_Data(path, file_type)
 
+    # Memory mapped arrays are only used if no byte swapping or value type
+    # conversion is needed.
+    from numpy import float16
+    self.memory_map = (memory_map and not d.swap_bytes and d.element_type != float16)
+
     self.mrc_data = d
 
     # Read float16 as float32 since C++ routines can't handle float16.
@@ -47,7 +52,8 @@ class MRCGrid(GridData):
   #
   def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
 
-    m = self.mrc_data.read_matrix(ijk_origin, ijk_size, ijk_step, progress)
+    m = self.mrc_data.read_matrix(ijk_origin, ijk_size, ijk_step, progress,
+                                  memory_map = self.memory_map)
 
     from numpy import float16, float32
     if m.dtype == float16:
@@ -0,0 +1,467 @@
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Read OME-Zarr (OME-NGFF) multi-resolution images from a local directory.
+#
+# A Zarr array is stored as a directory containing a metadata file (.zarray
+# for Zarr format 2, zarr.json for format 3) and one file per chunk.  Only
+# the chunks intersecting a requested region are read, so very large
+# tomograms can be displayed without reading the whole array.  An OME-Zarr
+# image group lists several arrays that are progressively downsampled copies
+# of the full resolution data.
+#
+# Sharded Zarr 3 arrays and Zarr 2 filters are not supported.
+#
+
+# -----------------------------------------------------------------------------
+#
+class OME_Zarr_Data:
+
+  def __init__(self, path, chunk_cache_size = 2**28):
+
+    self.path = path
+
+    from os.path import basename
+    self.name = basename(path.rstrip('/\\'))
+
+    attrs = read_attributes(path)
+    ome = attrs.get('ome', attrs)	# OME-NGFF 0.5 nests metadata under "ome".
+    multiscales = ome.get('multiscales')
+
+    cache = Chunk_Cache(chunk_cache_size)
+    if multiscales:
+      ms = multiscales[0]
+      datasets = ms.get('datasets', [])
+      if len(datasets) == 0:
+        raise SyntaxError('OME-Zarr image %s has no datasets' % path)
+      from os.path import join
+      arrays = [Zarr_Array(join(path, d['path']), cache) for d in datasets]
+      ndim = len(arrays[0].shape)
+      axes = axis_names(ms.get('axes'), ndim)
+      global_scale, global_shift = coordinate_transform(ms.get('coordinateTransformations'), ndim)
+      scales = []
+      for d in datasets:
+        scale, shift = coordinate_transform(d.get('coordinateTransformations'), ndim)
+        scales.append(([s*gs for s,gs in zip(scale, global_scale)],
+                       [t*gs + gt for t,gs,gt in zip(shift, global_scale, global_shift)]))
+      if ms.get('name'):
+        self.name = ms['name']
+    else:
+      a = Zarr_Array(path, cache)
+      arrays = [a]
+      ndim = len(a.shape)
+      axes = axis_names(a.dimension_names, ndim)
+      scales = [((1,)*ndim, (0,)*ndim)]
+
+    self.axes = axes
+    missing = [a for a in ('x','y') if a not in axes]
+    if missing:
+      raise SyntaxError('OME-Zarr image %s has no %s axis, got axes %s'
+                        % (path, ' or '.join(missing), ', '.join(axes)))
+
+    # Resolution levels as (array, scale, translation) with scale and
+    # translation for each array axis.
+    self.levels = [(a, scale, shift) for a, (scale, shift) in zip(arrays, scales)]
+
+    a0 = arrays[0]
+    self.value_type = a0.dtype
+    self.channel_count = a0.shape[axes.index('c')] if 'c' in axes else 1
+    self.time_count = a0.shape[axes.index('t')] if 't' in axes else 1
+    self.channel_colors = omero_channel_colors(ome.get('omero', attrs.get('omero')))
+
+  # ---------------------------------------------------------------------------
+  # Size, origin and step in x, y, z order for a resolution level.
+  #
+  def level_geometry(self, level):
+
+    a, scale, shift = self.levels[level]
+    axes = self.axes
+    size, origin, step = [], [], []
+    for axis in ('x','y','z'):
+      if axis in axes:
+        ai = axes.index(axis)
+        size.append(a.shape[ai])
+        origin.append(shift[ai])
+        step.append(scale[ai])
+      else:
+        size.append(1)
+        origin.append(0)
+        step.append(1)
+    return size, origin, step
+
+  # ---------------------------------------------------------------------------
+  # Read a subregion of one resolution level for a specified time and
+  # channel into a z,y,x order numpy array.
+  #
+  def read_matrix(self, ijk_origin, ijk_size, ijk_step, level, time, channel,
+                  array, progress):
+
+    a = self.levels[level][0]
+    axes = self.axes
+    xyz_axis = {'x':0, 'y':1, 'z':2}
+    selection = []
+    for axis in axes:
+      if axis == 't':
+        selection.append(time)
+      elif axis == 'c':
+        selection.append(channel)
+      elif axis in xyz_axis:
+        i = xyz_axis[axis]
+        count = 1 + (ijk_size[i]-1)//ijk_step[i]
+        selection.append((ijk_origin[i], count, ijk_step[i]))
+      else:
+        selection.append(0)	# Unknown extra axis, use first index.
+
+    m = a.read(selection, progress)
+
+    # Reorder spatial axes to z,y,x order.
+    saxes = [axis for axis in axes if axis in xyz_axis]
+    order = [saxes.index(axis) for axis in ('z','y','x') if axis in saxes]
+    m = m.transpose(order)
+    array[:] = m.reshape(array.shape)
+    return array
+
+# -----------------------------------------------------------------------------
+# Read Zarr group or array attributes, either .zattrs (format 2) or the
+# attributes in zarr.json (format 3).
+#
+def read_attributes(path):
+
+  from os.path import join, isfile
+  zattrs = join(path, '.zattrs')
+  zjson = join(path, 'zarr.json')
+  if isfile(zattrs):
+    return read_json(zattrs)
+  elif isfile(zjson):
+    return read_json(zjson).get('attributes', {})
+  elif isfile(join(path, '.zarray')) or isfile(join(path, '.zgroup')):
+    return {}
+  raise SyntaxError('Directory %s is not a Zarr group or array, no .zattrs, .zarray or zarr.json file' % path)
+
+# -----------------------------------------------------------------------------
+#
+def read_json(path):
+  import json
+  with open(path, 'r') as f:
+    try:
+      return json.load(f)
+    except ValueError as e:
+      raise SyntaxError('Could not parse Zarr metadata file %s: %s' % (path, str(e)))
+
+# -----------------------------------------------------------------------------
+# Axis names are lists of dictionaries in OME-NGFF 0.4 and later, and lists
+# of strings in version 0.3.  Earlier versions always use t,c,z,y,x order.
+#
+def axis_names(axes, ndim):
+
+  if axes is None or None in axes:
+    return ['t','c','z','y','x'][-ndim:]
+  names = [(a['name'] if isinstance(a, dict) else a).lower() for a in axes]
+  if len(names) != ndim:
+    raise SyntaxError('OME-Zarr axes %s do not match array dimension %d'
+                      % (', '.join(names), ndim))
+  for i,a in enumerate(axes):
+    if isinstance(a, dict):
+      atype = a.get('type')
+      if atype == 'time':
+        names[i] = 't'
+      elif atype == 'channel':
+        names[i] = 'c'
+  return names
+
+# -----------------------------------------------------------------------------
+# Return scale and translation for each array axis.
+#
+def coordinate_transform(transforms, ndim):
+
+  scale, shift = [1.0]*ndim, [0.0]*ndim
+  for t in (transforms or []):
+    ttype = t.get('type')
+    if ttype == 'scale' and 'scale' in t:
+      scale = [float(s) for s in t['scale']]
+    elif ttype == 'translation' and 'translation' in t:
+      shift = [float(s) for s in t['translation']]
+  return scale, shift
+
+# -----------------------------------------------------------------------------
+#
+def omero_channel_colors(omero):
+
+  colors = []
+  if not isinstance(omero, dict):
+    return colors
+  for c in omero.get('channels', []):
+    color = c.get('color')
+    try:
+      rgb = tuple(int(color[i:i+2],16)/255 for i in (0,2,4))
+    except (TypeError, ValueError):
+      rgb = None
+    colors.append(None if rgb is None else rgb + (1,))
+  return colors
+
+# -----------------------------------------------------------------------------
+#
+class Zarr_Array:
+
+  def __init__(self, path, chunk_cache):
+
+    self.path = path
+    self.chunk_cache = chunk_cache
+
+    from os.path import join, isfile
+    zarray = join(path, '.zarray')
+    zjson = join(path, 'zarr.json')
+    if isfile(zarray):
+      self._read_v2_metadata(read_json(zarray))
+    elif isfile(zjson):
+      self._read_v3_metadata(read_json(zjson))
+    else:
+      raise SyntaxError('Zarr array %s has no .zarray or zarr.json file' % path)
+
+  # ---------------------------------------------------------------------------
+  #
+  def _read_v2_metadata(self, meta):
+
+    self.shape = tuple(meta['shape'])
+    self.chunk_shape = tuple(meta['chunks'])
+    from numpy import dtype
+    self.file_dtype = dtype(meta['dtype'])
+    self.dtype = self.file_dtype.newbyteorder('=')
+    self.fill_value = fill_value(meta.get('fill_value'), self.dtype)
+    self.order = meta.get('order', 'C')
+    if meta.get('filters'):
+      fnames = ', '.join(f.get('id', '') for f in meta['filters'])
+      raise SyntaxError('Zarr array %s uses filters %s which are not supported' % (self.path, fnames))
+    c = meta.get('compressor')
+    self.compressors = [] if c is None else [c['id']]
+    self.transpose = []
+    self.key_prefix = ''
+    self.key_separator = meta.get('dimension_separator', '.')
+    self.dimension_names = None
+
+  # ---------------------------------------------------------------------------
+  #
+  def _read_v3_metadata(self, meta):
+
+    if meta.get('node_type') != 'array':
+      raise SyntaxError('Zarr node %s is not an array' % self.path)
+    self.shape = tuple(meta['shape'])
+    grid = meta['chunk_grid']
+    if grid.get('name') != 'regular':
+      raise SyntaxError('Zarr array %s chunk grid type %s is not supported'
+                        % (self.path, grid.get('name')))
+    self.chunk_shape = tuple(grid['configuration']['chunk_shape'])
+
+    key = meta.get('chunk_key_encoding', {'name': 'default'})
+    kconfig = key.get('configuration', {})
+    if key.get('name') == 'v2':
+      self.key_prefix = ''
+      self.key_separator = kconfig.get('separator', '.')
+    else:
+      self.key_prefix = 'c'
+      self.key_separator = kconfig.get('separator', '/')
+
+    endian = 'little'
+    self.transpose = []
+    self.compressors = []
+    for codec in meta.get('codecs', []):
+      name = codec['name']
+      config = codec.get('configuration', {})
+      if name == 'bytes':
+        endian = config.get('endian', 'little')
+      elif name == 'transpose':
+        self.transpose.append(tuple(config['order']))
+      elif name in ('gzip', 'zstd', 'blosc'):
+        self.compressors.append(name)
+      else:
+        raise SyntaxError('Zarr array %s uses codec %s which is not supported' % (self.path, name))
+    self.order = 'C'
+
+    from numpy import dtype
+    dt = dtype(meta['data_type'])
+    self.file_dtype = dt.newbyteorder('<' if endian == 'little' else '>')
+    self.dtype = dt.newbyteorder('=')
+    self.fill_value = fill_value(meta.get('fill_value'), self.dtype)
+    self.dimension_names = meta.get('dimension_names')
+
+  # ---------------------------------------------------------------------------
+  # Selection has for each axis either an integer index or a tuple
+  # (start, count, step).  Axes with an integer index are removed from the
+  # returned array.
+  #
+  def read(self, selection, progress = None):
+
+    # For each axis make a list of (chunk index, output slice, chunk slice).
+    axis_chunks = []
+    read_shape, out_shape = [], []
+    for s, csize in zip(selection, self.chunk_shape):
+      start, count, step = (s, 1, 1) if isinstance(s, int) else s
+      read_shape.append(count)
+      if not isinstance(s, int):
+        out_shape.append(count)
+      chunks = []
+      i, o, end = start, 0, start + (count-1)*step + 1
+      while i < end:
+        c = i // csize
+        cend = min(end, (c+1)*csize)
+        n = (cend - i + step - 1) // step
+        chunks.append((c, slice(o, o+n), slice(i - c*csize, i - c*csize + (n-1)*step + 1, step)))
+        i += n*step
+        o += n
+      axis_chunks.append(chunks)
+
+    from numpy import empty
+    m = empty(read_shape, self.dtype)
+
+    from itertools import product
+    cblocks = list(product(*axis_chunks))
+    for b, block in enumerate(cblocks):
+      if progress:
+        progress.fraction(b/len(cblocks))
+      cindex = tuple(c for c,os,cs in block)
+      chunk = self.chunk(cindex)
+      m[tuple(os for c,os,cs in block)] = chunk[tuple(cs for c,os,cs in block)]
+
+    return m.reshape(out_shape)
+
+  # ---------------------------------------------------------------------------
+  #
+  def chunk(self, cindex):
+
+    key = (self.path, cindex)
+    cache = self.chunk_cache
+    c = cache.get(key)
+    if c is None:
+      c = self._read_chunk(cindex)
+      cache.add(key, c)
+    return c
+
+  # ---------------------------------------------------------------------------
+  #
+  def _read_chunk(self, cindex):
+
+    parts = [str(i) for i in cindex]
+    if self.key_prefix:
+      parts.insert(0, self.key_prefix)
+    from os.path import join
+    if self.key_separator == '/':
+      cpath = join(self.path, *parts)
+    else:
+      cpath = join(self.path, self.key_separator.join(parts))
+
+    from os.path import isfile
+    if not isfile(cpath):
+      # Missing chunks are filled with the fill value.
+      from numpy import full
+      return full(self.chunk_shape, self.fill_value, self.dtype)
+
+    with open(cpath, 'rb') as f:
+      data = f.read()
+    for cname in reversed(self.compressors):
+      data = decompress(data, cname, cpath)
+
+    from numpy import frombuffer
+    shape = self.chunk_shape
+    for order in self.transpose:
+      shape = tuple(shape[i] for i in order)
+    a = frombuffer(data, self.file_dtype)
+    if a.size != _product(shape):
+      raise SyntaxError('Zarr chunk %s has %d values, expected %d'
+                        % (cpath, a.size, _product(shape)))
+    a = a.reshape(shape, order = self.order)
+    from numpy import argsort
+    for order in reversed(self.transpose):
+      a = a.transpose(argsort(order))
+    if a.dtype != self.dtype:
+      a = a.astype(self.dtype)
+    return a
+
+# -----------------------------------------------------------------------------
+#
+def decompress(data, compressor, path):
+
+  if compressor == 'zlib':
+    import zlib
+    return zlib.decompress(data)
+  elif compressor == 'gzip':
+    import gzip
+    return gzip.decompress(data)
+  elif compressor == 'bz2':
+    import bz2
+    return bz2.decompress(data)
+  elif compressor == 'lzma':
+    import lzma
+    return lzma.decompress(data)
+  elif compressor in ('blosc', 'zstd'):
+    try:
+      import imagecodecs
+    except ImportError:
+      raise SyntaxError('Reading %s compressed Zarr chunk %s requires the imagecodecs module'
+                        % (compressor, path))
+    decode = imagecodecs.blosc_decode if compressor == 'blosc' else imagecodecs.zstd_decode
+    return decode(data)
+  raise SyntaxError('Zarr chunk %s uses compression %s which is not supported' % (path, compressor))
+
+# -----------------------------------------------------------------------------
+#
+def fill_value(value, dtype):
+
+  if value is None:
+    return 0
+  if isinstance(value, str):
+    if value in ('NaN', 'Infinity', '-Infinity'):
+      return float(value.replace('inity', ''))
+    return 0
+  return dtype.type(value)
+
+# -----------------------------------------------------------------------------
+#
+def _product(values):
+  p = 1
+  for v in values:
+    p *= v
+  return p
+
+# -----------------------------------------------------------------------------
+# Decoded chunks are kept in a least recently used cache limited in total
+# bytes.  The map data cache holds the assembled subregion arrays, this cache
+# avoids decompressing a chunk again when neighboring regions are read.
+#
+class Chunk_Cache:
+
+  def __init__(self, size):
+
+    self.size = size
+    self.used = 0
+    from collections import OrderedDict
+    self.chunks = OrderedDict()
+
+  # ---------------------------------------------------------------------------
+  #
+  def get(self, key):
+
+    c = self.chunks.get(key)
+    if c is not None:
+      self.chunks.move_to_end(key)
+    return c
+
+  # ---------------------------------------------------------------------------
+  #
+  def add(self, key, chunk):
+
+    if chunk.nbytes > self.size:
+      return
+    self.chunks[key] = chunk
+    self.used += chunk.nbytes
+    while self.used > self.size:
+      k, c = self.chunks.popitem(last = False)
+      self.used -= c.nbytes
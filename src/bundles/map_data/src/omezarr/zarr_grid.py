@@ -0,0 +1,95 @@
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Wrap OME-Zarr image data as grid data for displaying surface, meshes, and volumes.
+#
+from ..griddata import GridData
+
+# -----------------------------------------------------------------------------
+#
+class OMEZarrGrid(GridData):
+
+  def __init__(self, zarr_data, level, time_index, channel_index, **grid_settings):
+
+    self.zarr_data = zarr_data
+    self.level = level
+    self.time_index = time_index
+    self.channel_index = channel_index
+
+    grid_id = 'level %d time %d channel %d' % (level, time_index, channel_index)
+    GridData.__init__(self, path = zarr_data.path, file_type = 'omezarr',
+                      grid_id = grid_id, **grid_settings)
+
+  # ---------------------------------------------------------------------------
+  #
+  def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
+
+    from ..readarray import allocate_array
+    m = allocate_array(ijk_size, self.value_type, ijk_step, progress)
+    self.zarr_data.read_matrix(ijk_origin, ijk_size, ijk_step, self.level,
+                               self.time_index, self.channel_index, m, progress)
+    return m
+
+# -----------------------------------------------------------------------------
+#
+def read_ome_zarr_map(path):
+
+  from .zarr_format import OME_Zarr_Data
+  d = OME_Zarr_Data(path)
+
+  default_colors = ((1,0,0,1),(0,1,0,1),(0,0,1,1),(0,1,1,1),(1,1,0,1),(1,0,1,1))
+  nc, nt = d.channel_count, d.time_count
+  size, origin, step = d.level_geometry(0)
+  grids = []
+  for c in range(nc):
+    if nc > 1:
+      ccolors = d.channel_colors
+      rgba = ccolors[c] if c < len(ccolors) and ccolors[c] else default_colors[c%len(default_colors)]
+    else:
+      rgba = None
+    for t in range(nt):
+      name = d.name
+      if nc > 1:
+        name += ' channel %d' % c
+      g = OMEZarrGrid(d, 0, t, c, size = size, value_type = d.value_type,
+                      origin = origin, step = step, name = name,
+                      default_color = rgba,
+                      time = (t if nt > 1 else None),
+                      channel = (c if nc > 1 else None))
+      if len(d.levels) > 1:
+        g = add_subsamples(d, g, t, c)
+      if nt > 1:
+        g.series_index = t
+      grids.append(g)
+
+  return grids
+
+# -----------------------------------------------------------------------------
+# Add lower resolution levels as subsample grids.  Levels that are not an
+# integer reduction of the full resolution size are skipped.
+#
+def add_subsamples(zarr_data, g, time, channel):
+
+  from ..subsample import SubsampledGrid
+  sg = SubsampledGrid(g)
+  for level in range(1, len(zarr_data.levels)):
+    size, origin, step = zarr_data.level_geometry(level)
+    cell_size = tuple(int(round(s/s0)) for s, s0 in zip(step, g.step))
+    from math import isclose
+    if min(cell_size) < 1 or not all(isclose(s0*c, s, rel_tol = 1e-3)
+                                     for s0, c, s in zip(g.step, cell_size, step)):
+      continue
+    settings = g.settings(size = size, step = step)
+    lg = OMEZarrGrid(zarr_data, level, time, channel, **settings)
+    sg.add_subsamples(lg, cell_size)
+
+  return sg
@@ -74,6 +74,23 @@ def read_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
 
     return matrix
 
+# -----------------------------------------------------------------------------
+# Return part of a matrix in a binary file as a view of a memory mapped file.
+# No data is read until values are accessed, and then only the pages of
+# the file containing the accessed values are read.  The file is mapped
+# copy-on-write so modifying the array does not change the file.
+#
+def memory_map_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
+                     full_size, type):
+
+    from numpy import memmap
+    shape = tuple(full_size[::-1])
+    m = memmap(path, dtype = type, mode = 'c', offset = byte_offset, shape = shape)
+    io, jo, ko = ijk_origin
+    isize, jsize, ksize = ijk_size
+    istep, jstep, kstep = ijk_step
+    return m[ko:ko+ksize:kstep, jo:jo+jsize:jstep, io:io+isize:istep]
+
 # -----------------------------------------------------------------------------
 # Read an array from a binary file making at most one copy of array in memory.
 #
@@ -0,0 +1,88 @@
+from chimerax.map_data import MatrixBlockRanges
+
+def _block_range_test_matrices():
+    from numpy import random, float32, float64, int16, nan
+    r = random.default_rng(2)
+    matrices = [r.random((37,41,29)).astype(float32),
+                r.random((8,8,8)),
+                (1000 * r.random((1,5,70))).astype(int16),
+                r.random((60,30,40)).astype(float32)[::2,:,1::3]]	# Strided
+    m = r.random((30,31,32)).astype(float64)
+    m[3,4,5] = m[20:25,7,8] = nan
+    matrices.append(m)
+    return matrices
+
+def _brute_force_block_ranges(m, block_size):
+    '''Minimum and maximum of each block extended by one grid point on each side.'''
+    from numpy import empty, float32, isnan, inf
+    shape = [(s + block_size - 1) // block_size for s in m.shape]
+    ranges = empty(shape + [2], float32)
+    for k in range(shape[0]):
+        for j in range(shape[1]):
+            for i in range(shape[2]):
+                b = m[max(0, k*block_size-1):(k+1)*block_size+1,
+                      max(0, j*block_size-1):(j+1)*block_size+1,
+                      max(0, i*block_size-1):(i+1)*block_size+1].astype(float32)
+                ranges[k,j,i] = (-inf, inf) if isnan(b).any() else (b.min(), b.max())
+    return ranges
+
+def _test_levels(m, n = 9):
+    from numpy import nanmin, nanmax, linspace
+    return [float(l) for l in linspace(nanmin(m), nanmax(m), n)]
+
+def test_block_ranges():
+    from numpy import array_equal
+    for m in _block_range_test_matrices():
+        for block_size in (4, 8):
+            br = MatrixBlockRanges(m, block_size, num_threads = 3)
+            assert array_equal(br.ranges, _brute_force_block_ranges(m, block_size))
+
+def test_block_ranges_value_range():
+    from numpy import nanmin, nanmax, float32
+    for m in _block_range_test_matrices():
+        vmin, vmax = MatrixBlockRanges(m).value_range()
+        assert vmin == float32(nanmin(m)) and vmax == float32(nanmax(m))
+
+def test_block_ranges_voxels_above():
+    from chimerax.map._map import high_count
+    from numpy import float32, errstate
+    for m in _block_range_test_matrices():
+        br = MatrixBlockRanges(m, 4)
+        for level in _test_levels(m):
+            with errstate(invalid = 'ignore'):
+                count = int((m >= float32(level)).sum())
+            assert br.voxels_above(level) == count
+            assert high_count(m, level) == count
+            assert high_count(m, level, block_ranges = br.ranges, block_size = 4) == count
+
+def test_block_ranges_straddling_blocks():
+    from numpy import nonzero
+    for m in _block_range_test_matrices():
+        br = MatrixBlockRanges(m, 4)
+        r = br.ranges
+        for level in _test_levels(m):
+            blocks = set(map(tuple, br.straddling_blocks(level).tolist()))
+            brute = set(zip(*[b.tolist() for b in nonzero((r[...,0] <= level) & (r[...,1] >= level))]))
+            assert blocks == brute
+
+def test_block_ranges_level_with_count_above():
+    from numpy import random, float32
+    m = random.default_rng(3).random((23,19,31)).astype(float32)
+    br = MatrixBlockRanges(m)
+    for count in (1, 100, 5000, m.size - 1):
+        level = br.level_with_count_above(count, 0.0, 1.0)
+        assert (m >= float32(level)).sum() == count
+
+def test_surface_level_enclosing_volume():
+    from chimerax.map_data import surface_level_enclosing_volume
+    from numpy import indices, sqrt, float32, pi
+    # Values are minus the distance from the grid center so the level -r
+    # encloses a sphere of radius r.
+    k, j, i = indices((40,44,48), float32)
+    m = -sqrt((k-19.5)**2 + (j-21.5)**2 + (i-23.5)**2)
+    radius = 12
+    volume = 4/3 * pi * radius**3
+    level = surface_level_enclosing_volume(m, volume, tolerance = 1e-3)
+    assert abs(level + radius) < 0.1
+    br = MatrixBlockRanges(m, 4)
+    assert surface_level_enclosing_volume(m, volume, tolerance = 1e-3, block_ranges = br) == level
@@ -0,0 +1,52 @@
+from chimerax.map_data.datacache import Data_Cache
+
+def _cache_arrays(cache, keys, groups = []):
+    from numpy import zeros, uint8
+    for k in keys:
+        cache.cache_data(k, zeros((100,), uint8), 100, 'array %s' % k, list(groups))
+
+def test_data_cache_lru_order():
+    cache = Data_Cache(size = 300)
+    _cache_arrays(cache, 'abc')
+    cache.lookup_data('a')
+    _cache_arrays(cache, 'd')
+    assert set(cache.data.keys()) == set('acd')
+    assert cache.statistics()['evictions'] == 1
+
+def test_data_cache_keeps_referenced_data():
+    cache = Data_Cache(size = 200)
+    _cache_arrays(cache, 'ab')
+    a = cache.lookup_data('a')
+    _cache_arrays(cache, 'c')
+    assert set(cache.data.keys()) == set('ac')
+    del a
+
+def test_data_cache_group_limit_order():
+    cache = Data_Cache(size = 10000)
+    g1, g2 = object(), object()
+    _cache_arrays(cache, 'abc', [g1])
+    _cache_arrays(cache, 'xy', [g2])
+    cache.lookup_data('a')
+    cache.set_group_limit(g1, 200)
+    # Least recently used group 1 data is released, other groups are untouched.
+    assert set(cache.data.keys()) == set('acxy')
+    _cache_arrays(cache, 'd', [g1])
+    assert set(cache.data.keys()) == set('adxy')
+    cache.lookup_data('a')
+    _cache_arrays(cache, 'e', [g1])
+    assert set(cache.data.keys()) == set('aexy')
+    assert cache.group_statistics(g1) == {'used': 200, 'objects': 2, 'limit': 200}
+    assert cache.group_statistics(g2)['used'] == 200
+
+def test_data_cache_remove_group():
+    cache = Data_Cache(size = 10000)
+    g = object()
+    _cache_arrays(cache, 'ab', [g])
+    cache.set_group_limit(g, 200)
+    cache.remove_group(g)
+    assert cache.group_limit(g) is None
+    assert g not in cache.groups and g not in cache.group_used
+    assert all(g not in d.groups for d in cache.data.values())
+    _cache_arrays(cache, 'c')
+    cache.remove_key('a')
+    assert set(cache.data.keys()) == set('bc')
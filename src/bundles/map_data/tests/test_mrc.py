@@ -0,0 +1,90 @@
+from chimerax.map_data.mrc.mrc_grid import MRCGrid
+
+def _write_mrc(path, m, axis_order = (1,2,3), swap_bytes = False):
+    '''Write an MRC 2000 file with matrix m in file (section, row, column) order.'''
+    from numpy import zeros, int32, float32, int8, int16, frombuffer
+    mode = {int8: 0, int16: 1, float32: 2}[m.dtype.type]
+    h = zeros((256,), int32)
+    hf = h.view(float32)
+    ns, nr, nc = m.shape
+    h[0:4] = (nc, nr, ns, mode)
+    h[7:10] = (nc, nr, ns)
+    hf[10:13] = (1.5*nc, 1.5*nr, 1.5*ns)
+    hf[13:16] = (90, 90, 90)
+    h[16:19] = axis_order
+    hf[19:22] = (m.min(), m.max(), m.mean())
+    hf[49:52] = (2, -3, 5)
+    h[52] = frombuffer(b'MAP ', int32)[0]
+    if swap_bytes:
+        h = h.byteswap()
+        h[52] = frombuffer(b'MAP ', int32)[0]
+        m = m.byteswap()
+    with open(path, 'wb') as f:
+        f.write(h.tobytes())
+        f.write(m.tobytes())
+
+def _test_matrix(value_type):
+    from numpy import random
+    return (100 * random.default_rng(6).random((11,14,9)) - 50).astype(value_type)
+
+def _is_memory_mapped(a):
+    from numpy import memmap
+    while a is not None:
+        if isinstance(a, memmap):
+            return True
+        a = a.base
+    return False
+
+def _read(g, origin = (0,0,0), size = None, step = (1,1,1)):
+    return g.read_matrix(origin, g.size if size is None else size, step, None)
+
+def _check_same_matrices(g, gm):
+    from numpy import array_equal
+    assert gm.size == g.size and gm.origin == g.origin and gm.step == g.step
+    assert gm.value_type == g.value_type
+    assert array_equal(_read(gm), _read(g))
+    for origin, size, step in (((1,2,3), (5,7,4), (1,1,1)),
+                               ((0,1,0), (g.size[0],g.size[1]-1,g.size[2]), (2,3,2)),
+                               ((g.size[0]-1,0,1), (1,g.size[1],1), (1,1,1))):
+        sub = _read(g, origin, size, step)
+        sub_mapped = _read(gm, origin, size, step)
+        assert sub_mapped.shape == sub.shape
+        assert array_equal(sub_mapped, sub)
+
+def test_mrc_memory_map(tmp_path):
+    from numpy import float32, int16, int8, array_equal
+    for value_type in (float32, int16, int8):
+        path = str(tmp_path / ('test_%s.mrc' % value_type.__name__))
+        m = _test_matrix(value_type)
+        _write_mrc(path, m)
+        g = MRCGrid(path)
+        gm = MRCGrid(path, memory_map = True)
+        assert gm.memory_map and not g.memory_map
+        assert array_equal(_read(g), m)
+        assert _is_memory_mapped(_read(gm)) and not _is_memory_mapped(_read(g))
+        _check_same_matrices(g, gm)
+
+        # Mapping is copy-on-write so changing values does not change the file.
+        mapped = _read(gm)
+        mapped[:] = 0
+        assert array_equal(_read(MRCGrid(path)), m)
+
+def test_mrc_memory_map_axis_order(tmp_path):
+    from numpy import float32
+    path = str(tmp_path / 'test_axes.mrc')
+    _write_mrc(path, _test_matrix(float32), axis_order = (3,1,2))
+    gm = MRCGrid(path, memory_map = True)
+    assert _is_memory_mapped(_read(gm))
+    _check_same_matrices(MRCGrid(path), gm)
+
+def test_mrc_memory_map_swapped_bytes(tmp_path):
+    from numpy import float32, array_equal
+    path = str(tmp_path / 'test_swapped.mrc')
+    m = _test_matrix(float32)
+    _write_mrc(path, m, swap_bytes = True)
+    # Byte swapped files are read normally.
+    gm = MRCGrid(path, memory_map = True)
+    assert not gm.memory_map
+    assert not _is_memory_mapped(_read(gm))
+    assert array_equal(_read(gm), m)
+    _check_same_matrices(MRCGrid(path), gm)
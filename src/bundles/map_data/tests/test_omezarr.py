@@ -0,0 +1,159 @@
+import json
+import os
+import zlib
+import gzip
+
+from chimerax.map_data import omezarr
+
+def _chunk_indices(shape, chunks):
+    from itertools import product
+    return product(*[range((s + c - 1) // c) for s, c in zip(shape, chunks)])
+
+def _padded_chunk(a, cindex, chunks, fill_value):
+    '''Chunk of array a padded to the full chunk shape as Zarr stores edge chunks.'''
+    from numpy import full
+    c = full(chunks, fill_value, a.dtype)
+    region = tuple(slice(i*cs, (i+1)*cs) for i, cs in zip(cindex, chunks))
+    block = a[region]
+    c[tuple(slice(0, n) for n in block.shape)] = block
+    return c, block
+
+def _write_zarr2_array(path, a, chunks, fill_value = 0, skip_fill_chunks = False):
+    os.makedirs(path)
+    meta = {'zarr_format': 2, 'shape': list(a.shape), 'chunks': list(chunks),
+            'dtype': a.dtype.str, 'compressor': {'id': 'zlib', 'level': 1},
+            'fill_value': fill_value, 'order': 'C', 'filters': None}
+    with open(os.path.join(path, '.zarray'), 'w') as f:
+        json.dump(meta, f)
+    for cindex in _chunk_indices(a.shape, chunks):
+        c, block = _padded_chunk(a, cindex, chunks, fill_value)
+        if skip_fill_chunks and (block == fill_value).all():
+            continue
+        with open(os.path.join(path, '.'.join(str(i) for i in cindex)), 'wb') as f:
+            f.write(zlib.compress(c.tobytes()))
+
+def _write_zarr3_array(path, a, chunks, dimension_names):
+    os.makedirs(path)
+    meta = {'zarr_format': 3, 'node_type': 'array', 'shape': list(a.shape),
+            'data_type': a.dtype.name,
+            'chunk_grid': {'name': 'regular', 'configuration': {'chunk_shape': list(chunks)}},
+            'chunk_key_encoding': {'name': 'default', 'configuration': {'separator': '/'}},
+            'codecs': [{'name': 'bytes', 'configuration': {'endian': 'big'}},
+                       {'name': 'gzip', 'configuration': {'level': 1}}],
+            'fill_value': 0, 'dimension_names': dimension_names}
+    with open(os.path.join(path, 'zarr.json'), 'w') as f:
+        json.dump(meta, f)
+    for cindex in _chunk_indices(a.shape, chunks):
+        c, block = _padded_chunk(a, cindex, chunks, 0)
+        cdir = os.path.join(path, 'c', *[str(i) for i in cindex[:-1]])
+        os.makedirs(cdir, exist_ok = True)
+        with open(os.path.join(cdir, str(cindex[-1])), 'wb') as f:
+            f.write(gzip.compress(c.astype(c.dtype.newbyteorder('>')).tobytes()))
+
+def _multiscale_image(tmp_path):
+    '''Zarr 2 OME-Zarr image with z,y,x axes and a level binned by 2.'''
+    from numpy import random, float32
+    a = random.default_rng(9).random((19,22,27)).astype(float32)
+    path = str(tmp_path / 'image.zarr')
+    os.makedirs(path)
+    _write_zarr2_array(os.path.join(path, '0'), a, (8,8,8))
+    _write_zarr2_array(os.path.join(path, '1'), a[::2,::2,::2], (8,8,8))
+    axes = [{'name': n, 'type': 'space', 'unit': 'angstrom'} for n in 'zyx']
+    datasets = [{'path': str(l), 'coordinateTransformations':
+                 [{'type': 'scale', 'scale': [0.5*2**l]*3},
+                  {'type': 'translation', 'translation': [3, 2, 1]}]} for l in (0,1)]
+    attrs = {'multiscales': [{'version': '0.4', 'name': 'tomogram', 'axes': axes,
+                              'datasets': datasets}]}
+    with open(os.path.join(path, '.zgroup'), 'w') as f:
+        json.dump({'zarr_format': 2}, f)
+    with open(os.path.join(path, '.zattrs'), 'w') as f:
+        json.dump(attrs, f)
+    return path, a
+
+def test_omezarr_open(tmp_path):
+    path, a = _multiscale_image(tmp_path)
+    grids = omezarr.open(path)
+    assert len(grids) == 1
+    g = grids[0]
+    assert g.name == 'tomogram'
+    assert tuple(g.size) == (27,22,19)
+    assert tuple(g.step) == (0.5,0.5,0.5)
+    assert tuple(g.origin) == (1,2,3)
+    assert g.value_type == a.dtype
+    from numpy import array_equal
+    assert array_equal(g.matrix(), a)
+
+def test_omezarr_chunked_read(tmp_path):
+    path, a = _multiscale_image(tmp_path)
+    g = omezarr.open(path)[0].available_subsamplings[(1,1,1)]
+    zarray = g.zarr_data.levels[0][0]
+    from numpy import array_equal
+    for origin, size, step in (((3,5,2), (10,7,9), (1,1,1)),
+                               ((0,1,4), (27,20,15), (3,1,2)),
+                               ((26,21,18), (1,1,1), (1,1,1))):
+        zarray.chunk_cache.chunks.clear()
+        zarray.chunk_cache.used = 0
+        m = g.read_matrix(origin, size, step, None)
+        (i0,j0,k0), (si,sj,sk), (ti,tj,tk) = origin, size, step
+        assert array_equal(m, a[k0:k0+sk:tk, j0:j0+sj:tj, i0:i0+si:ti])
+        # Only chunks containing the requested grid points are read.
+        needed = set()
+        for k in range(k0, k0+sk, tk):
+            for j in range(j0, j0+sj, tj):
+                for i in range(i0, i0+si, ti):
+                    needed.add((k//8, j//8, i//8))
+        assert set(c for p, c in zarray.chunk_cache.chunks) == needed
+
+def test_omezarr_multiscale(tmp_path):
+    path, a = _multiscale_image(tmp_path)
+    g = omezarr.open(path)[0]
+    assert set(g.available_subsamplings.keys()) == {(1,1,1), (2,2,2)}
+    g2 = g.available_subsamplings[(2,2,2)]
+    assert tuple(g2.size) == (14,11,10)
+    assert tuple(g2.step) == (1,1,1)
+    from numpy import array_equal
+    assert array_equal(g.matrix(ijk_step = (2,2,2)), a[::2,::2,::2])
+    assert array_equal(g.matrix(ijk_step = (4,4,4)), a[::4,::4,::4])
+    level1 = g2.zarr_data.levels[1][0]
+    assert len(level1.chunk_cache.chunks) > 0
+    assert all(p == level1.path for p, c in level1.chunk_cache.chunks)
+
+def test_omezarr_zarr3_channels(tmp_path):
+    from numpy import random, uint16, array_equal
+    a = (1000 * random.default_rng(10).random((2,5,12,9))).astype(uint16)
+    path = str(tmp_path / 'channels.zarr')
+    _write_zarr3_array(os.path.join(path, 's0'), a, (1,4,5,4), ['c','z','y','x'])
+    axes = [{'name': 'c', 'type': 'channel'}] + [{'name': n, 'type': 'space'} for n in 'zyx']
+    ome = {'version': '0.5',
+           'multiscales': [{'axes': axes, 'datasets': [{'path': 's0', 'coordinateTransformations':
+                                                        [{'type': 'scale', 'scale': [1,2,2,2]}]}]}],
+           'omero': {'channels': [{'color': 'FF0000'}, {'color': '00FF00'}]}}
+    with open(os.path.join(path, 'zarr.json'), 'w') as f:
+        json.dump({'zarr_format': 3, 'node_type': 'group', 'attributes': {'ome': ome}}, f)
+    grids = omezarr.open(path)
+    assert len(grids) == 2
+    assert [g.channel for g in grids] == [0, 1]
+    assert tuple(grids[1].rgba) == (0,1,0,1)
+    assert tuple(grids[0].size) == (9,12,5) and tuple(grids[0].step) == (2,2,2)
+    for c, g in enumerate(grids):
+        assert array_equal(g.matrix(), a[c])
+        assert array_equal(g.matrix((2,3,1), (5,6,3), (2,1,1)), a[c,1:4,3:9,2:7:2])
+
+def test_omezarr_missing_chunks(tmp_path):
+    from numpy import random, int16, array_equal
+    a = (100 * random.default_rng(11).random((10,10,10))).astype(int16)
+    a[:5,:5,:] = 7
+    path = str(tmp_path / 'array.zarr')
+    _write_zarr2_array(path, a, (5,5,5), fill_value = 7, skip_fill_chunks = True)
+    assert not os.path.exists(os.path.join(path, '0.0.0'))
+    g = omezarr.open(path)[0]
+    assert array_equal(g.matrix(), a)
+
+def test_open_omezarr_command(test_production_session, tmp_path):
+    session = test_production_session
+    from chimerax.core.commands import run
+    path, a = _multiscale_image(tmp_path)
+    v = run(session, 'open %s format omezarr' % path)[0]
+    assert tuple(v.data.size) == (27,22,19)
+    from numpy import array_equal
+    assert array_equal(v.full_matrix(), a)
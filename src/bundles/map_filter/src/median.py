@@ -10,12 +10,15 @@
 # === UCSF ChimeraX Copyright ===
 
 # -----------------------------------------------------------------------------
-# 3x3x3 median filter.
+# 3x3x3 median filter.  Other ranks give percentile, minimum (rank 0) or
+# maximum (rank 1) filters.
 #
 def median_filter(volume, bin_size = 3, iterations = 1,
-                  step = 1, subregion = None, modelId = None):
+                  step = 1, subregion = None, modelId = None,
+                  rank = 0.5, nthread = None):
 
-  mg = median_grid(volume, bin_size, iterations, step, subregion)
+  mg = median_grid(volume, bin_size, iterations, step, subregion,
+                   rank = rank, nthread = nthread)
   from chimerax.map import volume_from_grid_data
   mv = volume_from_grid_data(mg, volume.session, model_id = modelId)
   mv.copy_settings_from(volume, copy_region = False)
@@ -27,7 +30,8 @@ def median_filter(volume, bin_size = 3, iterations = 1,
 # -----------------------------------------------------------------------------
 #
 def median_grid(volume, bin_size = 3, iterations = 1,
-                step = 1, subregion = None, region = None):
+                step = 1, subregion = None, region = None,
+                rank = 0.5, nthread = None):
 
   v = volume
   if region is None:
@@ -38,12 +42,13 @@ def median_grid(volume, bin_size = 3, iterations = 1,
   vm = v.region_matrix(region)
   m = vm
   for i in range(iterations):
-    m = median_array(m, bin_size)
+    m = rank_array(m, bin_size, rank, nthread)
 
   from chimerax.map_data import ArrayGridData
   d = v.data
-  if v.name.endswith('median'): name = v.name
-  else:                         name = '%s median' % v.name
+  suffix = 'median' if rank == 0.5 else 'rank %.3g' % rank
+  if v.name.endswith(suffix): name = v.name
+  else:                       name = '%s %s' % (v.name, suffix)
   mg = ArrayGridData(m, origin, step, d.cell_angles, d.rotation,
                      name = name)
   return mg
@@ -51,30 +56,30 @@ def median_grid(volume, bin_size = 3, iterations = 1,
 # -----------------------------------------------------------------------------
 # Volume border of result is set to zero.  Bin size must be odd.
 #
-def median_array(m, bin_size=3):
+def median_array(m, bin_size=3, nthread=None):
+
+  return rank_array(m, bin_size, 0.5, nthread)
+
+# -----------------------------------------------------------------------------
+# Replace each value by the value of the given rank in a box of size bin_size
+# centered on that value.  Rank is a fraction from 0 (minimum) to 1 (maximum).
+# Volume border of result is set to zero.  Bin size must be odd.  The filter
+# runs in C++ using nthread threads, default all cores.
+#
+def rank_array(m, bin_size=3, rank=0.5, nthread=None):
 
   if isinstance(bin_size, int):
     bin_size = (bin_size, bin_size, bin_size)
-  si,sj,sk= bin_size
 
-  from numpy import zeros, empty, median
+  from numpy import zeros
   mm = zeros(m.shape, m.dtype)
 
-  if m.shape[0] < sk or m.shape[1] < sj or m.shape[2] < si:
-    return mm     # Size less than filter width.
-
-  ksize, jsize, isize = m.shape
-  hsi,hsj,hsk = [(n-1)//2 for n in bin_size]
-  pn = empty((jsize-2*hsj,isize-2*hsi,si*sj*sk), m.dtype)
-
-  for k in range(hsk,ksize-hsk):
-    c = 0
-    for ko in range(-hsk,hsk+1):
-      for jo in range(-hsj,hsj+1):
-        for io in range(-hsi,hsi+1):
-          pn[:,:,c] = m[k+ko,hsj+jo:jsize-hsj+jo,hsi+io:isize-hsi+io]
-          c += 1
-    mm[k,hsj:jsize-hsj,hsi:isize-hsi] = median(pn,axis=2)
+  if nthread is None:
+    from os import cpu_count
+    nthread = cpu_count() or 1
+
+  from chimerax.map._map import rank_filter
+  rank_filter(m, bin_size, rank, mm, num_threads = nthread)
 
   return mm
 
@@ -179,7 +179,9 @@ def register_volume_filtering_subcommands(logger):
 
     median_desc = CmdDesc(required = varg,
                           keyword = [('bin_size', MapStepArg),
-                                     ('iterations', IntArg)] + ssm_kw,
+                                     ('iterations', IntArg),
+                                     ('rank', FloatArg),
+                                     ('nthread', IntArg)] + ssm_kw,
                           synopsis = 'Median map value over a sliding window')
     register('volume median', median_desc, volume_median, logger=logger)
 
@@ -713,14 +715,23 @@ def volume_local_correlation(session, volumes, window_size = 5, subtract_mean =
 # -----------------------------------------------------------------------------
 #
 def volume_median(session, volumes, bin_size = (3,3,3), iterations = 1,
-              subregion = 'all', step = 1, model_id = None):
-    '''Replace map values with median of neighboring values.'''
+                  rank = 0.5, nthread = None,
+                  subregion = 'all', step = 1, model_id = None):
+    '''
+    Replace map values with median of neighboring values.  A rank other
+    than 0.5 uses other percentiles, 0 giving the minimum and 1 the maximum.
+    '''
     for b in bin_size:
         if b <= 0 or b % 2 == 0:
             raise CommandError('Bin size must be positive odd integer, got %d' % b)
+    if rank < 0 or rank > 1:
+        raise CommandError('Rank must be between 0 and 1, got %.4g' % rank)
+    if nthread is not None and nthread < 1:
+        raise CommandError('Number of threads must be at least 1, got %d' % nthread)
 
     from .median import median_filter
-    mv = [median_filter(v, bin_size, iterations, step, subregion, model_id)
+    mv = [median_filter(v, bin_size, iterations, step, subregion, model_id,
+                        rank = rank, nthread = nthread)
           for v in volumes]
     return _volume_or_list(mv)
 
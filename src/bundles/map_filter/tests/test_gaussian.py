@@ -0,0 +1,88 @@
+from chimerax.map_filter.gaussian import gaussian_convolution, efficient_fft_size
+
+def _reference_convolution(m, ijk_sdev, cyclic = False, cutoff = 5, invert = False):
+    '''Gaussian filtering one axis at a time with float64 numpy FFTs.'''
+    from numpy import arange, minimum, exp, float64, moveaxis
+    from numpy.fft import rfft, irfft
+    c = m.astype(float64)
+    for axis in range(3):
+        size = c.shape[axis]
+        if size == 1:
+            continue
+        sdev = ijk_sdev[2-axis]
+        hw = min(size//2, int(cutoff*sdev+1))
+        n = size if cyclic else efficient_fft_size(size + hw)
+        i = arange(n, dtype = float64)
+        u = minimum(i, n-i) / sdev
+        g = exp(-minimum(u*u/2, 100))
+        g /= g.sum()
+        g[hw:-hw] = 0
+        ft = rfft(moveaxis(c, axis, -1), n = n)
+        ft = ft / rfft(g) if invert else ft * rfft(g)
+        c = moveaxis(irfft(ft, n = n)[...,:size], -1, axis)
+    return c
+
+def _relative_error(a, b):
+    return abs(a.astype(b.dtype) - b).max() / abs(b).max()
+
+def _test_map(shape, value_type):
+    from numpy import random
+    return random.default_rng(3).random(shape).astype(value_type)
+
+def test_gaussian_float32_float64():
+    from numpy import float32, float64
+    for value_type, tolerance in ((float32, 1e-5), (float64, 1e-12)):
+        for shape, ijk_sdev in (((20,24,30), (1.5,1.5,1.5)), ((9,17,13), (1,2,0.7)),
+                                ((1,16,20), (2,2,2))):
+            m = _test_map(shape, value_type)
+            g = gaussian_convolution(m, ijk_sdev, nthread = 1)
+            assert g.dtype == value_type and g.shape == m.shape
+            assert _relative_error(g, _reference_convolution(m, ijk_sdev)) < tolerance
+
+def test_gaussian_integer_values():
+    from numpy import int16, float32
+    m = (1000*_test_map((12,10,14), float32)).astype(int16)
+    g = gaussian_convolution(m, (1,1,1), value_type = float32)
+    assert g.dtype == float32
+    assert _relative_error(g, _reference_convolution(m, (1,1,1))) < 1e-5
+
+def test_gaussian_invert():
+    from numpy import float32, float64
+    ijk_sdev = (0.8,0.6,0.7)
+    for value_type, tolerance in ((float32, 1e-4), (float64, 1e-10)):
+        m = _test_map((16,18,20), value_type)
+        s = gaussian_convolution(m, ijk_sdev, invert = True)
+        assert s.dtype == value_type
+        assert _relative_error(s, _reference_convolution(m, ijk_sdev, invert = True)) < tolerance
+        # Cyclic sharpening undoes cyclic smoothing.
+        g = gaussian_convolution(m.astype(float64), ijk_sdev, cyclic = True)
+        gs = gaussian_convolution(g, ijk_sdev, cyclic = True, invert = True)
+        assert _relative_error(gs, m.astype(float64)) < 1e-8
+
+def test_gaussian_cyclic_odd_sizes():
+    from numpy import float32, float64
+    for value_type, tolerance in ((float32, 1e-5), (float64, 1e-12)):
+        for shape, ijk_sdev in (((13,17,19), (1,1.5,2)), ((7,5,9), (3,3,3))):
+            m = _test_map(shape, value_type)
+            g = gaussian_convolution(m, ijk_sdev, cyclic = True)
+            ref = _reference_convolution(m, ijk_sdev, cyclic = True)
+            assert _relative_error(g, ref) < tolerance
+    # Smoothing a constant cyclic map only scales it.
+    from numpy import ones
+    m = ones((13,17,19), float64)
+    g = gaussian_convolution(m, (1,1,1), cyclic = True)
+    assert abs(g - g.flat[0]).max() < 1e-12
+
+def test_gaussian_chunks_and_threads():
+    from numpy import float32, float64, array_equal
+    for value_type in (float32, float64):
+        m = _test_map((23,30,17), value_type)
+        for invert, cyclic in ((False, False), (True, False), (False, True)):
+            g = gaussian_convolution(m, (1.2,0.9,1.5), invert = invert, cyclic = cyclic,
+                                     nthread = 1)
+            for chunk_bytes in (1, 5000, 2**16):
+                for nthread in (1, 2, 4):
+                    gc = gaussian_convolution(m, (1.2,0.9,1.5), invert = invert,
+                                              cyclic = cyclic, nthread = nthread,
+                                              chunk_bytes = chunk_bytes)
+                    assert array_equal(gc, g)
@@ -0,0 +1,75 @@
+from chimerax.map_filter.median import rank_array
+
+def _bin_values(m, bin_size):
+    '''Array of sorted bin values for each interior grid point, NaN last.'''
+    from numpy.lib.stride_tricks import sliding_window_view
+    bx, by, bz = bin_size
+    w = sliding_window_view(m, (bz, by, bx))
+    from numpy import sort
+    return sort(w.reshape(w.shape[:3] + (-1,)), axis = -1)
+
+def _interior(m, bin_size):
+    bx, by, bz = bin_size
+    return m[bz//2:m.shape[0]-bz//2, by//2:m.shape[1]-by//2, bx//2:m.shape[2]-bx//2]
+
+def _check_borders_zero(mr, bin_size):
+    from numpy import ones
+    mask = ones(mr.shape, bool)
+    _interior(mask, bin_size)[:] = False
+    assert (mr[mask] == 0).all()
+
+def _test_arrays():
+    from numpy import random, float32, float64, int16
+    r = random.default_rng(4)
+    return [r.random((13,17,19)).astype(float32),
+            r.random((9,12,15)),
+            (1000*r.random((11,8,14))).astype(int16),
+            r.random((30,17,40)).astype(float32)[::2,:,1::3]]	# Strided
+
+def test_median_filter():
+    from numpy import median, array_equal
+    for m in _test_arrays():
+        for bin_size in ((3,3,3), (5,3,1), (1,3,5), (3,5,7)):
+            mr = rank_array(m, bin_size, 0.5, nthread = 3)
+            w = _bin_values(m, bin_size)
+            assert array_equal(_interior(mr, bin_size), median(w, axis = -1).astype(m.dtype))
+            _check_borders_zero(mr, bin_size)
+
+def test_rank_filter_minimum_maximum():
+    from numpy import array_equal
+    for m in _test_arrays():
+        for bin_size in ((3,3,3), (5,1,3)):
+            w = _bin_values(m, bin_size)
+            mr0 = rank_array(m, bin_size, 0, nthread = 2)
+            assert array_equal(_interior(mr0, bin_size), w.min(axis = -1))
+            mr1 = rank_array(m, bin_size, 1, nthread = 2)
+            assert array_equal(_interior(mr1, bin_size), w.max(axis = -1))
+
+def test_rank_filter_ranks():
+    from numpy import array_equal
+    m = _test_arrays()[0]
+    bin_size = (3,5,3)
+    w = _bin_values(m, bin_size)
+    n = w.shape[-1]
+    for rank in (0.1, 0.25, 0.8):
+        mr = rank_array(m, bin_size, rank, nthread = 1)
+        assert array_equal(_interior(mr, bin_size), w[..., int(rank*(n-1) + 0.5)])
+
+def test_rank_filter_threads():
+    from numpy import array_equal
+    m = _test_arrays()[1]
+    mr1 = rank_array(m, (3,3,5), 0.5, nthread = 1)
+    for nthread in (2, 3, 16):
+        assert array_equal(rank_array(m, (3,3,5), 0.5, nthread = nthread), mr1)
+
+def test_rank_filter_nan():
+    # NaN values are ranked above all other values, as numpy sort does.
+    from numpy import array_equal, nan
+    m = _test_arrays()[0]
+    m[4,5,6] = m[8,2:5,10] = nan
+    bin_size = (3,3,3)
+    w = _bin_values(m, bin_size)
+    for rank in (0, 0.5, 1):
+        mr = rank_array(m, bin_size, rank, nthread = 2)
+        expected = w[..., int(rank*(w.shape[-1]-1) + 0.5)]
+        assert array_equal(_interior(mr, bin_size), expected, equal_nan = True)
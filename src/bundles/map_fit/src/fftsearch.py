@@ -0,0 +1,192 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Exhaustive fit search.  For each rotation in a uniform sampling the fit
+# points are spread onto a grid matching the target map and the sum of map
+# values times point weights is computed for every translation at once using
+# FFT cross-correlation.  The best scoring placements are returned to be
+# refined by local optimization.
+#
+# Points should be in volume local coordinates.
+#
+def fft_search_placements(points, point_weights, volume, n,
+                          rotation_step = 30, rotations = True,
+                          radius = None, shift_tolerance = 3,
+                          request_stop_cb = None, nthread = 1):
+
+    from chimerax.geometry import identity, translation
+    data_array = volume.matrix(step = 1)
+    ijk_to_xyz_tf = volume.matrix_indices_to_xyz_transform(step = 1)
+    xyz_to_ijk_tf = ijk_to_xyz_tf.inverse()
+
+    center = points.mean(axis = 0)
+    ctf = translation(-center)
+    rlist = uniform_rotations(rotation_step) if rotations else [identity()]
+    weights = _point_weights(points, point_weights)
+
+    # Pad the target map with zeros so points off the edge of the map do
+    # not wrap around to the other side in the cyclic correlation.
+    from numpy import float32, zeros, sqrt, sum
+    from math import ceil
+    offsets = points - center
+    ijk_points = xyz_to_ijk_tf.transform_vectors(offsets)
+    extent = int(ceil(sqrt(sum(ijk_points*ijk_points, axis = 1)).max())) + 2
+    ksz, jsz, isz = data_array.shape
+    shape = (ksz + 2*extent, jsz + 2*extent, isz + 2*extent)
+    target = zeros(shape, float32)
+    target[:ksz,:jsz,:isz] = data_array
+    from numpy.fft import rfftn
+    target_ft = rfftn(target)
+
+    allowed = _allowed_centers(data_array.shape, ijk_to_xyz_tf, center, radius)
+    nmin = max(1, int(round(shift_tolerance / min(volume.data.step))))
+
+    def rotation_peaks(r):
+        u = xyz_to_ijk_tf.transform_vectors(rlist[r].transform_vectors(offsets))
+        scores = _correlation_scores(target_ft, shape, u, weights)
+        scores = scores[:ksz,:jsz,:isz]
+        return [(score, r, ijk) for score, ijk in
+                _best_peaks(scores, allowed, n, nmin)]
+
+    if nthread is None:
+        from multiprocessing import cpu_count
+        nthread = max(1, cpu_count()//2)
+
+    peaks = []
+    nrot = len(rlist)
+    chunk = max(1, 4*nthread)
+    from chimerax.core.threadq import apply_to_list
+    for r0 in range(0, nrot, chunk):
+        if request_stop_cb and request_stop_cb('FFT search rotation %d of %d'
+                                               % (r0+1, nrot)):
+            break
+        rotation_indices = range(r0, min(r0+chunk, nrot))
+        for rpeaks in apply_to_list(rotation_peaks, [(r,) for r in rotation_indices], nthread):
+            peaks.extend(rpeaks)
+
+    peaks.sort(key = lambda p: (-p[0], p[1]))
+    tfs = [translation(ijk_to_xyz_tf * ijk) * rlist[r] * ctf
+           for score, r, ijk in peaks[:n]]
+    return tfs
+
+# -----------------------------------------------------------------------------
+# Return rotations uniformly spaced by approximately angle_step degrees.  The
+# rotated z axis directions are spread evenly on a sphere, and for each
+# direction rotations about that axis are spaced by the angle step.
+#
+def uniform_rotations(angle_step):
+
+    from math import pi, ceil, radians
+    a = radians(angle_step)
+    naxes = max(1, int(ceil(4*pi / (a*a))))
+    nspin = max(1, int(ceil(2*pi / a)))
+    from chimerax.geometry.sphere import sphere_points
+    from chimerax.geometry import orthonormal_frame, rotation
+    spins = [rotation((0,0,1), 360*s/nspin) for s in range(nspin)]
+    rlist = []
+    for axis in sphere_points(naxes):
+        f = orthonormal_frame(axis)
+        rlist.extend(f * spin for spin in spins)
+    return rlist
+
+# -----------------------------------------------------------------------------
+#
+def _point_weights(points, point_weights):
+
+    from numpy import ones, float32
+    if point_weights is None:
+        return ones((len(points),), float32)
+    return point_weights
+
+# -----------------------------------------------------------------------------
+# Spread weights at grid index offsets u to the 8 nearest grid points of a
+# cyclic grid and cross-correlate with the target map.  The score at grid
+# index s is the sum of target values at s + u times weights.
+#
+def _correlation_scores(target_ft, shape, u, weights):
+
+    from numpy import floor, int64, bincount, concatenate
+    ksz, jsz, isz = shape
+    i0 = floor(u).astype(int64)
+    f = u - i0
+    indices, values = [], []
+    for di in (0,1):
+        wi = f[:,0] if di else 1-f[:,0]
+        for dj in (0,1):
+            wj = f[:,1] if dj else 1-f[:,1]
+            for dk in (0,1):
+                wk = f[:,2] if dk else 1-f[:,2]
+                i = (i0[:,0]+di) % isz
+                j = (i0[:,1]+dj) % jsz
+                k = (i0[:,2]+dk) % ksz
+                indices.append((k*jsz + j)*isz + i)
+                values.append(weights*wi*wj*wk)
+    splat = bincount(concatenate(indices), weights = concatenate(values),
+                     minlength = ksz*jsz*isz)
+    from numpy.fft import rfftn, irfftn
+    from numpy import conjugate
+    probe_ft = rfftn(splat.reshape(shape))
+    conjugate(probe_ft, out = probe_ft)
+    probe_ft *= target_ft
+    return irfftn(probe_ft, s = shape)
+
+# -----------------------------------------------------------------------------
+# Mask of grid points where the center of the fit points may be placed.
+#
+def _allowed_centers(shape, ijk_to_xyz_tf, center, radius):
+
+    if radius is None:
+        return None
+    from numpy import indices, float32, sum
+    ijk = indices(shape[::-1], float32).reshape((3,-1)).T
+    xyz = ijk_to_xyz_tf * ijk
+    d = xyz - center
+    inside = sum(d*d, axis = 1) <= radius*radius
+    return inside.reshape(shape[::-1]).transpose()
+
+# -----------------------------------------------------------------------------
+# Return up to n highest scores with grid indices (i,j,k) skipping peaks
+# within nmin grid points of a higher scoring peak.
+#
+def _best_peaks(scores, allowed, n, nmin):
+
+    from numpy import argpartition, unravel_index, inf
+    s = scores.ravel()
+    if allowed is not None:
+        s = s.copy()
+        s[~allowed.ravel()] = -inf
+    m = min(len(s), 8*n)
+    top = argpartition(-s, m-1)[:m] if m < len(s) else range(len(s))
+    top = sorted(top, key = lambda t: -s[t])
+    peaks = []
+    for t in top:
+        if s[t] == -inf or len(peaks) >= n:
+            break
+        k, j, i = unravel_index(t, scores.shape)
+        if any(max(abs(i-pi), abs(j-pj), abs(k-pk)) < nmin
+               for score, (pi, pj, pk) in peaks):
+            continue
+        peaks.append((float(s[t]), (int(i),int(j),int(k))))
+    return peaks
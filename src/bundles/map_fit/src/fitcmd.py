@@ -21,7 +21,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
            cluster_angle = 6, cluster_shift = 3,
            asymmetric_unit = True, level_inside = 0.1, seed = 0, sequence = 0,
            max_steps = 2000, grid_step_min = 0.01, grid_step_max = 0.5,
-           list_fits = None, log_fits = None, each_model = False):
+           list_fits = None, log_fits = None, each_model = False, nthread = 1, batch = 1,
+           search_method = 'random', rotation_step = 30):
     '''
     Fit an atomic model or a map in a map using a rigid rotation and translation
     by locally optimizing correlation.  There are four modes: 1) fit all models into map
@@ -47,6 +48,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
       Fit each model in sequence subtracting other models first for this number of specified fits.
     search : integer
       Fit using N randomized initial placements and cluster similar results.
+      With search_method 'fft' the N best placements from an exhaustive search
+      are optimized.
 
     ----------------------------------------------------------------------------
     Fitting settings
@@ -94,6 +97,23 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
     level_inside : float
        Fraction of fit atoms or map that must be inside the target map contour level
        in order to keep the fit.
+    seed : integer or 'random'
+       Random number generator seed used to make initial placements.
+    search_method : 'random' or 'fft'
+       How initial placements for a search are chosen.  Random places the fit
+       model at random positions and orientations.  FFT scores every grid
+       translation for each rotation of a uniform rotation sampling using
+       FFT cross-correlation of the fit points with the target map and keeps
+       the best scoring placements.
+    rotation_step : float
+       Spacing in degrees of rotations sampled by the FFT search method.
+    nthread : integer
+       Number of CPU threads used to optimize initial placements.  Results are the
+       same as with a single thread.
+    batch : integer
+       Number of initial placements to optimize together with array operations.
+       This reduces per-step overhead when there are many placements, though
+       fits can differ slightly from optimizing each placement separately.
 
     ----------------------------------------------------------------------------
     Output options
@@ -115,7 +135,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
             sequence = 1
 
     check_fit_options(atoms_or_map, volume, metric, resolution,
-                      symmetric, mwm, search, sequence)
+                      symmetric, mwm, search, sequence,
+                      shift, placement, search_method)
 
     flist = []
     log = session.logger
@@ -129,7 +150,9 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
             fits = fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                               mwm, search, placement, radius,
                               cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-                              max_steps, grid_step_min, grid_step_max, log, random_seed = seed)
+                              max_steps, grid_step_min, grid_step_max, log,
+                              random_seed = seed, nthread = nthread, batch = batch,
+                              search_method = search_method, rotation_step = rotation_step)
         elif symmetric:
             fits = [fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
                                              shift, rotate, mwm,
@@ -156,7 +179,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
 # -----------------------------------------------------------------------------
 #
 def check_fit_options(atoms_or_map, volume, metric, resolution,
-                      symmetric, move_whole_molecules, search, sequence):
+                      symmetric, move_whole_molecules, search, sequence,
+                      shift = True, placement = 'sr', search_method = 'random'):
     if volume is None:
         raise UserError('Must specify "in" keyword, e.g. fit #1 in #2')
     if sequence > 0 and search > 0:
@@ -165,6 +189,12 @@ def check_fit_options(atoms_or_map, volume, metric, resolution,
         raise UserError('Cannot use "sequence" and "symmetric" options together.')
     if search and symmetric:
         raise UserError('Symmetric fitting not available with fit search')
+    if search and search_method == 'fft':
+        # FFT search places the fit model at the best of all grid translations.
+        if not shift:
+            raise UserError('FFT fit search moves the fit model, cannot use "shift false"')
+        if 's' not in placement:
+            raise UserError('FFT fit search always shifts the fit model, placement must include "s"')
     if symmetric:
       if not metric in ('correlation', 'cam', None):
           raise UserError('Only "correlation" and "cam" metrics are'
@@ -390,7 +420,8 @@ def fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
 def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                move_whole_molecules, search, placement, radius,
                cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-               max_steps, grid_step_min, grid_step_max, log = None, random_seed = 0):
+               max_steps, grid_step_min, grid_step_max, log = None, random_seed = 0,
+               nthread = 1, batch = 1, search_method = 'random', rotation_step = 30):
     
     # TODO: Handle case where not moving whole molecules.
 
@@ -414,11 +445,19 @@ def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
     def stop_cb(msg, task = None, log = log):
         return request_stop_cb(msg, task = task, log = log)
 #    try:
+    if search_method == 'fft':
+        from .fftsearch import fft_search_placements
+        start_tfs = fft_search_placements(points, point_weights, volume, search,
+                                          rotation_step, rotations, radius,
+                                          cluster_shift, stop_cb, nthread)
+    else:
+        start_tfs = None
     flist, outside = FS.fit_search(
             mlist, points, point_weights, volume, search, rotations, shifts,
             radius, cluster_angle, cluster_shift, asymmetric_unit, level_inside,
             me, shift, rotate, max_steps, grid_step_min, grid_step_max, stop_cb,
-            random_seed = random_seed)
+            random_seed = random_seed, nthread = nthread, batch = batch,
+            start_transforms = start_tfs)
 #    finally:
 #        task.finished()
 
@@ -553,7 +592,7 @@ def report_status(log):
 #
 def register_fitmap_command(logger):
 
-    from chimerax.core.commands import CmdDesc, register, BoolArg, IntArg, FloatArg, EnumOf, ObjectsArg, SaveFileNameArg, Or
+    from chimerax.core.commands import CmdDesc, register, BoolArg, IntArg, FloatArg, PositiveFloatArg, EnumOf, ObjectsArg, SaveFileNameArg, Or
     from chimerax.map.mapargs import MapArg
 
     fitmap_desc = CmdDesc(
@@ -589,6 +628,10 @@ def register_fitmap_command(logger):
             ('asymmetric_unit', BoolArg),
             ('level_inside', FloatArg),            # fraction of point in contour
             ('seed', Or(IntArg, EnumOf(['random']))),
+            ('nthread', IntArg),
+            ('batch', IntArg),
+            ('search_method', EnumOf(('random', 'fft'))),
+            ('rotation_step', PositiveFloatArg),
 
 # Output options
             ('move_whole_molecules', BoolArg),
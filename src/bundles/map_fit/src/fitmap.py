@@ -192,19 +192,30 @@ def locate_maximum(points, point_weights, data_array, xyz_to_ijk_transform,
                                % (step, shift, angle)):
                 break
 
-    # Record statistics of optimization.
-    shift, angle = move_tf.shift_and_angle(rc)
+    stats = optimization_stats(points, point_weights, data_array,
+                               xyz_to_ijk_transform, move_tf, rc, step,
+                               syminv = syminv, values = values)
+    return move_tf, stats
+
+# -----------------------------------------------------------------------------
+# Record statistics of optimization.
+#
+def optimization_stats(points, point_weights, data_array, xyz_to_ijk_transform,
+                       move_tf, rotation_center, steps,
+                       syminv = [], values = None):
+
+    shift, angle = move_tf.shift_and_angle(rotation_center)
     axis, axis_point, angle, axis_shift = move_tf.axis_center_angle_shift()
     xyz_to_ijk_tf = xyz_to_ijk_transform * move_tf
     stats = {'shift': shift, 'axis': axis, 'axis point': axis_point,
-             'angle': angle, 'axis shift': axis_shift, 'steps': step,
-             'points': np, 'transform': move_tf}
+             'angle': angle, 'axis shift': axis_shift, 'steps': steps,
+             'points': len(points), 'transform': move_tf}
 
     amv, npts = average_map_value(points, xyz_to_ijk_tf, data_array,
                                   syminv = syminv, values = values)
     stats['average map value'] = amv
     stats['points in map'] = npts      # Excludes out-of-bounds points
-    stats['symmetries'] = len(symmetries)
+    stats['symmetries'] = len(syminv)
     if not point_weights is None:
         map_values = volume_values(points, xyz_to_ijk_tf, data_array,
                                    syminv=syminv, values=values)
@@ -212,8 +223,8 @@ def locate_maximum(points, point_weights, data_array, xyz_to_ijk_transform,
         stats['overlap'] = olap
         stats['correlation'] = cor
         stats['correlation about mean'] = corm
-                
-    return move_tf, stats
+
+    return stats
     
 # -----------------------------------------------------------------------------
 #
@@ -525,6 +536,262 @@ def maximum_ijk_motion(points, xyz_to_ijk_transform, move_tf):
     
     return d
 
+# -----------------------------------------------------------------------------
+# Find local maxima for many starting positions at once.  This does the same
+# optimization as locate_maximum() for each xyz_to_ijk transform in the list,
+# but each step interpolates the points for all positions in a single call
+# and updates all positions with array operations, so the Python overhead
+# per step does not grow with the number of starting positions.
+# Symmetries are not supported.  Returns a list of (move_tf, stats).
+#
+def locate_maxima(points, point_weights, data_array, xyz_to_ijk_transforms,
+                  max_steps = 2000, ijk_step_size_min = 0.01, ijk_step_size_max = 0.5,
+                  optimize_translation = True, optimize_rotation = True,
+                  metric = 'sum product', rotation_center = None):
+
+    segment_steps = 4
+    cut_step_size_threshold = .25
+    step_cut_factor = .5
+    step_grow_factor = 1.2
+
+    if metric == 'correlation about mean':
+        from numpy import sum, float64
+        wm = sum(point_weights, dtype = float64) / len(point_weights)
+        point_wts = point_weights.copy()
+        point_wts -= wm
+    else:
+        point_wts = point_weights
+
+    if rotation_center is None:
+        from numpy import sum, float64
+        rotation_center = sum(points, axis=0, dtype=float64) / len(points)
+
+    step_types = []
+    if optimize_translation:
+        step_types.append(translation_steps)
+    if optimize_rotation:
+        step_types.append(rotation_steps)
+
+    from numpy import array, float64, full, minimum, where, arange, zeros, int32
+    ptfs = array([tf.matrix for tf in xyz_to_ijk_transforms], float64)
+    n = len(ptfs)
+    move_tfs = identity_matrices(n)
+    ijk_step_size = full((n,), ijk_step_size_max, float64)
+    steps = zeros((n,), int32)
+    active = arange(n)
+
+    step = 0
+    while step < max_steps and len(active) > 0:
+        tfs = multiply_matrices(ptfs[active], move_tfs[active])
+        seg_tfs = identity_matrices(len(active))
+        step_size = ijk_step_size[active]
+        if step_types:
+            for s in range(segment_steps):
+                calculate_steps = step_types[s % len(step_types)]
+                step_tfs = calculate_steps(points, point_wts, rotation_center,
+                                           data_array, multiply_matrices(tfs, seg_tfs),
+                                           step_size, metric)
+                seg_tfs = multiply_matrices(seg_tfs, step_tfs)
+        step += segment_steps
+        steps[active] = step
+        mm = maximum_ijk_motions(points, tfs, multiply_matrices(tfs, seg_tfs))
+        mmcut = cut_step_size_threshold * segment_steps * step_size
+        ijk_step_size[active] = where(mm < mmcut, step_size * step_cut_factor,
+                                      minimum(step_size * step_grow_factor,
+                                              ijk_step_size_max))
+        move_tfs[active] = multiply_matrices(move_tfs[active], seg_tfs)
+        active = active[ijk_step_size[active] > ijk_step_size_min]
+
+    from chimerax.geometry import Place
+    results = []
+    for xyz_to_ijk_tf, move_matrix, nsteps in zip(xyz_to_ijk_transforms, move_tfs, steps):
+        move_tf = Place(move_matrix)
+        stats = optimization_stats(points, point_weights, data_array,
+                                   xyz_to_ijk_tf, move_tf, rotation_center, int(nsteps))
+        results.append((move_tf, stats))
+
+    return results
+
+# -----------------------------------------------------------------------------
+# Translation step for each of N transforms given as an N by 3 by 4 array.
+# Returns N by 3 by 4 array of step transforms.
+#
+def translation_steps(points, point_weights, center, data_array,
+                      xyz_to_ijk_transforms, ijk_step_sizes, metric):
+
+    g = gradient_directions(points, point_weights, data_array,
+                            xyz_to_ijk_transforms, metric)
+    from numpy import einsum, sqrt, zeros
+    gijk = einsum('nij,nj->ni', xyz_to_ijk_transforms[:,:,:3], g)
+    norms = sqrt((gijk*gijk).sum(axis = 1))
+    f = zeros(norms.shape, norms.dtype)
+    nz = (norms > 0)
+    f[nz] = ijk_step_sizes[nz] / norms[nz]
+    delta_tfs = identity_matrices(len(g))
+    delta_tfs[:,:,3] = g * f[:,None]
+    return delta_tfs
+
+# -----------------------------------------------------------------------------
+# Rotation step for each of N transforms given as an N by 3 by 4 array.
+# Returns N by 3 by 4 array of step transforms.
+#
+def rotation_steps(points, point_weights, center, data_array,
+                   xyz_to_ijk_transforms, ijk_step_sizes, metric):
+
+    axes = torque_axes(points, point_weights, center, data_array,
+                       xyz_to_ijk_transforms, metric)
+    from numpy import sqrt, zeros, newaxis, cross, einsum, pi
+    na = sqrt((axes*axes).sum(axis = 1))
+    angles = zeros(na.shape, na.dtype)
+    if len(points) > 1:
+        nz = (na > 0)
+        axes[nz] /= na[nz,newaxis]
+        # Angle that moves the point farthest from the axis by the step size in ijk space.
+        r = points - center
+        ijk_motion = einsum('nij,nkj->nki', xyz_to_ijk_transforms[:,:,:3],
+                            cross(axes[:,newaxis,:], r[newaxis,:,:]))
+        av = sqrt((ijk_motion*ijk_motion).sum(axis = 2)).max(axis = 1)
+        nz &= (av > 0)
+        angles[nz] = (ijk_step_sizes[nz] / av[nz]) * 180.0/pi
+    return rotation_matrices(axes, angles, center)
+
+# -----------------------------------------------------------------------------
+#
+def gradient_directions(points, point_weights, data_array,
+                        xyz_to_ijk_transforms, metric = 'sum product'):
+
+    values, gradients = volume_values_and_gradients(points, xyz_to_ijk_transforms,
+                                                    data_array)
+    if metric == 'sum product':
+        g = weighted_sums(point_weights, gradients)
+    else:
+        about_mean = (metric == 'correlation about mean')
+        g = correlation_derivatives(point_weights, values, gradients, about_mean)
+    return g
+
+# -----------------------------------------------------------------------------
+#
+def torque_axes(points, point_weights, center, data_array,
+                xyz_to_ijk_transforms, metric = 'sum product'):
+
+    values, gradients = volume_values_and_gradients(points, xyz_to_ijk_transforms,
+                                                    data_array)
+    from numpy import cross, newaxis, float32
+    r = (points - center).astype(float32)
+    rxg = cross(r[newaxis,:,:], gradients)
+    if metric == 'sum product':
+        t = weighted_sums(point_weights, rxg)
+    else:
+        about_mean = (metric == 'correlation about mean')
+        t = correlation_derivatives(point_weights, values, rxg, about_mean)
+    return t
+
+# -----------------------------------------------------------------------------
+# Interpolate map values and gradients at points for each of N transforms.
+# All transformed points are interpolated with a single call.  Returns
+# values as an N by P array and gradients in point coordinates as an
+# N by P by 3 array, where P is the number of points.
+#
+def volume_values_and_gradients(points, xyz_to_ijk_transforms, data_array):
+
+    from numpy import einsum, float32
+    tfs = xyz_to_ijk_transforms
+    ijk = einsum('nij,pj->npi', tfs[:,:,:3], points)
+    ijk += tfs[:,None,:,3]
+    n, np = ijk.shape[:2]
+    ijk = ijk.astype(float32).reshape((n*np,3))
+    from chimerax.geometry import identity
+    import chimerax.map_data as VD
+    values, outside = VD.interpolate_volume_data(ijk, identity(), data_array)
+    gijk, outside = VD.interpolate_volume_gradient(ijk, identity(), data_array)
+    gradients = einsum('npj,nji->npi', gijk.reshape((n,np,3)), tfs[:,:,:3])
+    return values.reshape((n,np)), gradients.astype(float32)
+
+# -----------------------------------------------------------------------------
+# Sum of weights times vectors for N sets of vectors given as an
+# N by P by 3 array.  Weights can be None meaning all weights are 1.
+#
+def weighted_sums(weights, vectors):
+
+    from numpy import float64, einsum
+    if weights is None:
+        return vectors.sum(axis = 1, dtype = float64)
+    return einsum('p,npi->ni', weights.astype(float64), vectors.astype(float64))
+
+# -----------------------------------------------------------------------------
+# Derivative of correlation for N sets of values and value derivatives,
+# computed as in the C++ routines used by correlation_gradient_direction()
+# and correlation_torque_axis().
+#
+# d = (|v-vm|^2*sum(wi*dvi) - sum(wi*vi)*sum((vi-vm)*dvi)) / |w||v-vm|^3
+#
+def correlation_derivatives(point_weights, values, derivatives, about_mean = False):
+
+    from numpy import float64, einsum, dot, sqrt, newaxis
+    w = point_weights.astype(float64)
+    v = values.astype(float64)
+    d = derivatives.astype(float64)
+    vvm = v - v.mean(axis = 1)[:,newaxis] if about_mean else v
+    svvm2 = (vvm*vvm).sum(axis = 1)
+    swv = dot(v, w)
+    swd = einsum('p,npi->ni', w, d)
+    svvmd = einsum('np,npi->ni', vvm, d)
+    c = svvm2[:,newaxis]*swd - swv[:,newaxis]*svvmd
+    nvw = svvm2 * sqrt(svvm2) * sqrt(dot(w,w))
+    nz = (nvw > 0)
+    c[nz] /= nvw[nz,newaxis]
+    return c
+
+# -----------------------------------------------------------------------------
+# Maximum motion in ijk space of points for each pair of transforms
+# given as N by 3 by 4 arrays.
+#
+def maximum_ijk_motions(points, xyz_to_ijk_transforms, moved_xyz_to_ijk_transforms):
+
+    from numpy import einsum, sqrt
+    diff = moved_xyz_to_ijk_transforms - xyz_to_ijk_transforms
+    d = einsum('nij,pj->npi', diff[:,:,:3], points)
+    d += diff[:,None,:,3]
+    return sqrt((d*d).sum(axis = 2)).max(axis = 1)
+
+# -----------------------------------------------------------------------------
+#
+def identity_matrices(n):
+
+    from numpy import zeros, float64
+    m = zeros((n,3,4), float64)
+    m[:,0,0] = m[:,1,1] = m[:,2,2] = 1
+    return m
+
+# -----------------------------------------------------------------------------
+# Product of N pairs of 3 by 4 transform matrices.
+#
+def multiply_matrices(tf1, tf2):
+
+    from numpy import matmul, empty
+    p = empty(tf1.shape, tf1.dtype)
+    p[:,:,:3] = matmul(tf1[:,:,:3], tf2[:,:,:3])
+    p[:,:,3] = matmul(tf1[:,:,:3], tf2[:,:,3:])[:,:,0] + tf1[:,:,3]
+    return p
+
+# -----------------------------------------------------------------------------
+# Rotation matrices about unit axes by angles in degrees about a center point.
+#
+def rotation_matrices(axes, angles, center):
+
+    from numpy import sin, cos, radians, float64, array
+    a = radians(angles)
+    c, s = cos(a), sin(a)
+    t = 1 - c
+    x, y, z = axes[:,0], axes[:,1], axes[:,2]
+    m = identity_matrices(len(axes))
+    m[:,0,0], m[:,0,1], m[:,0,2] = t*x*x + c, t*x*y - s*z, t*x*z + s*y
+    m[:,1,0], m[:,1,1], m[:,1,2] = t*x*y + s*z, t*y*y + c, t*y*z - s*x
+    m[:,2,0], m[:,2,1], m[:,2,2] = t*x*z - s*y, t*y*z + s*x, t*z*z + c
+    c0 = array(center, float64)
+    m[:,:,3] = c0 - m[:,:,:3] @ c0
+    return m
+
 
 # -----------------------------------------------------------------------------
 #
@@ -802,8 +1069,8 @@ def simulated_map(atoms, res, session):
     if v is None:
       # Need to be able to move map independent of molecule if changing
       #  atom coordinates if not mwm.
-      from chimerax.map.molmap import molecule_map
-      v = molecule_map(session, atoms, res)
+      from .simcache import cached_molecule_map
+      v = cached_molecule_map(atoms, res, session)
       v.display = False
       v.fitsim_params = (array_checksum(atoms.coords), res)
       v.atoms = atoms
@@ -847,19 +1114,49 @@ def volume_center_point(v, xform):
 
 # -----------------------------------------------------------------------------
 # Return indices of points that are closer to refpt then any symmetrically
-# transformed copy of refpt.
-#
-def asymmetric_unit_points(points, refpt, symmetries):
-
-    diff = points - refpt
-    from numpy import sum, minimum, nonzero
-    d = sum(diff*diff, axis = 1)
-    dsmin = d.copy()
-    for sym in symmetries:
-        srefpt = sym * refpt
-        diff = points - srefpt
-        ds = sum(diff*diff, axis = 1)
-        minimum(dsmin, ds, dsmin) 
-    indices = nonzero(d == dsmin)[0]
-        
+# transformed copy of refpt.  Each copy s bounds the asymmetric unit by the
+# half-space 2*p.(s-refpt) <= |s|^2 - |refpt|^2, so all copies are tested with
+# one matrix multiply per block of points.
+#
+def asymmetric_unit_points(points, refpt, symmetries, block_size = 65536):
+
+    from numpy import array, float64, sum, nonzero, concatenate, arange, int64
+    if len(symmetries) == 0:
+        return arange(len(points))
+    refpt = array(refpt, float64)
+    sym_matrices = symmetry_matrices(symmetries)[0]
+    srefpts = symmetric_points(sym_matrices, refpt)
+    normals = 2*(srefpts - refpt)
+    offsets = sum(srefpts*srefpts, axis = 1) - sum(refpt*refpt)
+
+    ilist = []
+    for b in range(0, len(points), block_size):
+        p = points[b:b+block_size]
+        inside = ((p @ normals.T) <= offsets).all(axis = 1)
+        ilist.append(nonzero(inside)[0] + b)
+    indices = concatenate(ilist) if ilist else array((), int64)
+
     return indices
+
+# -----------------------------------------------------------------------------
+# Return symmetry operators as an N by 3 by 4 array and a mask of which are
+# the identity, for transforming points by all symmetries at once.
+#
+def symmetry_matrices(symmetries):
+
+    from numpy import array, float64, empty
+    sym_matrices = empty((len(symmetries),3,4), float64)
+    for i, sym in enumerate(symmetries):
+        sym_matrices[i] = sym.matrix
+    sym_identity = array([sym.is_identity() for sym in symmetries], bool)
+    return sym_matrices, sym_identity
+
+# -----------------------------------------------------------------------------
+# Transform a point, or an N by 3 array of points, by each symmetry giving an
+# array of size S by 3, or N by S by 3.
+#
+def symmetric_points(sym_matrices, points):
+
+    from numpy import einsum
+    rot, shift = sym_matrices[:,:,:3], sym_matrices[:,:,3]
+    return einsum('sij,...j->...si', rot, points) + shift
@@ -38,7 +38,7 @@ def fit_search(models, points, point_weights, volume, n,
                max_steps = 2000,
                ijk_step_size_min = 0.01, ijk_step_size_max = 0.5,
                request_stop_cb = None,
-               random_seed = 0):
+               random_seed = 0, nthread = 1, batch = 1, start_transforms = None):
 
     bounds = volume.surface_bounds()
     if bounds is None:
@@ -59,41 +59,37 @@ def fit_search(models, points, point_weights, volume, n,
     vtfinv = volume.position.inverse()
     mtv_list = [vtfinv * m.position for m in models]
 
-    set_random_seed(random_seed)
-    
+    # Random starting placements are made before any optimization so that
+    # serial and multi-threaded searches give identical results.
+    if start_transforms is None:
+        set_random_seed(random_seed)
+        start_tfs = []
+        for i in range(n):
+            shift = ((random_translation(bounds) if radius is None
+                      else random_translation_step(center, radius)) if shifts
+                      else translation(center))
+            rot = random_rotation() if rotations else identity()
+            start_tfs.append(shift * rot * ctf)
+    else:
+        start_tfs = list(start_transforms)
+        n = len(start_tfs)
+
     flist = []
     outside = 0
     from math import pi
     from chimerax.geometry import bins
     b = bins.Binned_Transforms(angle_tolerance*pi/180, shift_tolerance, center)
     fo = {}
-    from .fitmap import locate_maximum
-    for i in range(n):
-        if request_stop_cb and request_stop_cb('Fit %d of %d' % (i+1,n)):
-            break
-        shift = ((random_translation(bounds) if radius is None
-                  else random_translation_step(center, radius)) if shifts
-                  else translation(center))
-        rot = random_rotation() if rotations else identity()
-        tf = shift * rot * ctf
-        optimize = True
-        max_opt = 2
-        while optimize and max_opt > 0:
-            p_to_ijk_tf = xyz_to_ijk_tf * tf
-            move_tf, stats = \
-              locate_maximum(points, point_weights, data_array, p_to_ijk_tf,
-                             max_steps, ijk_step_size_min, ijk_step_size_max,
-                             optimize_translation, optimize_rotation,
-                             metric, request_stop_cb = None)
-            ptf = tf * move_tf
-            optimize = False
-            max_opt -= 1
-            if asymmetric_unit:
-                atf = unique_symmetry_position(ptf, center, asym_center,
-                                               volume.data.symmetries)
-                if not atf is ptf:
-                    ptf = tf = atf
-                    optimize = not b.close_transforms(ptf)
+
+    # Symmetry matrices are computed once and shared by all placements.
+    symmetries = (SymmetryLookup(volume.data.symmetries)
+                  if asymmetric_unit and len(volume.data.symmetries) > 0 else None)
+    opt_args = (points, point_weights, data_array, xyz_to_ijk_tf,
+                center, asym_center, symmetries,
+                max_steps, ijk_step_size_min, ijk_step_size_max,
+                optimize_translation, optimize_rotation, metric)
+
+    def add_fit(ptf, stats):
         close = b.close_transforms(ptf)
         if len(close) == 0:
             transforms = [ptf * mtv for mtv in mtv_list]
@@ -107,6 +103,40 @@ def fit_search(models, points, point_weights, volume, n,
             s = fo[id(close[0])].stats
             s['hits'] += 1
 
+    if nthread is None or nthread > 1 or batch > 1:
+        # Optimize groups of placements in threads, optionally optimizing the
+        # placements of a group together.  Results are clustered in placement
+        # order after each round so clustering matches serial mode.
+        from chimerax.core.threadq import apply_to_list
+        from multiprocessing import cpu_count
+        nt = max(1, cpu_count()//2 if nthread is None else nthread)
+        group_size = max(1, batch)
+        round_size = 8 * nt * group_size
+        def optimize(i, tfs):
+            return i, optimize_placements(tfs, *opt_args)
+        for r0 in range(0, n, round_size):
+            r1 = min(n, r0 + round_size)
+            if request_stop_cb and request_stop_cb('Fit %d-%d of %d using %d threads'
+                                                   % (r0+1, r1, n, nt)):
+                break
+            groups = [(i, start_tfs[i:min(i+group_size,r1)])
+                      for i in range(r0, r1, group_size)]
+            results = apply_to_list(optimize, groups, nt)
+            for r in results:
+                if isinstance(r, Exception):
+                    raise r	# Error in a worker thread.
+            results.sort(key = lambda r: r[0])
+            for i, placements in results:
+                for placement in placements:
+                    add_fit(*placement_fit(placement, b))
+    else:
+        reoptimize = lambda atf: len(b.close_transforms(atf)) == 0
+        for i, tf in enumerate(start_tfs):
+            if request_stop_cb and request_stop_cb('Fit %d of %d' % (i+1,n)):
+                break
+            placement = optimize_placement(tf, *opt_args, reoptimize = reoptimize)
+            add_fit(*placement_fit(placement, b))
+
     # Filter out solutions with too many points outside volume contour.
     fflist = [f for f in flist if (in_contour(f.ptf, points, volume, f.stats)
                                    >= minimum_points_in_contour)]
@@ -119,6 +149,84 @@ def fit_search(models, points, point_weights, volume, n,
 
     return fflist, outside
 
+# -----------------------------------------------------------------------------
+# Optimize one starting placement.  If the optimized placement is moved to
+# a different asymmetric unit it is optimized a second time, unless the
+# reoptimize(tf) function returns false.  Without a reoptimize function the
+# second optimization is always done, and placement_fit() later decides
+# whether to use it.  This allows placements to be optimized independently
+# in parallel.
+#
+def optimize_placement(tf, points, point_weights, data_array, xyz_to_ijk_tf,
+                       center, asym_center, symmetries,
+                       max_steps, ijk_step_size_min, ijk_step_size_max,
+                       optimize_translation, optimize_rotation, metric,
+                       reoptimize = None):
+
+    from .fitmap import locate_maximum
+    def optimize(tf):
+        move_tf, stats = \
+          locate_maximum(points, point_weights, data_array, xyz_to_ijk_tf * tf,
+                         max_steps, ijk_step_size_min, ijk_step_size_max,
+                         optimize_translation, optimize_rotation,
+                         metric, request_stop_cb = None)
+        ptf = tf * move_tf
+        if symmetries is not None:
+            atf = unique_symmetry_position(ptf, center, asym_center, symmetries)
+            if not atf is ptf:
+                return atf, stats, True
+        return ptf, stats, False
+
+    ptf, stats, moved = optimize(tf)
+    if not moved or (reoptimize is not None and not reoptimize(ptf)):
+        return (ptf, stats, moved, None)
+    return (ptf, stats, moved, optimize(ptf)[:2])
+
+# -----------------------------------------------------------------------------
+# Optimize several starting placements together using the batched optimizer.
+# Results are the same form as optimize_placement() with the second
+# optimization always done for placements moved to another asymmetric unit.
+#
+def optimize_placements(tfs, points, point_weights, data_array, xyz_to_ijk_tf,
+                        center, asym_center, symmetries,
+                        max_steps, ijk_step_size_min, ijk_step_size_max,
+                        optimize_translation, optimize_rotation, metric):
+
+    if len(tfs) == 1:
+        return [optimize_placement(tfs[0], points, point_weights, data_array,
+                                   xyz_to_ijk_tf, center, asym_center, symmetries,
+                                   max_steps, ijk_step_size_min, ijk_step_size_max,
+                                   optimize_translation, optimize_rotation, metric)]
+
+    from .fitmap import locate_maxima
+    def optimize(tfs):
+        results = locate_maxima(points, point_weights, data_array,
+                                [xyz_to_ijk_tf * tf for tf in tfs],
+                                max_steps, ijk_step_size_min, ijk_step_size_max,
+                                optimize_translation, optimize_rotation, metric)
+        ptfs = [tf * move_tf for tf, (move_tf, stats) in zip(tfs, results)]
+        atfs = unique_symmetry_positions(ptfs, center, asym_center, symmetries)
+        opt = [(atf, stats, atf is not ptf)
+               for ptf, atf, (move_tf, stats) in zip(ptfs, atfs, results)]
+        return opt
+
+    opt = optimize(tfs)
+    moved = [i for i, (ptf, stats, m) in enumerate(opt) if m]
+    reopt = dict(zip(moved, optimize([opt[i][0] for i in moved]))) if moved else {}
+    placements = [(ptf, stats, m, (reopt[i][:2] if m else None))
+                  for i, (ptf, stats, m) in enumerate(opt)]
+    return placements
+
+# -----------------------------------------------------------------------------
+# Choose the position and statistics from optimize_placement() results.
+#
+def placement_fit(placement, binned_transforms):
+
+    ptf, stats, moved, reopt = placement
+    if moved and reopt is not None and len(binned_transforms.close_transforms(ptf)) == 0:
+        ptf, stats = reopt
+    return ptf, stats
+
 # -----------------------------------------------------------------------------
 #
 def in_contour(tf, points, volume, stats):
@@ -504,12 +612,40 @@ def any_close_tf(tf, tflist, angle_tolerance, shift_tolerance, shift_point):
 #
 def unique_symmetry_position(tf, center, ref_point, sym_list):
 
-    if sym_list is None or len(sym_list) == 0:
-        return tf
+    return unique_symmetry_positions([tf], center, ref_point, sym_list)[0]
+
+# -----------------------------------------------------------------------------
+# Move each transform to the symmetric copy that places center nearest
+# ref_point.  Transforms that are not moved are returned unchanged.
+#
+def unique_symmetry_positions(tfs, center, ref_point, sym_list):
+
+    if sym_list is None or len(sym_list) == 0 or len(tfs) == 0:
+        return list(tfs)
 
-    from chimerax.geometry import distance
-    import numpy as n
-    i = n.argmin([distance(sym*tf*center, ref_point) for sym in sym_list])
-    if sym_list[i].is_identity():
-        return tf
-    return sym_list[i]*tf
+    lookup = sym_list if isinstance(sym_list, SymmetryLookup) else SymmetryLookup(sym_list)
+    return lookup.nearest_positions(tfs, center, ref_point)
+
+# -----------------------------------------------------------------------------
+# Symmetry operators precomputed as arrays so the nearest symmetric position
+# of many placements can be found with array operations.
+#
+class SymmetryLookup:
+
+    def __init__(self, symmetries):
+        self.symmetries = symmetries
+        from .fitmap import symmetry_matrices
+        self.matrices, self.identity = symmetry_matrices(symmetries)
+
+    def __len__(self):
+        return len(self.symmetries)
+
+    def nearest_positions(self, tfs, center, ref_point):
+        from numpy import array, float64, sum
+        centers = array([tf*center for tf in tfs], float64)
+        from .fitmap import symmetric_points
+        diff = symmetric_points(self.matrices, centers) - array(ref_point, float64)
+        nearest = sum(diff*diff, axis = 2).argmin(axis = 1)
+        syms = self.symmetries
+        return [(tf if self.identity[i] else syms[i]*tf)
+                for tf, i in zip(tfs, nearest)]
@@ -0,0 +1,181 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Cache simulated maps used for fitting on disk so that scripts fitting the
+# same atomic models in many maps do not recompute them each run.  Maps are
+# keyed by a hash of the cache version, atom coordinates, elements, resolution
+# and molmap grid parameters.  The least recently used maps are removed when
+# the cache exceeds its maximum size.
+#
+max_cache_size = 2**30		# bytes, 0 disables the cache
+cache_directory = None		# default is simulated_maps in user cache directory
+cache_version = 'simulated map 1'	# change when molmap values or file format change
+
+# -----------------------------------------------------------------------------
+#
+def cached_molecule_map(atoms, resolution, session):
+
+    from math import pi, sqrt
+    step, pad = resolution/3, 3*resolution
+    cutoff_range, sigma_factor = 5, 1/(pi*sqrt(2))
+
+    cache = simulated_map_cache()
+    if cache is None:
+        grid = None
+    else:
+        key = cache.key(atoms, resolution, step, pad, cutoff_range, sigma_factor)
+        grid = cache.load(key)
+
+    if grid is None:
+        from chimerax.map.molmap import molecule_map
+        v = molecule_map(session, atoms, resolution, grid_spacing = step,
+                         edge_padding = pad, cutoff_range = cutoff_range,
+                         sigma_factor = sigma_factor)
+        if cache is not None:
+            cache.save(key, v.data)
+    else:
+        mols = atoms.unique_structures
+        grid.name = ('%s map %.3g' % (mols[0].name, resolution) if len(mols) == 1
+                     else 'map %.3g' % resolution)
+        from chimerax.map.molmap import make_molecule_map
+        v = make_molecule_map(atoms, resolution, step, False, pad, None,
+                              cutoff_range, sigma_factor, False, None,
+                              0.95, None, True, False, grid.name, session,
+                              grid = grid)
+    return v
+
+# -----------------------------------------------------------------------------
+#
+_cache = None
+def simulated_map_cache():
+    if max_cache_size <= 0:
+        return None
+    global _cache
+    directory = cache_directory
+    if directory is None:
+        from chimerax import app_dirs
+        from os.path import join
+        directory = join(app_dirs.user_cache_dir, 'simulated_maps')
+    if _cache is None or _cache.directory != directory:
+        _cache = SimulatedMapCache(directory)
+    _cache.max_size = max_cache_size
+    return _cache
+
+# -----------------------------------------------------------------------------
+#
+class SimulatedMapCache:
+
+    def __init__(self, directory, max_size = 2**30):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, atoms, resolution, step, pad, cutoff_range, sigma_factor):
+        from chimerax.map.molmap import molecule_coordinates
+        xyz, tf = molecule_coordinates(atoms)
+        from numpy import float32, uint8, ascontiguousarray
+        import hashlib
+        h = hashlib.sha1()
+        h.update(cache_version.encode('utf-8'))
+        h.update(ascontiguousarray(xyz, float32).tobytes())
+        h.update(ascontiguousarray(atoms.element_numbers, uint8).tobytes())
+        params = (len(atoms), resolution, step, pad, cutoff_range, sigma_factor)
+        h.update(repr(params).encode('utf-8'))
+        return h.hexdigest()
+
+    def load(self, key):
+        path = self._path(key)
+        from os.path import isfile
+        if not isfile(path):
+            return None
+        import numpy
+        try:
+            with numpy.load(path) as f:
+                matrix, origin, step = f['matrix'], f['origin'], f['step']
+        except Exception:
+            return None	# Partial or corrupt file
+        import os
+        try:
+            os.utime(path)	# Mark as recently used.
+        except OSError:
+            pass
+        from chimerax.map_data import ArrayGridData
+        return ArrayGridData(matrix, tuple(origin.tolist()), tuple(step.tolist()))
+
+    def save(self, key, grid):
+        import os, numpy
+        path = self._path(key)
+        # Write to a temporary file and rename so concurrent runs
+        # never read a partially written map.
+        tpath = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            os.makedirs(self.directory, exist_ok = True)
+            with open(tpath, 'wb') as f:
+                numpy.savez(f, matrix = grid.full_matrix(),
+                            origin = numpy.array(grid.origin),
+                            step = numpy.array(grid.step))
+            os.replace(tpath, path)
+        except OSError:
+            if os.path.exists(tpath):
+                os.remove(tpath)
+            return
+        self.evict()
+
+    def evict(self):
+        '''Remove least recently used maps until cache is within size limit.'''
+        import os
+        from os.path import join
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith('.npz')]
+        except OSError:
+            return
+        files = []
+        for n in names:
+            try:
+                s = os.stat(join(self.directory, n))
+            except OSError:
+                continue
+            files.append((s.st_mtime, s.st_size, n))
+        size = sum(fsize for t, fsize, n in files)
+        files.sort()
+        for t, fsize, n in files:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(join(self.directory, n))
+            except OSError:
+                continue
+            size -= fsize
+
+    def clear(self):
+        import os
+        from os.path import join
+        if os.path.isdir(self.directory):
+            for n in os.listdir(self.directory):
+                if n.endswith('.npz'):
+                    os.remove(join(self.directory, n))
+
+    def _path(self, key):
+        from os.path import join
+        return join(self.directory, key + '.npz')
@@ -13,3 +13,40 @@ def test_map_fit(test_production_session):
     run(test_production_session, "vol #2 sym C2")
     run(test_production_session, "fit #3 in #2 sym true")
     run(test_production_session, "fit #4 in #2 envelope false zeros true")
+    run(test_production_session, "fit #1 in #2 search 3 nthread 2")
+    run(test_production_session, "fit #1 in #2 search 6 batch 3")
+    run(test_production_session, "fit #1 in #2 search 3 searchMethod fft rotationStep 60")
+
+def test_map_fit_fft_requires_shift(test_production_session):
+    import pytest
+    from chimerax.core.commands import run
+    from chimerax.core.errors import UserError
+    run(test_production_session, "open 1a0m")
+    run(test_production_session, "molmap #1 5")
+    with pytest.raises(UserError):
+        run(test_production_session, "fit #1 in #2 search 3 searchMethod fft shift false")
+    with pytest.raises(UserError):
+        run(test_production_session, "fit #1 in #2 search 3 searchMethod fft placement r")
+
+def test_simulated_map_cache(test_production_session, tmp_path, monkeypatch):
+    from chimerax.core.commands import run
+    from chimerax.map_fit import simcache
+    from numpy import array_equal
+    session = test_production_session
+    atoms = run(session, "open 1a0m")[0].atoms
+    monkeypatch.setattr(simcache, 'cache_directory', str(tmp_path))
+    v1 = simcache.cached_molecule_map(atoms, 5, session)
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+    # The second map must be read from the disk cache, not computed.
+    from chimerax.map import molmap
+    def no_molmap(*args, **kw):
+        raise AssertionError('Simulated map was not read from the cache')
+    monkeypatch.setattr(molmap, 'molecule_map', no_molmap)
+    v2 = simcache.cached_molecule_map(atoms, 5, session)
+    assert array_equal(v1.full_matrix(), v2.full_matrix())
+    assert v1.data.origin == v2.data.origin and v1.data.step == v2.data.step
+    # Changing the cache version changes the key.
+    cache = simcache.simulated_map_cache()
+    key = cache.key(atoms, 5, 5/3, 15, 5, 0.2)
+    monkeypatch.setattr(simcache, 'cache_version', 'test')
+    assert cache.key(atoms, 5, 5/3, 15, 5, 0.2) != key
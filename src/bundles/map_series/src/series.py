@@ -56,6 +56,26 @@ class MapSeries(Model):
     self.last_shown_time = tuple(t)[0] if len(t) > 0 else 0
     for m in maps:
       m.series = self
+      m.data.cache_group = self
+
+  # ---------------------------------------------------------------------------
+  # Limit memory used by cached data for all maps of the series.
+  # A size of None means no limit other than the overall cache size.
+  #
+  def set_data_cache_limit(self, size):
+    from chimerax.map.volume import data_cache
+    data_cache(self.session).set_group_limit(self, size)
+
+  # ---------------------------------------------------------------------------
+  #
+  def delete(self):
+    for m in self.maps:
+      if m is not None and m.data.cache_group is self:
+        m.data.cache_group = None
+    dc = getattr(self.session, '_volume_data_cache', None)
+    if dc is not None:
+      dc.remove_group(self)
+    Model.delete(self)
 
   # ---------------------------------------------------------------------------
   #
@@ -82,6 +82,7 @@ def register_vseries_command(logger):
                                    ('following_marker_frames', IntArg),
                                    ('color_range', FloatArg),
                                    ('cache_frames', IntArg),
+                                   ('data_cache_size', FloatArg),
                                    ('jump_to', IntArg),
                                    ('range', IntRangeArg),
                                    ('start_time', IntArg),],
@@ -101,11 +102,15 @@ def register_vseries_command(logger):
 def vseries_play(session, series, direction = 'forward', loop = False, max_frame_rate = None, pause_frames = 0,
             jump_to = None, range = None, start_time = None, normalize = False, markers = None,
             preceding_marker_frames = 0, following_marker_frames = 0,
-            color_range = None, cache_frames = 1):
+            color_range = None, cache_frames = 1, data_cache_size = None):
     '''Show a sequence of maps from a volume series.'''
     if len(series) == 0:
         from chimerax.core.errors import UserError
         raise UserError('No volume series specified')
+
+    if data_cache_size is not None:
+        for s in series:
+            s.set_data_cache_limit(data_cache_size * (2**20))
     
     from . import play
     p = play.Play_Series(series, session, range = range, start_time = start_time,
@@ -8,6 +8,7 @@
 #include <sys/types.h>
 #include <sys/stat.h>
 #include <stdarg.h>
+#include <string.h>
 #include <vector>
 #include <iostream>
 extern "C" {
@@ -143,11 +144,247 @@ readTrrFile(PyObject *, PyObject *args)
 	return read_traj_file(args, false);
 }
 
+// Skip over one xtc frame starting at the current file position.
+// Returns exdrENDOFFILE if no frame starts there.
+static int
+skip_xtc_frame(XDRFILE *xd, int num_atoms)
+{
+	int header[3];	// magic, natoms, step
+	if (xdrfile_read_int(header, 3, xd) != 3)
+		return exdrENDOFFILE;
+	if (header[0] != 1995)
+		return exdrMAGIC;
+	if (header[1] != num_atoms)
+		return exdrHEADER;
+	// time, box, number of coordinates
+	if (xdrfile_seek(xd, 11 * 4, SEEK_CUR) != 0)
+		return exdrENDOFFILE;
+	int nbytes;
+	if (num_atoms <= 9)
+		// uncompressed coordinates
+		nbytes = 3 * num_atoms * 4;
+	else {
+		// precision, minint, maxint, smallidx
+		if (xdrfile_seek(xd, 8 * 4, SEEK_CUR) != 0)
+			return exdrENDOFFILE;
+		if (xdrfile_read_int(&nbytes, 1, xd) != 1)
+			return exdrENDOFFILE;
+		nbytes = (nbytes + 3) & ~3;	// padded to 4 bytes
+	}
+	if (xdrfile_seek(xd, nbytes, SEEK_CUR) != 0)
+		return exdrENDOFFILE;
+	return exdrOK;
+}
+
+// Skip over one trr frame starting at the current file position.
+// Returns exdrENDOFFILE if no frame starts there.
+static int
+skip_trr_frame(XDRFILE *xd, int num_atoms)
+{
+	int magic, slen;
+	if (xdrfile_read_int(&magic, 1, xd) != 1)
+		return exdrENDOFFILE;
+	if (magic != 1993)
+		return exdrMAGIC;
+	char version[128];
+	if (xdrfile_read_int(&slen, 1, xd) != 1 || slen <= 0 || slen > 128)
+		return exdrSTRING;
+	if (xdrfile_read_string(version, 128, xd) <= 0)
+		return exdrSTRING;
+	// ir, e, box, vir, pres, top, sym, x, v, f sizes, natoms, step, nre
+	int h[13];
+	if (xdrfile_read_int(h, 13, xd) != 13)
+		return exdrENDOFFILE;
+	int box_size = h[2], vir_size = h[3], pres_size = h[4];
+	int x_size = h[7], v_size = h[8], f_size = h[9], natoms = h[10];
+	if (natoms != num_atoms)
+		return exdrHEADER;
+	int real_size;
+	if (box_size)
+		real_size = box_size / 9;
+	else if (x_size)
+		real_size = x_size / (3 * natoms);
+	else if (v_size)
+		real_size = v_size / (3 * natoms);
+	else if (f_size)
+		real_size = f_size / (3 * natoms);
+	else
+		return exdrHEADER;
+	if (real_size != sizeof(float) && real_size != sizeof(double))
+		return exdrHEADER;
+	// time, lambda and data blocks
+	int64_t nbytes = 2 * (int64_t)real_size + (int64_t)box_size + vir_size + pres_size
+		+ (int64_t)x_size + v_size + f_size;
+	if (xdrfile_seek(xd, nbytes, SEEK_CUR) != 0)
+		return exdrENDOFFILE;
+	return exdrOK;
+}
+
+// Find the file offset of each frame without decoding coordinates
+// so that frames can later be read individually.
+static PyObject *
+index_traj_file(PyObject *args, bool is_xtc)
+{
+	char error_string[256];
+
+	char *file_name;
+	if (!PyArg_ParseTuple(args, PY_STUPID "s", &file_name)) {
+		if (is_xtc) {
+			ERROR_RETURN("indexXtcFile: could not parse args");
+		} else {
+			ERROR_RETURN("indexTrrFile: could not parse args");
+		}
+	}
+
+	int num_atoms, status;
+	const char *format;
+	if (is_xtc) {
+		status = read_xtc_natoms(file_name, &num_atoms);
+		format = "xtc";
+	} else {
+		status = read_trr_natoms(file_name, &num_atoms);
+		format = "trr";
+	}
+	if (status != exdrOK)
+		ERROR_RETURN3("read_%s_natoms failure; return code %d", format, status);
+
+	XDRFILE *xd = xdrfile_open(file_name, "r");
+	if (xd == NULL)
+		ERROR_RETURN("xdrfile_open failure");
+
+	std::vector<int64_t> offsets;
+	Py_BEGIN_ALLOW_THREADS
+	xdrfile_seek(xd, 0, SEEK_END);
+	int64_t file_size = xdrfile_tell(xd);
+	xdrfile_seek(xd, 0, SEEK_SET);
+	while (true) {
+		int64_t offset = xdrfile_tell(xd);
+		status = (is_xtc ? skip_xtc_frame(xd, num_atoms) : skip_trr_frame(xd, num_atoms));
+		// A truncated last frame is dropped, as when reading all frames.
+		if (status != exdrOK || xdrfile_tell(xd) > file_size)
+			break;
+		offsets.push_back(offset);
+	}
+	Py_END_ALLOW_THREADS
+	xdrfile_close(xd);
+	if (status != exdrOK && status != exdrENDOFFILE)
+		ERROR_RETURN3("indexing %s file failed; return code %d", format, status);
+
+	npy_intp dimensions[1];
+	dimensions[0] = offsets.size();
+	PyObject *offset_array = PyArray_SimpleNew(1, dimensions, NPY_INT64);
+	if (offset_array == NULL)
+		ERROR_RETURN("Couldn't create array for frame offsets");
+	if (offsets.size() > 0)
+		memcpy(PyArray_DATA((PyArrayObject *)offset_array), offsets.data(),
+		       offsets.size() * sizeof(int64_t));
+
+	return Py_BuildValue(PY_STUPID "iN", num_atoms, offset_array);
+}
+
+// Read the frames starting at the given file offsets into an
+// N by num_atoms by 3 float32 array.
+static PyObject *
+read_traj_frames(PyObject *args, bool is_xtc)
+{
+	char error_string[256];
+
+	char *file_name;
+	int num_atoms;
+	PyObject *offsets_py;
+	if (!PyArg_ParseTuple(args, PY_STUPID "siO", &file_name, &num_atoms, &offsets_py)) {
+		if (is_xtc) {
+			ERROR_RETURN("readXtcFrames: could not parse args");
+		} else {
+			ERROR_RETURN("readTrrFrames: could not parse args");
+		}
+	}
+	PyArrayObject *offsets = (PyArrayObject *)PyArray_FROMANY(offsets_py, NPY_INT64, 1, 1,
+								   NPY_ARRAY_IN_ARRAY);
+	if (offsets == NULL)
+		return NULL;	// exception set by PyArray_FROMANY
+	npy_intp num_frames = PyArray_DIM(offsets, 0);
+	const int64_t *frame_offsets = (const int64_t *)PyArray_DATA(offsets);
+
+	npy_intp dimensions[3];
+	dimensions[0] = num_frames;
+	dimensions[1] = num_atoms;
+	dimensions[2] = 3;
+	PyObject *coords = PyArray_SimpleNew(3, dimensions, NPY_FLOAT);
+	if (coords == NULL) {
+		Py_DECREF(offsets);
+		ERROR_RETURN("Couldn't allocate enough memory for coords");
+	}
+
+	XDRFILE *xd = xdrfile_open(file_name, "r");
+	if (xd == NULL) {
+		Py_DECREF(offsets);
+		Py_DECREF(coords);
+		ERROR_RETURN("xdrfile_open failure");
+	}
+
+	rvec *crds = (rvec *)PyArray_DATA((PyArrayObject *)coords);
+	int status = exdrOK;
+	Py_BEGIN_ALLOW_THREADS
+	int step;
+	float time, precision, lambda;
+	matrix box;
+	for (npy_intp f = 0; f < num_frames && status == exdrOK; ++f) {
+		if (xdrfile_seek(xd, frame_offsets[f], SEEK_SET) != 0)
+			status = exdrENDOFFILE;
+		else if (is_xtc)
+			status = read_xtc(xd, num_atoms, &step, &time, box, crds + f * num_atoms, &precision);
+		else
+			status = read_trr(xd, num_atoms, &step, &time, &lambda, box, crds + f * num_atoms,
+					  NULL, NULL);
+	}
+	Py_END_ALLOW_THREADS
+	xdrfile_close(xd);
+	Py_DECREF(offsets);
+	if (status != exdrOK) {
+		Py_DECREF(coords);
+		if (is_xtc) {
+			ERROR_RETURN3("read_%s failure; return code %d", "xtc", status);
+		} else {
+			ERROR_RETURN3("read_%s failure; return code %d", "trr", status);
+		}
+	}
+
+	return coords;
+}
+
+static PyObject *
+indexXtcFile(PyObject *, PyObject *args)
+{
+	return index_traj_file(args, true);
+}
+
+static PyObject *
+indexTrrFile(PyObject *, PyObject *args)
+{
+	return index_traj_file(args, false);
+}
+
+static PyObject *
+readXtcFrames(PyObject *, PyObject *args)
+{
+	return read_traj_frames(args, true);
+}
+
+static PyObject *
+readTrrFrames(PyObject *, PyObject *args)
+{
+	return read_traj_frames(args, false);
+}
 
 static PyMethodDef Methods[] =
 {
 	{PY_STUPID "read_xtc_file", readXtcFile, METH_VARARGS, NULL},
 	{PY_STUPID "read_trr_file", readTrrFile, METH_VARARGS, NULL},
+	{PY_STUPID "index_xtc_file", indexXtcFile, METH_VARARGS, NULL},
+	{PY_STUPID "index_trr_file", indexTrrFile, METH_VARARGS, NULL},
+	{PY_STUPID "read_xtc_frames", readXtcFrames, METH_VARARGS, NULL},
+	{PY_STUPID "read_trr_frames", readTrrFrames, METH_VARARGS, NULL},
 	{nullptr, nullptr, 0, nullptr}
 };
 
@@ -28,6 +28,12 @@ class _MDCrdsBundleAPI(BundleAPI):
     
     from chimerax.atomic import StructureArg
 
+    @staticmethod
+    def get_class(class_name):
+        if class_name == 'TrajectoryFrames':
+            from .lazy_coords import TrajectoryFrames
+            return TrajectoryFrames
+
     @staticmethod
     def run_provider(session, name, mgr):
         if mgr == session.open_command:
@@ -64,7 +70,8 @@ class _MDCrdsBundleAPI(BundleAPI):
             else:
                 class MDInfo(OpenerInfo):
                     def open(self, session, data, file_name, *, structure_model=None,
-                            md_type=name, replace=True, slider=True, start=1, step=1, end=None, **kw):
+                            md_type=name, replace=True, slider=True, start=1, step=1, end=None,
+                            lazy=False, cache_frames=100, compact=None, **kw):
                         if structure_model is None:
                             from chimerax.core.errors import UserError, CancelOperation
                             from chimerax.atomic import Structure
@@ -111,9 +118,12 @@ class _MDCrdsBundleAPI(BundleAPI):
                                 else:
                                     raise UserError("Must specify an atomic model to read the coordinates"
                                         " into")
+                        if compact is not None:
+                            structure_model.compact_coordsets = compact
                         from .read_coords import read_coords
                         num_coords = read_coords(session, data, structure_model, md_type,
-                            replace=replace, start=start, step=step, end=end)
+                            replace=replace, start=start, step=step, end=end, lazy=lazy,
+                            cache_frames=cache_frames)
                         if slider and session.ui.is_gui:
                             from chimerax.std_commands.coordset import coordset_slider
                             coordset_slider(session, [structure_model])
@@ -127,7 +137,10 @@ class _MDCrdsBundleAPI(BundleAPI):
                         from chimerax.atomic import StructureArg
                         from chimerax.core.commands import BoolArg, PositiveIntArg
                         return {
+                            'cache_frames': PositiveIntArg,
+                            'compact': BoolArg,
                             'end': PositiveIntArg,
+                            'lazy': BoolArg,
                             'replace': BoolArg,
                             'slider': BoolArg,
                             'start': PositiveIntArg,
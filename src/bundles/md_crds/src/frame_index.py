@@ -0,0 +1,96 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# File offsets of the frames of Gromacs xtc and trr trajectories.  Finding them
+# requires scanning the whole file, so they are saved in a small index file next
+# to the trajectory (or in the user cache directory if the trajectory directory
+# is not writable) and reused while the trajectory size and modification time
+# are unchanged.
+
+def frame_offsets(session, path, format_name):
+    '''Return the number of atoms and an int64 array of the file offsets of each frame.'''
+    from os.path import getsize, getmtime
+    size, mtime = getsize(path), getmtime(path)
+    index_paths = _index_paths(path)
+    for index_path in index_paths:
+        index = _read_index(index_path, size, mtime)
+        if index is not None:
+            return index
+
+    if format_name == "xtc":
+        from ._gromacs import index_xtc_file as index_file
+    else:
+        from ._gromacs import index_trr_file as index_file
+    session.logger.status("Indexing Gromacs %s frames" % format_name, blank_after=0)
+    num_atoms, offsets = index_file(path)
+    session.logger.status("Finished indexing Gromacs %s frames" % format_name)
+    for index_path in index_paths:
+        if _write_index(index_path, num_atoms, offsets, size, mtime):
+            break
+    return num_atoms, offsets
+
+def _index_paths(path):
+    from os.path import abspath, dirname, basename, join
+    path = abspath(path)
+    paths = [join(dirname(path), '.%s.frames.npz' % basename(path))]
+    try:
+        from chimerax import app_dirs
+    except ImportError:
+        return paths
+    import hashlib
+    key = hashlib.sha1(path.encode('utf-8')).hexdigest()
+    paths.append(join(app_dirs.user_cache_dir, 'trajectory_frames', key + '.npz'))
+    return paths
+
+def _read_index(index_path, size, mtime):
+    from os.path import isfile
+    if not isfile(index_path):
+        return None
+    import numpy
+    try:
+        with numpy.load(index_path) as f:
+            if int(f['size']) != size or float(f['mtime']) != mtime:
+                return None
+            return int(f['num_atoms']), f['offsets']
+    except Exception:
+        return None	# Partial or corrupt file
+
+def _write_index(index_path, num_atoms, offsets, size, mtime):
+    import os, numpy
+    # Write to a temporary file and rename so concurrent opens
+    # never read a partially written index.
+    tpath = '%s.%d.tmp' % (index_path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok = True)
+        with open(tpath, 'wb') as f:
+            numpy.savez(f, num_atoms = num_atoms, offsets = offsets, size = size, mtime = mtime)
+        os.replace(tpath, index_path)
+    except OSError:
+        if os.path.exists(tpath):
+            try:
+                os.remove(tpath)
+            except OSError:
+                pass
+        return False
+    return True
@@ -0,0 +1,169 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <https://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# Read Gromacs trajectory frames on demand so that trajectories larger than
+# memory can be played.  The offset of each frame is found from the frame index
+# (see frame_index.py), empty coordinate sets are created for all frames, and a
+# frame is read when its coordinate set is about to become active.  Only the most
+# recently used frames keep their coordinates.
+
+from chimerax.core.state import State
+from chimerax.core.errors import UserError
+
+def read_coords_lazily(session, file_name, model, format_name, *, replace=True,
+        start=1, step=1, end=None, cache_frames=100):
+    if format_name not in ("xtc", "trr"):
+        raise UserError("Reading frames on demand is only supported for Gromacs xtc and trr"
+            " trajectories, not %s" % format_name)
+    from .frame_index import frame_offsets
+    num_atoms, offsets = frame_offsets(session, file_name, format_name)
+    if model.num_atoms != num_atoms:
+        raise UserError("Specified structure has %d atoms"
+            " whereas the coordinates are for %d atoms" % (model.num_atoms, num_atoms))
+    from .read_coords import process_limit_args
+    start, step, end = process_limit_args(session, start, step, end, len(offsets))
+    offsets = offsets[start:end:step]
+    if len(offsets) == 0:
+        return 0
+
+    previous = None
+    if replace:
+        model.coordset_provider = None
+        model.remove_coordsets()
+        first_id = 1
+    else:
+        previous = model.coordset_provider
+        cs_ids = model.coordset_ids
+        first_id = int(cs_ids.max()) + 1 if len(cs_ids) > 0 else 1
+
+    frames = TrajectoryFrames(file_name, format_name, num_atoms, offsets, first_id,
+        cache_frames = cache_frames, previous = previous)
+    for cs_id in range(first_id, first_id + len(offsets)):
+        model.new_coordset(cs_id, 0)
+    model.coordset_provider = frames
+    if replace:
+        model.active_coordset_id = first_id
+    return len(offsets)
+
+class TrajectoryFrames(State):
+    '''
+    Coordinate set provider that reads trajectory frames from a Gromacs xtc or trr
+    file when they are made active.  Frames are given consecutive coordinate set ids
+    starting at first_id.  At most cache_frames frames hold coordinates, the least
+    recently used frames being emptied.  Coordinate set ids outside this file's range
+    are handed to the previous provider, if any.
+    '''
+    def __init__(self, path, format_name, num_atoms, offsets, first_id, *,
+            cache_frames=100, previous=None):
+        self.path = path
+        self.format_name = format_name
+        self.num_atoms = num_atoms
+        self.offsets = offsets
+        self.first_id = first_id
+        self.cache_frames = cache_frames
+        self.previous = previous
+        self._loaded = {}	# Coordinate set ids with coordinates, in least recently used order.
+
+    def load_coordset(self, structure, cs_id):
+        i = cs_id - self.first_id
+        if i < 0 or i >= len(self.offsets):
+            if self.previous is not None:
+                self.previous.load_coordset(structure, cs_id)
+            return
+        if cs_id in self._loaded:
+            del self._loaded[cs_id]
+            self._loaded[cs_id] = True
+            return
+        xyz = self.read_frames(self.offsets[i:i+1])[0]
+        structure.add_coordset(cs_id, xyz)
+        self._loaded[cs_id] = True
+        self._evict(structure, keep = (cs_id, structure._active_coordset_id))
+
+    def load_all_coordsets(self, structure):
+        '''Read all frames that do not have coordinates, for instance before combining
+        structures which merges their coordinate sets.'''
+        for i in range(len(self.offsets)):
+            cs_id = self.first_id + i
+            if cs_id not in self._loaded:
+                xyz = self.read_frames(self.offsets[i:i+1])[0]
+                structure.add_coordset(cs_id, xyz)
+                self._loaded[cs_id] = True
+        if self.previous is not None:
+            self.previous.load_all_coordsets(structure)
+
+    def copy(self):
+        '''Return a provider for a copy of the structure.  The copied structure has
+        coordinates for the same frames as this one.'''
+        previous = None if self.previous is None else self.previous.copy()
+        frames = TrajectoryFrames(self.path, self.format_name, self.num_atoms, self.offsets,
+            self.first_id, cache_frames = self.cache_frames, previous = previous)
+        frames._loaded = self._loaded.copy()
+        return frames
+
+    def read_frames(self, offsets):
+        '''Return float32 coordinates in Angstroms for frames at the given file offsets.'''
+        from os.path import isfile
+        if not isfile(self.path):
+            raise UserError("Trajectory file %s used for reading frames on demand"
+                " no longer exists" % self.path)
+        if self.format_name == "xtc":
+            from ._gromacs import read_xtc_frames as read_frames
+        else:
+            from ._gromacs import read_trr_frames as read_frames
+        xyz = read_frames(self.path, self.num_atoms, offsets)
+        xyz *= 10.0
+        return xyz
+
+    def _evict(self, structure, keep):
+        if len(self._loaded) <= self.cache_frames:
+            return
+        for cs_id in tuple(self._loaded.keys()):
+            if cs_id in keep:
+                continue
+            structure.new_coordset(cs_id, 0)
+            del self._loaded[cs_id]
+            if len(self._loaded) <= self.cache_frames:
+                break
+
+    def take_snapshot(self, session, flags):
+        return {
+            'path': self.path,
+            'format_name': self.format_name,
+            'num_atoms': self.num_atoms,
+            'offsets': self.offsets,
+            'first_id': self.first_id,
+            'cache_frames': self.cache_frames,
+            'previous': self.previous,
+            'loaded': list(self._loaded.keys()),
+            'version': 1
+        }
+
+    @staticmethod
+    def restore_snapshot(session, data):
+        frames = TrajectoryFrames(data['path'], data['format_name'], data['num_atoms'],
+            data['offsets'], data['first_id'], cache_frames = data['cache_frames'],
+            previous = data['previous'])
+        for cs_id in data['loaded']:
+            frames._loaded[cs_id] = True
+        return frames
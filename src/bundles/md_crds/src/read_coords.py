@@ -24,22 +24,38 @@
 
 from chimerax.core.errors import UserError
 
-def read_coords(session, file_name, model, format_name, *, replace=True, start=1, step=1, end=None):
-    from numpy import array, float64
-    if format_name == "xtc":
-        from ._gromacs import read_xtc_file
-        session.logger.status("Reading Gromacs xtc coordinates", blank_after=0)
-        num_atoms, coords_list = read_xtc_file(file_name)
-        coords = array(coords_list, dtype=float64)
-        coords *= 10.0
-        session.logger.status("Finished reading Gromacs xtc coordinates")
-    elif format_name == "trr":
-        from ._gromacs import read_trr_file
-        session.logger.status("Reading Gromacs trr coordinates", blank_after=0)
-        num_atoms, coords_list = read_trr_file(file_name)
-        coords = array(coords_list, dtype=float64)
+def read_coords(session, file_name, model, format_name, *, replace=True, start=1, step=1, end=None,
+        lazy=False, cache_frames=100):
+    if lazy:
+        from .lazy_coords import read_coords_lazily
+        return read_coords_lazily(session, file_name, model, format_name, replace=replace,
+            start=start, step=step, end=end, cache_frames=cache_frames)
+    if replace:
+        # Frames previously read on demand are being replaced.
+        model.coordset_provider = None
+    # Single precision, as stored in the files, avoids a double precision copy of the
+    # whole trajectory; the structure converts frames as it stores them.
+    from numpy import array, float32
+    if format_name in ("xtc", "trr"):
+        from .frame_index import frame_offsets
+        num_atoms, offsets = frame_offsets(session, file_name, format_name)
+        if model.num_atoms != num_atoms:
+            raise UserError("Specified structure has %d atoms"
+                " whereas the coordinates are for %d atoms" % (model.num_atoms, num_atoms))
+        if len(offsets) == 0:
+            raise UserError("No frames found in Gromacs %s file %s" % (format_name, file_name))
+        start, step, end = process_limit_args(session, start, step, end, len(offsets))
+        if format_name == "xtc":
+            from ._gromacs import read_xtc_frames as read_frames
+        else:
+            from ._gromacs import read_trr_frames as read_frames
+        # Seek directly to the requested frames rather than decoding all of them.
+        session.logger.status("Reading Gromacs %s coordinates" % format_name, blank_after=0)
+        coords = read_frames(file_name, num_atoms, offsets[start:end:step])
         coords *= 10.0
-        session.logger.status("Finished reading Gromacs trr coordinates")
+        session.logger.status("Finished reading Gromacs %s coordinates" % format_name)
+        model.add_coordsets(coords, replace=replace)
+        return len(coords)
     elif format_name == "dcd":
         from .dcd.MDToolsMarch97.md_DCD import DCD
         session.logger.status("Reading DCD coordinates", blank_after=0)
@@ -52,7 +68,7 @@ def read_coords(session, file_name, model, format_name, *, replace=True, start=1
         ds = Dataset(file_name, "r")
         try:
             # netCDF4 has a builtin __array__ that doesn't allow a second argumeht...
-            coords = array(array(ds.variables['coordinates']), dtype=float64)
+            coords = array(array(ds.variables['coordinates']), dtype=float32)
         except KeyError:
             raise UserError("File is not an Amber netCDF coordinates file (no coordinates found)")
         num_atoms = len(coords[0])
@@ -91,10 +107,10 @@ def _set_model_dcd_coordinates(session, model, dcd, replace, start, step, end):
         base = 1
     else:
         base = max(model.coordset_ids) + 1
-    from numpy import asarray, float64
+    from numpy import asarray, float32
     num_frames = 0
     for i in range(start, end, step):
-        model.add_coordset(base+num_frames, asarray(dcd[i], float64, order = 'C'))
+        model.add_coordset(base+num_frames, asarray(dcd[i], float32, order = 'C'))
         num_frames += 1
     model.active_coordset_id = base
     return num_frames
@@ -15,3 +15,124 @@ def test_md_crds(test_production_session, test_pdb, test_crd_file, expected_coor
     run(session, "open %s" % test_pdb)
     run(session, "open %s structureModel #1" % test_crd_file)
     assert(session.models[0].num_coordsets == expected_coordsets), "Expected %i coordinate sets; actually produced %s" % (expected_coordsets, session.models[0].num_coordsets)
+
+def test_md_crds_lazy(test_production_session):
+    session = test_production_session
+    from chimerax.core.commands import run
+    run(session, "open %s" % test_pdb_1)
+    run(session, "open %s" % test_pdb_1)
+    run(session, "open %s structureModel #1" % test_xtc)
+    run(session, "open %s structureModel #2 lazy true cacheFrames 5" % test_xtc)
+    full, lazy = session.models[0], session.models[1]
+    assert lazy.num_coordsets == 21
+    for cs_id in [1, 21, 7, 8, 2, 21]:
+        full.active_coordset_id = lazy.active_coordset_id = cs_id
+        assert (abs(full.atoms.coords - lazy.atoms.coords).max() < 1e-5)
+
+def test_md_crds_compact(test_production_session):
+    session = test_production_session
+    from chimerax.core.commands import run
+    run(session, "open %s" % test_pdb_1)
+    run(session, "open %s" % test_pdb_1)
+    run(session, "open %s structureModel #1" % test_xtc)
+    run(session, "open %s structureModel #2 compact true" % test_xtc)
+    full, compact = session.models[0], session.models[1]
+    assert compact.compact_coordsets
+    assert compact.num_coordsets == 21
+    for cs_id in [1, 21, 7, 8, 2]:
+        full.active_coordset_id = compact.active_coordset_id = cs_id
+        assert (abs(full.atoms.coords - compact.atoms.coords).max() < 1e-4)
+        assert (abs(full.coordset(21).xyzs - compact.coordset(21).xyzs).max() < 1e-4)
+    # Reads of single coordinates and copies of compacted coordinate sets.
+    a_full, a_compact = full.atoms[5], compact.atoms[5]
+    for cs_id in [3, 21]:
+        assert (abs(a_full.get_coordset_coord(cs_id) - a_compact.get_coordset_coord(cs_id)).max() < 1e-4)
+    copy = compact.copy()
+    assert copy.compact_coordsets
+    for cs_id in [1, 2, 21]:
+        assert (abs(full.coordset(cs_id).xyzs - copy.coordset(cs_id).xyzs).max() < 1e-4)
+
+def test_md_crds_compact_replace_active(test_production_session):
+    # Replacing the active coordinate set of a compact structure must not
+    # compact the replaced (deleted) set.
+    session = test_production_session
+    from chimerax.core.commands import run
+    s = run(session, "open %s" % test_pdb_1)[0]
+    run(session, "open %s structureModel #1 compact true" % test_xtc)
+    s.active_coordset_id = 4
+    xyz = s.coordset(9).xyzs
+    s.add_coordset(s.active_coordset_id, xyz)
+    assert s.active_coordset_id == 4
+    assert (abs(s.atoms.coords - xyz).max() < 1e-4)
+    s.active_coordset_id = 5
+    assert (abs(s.coordset(4).xyzs - xyz).max() < 1e-4)
+    s.new_coordset(s.active_coordset_id, s.num_atoms)
+    assert s.active_coordset_id == 5
+    assert s.num_coordsets == 21
+
+def test_md_crds_subset(test_production_session, tmp_path):
+    session = test_production_session
+    import shutil
+    xtc = str(tmp_path / "chimera_test.xtc")
+    shutil.copyfile(test_xtc, xtc)
+    from chimerax.core.commands import run
+    run(session, "open %s" % test_pdb_1)
+    run(session, "open %s" % test_pdb_1)
+    run(session, "open %s structureModel #1" % xtc)
+    # The second open uses the frame index saved by the first.
+    run(session, "open %s structureModel #2 start 3 step 4" % xtc)
+    assert (tmp_path / ".chimera_test.xtc.frames.npz").exists()
+    full, subset = session.models[0], session.models[1]
+    assert subset.num_coordsets == 5
+    for i, cs_id in enumerate(subset.coordset_ids):
+        assert (abs(full.coordset(3 + 4*i).xyzs - subset.coordset(cs_id).xyzs).max() < 1e-5)
+
+def test_md_crds_lazy_copy(test_production_session):
+    session = test_production_session
+    from chimerax.core.commands import run
+    full = run(session, "open %s" % test_pdb_1)[0]
+    lazy = run(session, "open %s" % test_pdb_1)[0]
+    run(session, "open %s structureModel #1" % test_xtc)
+    run(session, "open %s structureModel #2 lazy true cacheFrames 5" % test_xtc)
+    lazy.active_coordset_id = 7
+    copy = lazy.copy()
+    assert copy.num_coordsets == 21
+    # Inactive frames read on demand have coordinates when accessed directly.
+    for cs_id in [1, 7, 12, 21]:
+        assert (abs(full.coordset(cs_id).xyzs - lazy.coordset(cs_id).xyzs).max() < 1e-5)
+        assert (abs(full.coordset(cs_id).xyzs - copy.coordset(cs_id).xyzs).max() < 1e-5)
+    for cs_id in [3, 21, 9]:
+        full.active_coordset_id = copy.active_coordset_id = cs_id
+        assert (abs(full.atoms.coords - copy.atoms.coords).max() < 1e-5)
+    # Combining merges all coordinate sets so all frames are read.
+    run(session, "combine #2,3")
+    combo = session.models[-1]
+    assert combo.num_coordsets == 21
+    assert combo.coordset_provider is None
+    n = full.num_atoms
+    for cs_id in [1, 12, 21]:
+        xyz = combo.coordset(cs_id).xyzs
+        assert len(xyz) == 2*n
+        assert (abs(full.coordset(cs_id).xyzs - xyz[:n]).max() < 1e-5)
+
+def test_md_crds_lazy_combine_active(test_production_session):
+    session = test_production_session
+    from chimerax.core.commands import run
+    full = run(session, "open %s" % test_pdb_1)[0]
+    lazy = run(session, "open %s" % test_pdb_1)[0]
+    single = run(session, "open %s" % test_pdb_1)[0]
+    run(session, "open %s structureModel #1" % test_xtc)
+    run(session, "open %s structureModel #2 lazy true cacheFrames 5" % test_xtc)
+    full.active_coordset_id = 9
+    # Make a frame that was never read active without reading it.
+    lazy._active_coordset_id = 9
+    assert len(lazy.active_coordset.xyzs) == 0
+    # Coordinate set counts differ so only the active coordinate sets are merged.
+    lazy.combine(single, {"A": "B"}, lazy.scene_position)
+    assert lazy.coordset_provider is None
+    assert lazy.num_coordsets == 1
+    n = full.num_atoms
+    xyz = lazy.atoms.coords
+    assert len(xyz) == 2*n
+    assert (abs(full.atoms.coords - xyz[:n]).max() < 1e-5)
+    assert (abs(single.atoms.coords - xyz[n:]).max() < 1e-5)
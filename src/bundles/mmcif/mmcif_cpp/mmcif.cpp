@@ -752,7 +752,7 @@ ExtractMolecule::finished_parse()
         if (coordsets && mol->coord_sets().size() > 1) {
             CoordSet *acs = mol->active_coord_set();
             const CoordSet *prev_cs = mol->find_coord_set(acs->id() - 1);
-            if (prev_cs != nullptr && acs->coords().size() < prev_cs->coords().size())
+            if (prev_cs != nullptr && acs->num_coords() < prev_cs->num_coords())
                 acs->fill(prev_cs);
         }
 
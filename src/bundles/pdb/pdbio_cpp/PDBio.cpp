@@ -755,7 +755,7 @@ start_t = end_t;
                 // trajectories if necessary
                 CoordSet *acs = as->active_coord_set();
                 const CoordSet *prev_cs = as->find_coord_set(acs->id()-1);
-                if (prev_cs != nullptr && acs->coords().size() < prev_cs->coords().size())
+                if (prev_cs != nullptr && acs->num_coords() < prev_cs->num_coords())
                     acs->fill(prev_cs);
             }
             break;
@@ -1926,10 +1926,12 @@ write_coord_set(StreamDispatcher& os, const Structure* s, const CoordSet* cs,
                 *rec_serial = ++serial;
                 rev_asn[a] = *rec_serial;
                 const Coord* crd;
+                Coord cs_crd;
                 float bfactor, occupancy;
                 if (alt_loc == ' ') {
                     // no alt locs
-                    crd = &a->coord(cs);
+                    cs_crd = a->coord(cs);
+                    crd = &cs_crd;
                     bfactor = cs->get_bfactor(a);
                     occupancy = cs->get_occupancy(a);
                 } else {
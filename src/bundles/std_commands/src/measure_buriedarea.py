@@ -23,7 +23,8 @@
 # === UCSF ChimeraX Copyright ===
 
 def measure_buriedarea(session, atoms1, with_atoms2 = None, probe_radius = 1.4,
-                       list_residues = False, cutoff_area = 1, color = None, select = False):
+                       list_residues = False, cutoff_area = 1, color = None, select = False,
+                       method = 'standard'):
     '''
     Compute buried solvent accessible surface (SAS) area between two sets of atoms.
     This is the sum of the SAS area of each set of atoms minus the SAS area of the
@@ -48,6 +49,9 @@ def measure_buriedarea(session, atoms1, with_atoms2 = None, probe_radius = 1.4,
       Color contacting residues.
     select : bool
       Whether to select contacting residues.
+    method : "standard" or "batch"
+      Compute each atom area in turn (standard) or the same areas in
+      parallel threads (batch).
     '''
     atoms2 = with_atoms2
     ni = len(atoms1.intersect(atoms2))
@@ -57,7 +61,7 @@ def measure_buriedarea(session, atoms1, with_atoms2 = None, probe_radius = 1.4,
                         % (ni, atoms1.spec, atoms2.spec))
 
     from chimerax.atomic import buried_area
-    ba, a1a, a2a, a12a = buried_area(atoms1, atoms2, probe_radius)
+    ba, a1a, a2a, a12a = buried_area(atoms1, atoms2, probe_radius, method = method)
 
     # Report result
     msg = 'Buried area between %s and %s = %.5g' % (atoms1.spec, atoms2.spec, ba)
@@ -90,8 +94,9 @@ def measure_buriedarea(session, atoms1, with_atoms2 = None, probe_radius = 1.4,
             log.info('%d contacting residues\n%s' % (len(res1) + len(res2), '\n'.join(lines)))
             
 def register_command(logger):
-    from chimerax.core.commands import CmdDesc, register, FloatArg, BoolArg, ColorArg
+    from chimerax.core.commands import CmdDesc, register, FloatArg, BoolArg, ColorArg, EnumOf
     from chimerax.atomic import AtomsArg
+    from chimerax.surface.sasa import sasa_methods
     desc = CmdDesc(
         required = [('atoms1', AtomsArg)],
         keyword = [('with_atoms2', AtomsArg),
@@ -99,7 +104,8 @@ def register_command(logger):
                    ('list_residues', BoolArg),
                    ('cutoff_area', FloatArg),
                    ('color', ColorArg),
-                   ('select', BoolArg),],
+                   ('select', BoolArg),
+                   ('method', EnumOf(sasa_methods)),],
         required_arguments = ['with_atoms2'],
         synopsis = 'compute buried area')
     register('measure buriedarea', desc, measure_buriedarea, logger=logger)
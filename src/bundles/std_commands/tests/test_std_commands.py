@@ -71,6 +71,7 @@ measure_test_commands = [
     *open_2tpk,
      "debug expectfail measure buriedarea #1 with #1",
     "measure buriedarea #1:1-18 with #1:19-36",
+    "measure buriedarea #1:1-18 with #1:19-36 method batch",
     "surface",
     "measure convexity #1",
     "measure length #1",
@@ -28,7 +28,10 @@
 
 #include <math.h>		// use M_PI, sqrt, cos, atan2, ...
 
+#include <algorithm>		// use std::sort, std::lower_bound, std::min
+#include <atomic>		// use std::atomic
 #include <iostream>		// use std::cerr for debugging
+#include <thread>		// use std::thread
 #include <vector>		// use std::vector
 
 #include <arrays/pythonarray.h>	// use parse_double_n3_array, ...
@@ -111,7 +114,32 @@ public:
   Index_List in_region, near_region;
 };
 
+// Cells of size equal to the largest sphere diameter.  Spheres that intersect
+// a sphere have centers in the same cell or one of the 26 neighbor cells.
+// Only occupied cells are kept, as a sorted list of cell keys.
+class Sphere_Grid
+{
+public:
+  Sphere_Grid(const double *centers, int n, const double *radii);
+  void nearby_spheres(int i, Index_List &near) const;
+  const Index_List &sphere_order() const { return order; }
+private:
+  long long cell_key(long long i, long long j, long long k) const
+    { return (i*gsize[1] + j)*gsize[2] + k; }
+  void cell_index(int i, long long ijk[3]) const;
+
+  const double *centers;
+  double xmin[3], cell_size;
+  long long gsize[3];
+  std::vector<long long> keys;	// Sorted cell keys of spheres.
+  Index_List order;		// Spheres in cell key order.
+};
+
 static int surface_area_of_spheres(double *centers, int n, double *radii, double *areas);
+static void batch_surface_area_of_spheres(double *centers, int n, double *radii, double *areas,
+					 int num_threads);
+static void batch_sphere_areas(const Sphere_Grid &grid, double *centers, double *radii,
+			      double *areas, std::atomic<int> *next_block, int block_size);
 static void find_sphere_regions(double *centers, int n, double *radii, unsigned int max_size,
 				std::vector<Region_Spheres> &rspheres);
 static void subdivide_region(const Region_Spheres &rs, double *centers, double *radii,
@@ -334,6 +362,134 @@ void Region_Spheres::find_nearby_spheres(const Index_List &near, double *centers
     }
 }
 
+// Same as surface_area_of_spheres() but finds intersecting spheres with a grid
+// of cells and computes the sphere areas in parallel threads.  Each thread takes
+// the next block of nearby spheres until all are done.
+static void batch_surface_area_of_spheres(double *centers, int n, double *radii, double *areas,
+					 int num_threads)
+{
+  if (n == 0)
+    return;
+  Sphere_Grid grid(centers, n, radii);
+  int block_size = 256;
+  int nblocks = (n + block_size - 1) / block_size;
+  int nt = std::min(std::max(num_threads, 1), nblocks);
+  std::atomic<int> next_block(0);
+  if (nt == 1)
+    batch_sphere_areas(grid, centers, radii, areas, &next_block, block_size);
+  else
+    {
+      std::vector<std::thread> threads;
+      for (int t = 0 ; t < nt ; ++t)
+	threads.push_back(std::thread(batch_sphere_areas, std::cref(grid), centers, radii,
+				      areas, &next_block, block_size));
+      for (auto &th: threads)
+	th.join();
+    }
+}
+
+static void batch_sphere_areas(const Sphere_Grid &grid, double *centers, double *radii,
+			      double *areas, std::atomic<int> *next_block, int block_size)
+{
+  const Index_List &order = grid.sphere_order();
+  int n = order.size();
+  Index_List near;
+  while (true)
+    {
+      int s0 = block_size * (*next_block)++;
+      if (s0 >= n)
+	break;
+      int s1 = std::min(s0 + block_size, n);
+      for (int s = s0 ; s < s1 ; ++s)
+	{
+	  int i = order[s];
+	  near.clear();
+	  grid.nearby_spheres(i, near);
+	  double ba;
+	  if (buried_sphere_area(i, near, centers, radii, &ba))
+	    {
+	      double r = radii[i];
+	      areas[i] = 4*M_PI*r*r - ba;
+	    }
+	  else
+	    areas[i] = -1;	// Calculation failed.
+	}
+    }
+}
+
+Sphere_Grid::Sphere_Grid(const double *centers, int n, const double *radii) : centers(centers)
+{
+  double rmax = 0;
+  for (int i = 0 ; i < n ; ++i)
+    if (radii[i] > rmax)
+      rmax = radii[i];
+  cell_size = (rmax > 0 ? 2*rmax : 1);
+  double xmax[3];
+  for (int a = 0 ; a < 3 ; ++a)
+    {
+      xmin[a] = xmax[a] = (n > 0 ? centers[a] : 0);
+      for (int i = 1 ; i < n ; ++i)
+	{
+	  double x = centers[3*i+a];
+	  if (x < xmin[a]) xmin[a] = x;
+	  if (x > xmax[a]) xmax[a] = x;
+	}
+    }
+  // Use larger cells if spheres are so far apart that cell keys would overflow.
+  while (true)
+    {
+      double nc = 1;
+      for (int a = 0 ; a < 3 ; ++a)
+	nc *= (xmax[a] - xmin[a]) / cell_size + 1;
+      if (nc < 1e15)
+	break;
+      cell_size *= 2;
+    }
+  for (int a = 0 ; a < 3 ; ++a)
+    gsize[a] = static_cast<long long>((xmax[a] - xmin[a]) / cell_size) + 1;
+
+  std::vector<std::pair<long long,int> > key_sphere(n);
+  for (int i = 0 ; i < n ; ++i)
+    {
+      long long ijk[3];
+      cell_index(i, ijk);
+      key_sphere[i] = std::make_pair(cell_key(ijk[0], ijk[1], ijk[2]), i);
+    }
+  std::sort(key_sphere.begin(), key_sphere.end());
+  keys.resize(n);
+  order.resize(n);
+  for (int i = 0 ; i < n ; ++i)
+    {
+      keys[i] = key_sphere[i].first;
+      order[i] = key_sphere[i].second;
+    }
+}
+
+void Sphere_Grid::cell_index(int i, long long ijk[3]) const
+{
+  for (int a = 0 ; a < 3 ; ++a)
+    {
+      long long c = static_cast<long long>((centers[3*i+a] - xmin[a]) / cell_size);
+      ijk[a] = std::min(std::max(c, 0LL), gsize[a]-1);
+    }
+}
+
+void Sphere_Grid::nearby_spheres(int i, Index_List &near) const
+{
+  long long ijk[3];
+  cell_index(i, ijk);
+  for (long long ci = std::max(ijk[0]-1, 0LL) ; ci <= std::min(ijk[0]+1, gsize[0]-1) ; ++ci)
+    for (long long cj = std::max(ijk[1]-1, 0LL) ; cj <= std::min(ijk[1]+1, gsize[1]-1) ; ++cj)
+      {
+	// Cells along the last axis have consecutive keys.
+	long long k0 = cell_key(ci, cj, std::max(ijk[2]-1, 0LL));
+	long long k1 = cell_key(ci, cj, std::min(ijk[2]+1, gsize[2]-1));
+	auto b = std::lower_bound(keys.begin(), keys.end(), k0);
+	auto e = std::upper_bound(b, keys.end(), k1);
+	near.insert(near.end(), order.begin() + (b - keys.begin()), order.begin() + (e - keys.begin()));
+      }
+}
+
 static bool buried_sphere_area(int i, const Index_List &iclose,
 			       double *centers, double *radii, double *area)
 {
@@ -830,6 +986,48 @@ extern "C" PyObject *surface_area_of_spheres(PyObject *, PyObject *args, PyObjec
   return py_areas;
 }
 
+// Python wrapper for analytic solvent accessible area calculation using threads.
+extern "C" PyObject *batch_surface_area_of_spheres(PyObject *, PyObject *args, PyObject *keywds)
+{
+  DArray centers, radii, areas;
+  int num_threads = 1;
+  const char *kwlist[] = {"centers", "radii", "areas", "num_threads", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds,
+				   const_cast<char *>("O&O&|O&i"), (char **)kwlist,
+				   parse_double_n3_array, &centers,
+				   parse_double_n_array, &radii,
+				   parse_writable_double_n_array, &areas,
+				   &num_threads))
+    return NULL;
+
+  DArray ca = centers.contiguous_array();
+  DArray ra = radii.contiguous_array();
+  bool alloc_areas = (areas.dimension() == 0);
+  if (alloc_areas)
+    parse_writable_double_n_array(python_double_array(ca.size(0)), &areas);
+  if (!areas.is_contiguous())
+    {
+      PyErr_SetString(PyExc_TypeError,
+		      "batch_surface_area_of_spheres: area array must be contiguous");
+      return NULL;
+    }
+  int n = ca.size(0);
+  if (ra.size(0) != n || areas.size(0) != n)
+    {
+      PyErr_SetString(PyExc_TypeError,
+		      "batch_surface_area_of_spheres: centers, radii and area arrays must be the same length.");
+      return NULL;
+    }
+
+  // Returned sphere area of -1 means calculation failed for that sphere.
+  Py_BEGIN_ALLOW_THREADS
+  batch_surface_area_of_spheres(ca.values(), n, ra.values(), areas.values(), num_threads);
+  Py_END_ALLOW_THREADS
+
+  PyObject *py_areas = array_python_source(areas, !alloc_areas);
+  return py_areas;
+}
+
 // Python wrapper for numerical estimate of solvent accessible area calculation.
 extern "C" PyObject *estimate_surface_area_of_spheres(PyObject *, PyObject *args, PyObject *keywds)
 {
@@ -38,6 +38,10 @@ extern "C"
 // bool surface_area_of_spheres(centers, radii, areas).  Can fail in degenerate cases returning false.
 PyObject *surface_area_of_spheres(PyObject *s, PyObject *args, PyObject *keywds);
 
+// Same as surface_area_of_spheres() using a grid to find intersecting spheres and threads.
+//   batch_surface_area_of_spheres(centers, radii, areas, num_threads)
+PyObject *batch_surface_area_of_spheres(PyObject *s, PyObject *args, PyObject *keywds);
+
 // Use points on unit sphere, count how many are inside other spheres.
 //   estimate_surface_area_of_spheres(centers, radii, sphere_points, point_weights, areas)
 PyObject *estimate_surface_area_of_spheres(PyObject *s, PyObject *args, PyObject *keywds);
@@ -329,6 +329,22 @@ Implemented in C++.
 )"
   },
 
+// ----------------------------------------------------------------------------    
+  {const_cast<char*>("batch_surface_area_of_spheres"),
+   (PyCFunction)batch_surface_area_of_spheres,
+   METH_VARARGS|METH_KEYWORDS,
+R"(
+batch_surface_area_of_spheres(centers, radii, areas, num_threads)
+
+Compute surface area of union of solid sphere as surface_area_of_spheres()
+does, finding intersecting spheres using a grid of cells and computing
+sphere areas in num_threads threads.
+Third argument areas contains areas contributed by each sphere
+Can fail in degenerate cases giving area -1 for spheres with failed area calculation.
+Implemented in C++.
+)"
+  },
+
 // ----------------------------------------------------------------------------    
   {const_cast<char*>("estimate_surface_area_of_spheres"),
    (PyCFunction)estimate_surface_area_of_spheres,
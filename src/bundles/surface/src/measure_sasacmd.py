@@ -23,7 +23,7 @@
 # === UCSF ChimeraX Copyright ===
 
 def measure_sasa(session, atoms = None, probe_radius = 1.4, sum = None,
-                 set_attribute = True):
+                 set_attribute = True, method = 'standard'):
     '''
     Compute solvent accessible surface area.
 
@@ -37,13 +37,16 @@ def measure_sasa(session, atoms = None, probe_radius = 1.4, sum = None,
       Sum the accessible areas per atom only over these atoms.
     set_attribute : bool
       Whether to set atom.area and residue.area values.
+    method : "standard" or "batch"
+      Compute each atom area in turn (standard) or the same areas in
+      parallel threads (batch).
     '''
     from .surfacecmds import check_atoms
     atoms = check_atoms(atoms, session)
     r = atoms.radii
     r += probe_radius
     from . import spheres_surface_area
-    areas = spheres_surface_area(atoms.scene_coords, r)
+    areas = spheres_surface_area(atoms.scene_coords, r, method = method)
 
     # Set area atom and residue attributes
     if set_attribute:
@@ -80,12 +83,14 @@ def set_area_attributes(atoms, areas):
         Residue.register_attr(session, "area", "Measure SASA", attr_type=float)
     
 def register_command(logger):
-    from chimerax.core.commands import CmdDesc, register, FloatArg, BoolArg
+    from chimerax.core.commands import CmdDesc, register, FloatArg, BoolArg, EnumOf
     from chimerax.atomic import AtomsArg
+    from .sasa import sasa_methods
     _sasa_desc = CmdDesc(
         optional = [('atoms', AtomsArg)],
         keyword = [('probe_radius', FloatArg),
                    ('sum', AtomsArg),
-                   ('set_attribute', BoolArg)],
+                   ('set_attribute', BoolArg),
+                   ('method', EnumOf(sasa_methods))],
         synopsis = 'compute solvent accessible surface area')
     register('measure sasa', _sasa_desc, measure_sasa, logger=logger)
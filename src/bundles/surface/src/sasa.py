@@ -478,21 +478,46 @@ def unit_sphere():
     radius = 1
     return (center, radius)
 
-def spheres_surface_area(centers, radii, npoints = 1000):
+def spheres_surface_area(centers, radii, npoints = 1000, method = 'standard'):
     '''
     Return the exposed surface area of a set of possibly intersecting set of spheres.
     An array giving the exposed area for each input sphere is returned.
     The area is computed by an exact method except for round-off errors.
     The calculation can fail in rare cases where 4 spheres intersect at a point
     and area values of -1 are returned for spheres where the calculation fails.
+    The method can be "standard" which computes each sphere area in turn in C++,
+    or "batch" which computes the same areas in parallel threads
+    (see batch_surface_area_of_spheres()).
     TODO: The code also computes the areas using numerical approximation, and the
     results compared with the maximum and average discrepancy printed for debugging.
     This code is not needed except for debugging.
     '''
+    if method == 'batch':
+        return batch_surface_area_of_spheres(centers, radii)
+    elif method != 'standard':
+        raise ValueError('Unknown sphere surface area method "%s"' % method)
     from . import _surface
     areas = _surface.surface_area_of_spheres(centers, radii)
     return areas
 
+sasa_methods = ('standard', 'batch')
+
+def batch_surface_area_of_spheres(centers, radii, nthread = None):
+    '''
+    Same exposed sphere areas as the standard method, computed in C++ using
+    a grid of cells to find intersecting spheres and nthread threads,
+    default all cores.
+    '''
+    if nthread is None:
+        from os import cpu_count
+        nthread = cpu_count() or 1
+    from numpy import array, float64
+    centers = array(centers, float64).reshape((-1,3))
+    radii = array(radii, float64).reshape((-1,))
+    from . import _surface
+    areas = _surface.batch_surface_area_of_spheres(centers, radii, num_threads = nthread)
+    return areas
+
 def report_sphere_area_errors(areas, centers, radii, npoints = 1000, max_err = 0.02):
     points, weights = sphere_points_and_weights(npoints)
     from ._surface import estimate_surface_area_of_spheres
@@ -0,0 +1,44 @@
+from chimerax.surface.sasa import spheres_surface_area, batch_surface_area_of_spheres
+
+def _random_spheres(n, seed = 3):
+    '''Overlapping spheres with about the atom density of a protein.'''
+    from numpy import random
+    r = random.default_rng(seed)
+    size = (20*n) ** (1/3)
+    centers = r.uniform(0, size, (n,3))
+    radii = r.uniform(1.5, 1.9, n) + 0.5
+    return centers, radii
+
+def test_batch_sasa_matches_standard():
+    from numpy import allclose, array_equal, pi
+    for n in (1, 50, 3000):
+        centers, radii = _random_spheres(n)
+        areas = spheres_surface_area(centers, radii, method = 'standard')
+        for nthread in (1, 3):
+            bareas = batch_surface_area_of_spheres(centers, radii, nthread = nthread)
+            assert allclose(bareas, areas, rtol = 0, atol = 1e-8)
+        assert array_equal(spheres_surface_area(centers, radii, method = 'batch'), bareas)
+    # Spheres where the calculation fails (area -1) are the same for both methods.
+    assert (areas == 0).sum() > 10 and (areas < 0).sum() < 0.01 * len(areas)
+    assert allclose(spheres_surface_area(centers[:1], radii[:1], method = 'batch'),
+                    4*pi*radii[:1]**2)
+
+def test_batch_sasa_special_cases():
+    from numpy import array, zeros, float64, allclose, pi
+    assert len(spheres_surface_area(zeros((0,3)), zeros((0,)), method = 'batch')) == 0
+    # Identical spheres, a sphere inside another, and spheres far apart.
+    centers = array(((0,0,0), (0,0,0), (0.5,0,0), (1e9,0,0), (-1e9,5,0)), float64)
+    radii = array((1, 1, 0.2, 2, 0), float64)
+    areas = spheres_surface_area(centers, radii, method = 'batch')
+    assert allclose(areas, (4*pi, 0, 0, 16*pi, 0))
+    assert allclose(areas, spheres_surface_area(centers, radii, method = 'standard'))
+
+def test_measure_sasa_batch(test_production_session):
+    from chimerax.core.commands import run
+    from numpy import allclose
+    session = test_production_session
+    s = run(session, "open 2tpk")[0]
+    run(session, "measure sasa #1")
+    areas = [a.area for a in s.atoms]
+    run(session, "measure sasa #1 method batch")
+    assert allclose([a.area for a in s.atoms], areas)